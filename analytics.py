@@ -1,18 +1,203 @@
+import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import matplotlib.dates as mdates
 import seaborn as sns
+from downsample import lttb
+from interactive_charts import PieHoverChart, HistoryChart
+from async_spotify import chunks, AUDIO_FEATURES_BATCH, ARTISTS_BATCH
+from report_engine import build_dataset, WEEKDAYS
+from artist_info import ArtistInfo
+from memory_budget import memory_budget
+from track_model import tracks_from_spotify, track_columns
+
+# Audio features shown in the features chart
+CHART_FEATURES = ["danceability", "energy", "valence", "tempo", "acousticness", "instrumentalness"]
+
+# Rollup levels from finest to coarsest, with their bucket length in days and pandas frequency
+ROLLUP_LEVELS = [("day", 1, "D"), ("week", 7, "W-MON"), ("month", 30, "MS")]
+MAX_BARS = 90  # Above this many points the history is drawn as a line instead of bars
+RADAR_FEATURES = ['danceability', 'energy', 'valence', 'acousticness', 'instrumentalness']
+EXPORT_CHARTS = ("genres", "features", "listening")
+EXPORT_MAX_POINTS = 800  # History points in exported images
+# Analytics tabs drawn from library-scale reports computed by ReportEngine
+REPORT_CHARTS = {'hours': "listening_heatmap", 'moods': "mood_clusters"}
+
+def choose_rollup_level(start, end, max_points):
+    """Pick the finest rollup level that fits a date range into max_points buckets"""
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+    for level, bucket_days, _ in ROLLUP_LEVELS:
+        if days / bucket_days <= max_points:
+            return level
+    return ROLLUP_LEVELS[-1][0]
+
+def chart_max_points(figsize=(8, 6)):
+    """History points that fit across the axes of a chart figure (one per pixel)"""
+    from matplotlib.figure import Figure
+    return max(50, int(Figure(figsize=figsize).add_subplot().get_window_extent().width))
+
+def new_figure(figsize=(8, 6), polar=False):
+    """(figure, axes) that pyplot doesn't keep a reference to, so an embedded chart is freed with its widget"""
+    from matplotlib.figure import Figure
+    fig = memory_budget.track("figures", Figure(figsize=figsize))
+    return fig, fig.add_subplot(polar=polar)
+
+def embed_figure(fig, frame):
+    """Tk canvas for a figure; tkinter is only imported once a chart is actually embedded"""
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    return FigureCanvasTkAgg(fig, master=frame)
+
+def plot_genre_pie(ax, top_genres):
+    """Draw genre shares as a pie; returns the wedges"""
+    wedges, _, _ = ax.pie(top_genres.values(), labels=top_genres.keys(), autopct='%1.1f%%')
+    ax.set_title('Your Top Genres')
+    return wedges
+
+def plot_feature_radar(ax, df):
+    """Draw the average audio features as a closed radar line on a polar axes"""
+    avg_features = df[RADAR_FEATURES].mean()
+    
+    categories = list(avg_features.index)
+    values = list(avg_features.values)
+    
+    # Add the first value at the end to close the circle
+    values.append(values[0])
+    categories.append(categories[0])
+    
+    # Calculate angle for each category (the closing copy reuses the first angle)
+    angles = np.linspace(0, 2*np.pi, len(categories) - 1, endpoint=False).tolist()
+    angles.append(angles[0])
+    
+    ax.plot(angles, values, linewidth=2)
+    ax.fill(angles, values, alpha=0.25)
+    ax.set_thetagrids(np.degrees(angles[:-1]), categories[:-1])
+    ax.set_title('Your Music Profile')
+
+def plot_listening_heatmap(ax, result):
+    """Draw a listening_heatmap report as plays per weekday and hour"""
+    image = ax.imshow(result['counts'], aspect="auto", cmap="magma")
+    ax.set_yticks(range(len(WEEKDAYS)))
+    ax.set_yticklabels([day[:3] for day in WEEKDAYS])
+    ax.set_xticks(range(0, 24, 3))
+    ax.set_xticklabels([f"{hour:02d}:00" for hour in range(0, 24, 3)])
+    ax.figure.colorbar(image, ax=ax, label="Plays")
+    ax.set_title('When You Listen')
+
+def plot_mood_clusters(ax, result):
+    """Draw a mood_clusters report as the number of tracks per mood"""
+    # Several clusters can share their nearest mood
+    totals = {}
+    for mood, size in zip(result['moods'], result['sizes']):
+        totals[str(mood)] = totals.get(str(mood), 0) + int(size)
+    moods = sorted(totals, key=totals.get)
+    ax.barh([mood.title() for mood in moods], [totals[mood] for mood in moods])
+    ax.set_xlabel('Tracks')
+    ax.set_title('Your Library by Mood')
+
+def plot_listening_series(ax, df, level, max_points):
+    """Draw play counts as bars when there are few points, otherwise as a downsampled area plot
+
+    Returns the artists drawn, so the series can be replaced when zooming.
+    """
+    if len(df) <= MAX_BARS:
+        bucket_days = {name: days for name, days, _ in ROLLUP_LEVELS}[level]
+        return [ax.bar(df['date'], df['count'], width=bucket_days * 0.8)]
+    
+    x = mdates.date2num(df['date'])
+    y = df['count'].to_numpy(dtype=float)
+    # Never draw more vertices than there are pixels across the axes
+    x, y = lttb(x, y, max_points)
+    line, = ax.plot(x, y, linewidth=1)
+    area = ax.fill_between(x, y, alpha=0.3)
+    ax.xaxis_date()
+    return [line, area]
 
 class MusicAnalytics:
-    def __init__(self, spotify_client):
+    def __init__(self, spotify_client, async_client=None, catalog=None, library=None):
         self.spotify = spotify_client
+        self.async_client = async_client  # Optional AsyncSpotify used by prefetch
+        self.catalog = catalog  # Optional MusicCatalog holding the long-term play history
+        self.library = library  # Optional LibrarySync keeping the saved library in the catalog
+        self.prefetched = {}  # Responses fetched by prefetch, used once by the get_* methods
+        self.charts = {}  # Chart name -> interactive controller; keeps its event callbacks alive
+    
+    def prefetch(self):
+        """Fetch the data for every chart concurrently, so the charts cost one round-trip instead of four"""
+        if not self.async_client:
+            return False
+        
+        try:
+            results = self.async_client.gather(
+                top_artists=("current_user_top_artists", (), {'limit': 50, 'time_range': "medium_term"}),
+                top_tracks=("top_tracks_with_features", (), {'limit': 20, 'time_range': "medium_term"}),
+                recent=("current_user_recently_played", (), {'limit': 50})
+            )
+        except Exception as e:
+            print(f"Error prefetching analytics: {e}")
+            return False
+        
+        # Failed calls are left out so the get_* methods fall back to spotipy
+        self.prefetched = {name: result for name, result in results.items() if not isinstance(result, Exception)}
+        return True
+        
+    def get_library_dataset(self):
+        """Pack the saved library's artists and audio features, plus stored plays, for ReportEngine
+
+        With a LibrarySync the library is read from the catalog as of its last
+        sync; callers sync first when they need it current.
+        """
+        try:
+            if self.library:
+                features = self.catalog.saved_audio_features()
+                artist_ids = self.catalog.saved_artist_ids()
+            else:
+                tracks = []
+                offset = 0
+                while True:
+                    page = self.spotify.current_user_saved_tracks(limit=50, offset=offset)
+                    tracks.extend(item['track'] for item in page['items'] if item.get('track'))
+                    offset += len(page['items'])
+                    if not page.get('next') or not page['items']:
+                        break
+                
+                features = self._fetch_batched("audio_features", [track['id'] for track in tracks if track.get('id')], AUDIO_FEATURES_BATCH)
+                artist_ids = list(dict.fromkeys(
+                    artist['id'] for track in tracks for artist in track['artists'] if artist.get('id')
+                ))
+            
+            artists = self._get_artists(artist_ids)
+            played_at = self.catalog.play_times() if self.catalog else []
+            return build_dataset(artists, features, played_at)
+        except Exception as e:
+            print(f"Error building library dataset: {e}")
+            return None
+    
+    def _get_artists(self, artist_ids):
+        """Artists in artist_ids order; with a catalog only missing or stale ones are fetched"""
+        if not self.catalog:
+            return self._fetch_batched("artists", artist_ids, ARTISTS_BATCH)
+        artists = ArtistInfo(self.spotify, self.catalog, self.async_client).get_artists(artist_ids)
+        return [artists[artist_id] for artist_id in artist_ids if artist_id in artists]
+    
+    def _fetch_batched(self, method, ids, batch_size):
+        """Call audio_features or artists for any number of ids, concurrently when the async client is set"""
+        if self.async_client:
+            result = self.async_client.run(getattr(self.async_client, method)(ids))
+            return result['artists'] if isinstance(result, dict) else result
         
+        results = []
+        for batch in chunks(ids, batch_size):
+            result = getattr(self.spotify, method)(batch)
+            results.extend(result['artists'] if isinstance(result, dict) else result)
+        return results
+    
     def get_top_genres_data(self):
         """Get user's top genres data for visualization"""
         try:
             # Get user's top artists
-            top_artists = self.spotify.current_user_top_artists(limit=50, time_range="medium_term")
+            top_artists = self.prefetched.pop('top_artists', None) or \
+                self.spotify.current_user_top_artists(limit=50, time_range="medium_term")
             
             if not top_artists['items']:
                 return None
@@ -37,90 +222,84 @@ class MusicAnalytics:
             print(f"Error getting top genres: {e}")
             return None
     
-    def create_genre_chart(self, frame):
+    def load_chart_data(self, name):
+        """Fetch what an analytics tab shows (network and catalog work, safe on a worker thread)"""
+        if name == "genres":
+            return self.get_top_genres_data()
+        if name == "features":
+            return self.get_audio_features_data()
+        if name == "listening":
+            return self.get_listening_chart_data(chart_max_points())
+        raise ValueError(f"Unknown chart: {name}")
+    
+    def create_chart(self, name, frame, data):
+        """Build an analytics tab from loaded data or a report result (Tk thread); None when there is nothing to show"""
+        if name == "genres":
+            return self.create_genre_chart(frame, data)
+        if name == "features":
+            return self.create_audio_features_chart(frame, data)
+        if name == "listening":
+            return self.create_listening_history_chart(frame, data)
+        if name in REPORT_CHARTS:
+            return self.create_report_chart(frame, REPORT_CHARTS[name], data)
+        raise ValueError(f"Unknown chart: {name}")
+    
+    def create_genre_chart(self, frame, top_genres):
         """Create and display a pie chart of top genres"""
-        top_genres = self.get_top_genres_data()
-        
         if not top_genres:
             return None
         
         # Create pie chart
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.pie(top_genres.values(), labels=top_genres.keys(), autopct='%1.1f%%')
-        ax.set_title('Your Top Genres')
+        fig, ax = new_figure()
+        wedges = plot_genre_pie(ax, top_genres)
         
         # Embed chart in tkinter
-        canvas = FigureCanvasTkAgg(fig, master=frame)
+        canvas = embed_figure(fig, frame)
+        self.charts['genres'] = PieHoverChart(canvas, ax, wedges, top_genres.keys(), top_genres.values())
         canvas.draw()
         return canvas.get_tk_widget()
     
     def get_audio_features_data(self):
         """Get audio features of user's top tracks"""
         try:
-            # Get user's top tracks
-            top_tracks = self.spotify.current_user_top_tracks(limit=20, time_range="medium_term")
-            
-            if not top_tracks['items']:
-                return None
-            
-            # Get track IDs
-            track_ids = [track['id'] for track in top_tracks['items']]
-            
-            # Get audio features for tracks
-            audio_features = self.spotify.audio_features(track_ids)
+            if 'top_tracks' in self.prefetched:
+                top_tracks, audio_features = self.prefetched.pop('top_tracks')
+                if not top_tracks['items']:
+                    return None
+            else:
+                # Get user's top tracks
+                top_tracks = self.spotify.current_user_top_tracks(limit=20, time_range="medium_term")
+                
+                if not top_tracks['items']:
+                    return None
+                
+                # Get track IDs
+                track_ids = [track['id'] for track in top_tracks['items']]
+                
+                # Get audio features for tracks
+                audio_features = self.spotify.audio_features(track_ids)
             
-            # Create dataframe
-            tracks_data = []
-            for i, features in enumerate(audio_features):
-                if features:
-                    track = top_tracks['items'][i]
-                    tracks_data.append({
-                        'name': track['name'],
-                        'artist': track['artists'][0]['name'],
-                        'danceability': features['danceability'],
-                        'energy': features['energy'],
-                        'valence': features['valence'],
-                        'tempo': features['tempo'],
-                        'acousticness': features['acousticness'],
-                        'instrumentalness': features['instrumentalness']
-                    })
-            
-            return pd.DataFrame(tracks_data)
+            # Build the dataframe column by column from tracks that have features, matched by id
+            by_id = {features['id']: features for features in audio_features if features and features.get('id')}
+            tracks = [track for track in tracks_from_spotify(top_tracks['items']) if track.id in by_id]
+            df = pd.DataFrame(track_columns(tracks, ("name", "artist")))
+            features = pd.DataFrame.from_records([by_id[track.id] for track in tracks], columns=CHART_FEATURES)
+            return pd.concat([df, features], axis=1)
         except Exception as e:
             print(f"Error getting audio features: {e}")
             return None
     
-    def create_audio_features_chart(self, frame):
+    def create_audio_features_chart(self, frame, df):
         """Create and display a radar chart of audio features"""
-        df = self.get_audio_features_data()
-        
         if df is None or df.empty:
             return None
         
-        # Calculate average audio features
-        avg_features = df[['danceability', 'energy', 'valence', 'acousticness', 'instrumentalness']].mean()
-        
         # Create radar chart
-        categories = list(avg_features.index)
-        values = list(avg_features.values)
-        
-        # Add the first value at the end to close the circle
-        values.append(values[0])
-        categories.append(categories[0])
-        
-        # Calculate angle for each category
-        angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False).tolist()
-        angles.append(angles[0])
-        
-        # Create plot
-        fig, ax = plt.subplots(figsize=(8, 6), subplot_kw=dict(polar=True))
-        ax.plot(angles, values, linewidth=2)
-        ax.fill(angles, values, alpha=0.25)
-        ax.set_thetagrids(np.degrees(angles[:-1]), categories[:-1])
-        ax.set_title('Your Music Profile')
+        fig, ax = new_figure(polar=True)
+        plot_feature_radar(ax, df)
         
         # Embed chart in tkinter
-        canvas = FigureCanvasTkAgg(fig, master=frame)
+        canvas = embed_figure(fig, frame)
         canvas.draw()
         return canvas.get_tk_widget()
     
@@ -128,23 +307,17 @@ class MusicAnalytics:
         """Get user's recent listening history data"""
         try:
             # Get recently played tracks
-            recent = self.spotify.current_user_recently_played(limit=50)
+            recent = self.prefetched.pop('recent', None) or self.spotify.current_user_recently_played(limit=50)
             
             if not recent['items']:
                 return None
             
-            # Create dataframe
-            history_data = []
-            for item in recent['items']:
-                track = item['track']
-                played_at = item['played_at']
-                history_data.append({
-                    'name': track['name'],
-                    'artist': track['artists'][0]['name'],
-                    'played_at': pd.to_datetime(played_at)
-                })
+            # Keep the plays so the long-term history keeps growing
+            if self.catalog:
+                self.catalog.record_plays(recent['items'])
             
-            df = pd.DataFrame(history_data)
+            # Only the play times are needed to count plays per day
+            df = pd.DataFrame({'played_at': pd.to_datetime([item['played_at'] for item in recent['items']], format="ISO8601")})
             df['date'] = df['played_at'].dt.date
             
             # Count plays per day
@@ -157,24 +330,125 @@ class MusicAnalytics:
             print(f"Error getting listening history: {e}")
             return None
     
-    def create_listening_history_chart(self, frame):
-        """Create and display a bar chart of listening history"""
-        df = self.get_listening_history_data()
+    def get_listening_series(self, start=None, end=None, max_points=800):
+        """Get play counts from the catalog rollups at a level that fits the range in max_points
+
+        Returns (DataFrame of date/count, level) or None when there is no stored history.
+        """
+        if not self.catalog:
+            return None
         
-        if df is None or df.empty:
+        self.catalog.update_rollups()
+        bounds = self.catalog.history_bounds()
+        if not bounds:
+            return None
+        start = pd.Timestamp(start or bounds[0]).strftime("%Y-%m-%d")
+        end = pd.Timestamp(end or bounds[1]).strftime("%Y-%m-%d")
+        level = choose_rollup_level(start, end, max_points)
+        
+        rows = self.catalog.get_rollup(level, start, end)
+        if not rows:
             return None
+        df = pd.DataFrame(rows, columns=['date', 'count'])
+        df['date'] = pd.to_datetime(df['date'])
         
-        # Create bar chart
-        fig, ax = plt.subplots(figsize=(8, 6))
-        ax.bar(df['date'], df['count'])
+        # Fill empty buckets with zeros so lines don't bridge gaps
+        frequency = {name: freq for name, _, freq in ROLLUP_LEVELS}[level]
+        full_range = pd.date_range(df['date'].iloc[0], df['date'].iloc[-1], freq=frequency)
+        df = df.set_index('date').reindex(full_range, fill_value=0).rename_axis('date').reset_index()
+        return df, level
+    
+    def get_listening_chart_data(self, max_points):
+        """(DataFrame of date/count, level, rolled_up): stored rollups, else the recent plays; None without history"""
+        df = self.get_listening_history_data()
+        series = self.get_listening_series(max_points=max_points)
+        if series:
+            return series + (True,)
+        if df is not None and not df.empty:
+            return df, "day", False
+        return None
+    
+    def create_listening_history_chart(self, frame, data):
+        """Create and display a chart of listening history from get_listening_chart_data"""
+        if not data:
+            return None
+        df, level, rolled_up = data
+        
+        fig, ax = new_figure()
+        max_points = max(50, int(ax.get_window_extent().width))
+        
+        # Embed chart in tkinter; zooming re-queries the rollups when they are available
+        canvas = embed_figure(fig, frame)
+        self.charts['listening'] = HistoryChart(
+            canvas, ax, df, level, max_points, plot_listening_series,
+            fetch=self.get_listening_series if rolled_up else None
+        )
         ax.set_xlabel('Date')
         ax.set_ylabel('Tracks Played')
-        ax.set_title('Your Listening Activity')
+        ax.set_title('Your Listening Activity (scroll to zoom, drag to pan)')
         
         # Format x-axis dates
         fig.autofmt_xdate()
+        canvas.draw()
+        return canvas.get_tk_widget()
+    
+    def create_report_chart(self, frame, report, result):
+        """Create and display a chart of a library-scale report result"""
+        if report == "listening_heatmap":
+            if not result['counts'].any():
+                return None
+            plot = plot_listening_heatmap
+        elif report == "mood_clusters":
+            if not len(result['sizes']):
+                return None
+            plot = plot_mood_clusters
+        else:
+            raise ValueError(f"No chart for report: {report}")
         
-        # Embed chart in tkinter
-        canvas = FigureCanvasTkAgg(fig, master=frame)
+        fig, ax = new_figure()
+        plot(ax, result)
+        canvas = embed_figure(fig, frame)
         canvas.draw()
-        return canvas.get_tk_widget()
\ No newline at end of file
+        return canvas.get_tk_widget()
+    
+    def export_chart(self, name, directory, formats=("png", "csv")):
+        """Write one chart's data as CSV and/or its figure as PNG without any GUI; returns the paths written"""
+        if name == "genres":
+            data = self.get_top_genres_data()
+            if not data:
+                return []
+            table = pd.DataFrame({'genre': list(data.keys()), 'artists': list(data.values())})
+            fig, ax = plt.subplots(figsize=(8, 6))
+            plot_genre_pie(ax, data)
+        elif name == "features":
+            table = self.get_audio_features_data()
+            if table is None or table.empty:
+                return []
+            fig, ax = plt.subplots(figsize=(8, 6), subplot_kw=dict(polar=True))
+            plot_feature_radar(ax, table)
+        elif name == "listening":
+            data = self.get_listening_chart_data(EXPORT_MAX_POINTS)
+            if not data:
+                return []
+            table, level, _ = data
+            fig, ax = plt.subplots(figsize=(10, 5))
+            plot_listening_series(ax, table, level, EXPORT_MAX_POINTS)
+            ax.set_xlabel('Date')
+            ax.set_ylabel('Tracks Played')
+            ax.set_title(f'Your Listening Activity (per {level})')
+            fig.autofmt_xdate()
+        else:
+            raise ValueError(f"Unknown chart: {name}")
+        
+        paths = []
+        try:
+            if "csv" in formats:
+                paths.append(os.path.join(directory, f"{name}.csv"))
+                table.to_csv(paths[-1], index=False)
+            if "png" in formats:
+                paths.append(os.path.join(directory, f"{name}.png"))
+                fig.savefig(paths[-1], dpi=120, bbox_inches="tight")
+        finally:
+            # Batch jobs render many figures; pyplot keeps every open one alive
+            plt.close(fig)
+        return paths
@@ -0,0 +1,155 @@
+"""
+Artist pages (metadata, top tracks, albums) fetched in batches and kept in the catalog
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from async_spotify import chunks, ARTISTS_BATCH
+from track_model import tracks_from_spotify
+
+ARTIST_MAX_AGE = 7 * 24 * 3600  # Stored artist metadata older than this (seconds) is fetched again
+DETAIL_MAX_AGE = 24 * 3600  # Top tracks and albums change more often
+TOP_TRACKS_COUNTRY = "US"
+ALBUM_LIMIT = 20
+PREFETCH_DETAILS = 12  # Visible artists whose top tracks and albums are prefetched
+PREFETCH_WORKERS = 4
+
+def album_summary(album):
+    """The album fields the artist view shows"""
+    images = album.get('images') or []
+    return {
+        'id': album.get('id'),
+        'name': album.get('name'),
+        'album_type': album.get('album_type'),
+        'release_date': album.get('release_date'),
+        'total_tracks': album.get('total_tracks'),
+        'image_url': images[-1]['url'] if images else None
+    }
+
+class ArtistInfo:
+    """Assembles artist pages from the catalog, fetching only what is missing or stale
+
+    Metadata comes from artists() calls of up to 50 ids at a time; top tracks
+    and albums are kept in the catalog's response cache. prefetch() fills both
+    for the artists on screen, so opening one of them doesn't wait on Spotify.
+    """
+    def __init__(self, spotify_client, catalog, async_client=None):
+        self.spotify = spotify_client
+        self.catalog = catalog
+        self.async_client = async_client
+        self.requests = 0  # Spotify calls made, for benchmarks
+        self._pending = set()  # Artist ids being prefetched
+        self._lock = threading.Lock()
+
+    def store(self, artists):
+        """Keep full artist objects already at hand (e.g. from search results)"""
+        return self.catalog.upsert_artists([artist for artist in artists if artist and 'genres' in artist])
+
+    def get_artists(self, artist_ids):
+        """Get {artist_id: artist dict}, fetching missing or stale artists in batches"""
+        artist_ids = list(dict.fromkeys(artist_id for artist_id in artist_ids if artist_id))
+        artists = self.catalog.get_artists(artist_ids, max_age=ARTIST_MAX_AGE)
+        missing = [artist_id for artist_id in artist_ids if artist_id not in artists]
+        if missing:
+            try:
+                if self.async_client:
+                    fetched = self.async_client.run(self.async_client.artists(missing))['artists']
+                else:
+                    fetched = [item for batch in chunks(missing, ARTISTS_BATCH) for item in self.spotify.artists(batch)['artists']]
+                self.requests += len(chunks(missing, ARTISTS_BATCH))
+                self.catalog.upsert_artists(fetched)
+                artists.update({artist['id']: artist for artist in fetched if artist})
+            except Exception as e:
+                print(f"Error fetching artists: {e}")
+                # Stale metadata is better than none
+                stale = self.catalog.get_artists(missing)
+                artists.update(stale)
+        return artists
+
+    def _cached(self, key):
+        """A response stored under key that is still fresh, or None"""
+        cached = self.catalog.get_cached_response(key)
+        if cached and cached[1] >= time.time() - DETAIL_MAX_AGE:
+            return cached[0]
+        return None
+
+    def _store_detail(self, artist_id, top_tracks, albums):
+        """Keep one artist's top tracks and albums in the catalog"""
+        if top_tracks is not None:
+            tracks = top_tracks.get('tracks') or []
+            self.catalog.upsert_tracks(tracks)
+            self.catalog.cache_response(f"artist_top_tracks:{artist_id}", tracks)
+        if albums is not None:
+            self.catalog.cache_response(f"artist_albums:{artist_id}", [album_summary(album) for album in albums.get('items') or []])
+
+    def _fetch_detail(self, artist_id):
+        """Fetch and store one artist's top tracks and albums"""
+        top_tracks = self.spotify.artist_top_tracks(artist_id, country=TOP_TRACKS_COUNTRY)
+        albums = self.spotify.artist_albums(artist_id, album_type="album,single", limit=ALBUM_LIMIT)
+        self.requests += 2
+        self._store_detail(artist_id, top_tracks, albums)
+
+    def get_detail(self, artist_id):
+        """Artist page: {'artist', 'top_tracks' (Tracks), 'albums', 'library'}, or None if the artist is unknown"""
+        artist = self.get_artists([artist_id]).get(artist_id)
+        if artist is None:
+            return None
+
+        tracks = self._cached(f"artist_top_tracks:{artist_id}")
+        albums = self._cached(f"artist_albums:{artist_id}")
+        if tracks is None or albums is None:
+            try:
+                self._fetch_detail(artist_id)
+            except Exception as e:
+                print(f"Error fetching artist details: {e}")
+            tracks = (self.catalog.get_cached_response(f"artist_top_tracks:{artist_id}") or ([],))[0]
+            albums = (self.catalog.get_cached_response(f"artist_albums:{artist_id}") or ([],))[0]
+
+        return {
+            'artist': artist,
+            'top_tracks': tracks_from_spotify(tracks),
+            'albums': albums,
+            'library': self.catalog.artist_library_stats(artist_id)
+        }
+
+    def prefetch(self, artist_ids, limit=PREFETCH_DETAILS):
+        """Fetch metadata for every artist and top tracks/albums for the first `limit`; returns their pages"""
+        artist_ids = list(dict.fromkeys(artist_id for artist_id in artist_ids if artist_id))
+        artists = self.get_artists(artist_ids)
+
+        with self._lock:
+            wanted = [
+                artist_id for artist_id in artist_ids[:limit]
+                if artist_id in artists and artist_id not in self._pending
+                and (self._cached(f"artist_top_tracks:{artist_id}") is None or self._cached(f"artist_albums:{artist_id}") is None)
+            ]
+            self._pending.update(wanted)
+
+        try:
+            if wanted and self.async_client:
+                # One round-trip of latency for every artist's two calls
+                calls = {}
+                for artist_id in wanted:
+                    calls[f"top:{artist_id}"] = ("artist_top_tracks", (artist_id,), {'country': TOP_TRACKS_COUNTRY})
+                    calls[f"albums:{artist_id}"] = ("artist_albums", (artist_id,), {'include_groups': "album,single", 'limit': ALBUM_LIMIT})
+                results = self.async_client.gather(**calls)
+                self.requests += len(calls)
+                for artist_id in wanted:
+                    top_tracks, albums = results[f"top:{artist_id}"], results[f"albums:{artist_id}"]
+                    self._store_detail(
+                        artist_id,
+                        None if isinstance(top_tracks, Exception) else top_tracks,
+                        None if isinstance(albums, Exception) else albums
+                    )
+            elif wanted:
+                with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as pool:
+                    for future in [pool.submit(self._fetch_detail, artist_id) for artist_id in wanted]:
+                        try:
+                            future.result()
+                        except Exception as e:
+                            print(f"Error prefetching artist: {e}")
+        finally:
+            with self._lock:
+                self._pending.difference_update(wanted)
+
+        return {artist_id: self.get_detail(artist_id) for artist_id in artist_ids[:limit] if artist_id in artists}
@@ -0,0 +1,196 @@
+"""
+Asyncio facade over the Spotify Web API for fetching several endpoints concurrently
+"""
+import asyncio
+import contextlib
+import functools
+import threading
+import aiohttp
+from spotipy.exceptions import SpotifyException
+from offline import CACHED_READS
+
+API_BASE = "https://api.spotify.com/v1/"
+MAX_CONCURRENCY = 8
+AUDIO_FEATURES_BATCH = 100  # Max ids per /audio-features request
+ARTISTS_BATCH = 50  # Max ids per /artists request
+
+def chunks(items, size):
+    """Split a list into lists of at most size items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def api_read(method):
+    """Mark a public read: it gets a span and goes through the offline cache like the spotipy wrappers"""
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await self._read(method, args, kwargs)
+    return wrapper
+
+class AsyncSpotify:
+    """Async versions of the spotipy calls the app uses, run on a private event loop thread
+
+    These calls don't pass through the app's TracedSpotify/ResilientSpotify
+    proxies, so the same services are applied here: with a tracer each read
+    is a span, and with a ResilientSpotify responses are stored in the
+    catalog and served from it when Spotify is unreachable.
+    """
+    def __init__(self, token_getter, max_concurrency=MAX_CONCURRENCY, timeout=10, resilient=None, tracer=None):
+        self.token_getter = token_getter  # Returns a current access token, e.g. SpotifyAuthManager.get_access_token
+        self.resilient = resilient  # Optional ResilientSpotify sharing its offline cache and state
+        self.tracer = tracer  # Optional Tracer recording a span per read
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._loop = None
+        self._session = None
+        self._semaphore = None
+        self._token_future = None  # token_getter call in flight, shared by concurrent requests
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        """Start the background event loop on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True).start()
+            return self._loop
+
+    def submit(self, coro):
+        """Start a coroutine on the facade's loop; returns a concurrent.futures.Future (callable from any thread)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro):
+        """Run a coroutine on the facade's loop and wait for its result (callable from any thread)"""
+        return self.submit(coro).result()
+
+    async def _read(self, method, args, kwargs):
+        """Run a public read inside its span, storing or replacing the response through the ResilientSpotify"""
+        name = method.__name__
+        with self.tracer.span(f"spotify.{name}", "spotify") if self.tracer else contextlib.nullcontext():
+            try:
+                response = await method(self, *args, **kwargs)
+            except Exception as e:
+                if not self.resilient or name not in CACHED_READS:
+                    raise
+                # Catalog reads and writes block, so they run off the loop thread
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, self.resilient.read_failed, name, args, kwargs, e
+                )
+            if self.resilient and name in CACHED_READS:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.resilient.read_succeeded, name, args, kwargs, response
+                )
+            return response
+
+    async def _get_session(self):
+        """Get the shared aiohttp session, creating it inside the loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit_per_host=self.max_concurrency)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _token(self):
+        """Current access token; a refresh is a blocking HTTP call, so the getter runs off the loop thread"""
+        if self._token_future is None or self._token_future.done():
+            self._token_future = asyncio.get_running_loop().run_in_executor(None, self.token_getter)
+        # One cancelled request must not cancel the refresh the others are waiting on
+        return await asyncio.shield(self._token_future)
+
+    async def _get(self, path, params=None):
+        """GET an API path, retrying once after a 429, and return the decoded JSON"""
+        session = await self._get_session()
+        headers = {'Authorization': f"Bearer {await self._token()}"}
+        url = API_BASE + path
+
+        for attempt in range(2):
+            async with self._semaphore:
+                async with session.get(url, params=params, headers=headers) as response:
+                    if response.status == 429 and attempt == 0:
+                        retry_after = float(response.headers.get("Retry-After", 1))
+                    elif response.status >= 400:
+                        raise SpotifyException(response.status, -1, f"{url}: {await response.text()}")
+                    else:
+                        return await response.json()
+            await asyncio.sleep(retry_after)
+
+    @api_read
+    async def current_user_top_artists(self, limit=20, offset=0, time_range="medium_term"):
+        return await self._get("me/top/artists", {'limit': limit, 'offset': offset, 'time_range': time_range})
+
+    @api_read
+    async def current_user_top_tracks(self, limit=20, offset=0, time_range="medium_term"):
+        return await self._get("me/top/tracks", {'limit': limit, 'offset': offset, 'time_range': time_range})
+
+    @api_read
+    async def current_user_recently_played(self, limit=50):
+        return await self._get("me/player/recently-played", {'limit': limit})
+
+    @api_read
+    async def current_user_playlists(self, limit=50, offset=0):
+        return await self._get("me/playlists", {'limit': limit, 'offset': offset})
+
+    @api_read
+    async def playlist_tracks(self, playlist_id, limit=100, offset=0):
+        return await self._get(f"playlists/{playlist_id}/tracks", {'limit': limit, 'offset': offset})
+
+    @api_read
+    async def search(self, q, limit=10, offset=0, type="track"):
+        return await self._get("search", {'q': q, 'limit': limit, 'offset': offset, 'type': type})
+
+    @api_read
+    async def audio_features(self, tracks):
+        """Audio features for any number of track ids, fetched in concurrent batches"""
+        pages = await asyncio.gather(*[
+            self._get("audio-features", {'ids': ",".join(batch)}) for batch in chunks(list(tracks), AUDIO_FEATURES_BATCH)
+        ])
+        return [features for page in pages for features in page['audio_features']]
+
+    @api_read
+    async def artists(self, artists):
+        """Artists for any number of ids, fetched in concurrent batches"""
+        pages = await asyncio.gather(*[
+            self._get("artists", {'ids': ",".join(batch)}) for batch in chunks(list(artists), ARTISTS_BATCH)
+        ])
+        return {'artists': [artist for page in pages for artist in page['artists']]}
+
+    @api_read
+    async def artist_top_tracks(self, artist_id, country="US"):
+        return await self._get(f"artists/{artist_id}/top-tracks", {'market': country})
+
+    @api_read
+    async def artist_albums(self, artist_id, include_groups="album,single", limit=20, offset=0):
+        return await self._get(f"artists/{artist_id}/albums", {'include_groups': include_groups, 'limit': limit, 'offset': offset})
+
+    async def top_tracks_with_features(self, limit=20, time_range="medium_term"):
+        """Top tracks and their audio features; the features call waits on the track ids"""
+        top_tracks = await self.current_user_top_tracks(limit=limit, time_range=time_range)
+        ids = [track['id'] for track in top_tracks['items']]
+        return top_tracks, (await self.audio_features(ids) if ids else [])
+
+    async def _gather(self, calls):
+        """Run named calls concurrently; failures are returned as exceptions"""
+        names = list(calls)
+        results = await asyncio.gather(
+            *[getattr(self, method)(*args, **kwargs) for method, args, kwargs in calls.values()],
+            return_exceptions=True
+        )
+        return dict(zip(names, results))
+
+    def gather(self, **calls):
+        """Fetch several endpoints in one round-trip of latency
+
+        Each keyword maps a result name to (method, args, kwargs), e.g.
+        gather(top=("current_user_top_tracks", (), {'limit': 20}),
+               recent=("current_user_recently_played", (), {}))
+        """
+        return self.run(self._gather(calls))
+
+    def close(self):
+        """Close the HTTP session and stop the loop"""
+        if self._loop is None:
+            return
+        if self._session is not None:
+            self.run(self._session.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
@@ -0,0 +1,166 @@
+"""
+Batch waveform, loudness and tempo analysis of local tracks and previews
+"""
+import os
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+# Analysis runs on mono audio at a reduced rate; this is plenty for peaks, loudness and tempo
+ANALYSIS_SAMPLE_RATE = 22050
+WAVEFORM_POINTS = 800
+LOUDNESS_BLOCK_SECONDS = 0.4
+TEMPO_HOP = 512
+MIN_BPM = 60
+MAX_BPM = 200
+
+def _init_worker():
+    """Set up a headless pygame mixer in each pool process"""
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    pygame.mixer.init(frequency=ANALYSIS_SAMPLE_RATE, size=-16, channels=1)
+
+def to_db(value):
+    """Convert a linear amplitude or power ratio to decibels"""
+    return float(10 * np.log10(max(value, 1e-10)))
+
+def waveform_envelopes(mono, points=WAVEFORM_POINTS):
+    """Downsample audio to per-bucket peak and RMS envelopes"""
+    bucket = max(1, int(np.ceil(len(mono) / points)))
+    padded = np.zeros(bucket * points, dtype=np.float32)
+    padded[:len(mono)] = mono[:bucket * points]
+    buckets = padded.reshape(points, bucket)
+
+    peaks = np.abs(buckets).max(axis=1)
+    rms = np.sqrt((buckets * buckets).mean(axis=1))
+    return peaks.astype(np.float16), rms.astype(np.float16)
+
+def gated_loudness(mono, sample_rate):
+    """Gated RMS loudness in dBFS (an un-weighted approximation of LUFS)"""
+    block = int(LOUDNESS_BLOCK_SECONDS * sample_rate)
+    n_blocks = len(mono) // block
+    if n_blocks == 0:
+        return to_db(float(np.mean(mono * mono)) if len(mono) else 0.0)
+
+    power = (mono[:n_blocks * block].reshape(n_blocks, block) ** 2).mean(axis=1)
+
+    # Absolute gate drops silence, relative gate drops quiet passages
+    power = power[power > 10 ** (-70 / 10)]
+    if not len(power):
+        return -70.0
+    relative_gate = power.mean() * 10 ** (-10 / 10)
+    gated = power[power > relative_gate]
+    return to_db(float(gated.mean() if len(gated) else power.mean()))
+
+def estimate_tempo(mono, sample_rate):
+    """Estimate tempo in BPM from the autocorrelation of an onset envelope"""
+    n_hops = len(mono) // TEMPO_HOP
+    if n_hops < 4:
+        return None
+
+    frames = mono[:n_hops * TEMPO_HOP].reshape(n_hops, TEMPO_HOP)
+    energy = np.log1p(1000 * (frames * frames).mean(axis=1))
+    onset = np.maximum(np.diff(energy), 0)
+    onset -= onset.mean()
+
+    # Autocorrelation through the FFT
+    spectrum = np.fft.rfft(onset, n=2 * len(onset))
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum))[:len(onset)]
+
+    frame_rate = sample_rate / TEMPO_HOP
+    min_lag = int(60 * frame_rate / MAX_BPM)
+    max_lag = min(int(60 * frame_rate / MIN_BPM), len(autocorr) - 1)
+    if max_lag <= min_lag:
+        return None
+
+    lag = min_lag + int(np.argmax(autocorr[min_lag:max_lag + 1]))
+    return round(60 * frame_rate / lag, 1)
+
+def analyze_pcm(pcm, sample_rate):
+    """Compute waveform envelopes, loudness and tempo for decoded PCM"""
+    mono = pcm.astype(np.float32)
+    if mono.ndim > 1:
+        mono = mono.mean(axis=1)
+    mono /= 32768.0
+
+    peaks, rms_envelope = waveform_envelopes(mono)
+    peak = float(np.abs(mono).max()) if len(mono) else 0.0
+
+    return {
+        'duration': len(mono) / sample_rate,
+        'sample_rate': sample_rate,
+        'peaks': peaks,
+        'rms_envelope': rms_envelope,
+        'rms_db': to_db(float(np.mean(mono * mono))) if len(mono) else -100.0,
+        'loudness_db': gated_loudness(mono, sample_rate),
+        'peak_db': float(20 * np.log10(max(peak, 1e-5))),
+        'tempo': estimate_tempo(mono, sample_rate)
+    }
+
+def analyze_source(track_key, source):
+    """Decode and analyse one local file or preview URL (runs in a pool process)"""
+    import pygame
+    from pcm_cache import decode_file
+
+    filename = source
+    downloaded = False
+    try:
+        if source.startswith(("http://", "https://")):
+            from http_pool import http_pool
+            response = http_pool.get(source, "previews")
+            if response.status_code != 200:
+                return track_key, source, None, f"HTTP {response.status_code}"
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
+                temp_file.write(response.content)
+            filename = temp_file.name
+            downloaded = True
+
+        pcm = decode_file(filename)
+        sample_rate = pygame.mixer.get_init()[0]
+        return track_key, source, analyze_pcm(pcm, sample_rate), None
+    except Exception as e:
+        return track_key, source, None, str(e)
+    finally:
+        if downloaded and os.path.exists(filename):
+            os.unlink(filename)
+
+def new_analysis_pool(max_workers=None):
+    """Process pool for analyze_tracks; spawning it costs a second or more, so long-running callers keep one"""
+    context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=_init_worker)
+
+def analyze_tracks(sources, catalog, max_workers=None, skip_existing=True, progress_callback=None, pool=None):
+    """Analyse (track_key, source) pairs across a process pool and store results in the catalog
+
+    A pool from new_analysis_pool is used as is and left running; without
+    one, a pool is started for this call only.
+    """
+    if skip_existing:
+        existing = catalog.analyzed_keys()
+        sources = [(key, source) for key, source in sources if key not in existing]
+    if not sources:
+        return 0
+
+    if pool is None:
+        with new_analysis_pool(max_workers) as pool:
+            return _run_analysis(pool, sources, catalog, progress_callback)
+    return _run_analysis(pool, sources, catalog, progress_callback)
+
+def _run_analysis(pool, sources, catalog, progress_callback):
+    """Submit sources to a pool and store each result as it completes"""
+    analyzed = 0
+    futures = [pool.submit(analyze_source, key, source) for key, source in sources]
+
+    for done, future in enumerate(as_completed(futures), 1):
+        track_key, source, analysis, error = future.result()
+        if analysis:
+            catalog.save_analysis(track_key, source, analysis)
+            analyzed += 1
+        else:
+            print(f"Error analysing {source}: {error}")
+
+        if progress_callback:
+            progress_callback(done, len(sources))
+
+    return analyzed
@@ -0,0 +1,807 @@
+"""
+Local SQLite catalog of tracks and precomputed audio analysis
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+import numpy as np
+
+DEFAULT_CATALOG_PATH = "catalog.db"
+API_CACHE_MAX_AGE = 30 * 24 * 3600  # Cached API responses older than this (seconds) are pruned
+API_CACHE_MAX_ROWS = 5000  # Only the newest cached responses are kept beyond this
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS tracks (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        artist TEXT,
+        album TEXT,
+        duration_ms INTEGER,
+        preview_url TEXT,
+        image_url TEXT,
+        updated_at REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS track_analysis (
+        track_key TEXT PRIMARY KEY,
+        source TEXT,
+        duration REAL,
+        sample_rate INTEGER,
+        peaks BLOB,
+        rms_envelope BLOB,
+        rms_db REAL,
+        loudness_db REAL,
+        peak_db REAL,
+        tempo REAL,
+        analyzed_at REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS play_history (
+        played_at TEXT PRIMARY KEY,
+        track_id TEXT,
+        context TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_play_history_track ON play_history(track_id)",
+    """CREATE TABLE IF NOT EXISTS api_cache (
+        cache_key TEXT PRIMARY KEY,
+        response TEXT,
+        fetched_at REAL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_api_cache_fetched ON api_cache(fetched_at)",
+    """CREATE TABLE IF NOT EXISTS play_rollups (
+        level TEXT,
+        bucket TEXT,
+        plays INTEGER,
+        PRIMARY KEY (level, bucket)
+    )""",
+    """CREATE TABLE IF NOT EXISTS play_counts (
+        track_id TEXT PRIMARY KEY,
+        plays INTEGER,
+        last_played TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS rollup_state (
+        level TEXT PRIMARY KEY,
+        last_rowid INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS saved_tracks (
+        track_id TEXT PRIMARY KEY,
+        artist_id TEXT,
+        added_at TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_saved_tracks_added ON saved_tracks(added_at)",
+    # Pages of the library walk this index instead of sorting the table per request
+    "CREATE INDEX IF NOT EXISTS idx_saved_tracks_page ON saved_tracks(added_at, track_id)",
+    "CREATE INDEX IF NOT EXISTS idx_saved_tracks_artist ON saved_tracks(artist_id)",
+    """CREATE TABLE IF NOT EXISTS audio_features (
+        track_id TEXT PRIMARY KEY,
+        danceability REAL,
+        energy REAL,
+        valence REAL,
+        acousticness REAL,
+        instrumentalness REAL,
+        speechiness REAL,
+        liveness REAL,
+        tempo REAL,
+        loudness REAL,
+        updated_at REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS playlists (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        snapshot_id TEXT,
+        synced_at REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS playlist_tracks (
+        playlist_id TEXT,
+        position INTEGER,
+        track_id TEXT,
+        PRIMARY KEY (playlist_id, position)
+    )""",
+    """CREATE TABLE IF NOT EXISTS artists (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        genres TEXT,
+        popularity INTEGER,
+        followers INTEGER,
+        image_url TEXT,
+        updated_at REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS artist_genres (
+        artist_id TEXT,
+        genre TEXT,
+        PRIMARY KEY (artist_id, genre)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_artist_genres_genre ON artist_genres(genre)",
+    """CREATE TABLE IF NOT EXISTS smart_playlists (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        definition TEXT,
+        spotify_id TEXT,
+        fingerprint TEXT,
+        updated_at REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS smart_playlist_tracks (
+        smart_id INTEGER,
+        track_id TEXT,
+        PRIMARY KEY (smart_id, track_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS pending_ops (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        method TEXT,
+        args TEXT,
+        kwargs TEXT,
+        created_at REAL
+    )"""
+]
+
+# Columns added after a table was first created: (table, column, type)
+MIGRATIONS = [
+    ("tracks", "isrc", "TEXT"),
+    ("audio_features", "key", "INTEGER"),
+    ("audio_features", "mode", "INTEGER")
+]
+
+# Spotify audio features stored per track
+FEATURE_COLUMNS = [
+    "danceability", "energy", "valence", "acousticness", "instrumentalness",
+    "speechiness", "liveness", "tempo", "loudness", "key", "mode"
+]
+
+# SQL for the bucket (first day of the period) a play falls in, per rollup level
+ROLLUP_BUCKETS = {
+    'day': "substr(played_at, 1, 10)",
+    'week': "date(substr(played_at, 1, 10), 'weekday 0', '-6 days')",
+    'month': "substr(played_at, 1, 7) || '-01'"
+}
+
+def local_track_key(path):
+    """Catalog key for a local audio file"""
+    return f"local:{os.path.abspath(path)}"
+
+def spotify_track_key(track_id):
+    """Catalog key for a Spotify track"""
+    return f"spotify:{track_id}"
+
+def track_from_row(row):
+    """Turn a tracks table row into a minimal spotipy-style track dict"""
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'artists': [{'name': row['artist']}] if row['artist'] else [],
+        'album': {
+            'name': row['album'],
+            'images': [{'url': row['image_url']}] if row['image_url'] else []
+        },
+        'duration_ms': row['duration_ms'],
+        'preview_url': row['preview_url'],
+        'external_ids': {'isrc': row['isrc']} if row['isrc'] else {}
+    }
+
+class MusicCatalog:
+    def __init__(self, path=DEFAULT_CATALOG_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.content_changes = 0  # Bumped by writes to tracks and playlists, which fingerprint() doesn't cover
+        self._content_fingerprint = None  # (data_version, fingerprint) last seen by content_version
+        with self._lock, self._conn:
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+            for table, column, column_type in MIGRATIONS:
+                columns = {row['name'] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    def execute(self, sql, params=()):
+        """Run a write statement in its own transaction"""
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        """Run a write statement for many rows in one transaction"""
+        with self._lock, self._conn:
+            return self._conn.executemany(sql, rows)
+
+    def query(self, sql, params=()):
+        """Run a read query and return all rows"""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def upsert_tracks(self, tracks):
+        """Store basic metadata for a list of spotipy track dicts"""
+        now = time.time()
+        rows = []
+        for track in tracks:
+            if not track or not track.get('id'):
+                continue
+            album = track.get('album') or {}
+            images = album.get('images') or []
+            rows.append((
+                track['id'],
+                track.get('name'),
+                track['artists'][0]['name'] if track.get('artists') else None,
+                album.get('name'),
+                track.get('duration_ms'),
+                track.get('preview_url'),
+                images[-1]['url'] if images else None,
+                (track.get('external_ids') or {}).get('isrc'),
+                now
+            ))
+
+        self.executemany(
+            """INSERT INTO tracks (id, name, artist, album, duration_ms, preview_url, image_url, isrc, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(id) DO UPDATE SET
+                   name=excluded.name, artist=excluded.artist, album=excluded.album,
+                   duration_ms=excluded.duration_ms, preview_url=excluded.preview_url,
+                   image_url=excluded.image_url, isrc=COALESCE(excluded.isrc, isrc),
+                   updated_at=excluded.updated_at""",
+            rows
+        )
+        self.content_changes += 1
+        return len(rows)
+
+    def save_analysis(self, track_key, source, analysis):
+        """Store the result of analysing one track"""
+        self.execute(
+            """INSERT OR REPLACE INTO track_analysis
+               (track_key, source, duration, sample_rate, peaks, rms_envelope,
+                rms_db, loudness_db, peak_db, tempo, analyzed_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                track_key,
+                source,
+                analysis['duration'],
+                analysis['sample_rate'],
+                np.asarray(analysis['peaks'], dtype=np.float16).tobytes(),
+                np.asarray(analysis['rms_envelope'], dtype=np.float16).tobytes(),
+                analysis['rms_db'],
+                analysis['loudness_db'],
+                analysis['peak_db'],
+                analysis['tempo'],
+                time.time()
+            )
+        )
+
+    def get_analysis(self, track_key):
+        """Get the stored analysis for a track, or None"""
+        rows = self.query("SELECT * FROM track_analysis WHERE track_key = ?", (track_key,))
+        if not rows:
+            return None
+        row = dict(rows[0])
+        row['peaks'] = np.frombuffer(row['peaks'], dtype=np.float16)
+        row['rms_envelope'] = np.frombuffer(row['rms_envelope'], dtype=np.float16)
+        return row
+
+    def analyzed_keys(self):
+        """Get the set of track keys that already have analysis"""
+        return {row['track_key'] for row in self.query("SELECT track_key FROM track_analysis")}
+
+    def record_plays(self, items):
+        """Store recently-played items (from current_user_recently_played) and their tracks"""
+        self.upsert_tracks([item['track'] for item in items if item.get('track')])
+        rows = [
+            (item['played_at'], item['track']['id'], (item.get('context') or {}).get('type'))
+            for item in items if item.get('track') and item.get('played_at')
+        ]
+        cursor = self.executemany("INSERT OR IGNORE INTO play_history (played_at, track_id, context) VALUES (?, ?, ?)", rows)
+        return cursor.rowcount
+
+    def play_stats(self, since=None):
+        """Count plays, distinct tracks and distinct artists, optionally since an ISO timestamp"""
+        rows = self.query(
+            """SELECT COUNT(*) AS plays,
+                      COUNT(DISTINCT h.track_id) AS tracks,
+                      COUNT(DISTINCT t.artist) AS artists
+               FROM play_history h LEFT JOIN tracks t ON t.id = h.track_id
+               WHERE h.played_at >= ?""",
+            (since or "",)
+        )
+        return dict(rows[0])
+
+    def top_played_artist(self, since=None):
+        """Get the most played artist name, optionally since an ISO timestamp"""
+        rows = self.query(
+            """SELECT t.artist, COUNT(*) AS plays
+               FROM play_history h JOIN tracks t ON t.id = h.track_id
+               WHERE h.played_at >= ? AND t.artist IS NOT NULL
+               GROUP BY t.artist ORDER BY plays DESC LIMIT 1""",
+            (since or "",)
+        )
+        return rows[0]['artist'] if rows else None
+
+    def play_times(self):
+        """Get every stored play timestamp (ISO strings), oldest first"""
+        return [row['played_at'] for row in self.query("SELECT played_at FROM play_history ORDER BY played_at")]
+
+    def update_rollups(self):
+        """Fold plays added since the last call into the day/week/month play counts"""
+        # play_history only ever gets inserts, so its rowid works as a watermark
+        with self._lock, self._conn:
+            max_rowid = self._conn.execute("SELECT MAX(rowid) FROM play_history").fetchone()[0] or 0
+            added = 0
+            for level, bucket in ROLLUP_BUCKETS.items():
+                row = self._conn.execute("SELECT last_rowid FROM rollup_state WHERE level = ?", (level,)).fetchone()
+                last_rowid = row[0] if row else 0
+                if max_rowid <= last_rowid:
+                    continue
+                cursor = self._conn.execute(
+                    f"""INSERT INTO play_rollups (level, bucket, plays)
+                        SELECT ?, {bucket}, COUNT(*) FROM play_history
+                        WHERE rowid > ? AND rowid <= ? GROUP BY 2
+                        ON CONFLICT(level, bucket) DO UPDATE SET plays = plays + excluded.plays""",
+                    (level, last_rowid, max_rowid)
+                )
+                added += cursor.rowcount
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rollup_state (level, last_rowid) VALUES (?, ?)",
+                    (level, max_rowid)
+                )
+            return added
+
+    def update_play_counts(self):
+        """Fold plays added since the last call into the per-track play counts"""
+        with self._lock, self._conn:
+            max_rowid = self._conn.execute("SELECT MAX(rowid) FROM play_history").fetchone()[0] or 0
+            row = self._conn.execute("SELECT last_rowid FROM rollup_state WHERE level = 'tracks'").fetchone()
+            last_rowid = row[0] if row else 0
+            if max_rowid <= last_rowid:
+                return 0
+            cursor = self._conn.execute(
+                """INSERT INTO play_counts (track_id, plays, last_played)
+                   SELECT track_id, COUNT(*), MAX(played_at) FROM play_history
+                   WHERE rowid > ? AND rowid <= ? AND track_id IS NOT NULL GROUP BY track_id
+                   ON CONFLICT(track_id) DO UPDATE SET
+                       plays = plays + excluded.plays, last_played = MAX(last_played, excluded.last_played)""",
+                (last_rowid, max_rowid)
+            )
+            self._conn.execute("INSERT OR REPLACE INTO rollup_state (level, last_rowid) VALUES ('tracks', ?)", (max_rowid,))
+            return cursor.rowcount
+
+    def most_played(self, limit=20, offset=0):
+        """Get (track dict, plays) for the most played tracks"""
+        self.update_play_counts()
+        rows = self.query(
+            """SELECT t.*, p.plays FROM play_counts p JOIN tracks t ON t.id = p.track_id
+               ORDER BY p.plays DESC, p.last_played DESC LIMIT ? OFFSET ?""",
+            (limit, offset)
+        )
+        return [(track_from_row(row), row['plays']) for row in rows]
+
+    def get_rollup(self, level, start=None, end=None):
+        """Get (bucket date, plays) rows for a rollup level, optionally within ISO dates"""
+        rows = self.query(
+            "SELECT bucket, plays FROM play_rollups WHERE level = ? AND bucket >= ? AND bucket <= ? ORDER BY bucket",
+            (level, start or "", end or "9999")
+        )
+        return [(row['bucket'], row['plays']) for row in rows]
+
+    def history_bounds(self):
+        """Get the first and last day with plays, or None"""
+        row = self.query("SELECT MIN(substr(played_at, 1, 10)) AS first, MAX(substr(played_at, 1, 10)) AS last FROM play_history")[0]
+        if not row['first']:
+            return None
+        return row['first'], row['last']
+
+    def search_tracks(self, query, limit=20):
+        """Find stored tracks whose name, artist or album contains every word of a query"""
+        words = query.lower().split()
+        if not words:
+            return []
+        where = " AND ".join(["(LOWER(name) LIKE ? OR LOWER(artist) LIKE ? OR LOWER(album) LIKE ?)"] * len(words))
+        params = [f"%{word}%" for word in words for _ in range(3)]
+        rows = self.query(f"SELECT * FROM tracks WHERE {where} ORDER BY name LIMIT ?", params + [limit])
+        return [track_from_row(row) for row in rows]
+
+    def random_tracks(self, limit=20):
+        """Get a random sample of stored tracks"""
+        rows = self.query("SELECT * FROM tracks ORDER BY RANDOM() LIMIT ?", (limit,))
+        return [track_from_row(row) for row in rows]
+
+    def add_saved_tracks(self, items, replace=False):
+        """Store saved-library items (from current_user_saved_tracks); replace drops tracks not in items"""
+        items = [item for item in items if item.get('track') and item['track'].get('id')]
+        self.upsert_tracks([item['track'] for item in items])
+        rows = [
+            (item['track']['id'], (item['track'].get('artists') or [{}])[0].get('id'), item['added_at'])
+            for item in items
+        ]
+        with self._lock, self._conn:
+            removed = 0
+            if replace:
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS synced_ids (track_id TEXT PRIMARY KEY)")
+                self._conn.execute("DELETE FROM synced_ids")
+                self._conn.executemany("INSERT OR IGNORE INTO synced_ids VALUES (?)", [(row[0],) for row in rows])
+                removed = self._conn.execute(
+                    "DELETE FROM saved_tracks WHERE track_id NOT IN (SELECT track_id FROM synced_ids)"
+                ).rowcount
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO saved_tracks (track_id, artist_id, added_at) VALUES (?, ?, ?)",
+                rows
+            )
+        return len(rows), removed
+
+    def known_saved(self, track_ids):
+        """Get {track_id: added_at} for the given ids that are already in the saved library"""
+        track_ids = list(track_ids)
+        if not track_ids:
+            return {}
+        placeholders = ",".join("?" * len(track_ids))
+        rows = self.query(f"SELECT track_id, added_at FROM saved_tracks WHERE track_id IN ({placeholders})", track_ids)
+        return {row['track_id']: row['added_at'] for row in rows}
+
+    def saved_count(self):
+        """Number of tracks in the saved library"""
+        return self.query("SELECT COUNT(*) AS n FROM saved_tracks")[0]['n']
+
+    def saved_tracks(self, limit=None, offset=0):
+        """Get the saved library, newest first, as spotipy-style saved-track items"""
+        # The page is picked before joining, so skipped rows are never looked up in tracks
+        rows = self.query(
+            """SELECT t.*, s.artist_id, s.added_at
+               FROM (SELECT * FROM saved_tracks ORDER BY added_at DESC, track_id DESC LIMIT ? OFFSET ?) s
+               JOIN tracks t ON t.id = s.track_id ORDER BY s.added_at DESC, s.track_id DESC""",
+            (-1 if limit is None else limit, offset)
+        )
+        items = []
+        for row in rows:
+            track = track_from_row(row)
+            if track['artists']:
+                track['artists'][0]['id'] = row['artist_id']
+            items.append({'added_at': row['added_at'], 'track': track})
+        return items
+
+    def saved_artist_ids(self):
+        """Distinct first-artist ids across the saved library"""
+        rows = self.query("SELECT DISTINCT artist_id FROM saved_tracks WHERE artist_id IS NOT NULL")
+        return [row['artist_id'] for row in rows]
+
+    def save_audio_features(self, features):
+        """Store spotipy audio feature dicts"""
+        now = time.time()
+        rows = [
+            [item['id']] + [item.get(column) for column in FEATURE_COLUMNS] + [now]
+            for item in features if item and item.get('id')
+        ]
+        self.executemany(
+            f"""INSERT OR REPLACE INTO audio_features (track_id, {", ".join(FEATURE_COLUMNS)}, updated_at)
+                VALUES ({", ".join("?" * (len(FEATURE_COLUMNS) + 2))})""",
+            rows
+        )
+        return len(rows)
+
+    def saved_without_features(self):
+        """Saved track ids that have no stored audio features"""
+        rows = self.query(
+            """SELECT s.track_id FROM saved_tracks s LEFT JOIN audio_features f ON f.track_id = s.track_id
+               WHERE f.track_id IS NULL"""
+        )
+        return [row['track_id'] for row in rows]
+
+    def get_audio_features(self, track_ids):
+        """Get {track_id: audio feature dict} for the given ids that have stored features"""
+        track_ids = list(track_ids)
+        features = {}
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(track_ids), 500):
+            batch = track_ids[start:start + 500]
+            rows = self.query(f"SELECT * FROM audio_features WHERE track_id IN ({','.join('?' * len(batch))})", batch)
+            for row in rows:
+                features[row['track_id']] = dict({column: row[column] for column in FEATURE_COLUMNS}, id=row['track_id'])
+        return features
+
+    def saved_audio_features(self):
+        """Audio feature dicts for the saved library, newest first"""
+        rows = self.query(
+            """SELECT f.* FROM saved_tracks s JOIN audio_features f ON f.track_id = s.track_id
+               ORDER BY s.added_at DESC"""
+        )
+        return [dict({column: row[column] for column in FEATURE_COLUMNS}, id=row['track_id']) for row in rows]
+
+    def search_library(self, query, limit=20):
+        """Find saved tracks whose name, artist or album contains every word of a query"""
+        words = query.lower().split()
+        if not words:
+            return []
+        where = " AND ".join(["(LOWER(t.name) LIKE ? OR LOWER(t.artist) LIKE ? OR LOWER(t.album) LIKE ?)"] * len(words))
+        params = [f"%{word}%" for word in words for _ in range(3)]
+        rows = self.query(
+            f"SELECT t.* FROM saved_tracks s JOIN tracks t ON t.id = s.track_id WHERE {where} ORDER BY t.name LIMIT ?",
+            params + [limit]
+        )
+        return [track_from_row(row) for row in rows]
+
+    def recommend_from_library(self, targets, limit=20):
+        """Saved tracks closest to target audio features, e.g. {'valence': 0.8, 'energy': 0.7}"""
+        targets = {column: value for column, value in targets.items() if column in FEATURE_COLUMNS}
+        if not targets:
+            return []
+        distance = " + ".join(f"(f.{column} - ?) * (f.{column} - ?)" for column in targets)
+        params = [value for value in targets.values() for _ in range(2)]
+        rows = self.query(
+            f"""SELECT t.* FROM saved_tracks s
+                JOIN audio_features f ON f.track_id = s.track_id
+                JOIN tracks t ON t.id = s.track_id
+                WHERE {" AND ".join(f"f.{column} IS NOT NULL" for column in targets)}
+                ORDER BY {distance} LIMIT ?""",
+            params + [limit]
+        )
+        return [track_from_row(row) for row in rows]
+
+    def upsert_artists(self, artists):
+        """Store spotipy artist dicts and their genres"""
+        now = time.time()
+        artists = [artist for artist in artists if artist and artist.get('id')]
+        rows = [
+            (
+                artist['id'],
+                artist.get('name'),
+                json.dumps(artist.get('genres') or []),
+                artist.get('popularity'),
+                (artist.get('followers') or {}).get('total'),
+                artist['images'][-1]['url'] if artist.get('images') else None,
+                now
+            )
+            for artist in artists
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """INSERT OR REPLACE INTO artists (id, name, genres, popularity, followers, image_url, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            self._conn.executemany("DELETE FROM artist_genres WHERE artist_id = ?", [(artist['id'],) for artist in artists])
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO artist_genres (artist_id, genre) VALUES (?, ?)",
+                [(artist['id'], genre) for artist in artists for genre in artist.get('genres') or []]
+            )
+        return len(rows)
+
+    def get_artists(self, artist_ids, max_age=None):
+        """Get {artist_id: spotipy-style artist dict} for stored artists, optionally no older than max_age seconds"""
+        artist_ids = list(artist_ids)
+        if not artist_ids:
+            return {}
+        oldest = time.time() - max_age if max_age else 0
+        artists = {}
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(artist_ids), 500):
+            batch = artist_ids[start:start + 500]
+            rows = self.query(
+                f"SELECT * FROM artists WHERE id IN ({','.join('?' * len(batch))}) AND updated_at >= ?",
+                batch + [oldest]
+            )
+            for row in rows:
+                artists[row['id']] = {
+                    'id': row['id'],
+                    'name': row['name'],
+                    'genres': json.loads(row['genres']),
+                    'popularity': row['popularity'],
+                    'followers': {'total': row['followers']},
+                    'images': [{'url': row['image_url']}] if row['image_url'] else []
+                }
+        return artists
+
+    def artist_library_stats(self, artist_id):
+        """Saved tracks by an artist and how often they were played"""
+        self.update_play_counts()
+        row = self.query(
+            """SELECT COUNT(*) AS saved_tracks, IFNULL(SUM(p.plays), 0) AS plays FROM saved_tracks s
+               LEFT JOIN play_counts p ON p.track_id = s.track_id WHERE s.artist_id = ?""",
+            (artist_id,)
+        )[0]
+        return dict(row)
+
+    def saved_artists_missing(self):
+        """Artist ids from the saved library that have no stored artist row"""
+        rows = self.query(
+            """SELECT DISTINCT s.artist_id FROM saved_tracks s LEFT JOIN artists a ON a.id = s.artist_id
+               WHERE s.artist_id IS NOT NULL AND a.id IS NULL"""
+        )
+        return [row['artist_id'] for row in rows]
+
+    def fingerprint(self):
+        """Cheap summary that changes whenever the library, features, artists or play history change"""
+        row = self.query(
+            """SELECT (SELECT COUNT(*) || '/' || IFNULL(MAX(added_at), '') FROM saved_tracks) AS saved,
+                      (SELECT IFNULL(MAX(rowid), 0) FROM play_history) AS plays,
+                      (SELECT IFNULL(MAX(updated_at), 0) FROM audio_features) AS features,
+                      (SELECT IFNULL(MAX(updated_at), 0) FROM artists) AS artists"""
+        )[0]
+        return f"{row['saved']}:{row['plays']}:{row['features']}:{row['artists']}"
+
+    def save_smart_playlist(self, name, definition, smart_id=None):
+        """Create or update a smart playlist definition and return its id"""
+        if smart_id is None:
+            cursor = self.execute(
+                "INSERT INTO smart_playlists (name, definition, updated_at) VALUES (?, ?, ?)",
+                (name, json.dumps(definition), time.time())
+            )
+            self.content_changes += 1
+            return cursor.lastrowid
+        # A changed definition must be re-evaluated even if the catalog didn't change
+        self.execute(
+            "UPDATE smart_playlists SET name = ?, definition = ?, fingerprint = NULL, updated_at = ? WHERE id = ?",
+            (name, json.dumps(definition), time.time(), smart_id)
+        )
+        self.content_changes += 1
+        return smart_id
+
+    def smart_playlists(self):
+        """Get every smart playlist as a dict"""
+        return [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'definition': json.loads(row['definition']),
+                'spotify_id': row['spotify_id'],
+                'fingerprint': row['fingerprint']
+            }
+            for row in self.query("SELECT * FROM smart_playlists ORDER BY name")
+        ]
+
+    def smart_playlist_tracks(self, smart_id):
+        """Get the set of track ids a smart playlist was last materialized with"""
+        return {row['track_id'] for row in self.query("SELECT track_id FROM smart_playlist_tracks WHERE smart_id = ?", (smart_id,))}
+
+    def update_smart_playlist_tracks(self, smart_id, added, removed, fingerprint, spotify_id):
+        """Apply a materialization diff and remember what it was computed from"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM smart_playlist_tracks WHERE smart_id = ? AND track_id = ?",
+                [(smart_id, track_id) for track_id in removed]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO smart_playlist_tracks (smart_id, track_id) VALUES (?, ?)",
+                [(smart_id, track_id) for track_id in added]
+            )
+            self._conn.execute(
+                "UPDATE smart_playlists SET fingerprint = ?, spotify_id = ?, updated_at = ? WHERE id = ?",
+                (fingerprint, spotify_id, time.time(), smart_id)
+            )
+        self.content_changes += 1
+
+    def delete_smart_playlist(self, smart_id):
+        """Forget a smart playlist (the Spotify playlist is left alone)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM smart_playlist_tracks WHERE smart_id = ?", (smart_id,))
+            self._conn.execute("DELETE FROM smart_playlists WHERE id = ?", (smart_id,))
+        self.content_changes += 1
+
+    def playlist_snapshots(self):
+        """Get {playlist_id: snapshot_id} for stored playlists"""
+        return {row['id']: row['snapshot_id'] for row in self.query("SELECT id, snapshot_id FROM playlists")}
+
+    def save_playlist(self, playlist_id, name, snapshot_id, track_ids):
+        """Replace a playlist's stored track list"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM playlist_tracks WHERE playlist_id = ?", (playlist_id,))
+            self._conn.executemany(
+                "INSERT INTO playlist_tracks (playlist_id, position, track_id) VALUES (?, ?, ?)",
+                [(playlist_id, position, track_id) for position, track_id in enumerate(track_ids)]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO playlists (id, name, snapshot_id, synced_at) VALUES (?, ?, ?, ?)",
+                (playlist_id, name, snapshot_id, time.time())
+            )
+        self.content_changes += 1
+
+    def delete_playlists(self, playlist_ids):
+        """Forget stored playlists"""
+        with self._lock, self._conn:
+            for playlist_id in playlist_ids:
+                self._conn.execute("DELETE FROM playlist_tracks WHERE playlist_id = ?", (playlist_id,))
+                self._conn.execute("DELETE FROM playlists WHERE id = ?", (playlist_id,))
+        self.content_changes += 1
+
+    def playlist_names(self):
+        """Get {playlist_id: name} for stored playlists"""
+        return {row['id']: row['name'] for row in self.query("SELECT id, name FROM playlists ORDER BY name")}
+
+    def playlist_track_lists(self):
+        """Get {playlist_id: [track ids in order]} for every stored playlist"""
+        lists = {}
+        for row in self.query("SELECT playlist_id, track_id FROM playlist_tracks ORDER BY playlist_id, position"):
+            lists.setdefault(row['playlist_id'], []).append(row['track_id'])
+        return lists
+
+    def playlist_summaries(self):
+        """Get id, name, snapshot_id and track count of every stored playlist"""
+        rows = self.query(
+            """SELECT p.id, p.name, p.snapshot_id, COUNT(t.track_id) AS tracks FROM playlists p
+               LEFT JOIN playlist_tracks t ON t.playlist_id = p.id GROUP BY p.id ORDER BY p.name"""
+        )
+        return [dict(row) for row in rows]
+
+    def playlist_tracks(self, playlist_id, limit=None, offset=0):
+        """Get one stored playlist's tracks in order as track dicts"""
+        rows = self.query(
+            """SELECT t.* FROM (SELECT position, track_id FROM playlist_tracks WHERE playlist_id = ?
+                                ORDER BY position LIMIT ? OFFSET ?) p
+               JOIN tracks t ON t.id = p.track_id ORDER BY p.position""",
+            (playlist_id, -1 if limit is None else limit, offset)
+        )
+        return [track_from_row(row) for row in rows]
+
+    def playlist_track_info(self):
+        """Get {track_id: (name, artist, isrc)} for every track in a stored playlist"""
+        rows = self.query(
+            """SELECT DISTINCT t.id, t.name, t.artist, t.isrc FROM playlist_tracks p
+               JOIN tracks t ON t.id = p.track_id"""
+        )
+        return {row['id']: (row['name'], row['artist'], row['isrc']) for row in rows}
+
+    def cache_response(self, cache_key, response):
+        """Store an API response as JSON"""
+        self.execute(
+            "INSERT OR REPLACE INTO api_cache (cache_key, response, fetched_at) VALUES (?, ?, ?)",
+            (cache_key, json.dumps(response), time.time())
+        )
+
+    def get_cached_response(self, cache_key):
+        """Get a stored API response and when it was fetched, or None"""
+        rows = self.query("SELECT response, fetched_at FROM api_cache WHERE cache_key = ?", (cache_key,))
+        if not rows:
+            return None
+        return json.loads(rows[0]['response']), rows[0]['fetched_at']
+
+    def prune_api_cache(self, max_age=API_CACHE_MAX_AGE, max_rows=API_CACHE_MAX_ROWS):
+        """Delete cached responses older than max_age seconds, then the oldest beyond max_rows; returns rows deleted"""
+        # Placeholder id mappings are tiny and queued offline writes may still need them
+        with self._lock, self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM api_cache WHERE fetched_at < ? AND cache_key NOT LIKE 'offline_id:%'",
+                (time.time() - max_age,)
+            ).rowcount
+            deleted += self._conn.execute(
+                """DELETE FROM api_cache WHERE cache_key IN (
+                       SELECT cache_key FROM api_cache WHERE cache_key NOT LIKE 'offline_id:%'
+                       ORDER BY fetched_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (max_rows,)
+            ).rowcount
+        return deleted
+
+    def queue_op(self, method, args, kwargs):
+        """Queue a write made while offline and return its id"""
+        cursor = self.execute(
+            "INSERT INTO pending_ops (method, args, kwargs, created_at) VALUES (?, ?, ?, ?)",
+            (method, json.dumps(list(args)), json.dumps(kwargs), time.time())
+        )
+        return cursor.lastrowid
+
+    def pending_ops(self):
+        """Get queued writes, oldest first"""
+        rows = self.query("SELECT * FROM pending_ops ORDER BY id")
+        return [
+            {'id': row['id'], 'method': row['method'], 'args': json.loads(row['args']), 'kwargs': json.loads(row['kwargs'])}
+            for row in rows
+        ]
+
+    def delete_op(self, op_id):
+        """Remove a queued write once it has been replayed"""
+        self.execute("DELETE FROM pending_ops WHERE id = ?", (op_id,))
+
+    def data_version(self):
+        """Token that changes whenever this or any other connection commits to the database"""
+        with self._lock:
+            # data_version only moves for other connections' commits; total_changes covers ours
+            other = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            return f"{other}:{self._conn.total_changes}"
+
+    def content_version(self):
+        """Token that changes with the library, play history, tracks and playlists, but not with api_cache or pending_ops writes"""
+        version = self.data_version()
+        cached = self._content_fingerprint
+        if cached is None or cached[0] != version:
+            # Cached reads and queued writes also move data_version, so compare the data itself
+            cached = self._content_fingerprint = (version, self.fingerprint())
+        return f"{cached[1]}:{self.content_changes}"
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,333 @@
+"""
+Headless command-line entry point for batch library, playlist and report jobs (no display needed)
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from catalog import MusicCatalog, DEFAULT_CATALOG_PATH
+from library_sync import LibrarySync
+from playlist_manager import PlaylistManager, MOOD_PARAMS
+from playlist_ordering import ORDERINGS
+from report_engine import ReportEngine, REPORTS, DEFAULT_REPORT_CACHE_DIR, export_report_csv
+from local_api import LocalAPI, DEFAULT_API_HOST, DEFAULT_API_PORT
+
+DEFAULT_WORKERS = 4
+REPORT_FORMATS = ("png", "csv")
+CHARTS = ("genres", "features", "listening")  # analytics.EXPORT_CHARTS, named here so other jobs never load matplotlib
+
+class Progress:
+    """Numbered progress lines for a batch of steps; safe to call from worker threads"""
+    def __init__(self, total, quiet=False):
+        self.total = total
+        self.quiet = quiet
+        self.done = 0
+        self.failed = 0
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def step(self, success, message):
+        """Report one finished step"""
+        with self._lock:
+            self.done += 1
+            self.failed += not success
+            if not self.quiet or not success:
+                status = "ok" if success else "FAILED"
+                print(f"[{self.done}/{self.total}] {status:<6} {message}", flush=True)
+
+    def finish(self):
+        """Print a summary; returns the process exit code"""
+        elapsed = time.perf_counter() - self.start
+        print(f"{self.done - self.failed} of {self.total} steps succeeded in {elapsed:.1f}s", flush=True)
+        return 1 if self.failed else 0
+
+class Session:
+    """Spotify client, catalog and managers shared by the jobs of one run"""
+    def __init__(self, args):
+        self.args = args
+        self.spotify = None
+        self.async_client = None
+        if getattr(args, "catalog_only", False):
+            pass  # The job only reads the catalog, so no login is needed
+        elif args.fake:
+            from fake_spotify import FakeSpotify
+            self.spotify = FakeSpotify(n_tracks=args.fake)
+        else:
+            from spotify_auth import SpotifyAuthManager
+            from async_spotify import AsyncSpotify
+            auth = SpotifyAuthManager()
+            success, message = auth.authenticate()
+            if not success:
+                raise SystemExit(f"Error: {message}")
+            self.spotify = auth.get_spotify_client()
+            self.async_client = AsyncSpotify(auth.get_access_token)
+
+        self.catalog = MusicCatalog(args.catalog)
+        if self.spotify is None:
+            return
+        self.library = LibrarySync(self.spotify, self.catalog, self.async_client)
+        self.playlist_manager = PlaylistManager(self.spotify, self.catalog, self.async_client)
+
+    def close(self):
+        """Release the async client and the catalog"""
+        if self.async_client:
+            self.async_client.close()
+        self.catalog.close()
+
+def run_sync(session, args):
+    """Sync the saved library and playlists in parallel, then refresh smart playlists"""
+    progress = Progress(3, args.quiet)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = {
+            pool.submit(session.library.sync, args.full): "library",
+            pool.submit(session.playlist_manager.sync_playlists): "playlists"
+        }
+        for future in as_completed(futures):
+            progress.step(*future.result())
+    progress.step(*session.playlist_manager.refresh_smart_playlists(args.force))
+    return progress.finish()
+
+def run_mood_playlists(session, args):
+    """Build a playlist for every requested mood, several moods at a time"""
+    moods = args.moods or list(MOOD_PARAMS)
+    progress = Progress(len(moods), args.quiet)
+
+    def build(mood):
+        tracks = session.playlist_manager.get_mood_recommendations(mood, limit=args.limit)
+        track_ids = [track.id for track in tracks if track.id]
+        if not track_ids:
+            return False, f"{mood}: no recommendations"
+        if args.dry_run:
+            ordered = session.playlist_manager.order_tracks(track_ids, args.ordering)
+            return True, f"{mood}: {len(ordered)} tracks (dry run)"
+        success, result = session.playlist_manager.create_mood_playlist(mood, track_ids, args.ordering)
+        return success, f"{mood}: {len(track_ids)} tracks -> {result}" if success else f"{mood}: {result}"
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(build, mood): mood for mood in moods}
+        for future in as_completed(futures):
+            try:
+                progress.step(*future.result())
+            except Exception as e:
+                progress.step(False, f"{futures[future]}: {e}")
+    return progress.finish()
+
+def run_reports(session, args):
+    """Export chart images/data and library-scale report tables to a directory"""
+    # Must be chosen before pyplot is first imported; Agg renders without a display
+    import matplotlib
+    matplotlib.use("Agg")
+    from analytics import MusicAnalytics
+
+    os.makedirs(args.out, exist_ok=True)
+    charts = args.charts or list(CHARTS)
+    library_reports = [] if args.no_library else list(REPORTS)
+    progress = Progress(len(charts) + len(library_reports), args.quiet)
+    analytics = MusicAnalytics(session.spotify, session.async_client, session.catalog, session.library)
+
+    # Library reports run in worker processes while the charts are drawn here
+    engine = ReportEngine(max_workers=args.workers, cache_dir=args.report_cache or None)
+    futures = {}
+    try:
+        if library_reports:
+            # The dataset is read from the catalog, so bring the saved library up to date first
+            session.library.sync()
+            dataset = analytics.get_library_dataset()
+            if dataset is None:
+                for report in library_reports:
+                    progress.step(False, f"{report}: library dataset unavailable")
+            else:
+                futures = {report: engine.submit(report, dataset) for report in library_reports}
+
+        analytics.prefetch()
+        for chart in charts:
+            try:
+                paths = analytics.export_chart(chart, args.out, args.formats)
+                progress.step(bool(paths), f"{chart}: {', '.join(paths) if paths else 'no data'}")
+            except Exception as e:
+                progress.step(False, f"{chart}: {e}")
+
+        for report, future in futures.items():
+            try:
+                path = os.path.join(args.out, f"{report}.csv")
+                rows = export_report_csv(report, future.result(), path)
+                progress.step(True, f"{report}: {path} ({rows} rows, {engine.timings.get(report, 0):.2f}s)")
+            except Exception as e:
+                progress.step(False, f"{report}: {e}")
+    finally:
+        engine.shutdown()
+    return progress.finish()
+
+def run_smart_refresh(session, args):
+    """Push pending changes of every smart playlist"""
+    progress = Progress(1, args.quiet)
+    progress.step(*session.playlist_manager.refresh_smart_playlists(args.force))
+    return progress.finish()
+
+def run_export_playlist(session, args):
+    """Stream one playlist to a file"""
+    progress = Progress(1, args.quiet)
+    progress.step(*session.playlist_manager.export_playlist(args.playlist_id, args.path))
+    return progress.finish()
+
+def run_import_playlist(session, args):
+    """Create a playlist from a file"""
+    progress = Progress(1, args.quiet)
+
+    def report(read, added):
+        if not args.quiet:
+            print(f"  {read} rows read, {added} tracks resolved", flush=True)
+
+    progress.step(*session.playlist_manager.import_playlist(args.path, args.name, progress_callback=report))
+    return progress.finish()
+
+def resolve_playlists(sets, names):
+    """Playlist ids for ids or (case-insensitive) names; raises SystemExit for unknown ones"""
+    by_name = {name.lower(): playlist_id for playlist_id, name in sets.names.items()}
+    playlist_ids = []
+    for name in names:
+        playlist_id = name if name in sets.masks else by_name.get(name.lower())
+        if playlist_id is None:
+            raise SystemExit(f"Error: no synced playlist {name!r} (run 'sync' first or check the name)")
+        playlist_ids.append(playlist_id)
+    return playlist_ids
+
+def run_playlist_sets(session, args):
+    """Union, intersection or difference of synced playlists, optionally saved as a new playlist"""
+    progress = Progress(2 if args.save else 1, args.quiet)
+    if not args.no_sync:
+        success, message = session.playlist_manager.sync_playlists()
+        if not success:
+            progress.step(False, message)
+            return progress.finish()
+
+    sets = session.playlist_manager.get_playlist_sets(fuzzy=args.fuzzy)
+    playlist_ids = resolve_playlists(sets, args.playlists)
+    operation = getattr(sets, args.operation)
+    track_ids = operation(*playlist_ids)
+    names = ", ".join(sets.names.get(playlist_id, playlist_id) for playlist_id in playlist_ids)
+    progress.step(True, f"{args.operation} of {names}: {len(track_ids)} tracks")
+    if not args.quiet:
+        for track_id in track_ids:
+            print(f"  spotify:track:{track_id}")
+
+    if args.save:
+        if not track_ids:
+            progress.step(False, f"{args.save}: nothing to save")
+        else:
+            success, result = session.playlist_manager.create_playlist_from_tracks(
+                args.save, track_ids, f"{args.operation.title()} of {names}"
+            )
+            progress.step(success, f"{args.save}: {len(track_ids)} tracks -> {result}" if success else result)
+    return progress.finish()
+
+def run_duplicates(session, args):
+    """Report tracks repeated within a playlist and shared across playlists"""
+    progress = Progress(1, args.quiet)
+    if not args.no_sync:
+        success, message = session.playlist_manager.sync_playlists()
+        if not success:
+            progress.step(False, message)
+            return progress.finish()
+
+    sets = session.playlist_manager.get_playlist_sets(fuzzy=args.fuzzy)
+    report = sets.duplicates(args.min_playlists)
+    names = sets.names
+
+    print(f"Repeated within a playlist ({len(report['within'])} playlists):")
+    for playlist_id, track_ids in report['within'].items():
+        print(f"  {names.get(playlist_id, playlist_id)}: {len(track_ids)} tracks")
+    print(f"In {args.min_playlists} or more playlists ({len(report['across'])} tracks):")
+    for track_id, playlist_ids in sorted(report['across'].items(), key=lambda entry: -len(entry[1]))[:args.top]:
+        print(f"  spotify:track:{track_id}: {', '.join(names.get(playlist_id, playlist_id) for playlist_id in playlist_ids)}")
+    if args.fuzzy:
+        print(f"Different versions of the same recording ({len(report['variants'])} groups):")
+        for track_ids in report['variants'][:args.top]:
+            print(f"  {', '.join(track_ids)}")
+
+    progress.step(True, f"{len(report['within'])} playlists with repeats, {len(report['across'])} shared tracks")
+    return progress.finish()
+
+def run_serve(session, args):
+    """Serve the read-only local API until interrupted"""
+    print(f"Serving the local API on http://{args.host}:{args.port}/api (Ctrl+C to stop)", flush=True)
+    LocalAPI(session.catalog, args.host, args.port).serve_forever()
+    return 0
+
+def build_parser():
+    """Argument parser with one subcommand per job"""
+    parser = argparse.ArgumentParser(description="MoodySongs batch jobs (no GUI required)")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH, help="Catalog database path")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel workers per job")
+    parser.add_argument("--quiet", action="store_true", help="Only print failures and the summary")
+    parser.add_argument("--fake", type=int, metavar="TRACKS", help="Use a synthetic account of this many tracks (no network)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = commands.add_parser("sync", help="Sync the saved library and playlists into the catalog")
+    sync_parser.add_argument("--full", action="store_true", help="Re-read the whole library")
+    sync_parser.add_argument("--force", action="store_true", help="Re-evaluate smart playlists even if nothing changed")
+    sync_parser.set_defaults(job=run_sync)
+
+    mood_parser = commands.add_parser("mood-playlists", help="Create a playlist for each mood")
+    mood_parser.add_argument("--moods", nargs="+", choices=list(MOOD_PARAMS))
+    mood_parser.add_argument("--limit", type=int, default=20)
+    mood_parser.add_argument("--ordering", choices=list(ORDERINGS), default="original")
+    mood_parser.add_argument("--dry-run", action="store_true", help="Fetch and order the tracks but create nothing")
+    mood_parser.set_defaults(job=run_mood_playlists)
+
+    reports_parser = commands.add_parser("reports", help="Export charts and library reports as PNG/CSV")
+    reports_parser.add_argument("--out", default="reports")
+    reports_parser.add_argument("--formats", nargs="+", choices=REPORT_FORMATS, default=list(REPORT_FORMATS))
+    reports_parser.add_argument("--charts", nargs="+", choices=CHARTS)
+    reports_parser.add_argument("--no-library", action="store_true", help="Skip the library-scale reports")
+    reports_parser.add_argument("--report-cache", default=DEFAULT_REPORT_CACHE_DIR, help="Report cache directory ('' to disable)")
+    reports_parser.set_defaults(job=run_reports)
+
+    smart_parser = commands.add_parser("smart-refresh", help="Push changes to smart playlists")
+    smart_parser.add_argument("--force", action="store_true")
+    smart_parser.set_defaults(job=run_smart_refresh)
+
+    export_parser = commands.add_parser("export-playlist", help="Export a playlist to M3U/CSV/JSONL/Parquet")
+    export_parser.add_argument("playlist_id")
+    export_parser.add_argument("path")
+    export_parser.set_defaults(job=run_export_playlist)
+
+    import_parser = commands.add_parser("import-playlist", help="Create a playlist from a file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--name")
+    import_parser.set_defaults(job=run_import_playlist)
+
+    sets_parser = commands.add_parser("playlist-sets", help="Union/intersection/difference of playlists, optionally saved")
+    sets_parser.add_argument("operation", choices=("union", "intersection", "difference"))
+    sets_parser.add_argument("playlists", nargs="+", help="Playlist ids or names (difference: the first minus the rest)")
+    sets_parser.add_argument("--save", metavar="NAME", help="Create a playlist with the result")
+    sets_parser.add_argument("--fuzzy", action="store_true", help="Match versions of a recording by ISRC or title and artist")
+    sets_parser.add_argument("--no-sync", action="store_true", help="Use the playlists already in the catalog")
+    sets_parser.set_defaults(job=run_playlist_sets)
+
+    duplicates_parser = commands.add_parser("duplicates", help="Report duplicate tracks within and across playlists")
+    duplicates_parser.add_argument("--fuzzy", action="store_true", help="Also group versions of the same recording")
+    duplicates_parser.add_argument("--min-playlists", type=int, default=2)
+    duplicates_parser.add_argument("--top", type=int, default=20, help="Entries listed per section")
+    duplicates_parser.add_argument("--no-sync", action="store_true", help="Use the playlists already in the catalog")
+    duplicates_parser.set_defaults(job=run_duplicates)
+
+    serve_parser = commands.add_parser("serve", help="Serve the catalog as a read-only JSON API on localhost")
+    serve_parser.add_argument("--host", default=DEFAULT_API_HOST)
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_API_PORT)
+    serve_parser.set_defaults(job=run_serve, catalog_only=True)
+    return parser
+
+def main(argv=None):
+    """Run one job; returns the exit code"""
+    args = build_parser().parse_args(argv)
+    session = Session(args)
+    try:
+        return args.job(session, args)
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
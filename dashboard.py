@@ -0,0 +1,167 @@
+"""
+Dashboard data aggregation with concurrent fetches and a cached model
+"""
+import time
+import threading
+from io import BytesIO
+from datetime import date, datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from playlist_manager import MOOD_PARAMS
+from tracing import tracer
+from http_pool import http_pool
+from track_model import tracks_from_spotify
+
+RECENT_LIMIT = 50
+RECENT_SHOWN = 5
+ALBUM_ART_SIZE = (40, 40)
+
+def classify_mood(features):
+    """Pick the mood whose target valence/energy is closest to the average of some audio features"""
+    features = [f for f in features if f]
+    if not features:
+        return None
+
+    valence = sum(f['valence'] for f in features) / len(features)
+    energy = sum(f['energy'] for f in features) / len(features)
+
+    def distance(mood):
+        params = MOOD_PARAMS[mood]
+        return (params['target_valence'] - valence) ** 2 + (params['target_energy'] - energy) ** 2
+
+    return min(MOOD_PARAMS, key=distance)
+
+def local_day_start(day=None):
+    """UTC ISO timestamp of local midnight on a day (today by default), for comparing with played_at"""
+    midnight = datetime.combine(day or date.today(), datetime.min.time()).astimezone()
+    return midnight.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def load_image(url, size):
+    """Download and resize an image, returning a PIL image or None"""
+    try:
+        with tracer.span("album_art.download", "network"):
+            response = http_pool.get(url, "images", use_etag=True, persist=True)
+        if response.status_code == 200:
+            with tracer.span("album_art.resize", "image"):
+                img = Image.open(BytesIO(response.content))
+                return img.resize(size, Image.LANCZOS)
+        return None
+    except Exception as e:
+        print(f"Error loading album art: {e}")
+        return None
+
+def stat_cards(model):
+    """Turn a dashboard model into (title, value) pairs for the stat cards"""
+    if not model:
+        return [("Recently Played", "-"), ("Top Genre", "-"), ("Top Artist", "-"), ("Mood Today", "-")]
+
+    plays = model['plays_today']
+    return [
+        ("Recently Played", f"{plays} track{'s' if plays != 1 else ''} today"),
+        ("Top Genre", (model['top_genre'] or "Unknown").title()),
+        ("Top Artist", model['top_artist'] or "Unknown"),
+        ("Mood Today", model['mood'] or "Unknown")
+    ]
+
+class DashboardAggregator:
+    def __init__(self, spotify_client, catalog, async_client=None, max_workers=6):
+        self.spotify = spotify_client
+        self.catalog = catalog
+        self.async_client = async_client  # Optional AsyncSpotify; API calls then share its event loop
+        self.max_workers = max_workers
+        self.model = None  # Last composed dashboard model
+        self.refreshing = False
+        self._lock = threading.Lock()
+
+    def get_cached(self):
+        """Get the last dashboard model without any network calls"""
+        with self._lock:
+            return self.model
+
+    def refresh(self):
+        """Fetch everything the dashboard needs in one concurrent batch and compose the model"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            recent_future = self._fetch(pool, "current_user_recently_played", limit=RECENT_LIMIT)
+            artists_future = self._fetch(pool, "current_user_top_artists", limit=20, time_range="short_term")
+
+            recent_items = recent_future.result()['items']
+            recent_tracks = tracks_from_spotify(recent_items)
+            shown = recent_tracks[:RECENT_SHOWN]
+
+            # Mood and album art only depend on the recent plays, so they overlap with the top artists call
+            track_ids = [track.id for track in recent_tracks if track.id][:100]
+            features_future = self._fetch(pool, "audio_features", track_ids) if track_ids else None
+            art_futures = {}
+            for track in shown:
+                if track.image_url and track.image_url not in art_futures:
+                    art_futures[track.image_url] = pool.submit(load_image, track.image_url, ALBUM_ART_SIZE)
+
+            top_artists = (self._safe_result(artists_future) or {}).get('items', [])
+            features = self._safe_result(features_future) or []
+            album_art = {url: future.result() for url, future in art_futures.items()}
+
+        # Fold the fetched plays into the catalog and compute stats from it
+        self.catalog.record_plays(recent_items)
+        # "Today" is the user's local day, while played_at is stored in UTC
+        stats_today = self.catalog.play_stats(since=local_day_start())
+
+        genre_counts = {}
+        for artist in top_artists:
+            for genre in artist.get('genres', []):
+                genre_counts[genre] = genre_counts.get(genre, 0) + 1
+        top_genre = max(genre_counts, key=genre_counts.get) if genre_counts else None
+
+        model = {
+            'recent_tracks': shown,
+            'album_art': album_art,
+            'plays_today': stats_today['plays'],
+            'tracks_today': stats_today['tracks'],
+            'top_genre': top_genre,
+            'top_artist': self.catalog.top_played_artist(),
+            'mood': classify_mood(features),
+            'total_plays': self.catalog.play_stats()['plays'],
+            'updated_at': time.time()
+        }
+
+        with self._lock:
+            self.model = model
+        return model
+
+    def _fetch(self, pool, method, *args, **kwargs):
+        """Start an API call on the async facade's loop, or on a pool thread without one; returns a Future"""
+        if self.async_client:
+            return self.async_client.submit(getattr(self.async_client, method)(*args, **kwargs))
+        return pool.submit(getattr(self.spotify, method), *args, **kwargs)
+
+    def refresh_async(self, callback=None):
+        """Refresh in a background thread; callback(model, error) runs on that thread"""
+        with self._lock:
+            if self.refreshing:
+                return False
+            self.refreshing = True
+
+        def worker():
+            model, error = None, None
+            try:
+                model = self.refresh()
+            except Exception as e:
+                error = e
+                print(f"Error refreshing dashboard: {e}")
+            finally:
+                with self._lock:
+                    self.refreshing = False
+            if callback:
+                callback(model, error)
+
+        threading.Thread(target=worker, daemon=True).start()
+        return True
+
+    def _safe_result(self, future):
+        """Get a future's result, treating failures as missing data"""
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error fetching dashboard data: {e}")
+            return None
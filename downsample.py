@@ -0,0 +1,46 @@
+"""
+Time-series downsampling for charts
+"""
+import numpy as np
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: pick `threshold` points that keep the visual shape of a series"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    # First and last points are always kept; the rest is split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    sampled = np.empty(threshold, dtype=int)
+    sampled[0] = 0
+    sampled[-1] = n - 1
+
+    a = 0  # Index of the previously selected point
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+
+        # Average of the next bucket (or the last point) is the third triangle corner
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        sampled[i + 1] = a
+
+    return x[sampled], y[sampled]
+
+def bucket_max(x, y, buckets):
+    """Split a series into equal buckets and keep each one's first x and largest y (a cheap outline for previews)"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    step = max(1, len(x) // max(1, buckets))
+    n = len(x) // step * step
+    if n == 0:
+        return x, y
+    return x[:n:step], y[:n].reshape(-1, step).max(axis=1)
@@ -0,0 +1,85 @@
+"""
+Playback DSP: loudness-normalizing gain and sample-accurate crossfades on PCM buffers
+"""
+import time
+import numpy as np
+
+# Level all tracks to this gated loudness (see audio_analysis.gated_loudness)
+TARGET_LOUDNESS_DB = -16.0
+MAX_BOOST_DB = 12.0
+MAX_CUT_DB = -24.0
+HEADROOM_DB = 1.0
+DEFAULT_CROSSFADE_SECONDS = 3.0
+
+def gain_for_loudness(loudness_db, peak_db=None, target_db=TARGET_LOUDNESS_DB):
+    """Linear gain that brings a track to the target loudness without clipping its peak"""
+    if loudness_db is None:
+        return 1.0
+    gain_db = min(max(target_db - loudness_db, MAX_CUT_DB), MAX_BOOST_DB)
+    if peak_db is not None:
+        gain_db = min(gain_db, -HEADROOM_DB - peak_db)
+    return float(10 ** (gain_db / 20))
+
+def to_int16(samples):
+    """Clip float samples back into the int16 range"""
+    return np.clip(samples, -32768, 32767).astype(np.int16)
+
+def apply_gain(pcm, gain):
+    """Scale an int16 PCM buffer by a linear gain"""
+    if gain == 1.0:
+        return pcm
+    return to_int16(pcm.astype(np.float32) * np.float32(gain))
+
+def fade_curves(frames):
+    """Equal-power fade-out and fade-in curves as (frames, 1) column vectors"""
+    t = np.linspace(0.0, np.pi / 2, frames, dtype=np.float32)
+    return np.cos(t)[:, np.newaxis], np.sin(t)[:, np.newaxis]
+
+def crossfade(tail, head, tail_gain=1.0, head_gain=1.0):
+    """Mix the end of one buffer into the start of another over their common length"""
+    frames = min(len(tail), len(head))
+    if frames == 0:
+        return np.zeros((0,) + tail.shape[1:], dtype=np.int16)
+
+    fade_out, fade_in = fade_curves(frames)
+    mixed = tail[:frames].astype(np.float32) * (fade_out * np.float32(tail_gain))
+    mixed += head[:frames].astype(np.float32) * (fade_in * np.float32(head_gain))
+    return to_int16(mixed)
+
+def render_switch(current_pcm, position, next_pcm, fade_frames, current_gain=1.0, next_gain=1.0):
+    """Render a buffer that crossfades from a position in one track into the whole of the next"""
+    tail = current_pcm[position:position + fade_frames]
+    mixed = crossfade(tail, next_pcm, current_gain, next_gain)
+    body = apply_gain(next_pcm[len(mixed):], next_gain)
+    return np.concatenate((mixed, body))
+
+def benchmark(seconds=60, sample_rate=44100, channels=2, fade_seconds=DEFAULT_CROSSFADE_SECONDS, repeats=5):
+    """Measure CPU seconds spent per second of audio for gain and crossfade rendering"""
+    rng = np.random.default_rng(0)
+    frames = seconds * sample_rate
+    current = rng.integers(-20000, 20000, size=(frames, channels), dtype=np.int16)
+    upcoming = rng.integers(-20000, 20000, size=(frames, channels), dtype=np.int16)
+    fade_frames = int(fade_seconds * sample_rate)
+
+    best = None
+    for _ in range(repeats):
+        start = time.process_time()
+        apply_gain(current, 0.8)
+        render_switch(current, frames - fade_frames, upcoming, fade_frames, 0.8, 1.2)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Two full tracks of audio are processed per repeat
+    cost = best / (2 * seconds)
+    return {
+        'audio_seconds': 2 * seconds,
+        'cpu_seconds': best,
+        'cpu_per_audio_second': cost,
+        'realtime_factor': 1 / cost if cost else float('inf')
+    }
+
+if __name__ == "__main__":
+    result = benchmark()
+    print(f"Processed {result['audio_seconds']}s of audio in {result['cpu_seconds'] * 1000:.1f}ms CPU")
+    print(f"Cost per second of audio: {result['cpu_per_audio_second'] * 1000:.3f}ms "
+          f"({result['realtime_factor']:.0f}x faster than real time)")
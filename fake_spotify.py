@@ -0,0 +1,282 @@
+"""
+Deterministic fake spotipy client with synthetic data, for benchmarks and offline runs
+
+Page limits are not capped like the real API so benchmarks can ask for large pages.
+"""
+import time
+import random
+from datetime import datetime, timedelta, timezone
+
+GENRES = [
+    "pop", "dance pop", "rock", "indie rock", "hip hop", "rap", "edm", "house",
+    "techno", "jazz", "soul", "r&b", "classical", "ambient", "folk", "country",
+    "metal", "punk", "bollywood", "filmi", "latin", "reggaeton", "k-pop", "lo-fi"
+]
+WORDS = [
+    "love", "night", "fire", "dream", "heart", "summer", "city", "lights", "rain",
+    "dance", "blue", "gold", "wild", "home", "road", "star", "ocean", "echo", "shadow", "sun"
+]
+
+class FakeSpotify:
+    def __init__(self, n_tracks=1000, seed=0, latency=0.0, n_playlists=20, playlist_size=None):
+        self.latency = latency  # Seconds slept per call, to mimic network round-trips
+        self.calls = {}  # Method name -> number of calls
+        rng = random.Random(seed)
+
+        n_artists = max(1, n_tracks // 10)
+        self.artists_by_id = {}
+        for i in range(n_artists):
+            artist_id = f"artist{i:06d}"
+            self.artists_by_id[artist_id] = {
+                'id': artist_id,
+                'name': f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}",
+                'genres': rng.sample(GENRES, rng.randint(1, 3)),
+                'popularity': rng.randint(0, 100),
+                'followers': {'total': rng.randint(100, 5000000)},
+                'images': [],
+                'type': "artist",
+                'uri': f"spotify:artist:{artist_id}"
+            }
+        artist_ids = list(self.artists_by_id)
+
+        self.tracks = []
+        self.features_by_id = {}
+        now = datetime.now(timezone.utc)
+        for i in range(n_tracks):
+            track_id = f"track{i:06d}"
+            artist = self.artists_by_id[rng.choice(artist_ids)]
+            album_id = f"album{i // 10:06d}"
+            self.tracks.append({
+                'id': track_id,
+                'name': f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+                'artists': [{'id': artist['id'], 'name': artist['name']}],
+                'album': {
+                    'id': album_id,
+                    'name': f"{rng.choice(WORDS).title()} Album {i // 10}",
+                    'images': [],
+                    'release_date': f"{rng.randint(1970, 2024)}-01-01"
+                },
+                'duration_ms': rng.randint(120000, 360000),
+                'popularity': rng.randint(0, 100),
+                'preview_url': None,
+                'external_ids': {'isrc': f"FAKE{i:08d}"},
+                'type': "track",
+                'uri': f"spotify:track:{track_id}"
+            })
+            self.features_by_id[track_id] = {
+                'id': track_id,
+                'danceability': rng.random(),
+                'energy': rng.random(),
+                'valence': rng.random(),
+                'tempo': rng.uniform(60, 190),
+                'acousticness': rng.random(),
+                'instrumentalness': rng.random() ** 3,
+                'speechiness': rng.random() * 0.3,
+                'liveness': rng.random() * 0.5,
+                'loudness': rng.uniform(-20, -3),
+                'key': rng.randint(0, 11),
+                'mode': rng.randint(0, 1)
+            }
+        self.tracks_by_id = {track['id']: track for track in self.tracks}
+
+        # Listening history spread over the last 30 days, newest first
+        self.history = []
+        for i in range(min(n_tracks, 500)):
+            played_at = now - timedelta(minutes=i * 37 + rng.randint(0, 30))
+            self.history.append({
+                'track': rng.choice(self.tracks) if self.tracks else None,
+                'played_at': played_at.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                'context': None
+            })
+
+        # Saved library, newest first
+        self.saved = []
+        for i, track in enumerate(self.tracks):
+            added_at = now - timedelta(hours=i * 3)
+            self.saved.append({'added_at': added_at.strftime("%Y-%m-%dT%H:%M:%SZ"), 'track': track})
+
+        # Playlists reuse slices of the track list
+        size = playlist_size or max(1, min(n_tracks, 100))
+        self.playlists = {}
+        for i in range(n_playlists):
+            playlist_id = f"playlist{i:04d}"
+            items = [{'added_at': None, 'track': track} for track in rng.sample(self.tracks, min(size, len(self.tracks)))]
+            self.playlists[playlist_id] = {
+                'id': playlist_id,
+                'name': f"{rng.choice(WORDS).title()} Mix {i}",
+                'description': "Synthetic playlist",
+                'owner': {'id': "fake_user"},
+                'items': items,
+                'snapshot_id': "snapshot0"
+            }
+
+    def _call(self, name):
+        """Count a call and simulate its latency"""
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _new_snapshot(self, playlist):
+        """Give a changed playlist a new snapshot id"""
+        playlist['snapshot_id'] = f"snapshot{int(playlist['snapshot_id'][len('snapshot'):]) + 1}"
+        return playlist['snapshot_id']
+
+    def _page(self, items, limit, offset, base):
+        """Build a spotipy-style paging object"""
+        page = items[offset:offset + limit]
+        has_next = offset + limit < len(items)
+        return {
+            'items': page,
+            'total': len(items),
+            'limit': limit,
+            'offset': offset,
+            'next': f"https://api.spotify.com/v1/{base}?offset={offset + limit}&limit={limit}" if has_next else None
+        }
+
+    def current_user(self):
+        self._call("current_user")
+        return {'id': "fake_user", 'display_name': "Benchmark User"}
+
+    def current_user_recently_played(self, limit=50, after=None, before=None):
+        self._call("current_user_recently_played")
+        return {'items': self.history[:limit]}
+
+    def current_user_top_artists(self, limit=20, offset=0, time_range="medium_term"):
+        self._call("current_user_top_artists")
+        return self._page(list(self.artists_by_id.values()), limit, offset, "me/top/artists")
+
+    def current_user_top_tracks(self, limit=20, offset=0, time_range="medium_term"):
+        self._call("current_user_top_tracks")
+        return self._page(self.tracks, limit, offset, "me/top/tracks")
+
+    def current_user_saved_tracks(self, limit=20, offset=0, market=None):
+        self._call("current_user_saved_tracks")
+        return self._page(self.saved, limit, offset, "me/tracks")
+
+    def audio_features(self, tracks=[]):
+        self._call("audio_features")
+        return [self.features_by_id.get(track_id) for track_id in tracks]
+
+    def track(self, track_id, market=None):
+        self._call("track")
+        return self.tracks_by_id.get(track_id)
+
+    def tracks(self, tracks, market=None):
+        self._call("tracks")
+        return {'tracks': [self.tracks_by_id.get(track_id) for track_id in tracks]}
+
+    def artist(self, artist_id):
+        self._call("artist")
+        return self.artists_by_id.get(artist_id)
+
+    def artists(self, artists):
+        self._call("artists")
+        return {'artists': [self.artists_by_id.get(artist_id) for artist_id in artists]}
+
+    def artist_top_tracks(self, artist_id, country="US"):
+        self._call("artist_top_tracks")
+        return {'tracks': [t for t in self.tracks if t['artists'][0]['id'] == artist_id][:10]}
+
+    def artist_albums(self, artist_id, album_type=None, country=None, limit=20, offset=0):
+        self._call("artist_albums")
+        albums = {}
+        for track in self.tracks:
+            if track['artists'][0]['id'] == artist_id:
+                albums.setdefault(track['album']['id'], track['album'])
+        return self._page(list(albums.values()), limit, offset, f"artists/{artist_id}/albums")
+
+    def search(self, q, limit=10, offset=0, type="track", market=None):
+        self._call("search")
+        words = q.lower().split()
+        types = type.split(",")
+        results = {}
+        if "track" in types:
+            matches = [t for t in self.tracks if all(w in t['name'].lower() or w in t['artists'][0]['name'].lower() for w in words)]
+            results['tracks'] = self._page(matches, limit, offset, "search")
+        if "artist" in types:
+            matches = [a for a in self.artists_by_id.values() if all(w in a['name'].lower() for w in words)]
+            results['artists'] = self._page(matches, limit, offset, "search")
+        if "album" in types:
+            results['albums'] = self._page([], limit, offset, "search")
+        return results
+
+    def recommendations(self, seed_artists=None, seed_genres=None, seed_tracks=None, limit=20, country=None, **kwargs):
+        self._call("recommendations")
+        target_valence = kwargs.get("target_valence", 0.5)
+        target_energy = kwargs.get("target_energy", 0.5)
+
+        def distance(track):
+            features = self.features_by_id[track['id']]
+            return (features['valence'] - target_valence) ** 2 + (features['energy'] - target_energy) ** 2
+
+        return {'tracks': sorted(self.tracks, key=distance)[:limit]}
+
+    def current_user_playlists(self, limit=50, offset=0):
+        self._call("current_user_playlists")
+        summaries = [
+            {
+                'id': p['id'],
+                'name': p['name'],
+                'description': p['description'],
+                'owner': p['owner'],
+                'snapshot_id': p['snapshot_id'],
+                'tracks': {'total': len(p['items'])}
+            }
+            for p in self.playlists.values()
+        ]
+        return self._page(summaries, limit, offset, "me/playlists")
+
+    def playlist(self, playlist_id, fields=None, market=None, additional_types=("track",)):
+        self._call("playlist")
+        p = self.playlists[playlist_id]
+        return {
+            'id': p['id'],
+            'name': p['name'],
+            'description': p['description'],
+            'owner': p['owner'],
+            'snapshot_id': p['snapshot_id'],
+            'tracks': self._page(p['items'], 100, 0, f"playlists/{playlist_id}/tracks")
+        }
+
+    def playlist_tracks(self, playlist_id, fields=None, limit=100, offset=0, market=None, additional_types=("track",)):
+        self._call("playlist_tracks")
+        return self._page(self.playlists[playlist_id]['items'], limit, offset, f"playlists/{playlist_id}/tracks")
+
+    def playlist_items(self, playlist_id, fields=None, limit=100, offset=0, market=None, additional_types=("track", "episode")):
+        return self.playlist_tracks(playlist_id, fields, limit, offset, market)
+
+    def user_playlist_create(self, user, name, public=True, collaborative=False, description=""):
+        self._call("user_playlist_create")
+        playlist_id = f"playlist{len(self.playlists):04d}"
+        self.playlists[playlist_id] = {
+            'id': playlist_id,
+            'name': name,
+            'description': description,
+            'owner': {'id': user},
+            'items': [],
+            'snapshot_id': "snapshot0"
+        }
+        return {'id': playlist_id, 'name': name}
+
+    def playlist_add_items(self, playlist_id, items, position=None):
+        self._call("playlist_add_items")
+        ids = [item.split(":")[-1] for item in items]
+        new_items = [{'added_at': None, 'track': self.tracks_by_id[i]} for i in ids if i in self.tracks_by_id]
+        playlist = self.playlists[playlist_id]
+        if position is None:
+            playlist['items'].extend(new_items)
+        else:
+            playlist['items'][position:position] = new_items
+        return {'snapshot_id': self._new_snapshot(playlist)}
+
+    def playlist_remove_all_occurrences_of_items(self, playlist_id, items, snapshot_id=None):
+        self._call("playlist_remove_all_occurrences_of_items")
+        ids = {item.split(":")[-1] for item in items}
+        playlist = self.playlists[playlist_id]
+        playlist['items'] = [item for item in playlist['items'] if item['track']['id'] not in ids]
+        return {'snapshot_id': self._new_snapshot(playlist)}
+
+    def playlist_replace_items(self, playlist_id, items):
+        self._call("playlist_replace_items")
+        self.playlists[playlist_id]['items'] = []
+        return self.playlist_add_items(playlist_id, items)
@@ -0,0 +1,205 @@
+"""
+Shared pooled HTTP sessions for the Spotify API, album art and audio previews
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Per host class: connections kept per host, and (connect, read) timeouts in seconds
+HOST_CLASSES = {
+    'api': {'pool_maxsize': 10, 'timeout': (3.05, 10)},  # api.spotify.com and accounts.spotify.com
+    'images': {'pool_maxsize': 8, 'timeout': (3.05, 5)},  # i.scdn.co album art
+    'previews': {'pool_maxsize': 4, 'timeout': (3.05, 15)}  # p.scdn.co 30 second previews
+}
+ETAG_CACHE_BYTES = 32 * 1024 * 1024
+# Downloaded album art and previews are kept here so they still load offline
+DEFAULT_MEDIA_DIR = "media_cache"
+MEDIA_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Least recently used media files are pruned beyond this
+MEDIA_CACHE_MAX_AGE = 30 * 24 * 3600  # Media files unused for longer than this (seconds) are pruned
+
+class HttpPool:
+    """One keep-alive requests.Session per host class, with an optional ETag cache"""
+    def __init__(self, etag_cache_bytes=ETAG_CACHE_BYTES, media_dir=DEFAULT_MEDIA_DIR):
+        self.sessions = {}  # Host class -> requests.Session
+        self.media_dir = media_dir
+        self.etag_cache_bytes = etag_cache_bytes
+        self._etags = OrderedDict()  # URL -> (etag, content), least recently used first
+        self._etag_bytes = 0
+        self.cache_hits = 0  # 304 responses served from the ETag cache
+        self._lock = threading.Lock()
+
+    def session(self, host_class="api"):
+        """Get the shared session for a host class, creating it on first use"""
+        with self._lock:
+            session = self.sessions.get(host_class)
+            if session is None:
+                config = HOST_CLASSES[host_class]
+                retries = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config['pool_maxsize'], max_retries=retries)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.sessions[host_class] = session
+            return session
+
+    def get(self, url, host_class="images", use_etag=False, persist=False, **kwargs):
+        """GET through the pooled session
+
+        With use_etag, a 304 is answered from the cached body. With persist, the
+        body is saved under media_dir and served from there if the network fails.
+        """
+        if persist and self.media_dir:
+            try:
+                response = self.get(url, host_class, use_etag, **kwargs)
+            except requests.exceptions.RequestException:
+                response = self._load_media(url)
+                if response is None:
+                    raise
+                return response
+            if response.status_code == 200:
+                self._save_media(url, response.content)
+            return response
+
+        kwargs.setdefault("timeout", HOST_CLASSES[host_class]['timeout'])
+        cached = None
+        if use_etag:
+            with self._lock:
+                cached = self._etags.get(url)
+                if cached:
+                    self._etags.move_to_end(url)
+            if cached:
+                kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'If-None-Match': cached[0]})
+
+        response = self.session(host_class).get(url, **kwargs)
+
+        if cached and response.status_code == 304:
+            # Present the cached body as a normal 200 response to callers
+            response.status_code = 200
+            response._content = cached[1]
+            self.cache_hits += 1
+        elif use_etag and response.status_code == 200 and response.headers.get("ETag"):
+            self._remember(url, response.headers["ETag"], response.content)
+        return response
+
+    def _media_path(self, url):
+        """File a URL's body is persisted to"""
+        return os.path.join(self.media_dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+    def _save_media(self, url, content):
+        """Persist a downloaded body"""
+        try:
+            os.makedirs(self.media_dir, exist_ok=True)
+            path = self._media_path(url)
+            with open(path + ".tmp", "wb") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            print(f"Error saving media cache file: {e}")
+
+    def _load_media(self, url):
+        """Build a 200 response from a persisted body, or None"""
+        path = self._media_path(url)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path)  # The modification time marks when a file was last used
+        except OSError:
+            return None
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = content
+        response.headers['X-Offline-Cache'] = "stale"
+        return response
+
+    def prune_media_cache(self, max_bytes=MEDIA_CACHE_MAX_BYTES, max_age=MEDIA_CACHE_MAX_AGE):
+        """Delete media files unused for max_age seconds, then the least recently used beyond max_bytes; returns files deleted"""
+        try:
+            entries = [entry for entry in os.scandir(self.media_dir) if entry.is_file() and not entry.name.endswith(".tmp")]
+        except OSError:
+            return 0
+        files = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort(reverse=True)  # Most recently used first
+
+        cutoff = time.time() - max_age
+        deleted, kept_bytes = 0, 0
+        for mtime, size, path in files:
+            if mtime >= cutoff and kept_bytes + size <= max_bytes:
+                kept_bytes += size
+                continue
+            try:
+                os.remove(path)
+                deleted += 1
+            except OSError as e:
+                print(f"Error pruning media cache file: {e}")
+        return deleted
+
+    def _remember(self, url, etag, content):
+        """Store a body by URL, evicting the least recently used ones over budget"""
+        with self._lock:
+            old = self._etags.pop(url, None)
+            if old:
+                self._etag_bytes -= len(old[1])
+            if len(content) > self.etag_cache_bytes:
+                return
+            self._etags[url] = (etag, content)
+            self._etag_bytes += len(content)
+            while self._etag_bytes > self.etag_cache_bytes:
+                _, (_, evicted) = self._etags.popitem(last=False)
+                self._etag_bytes -= len(evicted)
+
+    def memory_usage(self):
+        """Bytes of response bodies held by the ETag cache"""
+        return self._etag_bytes
+
+    def trim(self, max_bytes):
+        """Evict least recently used ETag bodies until at most max_bytes are held; returns bytes freed"""
+        freed = 0
+        with self._lock:
+            while self._etags and self._etag_bytes > max_bytes:
+                _, (_, evicted) = self._etags.popitem(last=False)
+                self._etag_bytes -= len(evicted)
+                freed += len(evicted)
+        return freed
+
+    def stats(self):
+        """Requests, new connections and connection reuse rate per host class"""
+        stats = {}
+        with self._lock:
+            sessions = dict(self.sessions)
+        for host_class, session in sessions.items():
+            requests_made, connections = 0, 0
+            adapter = session.get_adapter("https://")
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    requests_made += pool.num_requests
+                    connections += pool.num_connections
+            stats[host_class] = {
+                'requests': requests_made,
+                'connections': connections,
+                'reuse_rate': 1 - connections / requests_made if requests_made else 0.0
+            }
+        stats['etag_cache'] = {'entries': len(self._etags), 'bytes': self._etag_bytes, 'hits': self.cache_hits}
+        return stats
+
+    def close(self):
+        """Close every session and its pooled connections"""
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+# Shared pool used across the app
+http_pool = HttpPool()
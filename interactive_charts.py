@@ -0,0 +1,288 @@
+"""
+Interactive Matplotlib charts: hover feedback is blitted over a cached background
+"""
+import time
+import numpy as np
+import pandas as pd
+import matplotlib.dates as mdates
+from matplotlib.container import Container
+from matplotlib.lines import Line2D
+from matplotlib.patches import Wedge
+from downsample import bucket_max
+
+ZOOM_STEP = 1.25  # Axis range change per scroll step
+FRAME_INTERVAL = 1 / 30  # Zoom/pan frames are drawn at most 30 times a second
+PREVIEW_POINTS = 200  # Vertices in the blitted line shown while zooming or panning
+REFETCH_DELAY_MS = 150  # Wait this long after zoom/pan stops before the full redraw and loading a new rollup level
+DATE_FORMATS = {'day': "%b %d, %Y", 'week': "Week of %b %d, %Y", 'month': "%B %Y"}
+
+class BlitManager:
+    """Keeps a copy of the static figure and redraws only the animated artists on top of it"""
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.artists = []
+        self.background = None
+        canvas.mpl_connect("draw_event", self.on_draw)
+
+    def add(self, artist):
+        """Register an artist that is drawn only by blitting"""
+        artist.set_animated(True)
+        self.artists.append(artist)
+        return artist
+
+    def on_draw(self, event):
+        """Cache the background after every full draw (first draw, resize, zoom)"""
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        """Draw the animated artists"""
+        for artist in self.artists:
+            if artist.get_visible():
+                self.canvas.figure.draw_artist(artist)
+
+    def update(self):
+        """Restore the cached background, draw the animated artists and blit"""
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_animated()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+class HoverChart:
+    """Base class showing a tooltip for whatever is under the pointer"""
+    def __init__(self, canvas, ax):
+        self.canvas = canvas
+        self.ax = ax
+        self.blit = BlitManager(canvas)
+        self.tooltip = self.blit.add(ax.annotate(
+            "",
+            xy=(0, 0),
+            xytext=(12, 12),
+            textcoords="offset points",
+            color="white",
+            bbox=dict(boxstyle="round", fc="#1E1E2E", ec="#7C4DFF", alpha=0.9),
+            visible=False
+        ))
+        self._hover_key = None
+        canvas.mpl_connect("motion_notify_event", self.on_move)
+        canvas.mpl_connect("figure_leave_event", lambda event: self.set_hover(None))
+
+    def hit_test(self, event):
+        """Return (key, xy, text) for the item under the pointer, or None"""
+        return None
+
+    def show_hit(self, hit):
+        """Update extra hover artists for a hit (or None)"""
+
+    def on_move(self, event):
+        """Update the tooltip when the pointer moves onto a different item"""
+        self.set_hover(self.hit_test(event) if event.inaxes is self.ax else None)
+
+    def set_hover(self, hit):
+        """Show a hit; nothing is redrawn unless the hovered item changed"""
+        key = hit[0] if hit else None
+        if key == self._hover_key:
+            return
+        self._hover_key = key
+
+        if hit:
+            self.tooltip.xy = hit[1]
+            self.tooltip.set_text(hit[2])
+        self.tooltip.set_visible(bool(hit))
+        self.show_hit(hit)
+        self.blit.update()
+
+class PieHoverChart(HoverChart):
+    """Genre pie chart that outlines and labels the wedge under the pointer"""
+    def __init__(self, canvas, ax, wedges, labels, values):
+        super().__init__(canvas, ax)
+        self.wedges = wedges
+        self.labels = list(labels)
+        self.values = list(values)
+        self.total = sum(self.values) or 1
+        self.highlight = self.blit.add(Wedge((0, 0), 1, 0, 0, fill=False, linewidth=3, edgecolor="white", visible=False))
+        ax.add_patch(self.highlight)
+
+    def hit_test(self, event):
+        for i, wedge in enumerate(self.wedges):
+            if wedge.contains(event)[0]:
+                share = self.values[i] / self.total
+                return i, (event.xdata, event.ydata), f"{self.labels[i]}\n{self.values[i]} artists ({share:.1%})"
+        return None
+
+    def show_hit(self, hit):
+        if hit:
+            wedge = self.wedges[hit[0]]
+            self.highlight.set_center(wedge.center)
+            self.highlight.set_radius(wedge.r)
+            self.highlight.set_theta1(wedge.theta1)
+            self.highlight.set_theta2(wedge.theta2)
+        self.highlight.set_visible(bool(hit))
+
+class HistoryChart(HoverChart):
+    """Listening history with a hover cursor, scroll-wheel zoom and drag-to-pan
+
+    plot(ax, df, level, max_points) draws a series and returns its artists.
+    fetch(start, end, max_points) loads (df, level) for a date range, or is
+    None when the data can't be re-queried.
+    """
+    def __init__(self, canvas, ax, df, level, max_points, plot, fetch=None):
+        super().__init__(canvas, ax)
+        self.max_points = max_points
+        self.plot = plot
+        self.fetch = fetch
+        self.series_artists = []
+        self.frame_interval = FRAME_INTERVAL
+        self.cursor = self.blit.add(ax.axvline(0, color="white", linewidth=1, alpha=0.6, visible=False))
+        # Coarse line blitted over a frozen background while zooming or panning
+        self.preview = self.blit.add(Line2D([], [], linewidth=1, color="#7C4DFF", visible=False))
+        ax.add_line(self.preview)
+        self.previewing = False
+        self._pan_start = None  # (pixel x, xlim) while dragging
+        self._last_frame = 0.0
+        self._frame_timer = canvas.new_timer(interval=int(FRAME_INTERVAL * 1000))
+        self._frame_timer.single_shot = True
+        self._frame_timer.add_callback(self.draw_frame)
+        self._frame_pending = False
+        self._refetch_timer = canvas.new_timer(interval=REFETCH_DELAY_MS)
+        self._refetch_timer.single_shot = True
+        self._refetch_timer.add_callback(self.settle)
+
+        self.set_series(df, level)
+        self.bounds = (self.x[0], self.x[-1]) if len(self.x) else (0, 1)
+
+        canvas.mpl_connect("scroll_event", self.on_scroll)
+        canvas.mpl_connect("button_press_event", self.on_press)
+        canvas.mpl_connect("button_release_event", self.on_release)
+
+    def set_series(self, df, level):
+        """Replace the plotted series, keeping the current view range"""
+        for artist in self.series_artists:
+            artist.remove()
+        self.level = level
+        self.dates = pd.to_datetime(df['date'])
+        self.x = mdates.date2num(self.dates)
+        self.y = df['count'].to_numpy()
+        self.series_artists = self.plot(self.ax, df, level, self.max_points)
+        if self.previewing:
+            self.set_series_visible(False)
+
+    def set_series_visible(self, visible):
+        """Show or hide the full series (bar containers hold one patch per bar)"""
+        for artist in self.series_artists:
+            for part in (artist if isinstance(artist, Container) else [artist]):
+                part.set_visible(visible)
+
+    def hit_test(self, event):
+        if self._pan_start or self.previewing or not len(self.x) or event.xdata is None:
+            return None
+        # Nearest bucket to the pointer
+        i = int(np.clip(np.searchsorted(self.x, event.xdata), 1, len(self.x) - 1))
+        if event.xdata - self.x[i - 1] < self.x[i] - event.xdata:
+            i -= 1
+        label = self.dates[i].strftime(DATE_FORMATS.get(self.level, "%Y-%m-%d"))
+        return i, (self.x[i], self.y[i]), f"{label}\n{self.y[i]} plays"
+
+    def show_hit(self, hit):
+        if hit:
+            self.cursor.set_xdata([hit[1][0], hit[1][0]])
+        self.cursor.set_visible(bool(hit))
+
+    def set_xlim(self, xmin, xmax):
+        """Set the visible range, clamped to the data"""
+        width = min(xmax - xmin, self.bounds[1] - self.bounds[0] + 1)
+        xmin = min(max(xmin, self.bounds[0] - 1), self.bounds[1] + 1 - width)
+        self.ax.set_xlim(xmin, xmin + width)
+
+    def on_scroll(self, event):
+        """Zoom around the pointer; steps arriving between frames share one frame"""
+        if event.inaxes is not self.ax or event.xdata is None:
+            return
+        scale = 1 / ZOOM_STEP if event.button == "up" else ZOOM_STEP
+        xmin, xmax = self.ax.get_xlim()
+        self.set_hover(None)
+        self.set_xlim(event.xdata - (event.xdata - xmin) * scale, event.xdata + (xmax - event.xdata) * scale)
+        self.request_frame()
+        self._refetch_timer.start()
+
+    def on_press(self, event):
+        """Start panning"""
+        if event.inaxes is self.ax and event.button == 1:
+            self._pan_start = (event.x, self.ax.get_xlim())
+            self.set_hover(None)
+
+    def on_move(self, event):
+        """Pan while dragging, otherwise update the hover tooltip"""
+        if not self._pan_start:
+            super().on_move(event)
+            return
+
+        start_x, (xmin, xmax) = self._pan_start
+        data_per_pixel = (xmax - xmin) / max(1, self.ax.bbox.width)
+        shift = (start_x - event.x) * data_per_pixel
+        self.set_xlim(xmin + shift, xmax + shift)
+        self.request_frame()
+
+    def on_release(self, event):
+        """Finish panning and load the right rollup level for the new range"""
+        if self._pan_start:
+            self._pan_start = None
+            self._refetch_timer.start()
+
+    def request_frame(self):
+        """Draw a preview frame now, or once the frame interval has passed if one was just drawn"""
+        wait = self.frame_interval - (time.perf_counter() - self._last_frame)
+        if wait <= 0:
+            self.draw_frame()
+        elif not self._frame_pending:
+            # Later zoom/pan events only move the axis range; this frame draws wherever it ends up
+            self._frame_pending = True
+            self._frame_timer.interval = max(1, int(wait * 1000))
+            self._frame_timer.start()
+
+    def draw_frame(self):
+        """Blit the coarse preview line for the current range over the frozen background"""
+        self._frame_pending = False
+        self._last_frame = time.perf_counter()
+        if not self.previewing:
+            # One full draw without the series; ticks stay frozen until settle()
+            self.previewing = True
+            self.set_series_visible(False)
+            self.preview.set_visible(True)
+            self.canvas.draw()
+
+        xmin, xmax = self.ax.get_xlim()
+        start = max(0, np.searchsorted(self.x, xmin) - 1)
+        end = np.searchsorted(self.x, xmax) + 1
+        self.preview.set_data(*bucket_max(self.x[start:end], self.y[start:end], PREVIEW_POINTS))
+        self.blit.update()
+
+    def settle(self):
+        """Replace the preview with the full series once zooming/panning stops"""
+        self._frame_timer.stop()
+        self._frame_pending = False
+        if self.previewing:
+            self.previewing = False
+            self.preview.set_visible(False)
+            self.set_series_visible(True)
+        if not self.refetch_visible():
+            self.canvas.draw_idle()
+
+    def refetch_visible(self):
+        """Reload the series for the visible range, at the rollup level that range needs; True if redrawn"""
+        if not self.fetch:
+            return False
+        xmin, xmax = self.ax.get_xlim()
+        try:
+            result = self.fetch(mdates.num2date(xmin), mdates.num2date(xmax), self.max_points)
+        except Exception as e:
+            print(f"Error loading listening history: {e}")
+            return False
+        if not result:
+            return False
+        self.set_series(*result)
+        self.ax.set_xlim(xmin, xmax)
+        self.canvas.draw_idle()
+        return True
@@ -0,0 +1,119 @@
+"""
+Incremental sync of the user's saved-tracks library (user-library-read) into the catalog
+"""
+import time
+import threading
+from async_spotify import chunks, AUDIO_FEATURES_BATCH, ARTISTS_BATCH
+
+SYNC_PAGE_SIZE = 50  # Max items per /me/tracks request
+
+class LibrarySync:
+    """Mirrors current_user_saved_tracks in the catalog, fetching only what was added since the last sync"""
+    def __init__(self, spotify_client, catalog, async_client=None):
+        self.spotify = spotify_client
+        self.catalog = catalog
+        self.async_client = async_client  # Optional AsyncSpotify for fetching audio features concurrently
+        self.requests = 0  # API requests made by the last sync
+        self.last_synced_at = None
+        self._lock = threading.Lock()
+
+    def sync(self, full=False):
+        """Bring the local library up to date; returns (success, message)"""
+        with self._lock:
+            self.requests = 0
+            try:
+                added, removed = self._sync_tracks(full)
+                features = self._sync_features()
+                artists = self._sync_artists()
+            except Exception as e:
+                print(f"Error syncing library: {e}")
+                return False, f"Library sync failed: {e}"
+
+            self.last_synced_at = time.time()
+            return True, (f"Library synced: {added} added, {removed} removed, "
+                          f"{features} audio features and {artists} artists fetched ({self.requests} requests)")
+
+    def _page(self, offset):
+        """Fetch one page of saved tracks, newest first"""
+        page = self.spotify.current_user_saved_tracks(limit=SYNC_PAGE_SIZE, offset=offset)
+        self.requests += 1
+        if page.get('_stale'):
+            # An offline client answered from its cache; that page says nothing about new saves
+            raise ConnectionError("Spotify is unreachable")
+        return page
+
+    def _fetch_new(self):
+        """Page from the newest save until the first track already stored with the same added_at
+
+        Returns (new items, library total reported by Spotify, number of new items not stored at all)
+        """
+        new_items = []
+        unseen = 0
+        offset = 0
+        while True:
+            page = self._page(offset)
+            known = self.catalog.known_saved(item['track']['id'] for item in page['items'] if item.get('track'))
+            for item in page['items']:
+                track_id = (item.get('track') or {}).get('id')
+                if track_id in known and known[track_id] == item['added_at']:
+                    return new_items, page['total'], unseen
+                new_items.append(item)
+                unseen += track_id not in known
+
+            offset += len(page['items'])
+            if not page.get('next') or not page['items']:
+                return new_items, page['total'], unseen
+
+    def _fetch_all(self):
+        """Page through the whole library"""
+        items = []
+        offset = 0
+        while True:
+            page = self._page(offset)
+            items.extend(page['items'])
+            offset += len(page['items'])
+            if not page.get('next') or not page['items']:
+                return items
+
+    def _sync_tracks(self, full):
+        """Store new saves; returns (added, removed)"""
+        if not full and self.catalog.saved_count():
+            new_items, total, unseen = self._fetch_new()
+            if self.catalog.saved_count() + unseen == total:
+                self.catalog.add_saved_tracks(new_items)
+                return unseen, 0
+            # The counts disagree, so something was unsaved; only a full pass can tell what
+
+        before = self.catalog.saved_count()
+        stored, removed = self.catalog.add_saved_tracks(self._fetch_all(), replace=True)
+        return stored - (before - removed), removed
+
+    def _sync_features(self):
+        """Fetch audio features for saved tracks that have none stored"""
+        missing = self.catalog.saved_without_features()
+        if not missing:
+            return 0
+
+        if self.async_client:
+            features = self.async_client.run(self.async_client.audio_features(missing))
+        else:
+            features = [item for batch in chunks(missing, AUDIO_FEATURES_BATCH) for item in self.spotify.audio_features(batch)]
+        self.requests += len(chunks(missing, AUDIO_FEATURES_BATCH))
+
+        # Tracks Spotify has no features for are stored empty so they aren't requested on every sync
+        found = {item['id']: item for item in features if item}
+        self.catalog.save_audio_features([found.get(track_id) or {'id': track_id} for track_id in missing])
+        return len(found)
+
+    def _sync_artists(self):
+        """Fetch artists (for their genres) that no stored saved track's artist has yet"""
+        missing = self.catalog.saved_artists_missing()
+        if not missing:
+            return 0
+
+        if self.async_client:
+            artists = self.async_client.run(self.async_client.artists(missing))['artists']
+        else:
+            artists = [item for batch in chunks(missing, ARTISTS_BATCH) for item in self.spotify.artists(batch)['artists']]
+        self.requests += len(chunks(missing, ARTISTS_BATCH))
+        return self.catalog.upsert_artists(artists)
@@ -0,0 +1,308 @@
+"""
+Read-only HTTP/JSON API over the local catalog, served on localhost from an asyncio event loop
+"""
+import json
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from aiohttp import web
+from catalog import FEATURE_COLUMNS, track_from_row
+from report_engine import REPORTS, build_dataset
+
+DEFAULT_API_HOST = "127.0.0.1"
+DEFAULT_API_PORT = 8765
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_FEATURE_IDS = 500
+RESPONSE_CACHE_SIZE = 1024  # Encoded responses kept per catalog version
+ROLLUP_LEVELS = ("day", "week", "month")
+
+def configured_port(path="config.json"):
+    """local_api_port from the app config, or None when the API isn't enabled"""
+    try:
+        with open(path) as f:
+            return json.load(f).get("local_api_port")
+    except (OSError, ValueError):
+        return None
+
+def page_params(request):
+    """(offset, limit) from the query string, clamped to sane values"""
+    try:
+        offset = max(int(request.query.get('offset', 0)), 0)
+        limit = min(max(int(request.query.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise web.HTTPBadRequest(text="offset and limit must be integers")
+    return offset, limit
+
+def paged(request, items, offset, limit, total):
+    """Spotify-style paging object"""
+    following = None
+    if offset + len(items) < total:
+        following = str(request.rel_url.update_query(offset=offset + limit, limit=limit))
+    return {'items': items, 'offset': offset, 'limit': limit, 'total': total, 'next': following}
+
+def to_json(value):
+    """Make report results (dicts of numpy arrays) JSON serializable"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    return value
+
+class LocalAPI:
+    """Serves catalog queries, search and listening stats; responses are cached until the catalog changes
+
+    Every response carries a strong ETag, so clients that send If-None-Match
+    get a 304 without a body. Cache misses run their query on a worker thread
+    to keep the event loop free. Nothing here calls the Spotify API.
+    """
+    def __init__(self, catalog, host=DEFAULT_API_HOST, port=DEFAULT_API_PORT, report_engine=None):
+        self.catalog = catalog
+        self.host = host
+        self.port = port
+        self.report_engine = report_engine  # Optional ReportEngine for /api/reports; computed in-thread otherwise
+        self.cache = OrderedDict()  # Request path and query -> (catalog version, ETag, body)
+        self.cache_bytes = 0
+        self._cache_lock = threading.Lock()  # trim() may run on another thread
+        self.hits = 0
+        self.misses = 0
+        self._dataset = None  # (catalog version, report dataset)
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    def routes(self):
+        """URL routes and their handlers"""
+        return [
+            web.get("/api", self.index),
+            web.get("/api/library", self.library),
+            web.get("/api/tracks/{track_id}", self.track),
+            web.get("/api/features", self.features),
+            web.get("/api/search", self.search),
+            web.get("/api/playlists", self.playlists),
+            web.get("/api/playlists/{playlist_id}/tracks", self.playlist_tracks),
+            web.get("/api/smart-playlists", self.smart_playlists),
+            web.get("/api/stats/summary", self.summary),
+            web.get("/api/stats/plays", self.plays),
+            web.get("/api/stats/top-tracks", self.top_tracks),
+            web.get("/api/reports/{report}", self.report)
+        ]
+
+    def make_app(self):
+        """aiohttp application with the API routes and the caching middleware"""
+        app = web.Application(middlewares=[self.cached])
+        app.add_routes(self.routes())
+        return app
+
+    @web.middleware
+    async def cached(self, request, handler):
+        """Answer from the response cache (or with 304) while the served data is unchanged"""
+        version = self.catalog.content_version()
+        key = str(request.rel_url)
+        with self._cache_lock:
+            entry = self.cache.get(key)
+            if entry and entry[0] == version:
+                self.hits += 1
+                self.cache.move_to_end(key)
+        if not entry or entry[0] != version:
+            self.misses += 1
+            data = await handler(request)
+            body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+            entry = (version, f'"{hashlib.sha1(body).hexdigest()[:20]}"', body)
+            with self._cache_lock:
+                old = self.cache.pop(key, None)
+                self.cache_bytes += len(body) - (len(old[2]) if old else 0)
+                self.cache[key] = entry
+                if len(self.cache) > RESPONSE_CACHE_SIZE:
+                    _, evicted = self.cache.popitem(last=False)
+                    self.cache_bytes -= len(evicted[2])
+
+        _, etag, body = entry
+        headers = {'ETag': etag, 'Cache-Control': "no-cache"}
+        if etag in request.headers.get('If-None-Match', ""):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    def memory_usage(self):
+        """Bytes of encoded responses held"""
+        return self.cache_bytes
+
+    def trim(self, max_bytes):
+        """Drop least recently used responses until at most max_bytes are held; returns bytes freed"""
+        freed = 0
+        with self._cache_lock:
+            while self.cache and self.cache_bytes > max_bytes:
+                _, evicted = self.cache.popitem(last=False)
+                self.cache_bytes -= len(evicted[2])
+                freed += len(evicted[2])
+        return freed
+
+    async def in_thread(self, function, *args):
+        """Run a blocking catalog call on the default executor"""
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def index(self, request):
+        """List the endpoints"""
+        return {'endpoints': sorted({route.path for route in self.routes()}), 'reports': list(REPORTS)}
+
+    async def library(self, request):
+        """Saved tracks, newest first"""
+        offset, limit = page_params(request)
+        items, total = await self.in_thread(
+            lambda: (self.catalog.saved_tracks(limit, offset), self.catalog.saved_count())
+        )
+        return paged(request, items, offset, limit, total)
+
+    async def track(self, request):
+        """One stored track with its audio features"""
+        track_id = request.match_info['track_id']
+
+        def load():
+            rows = self.catalog.query("SELECT * FROM tracks WHERE id = ?", (track_id,))
+            return rows, self.catalog.get_audio_features([track_id]).get(track_id)
+
+        rows, features = await self.in_thread(load)
+        if not rows:
+            raise web.HTTPNotFound(text=f"No stored track {track_id}")
+        return dict(track_from_row(rows[0]), audio_features=features)
+
+    async def features(self, request):
+        """Stored audio features for ?ids=a,b,c"""
+        ids = [track_id for track_id in request.query.get('ids', "").split(",") if track_id]
+        if not ids or len(ids) > MAX_FEATURE_IDS:
+            raise web.HTTPBadRequest(text=f"Pass between 1 and {MAX_FEATURE_IDS} comma-separated ids")
+        features = await self.in_thread(self.catalog.get_audio_features, ids)
+        return {'audio_features': [features.get(track_id) for track_id in ids], 'columns': FEATURE_COLUMNS}
+
+    async def search(self, request):
+        """Stored tracks matching ?q=, saved library first"""
+        query = request.query.get('q', "").strip()
+        if not query:
+            raise web.HTTPBadRequest(text="Missing q")
+        _, limit = page_params(request)
+
+        def find():
+            library = self.catalog.search_library(query, limit)
+            seen = {track['id'] for track in library}
+            others = [track for track in self.catalog.search_tracks(query, limit) if track['id'] not in seen]
+            return library, others
+
+        library, others = await self.in_thread(find)
+        return {'library': library, 'tracks': others[:max(limit - len(library), 0)]}
+
+    async def playlists(self, request):
+        """Playlists synced into the catalog"""
+        return {'items': await self.in_thread(self.catalog.playlist_summaries)}
+
+    async def playlist_tracks(self, request):
+        """One synced playlist's tracks in order"""
+        playlist_id = request.match_info['playlist_id']
+        offset, limit = page_params(request)
+        summaries = await self.in_thread(self.catalog.playlist_summaries)
+        summary = next((item for item in summaries if item['id'] == playlist_id), None)
+        if summary is None:
+            raise web.HTTPNotFound(text=f"No synced playlist {playlist_id}")
+        items = await self.in_thread(self.catalog.playlist_tracks, playlist_id, limit, offset)
+        return dict(paged(request, items, offset, limit, summary['tracks']), name=summary['name'])
+
+    async def smart_playlists(self, request):
+        """Smart playlist definitions and their current sizes"""
+        def load():
+            return [
+                dict(smart, tracks=len(self.catalog.smart_playlist_tracks(smart['id'])))
+                for smart in self.catalog.smart_playlists()
+            ]
+        return {'items': await self.in_thread(load)}
+
+    async def summary(self, request):
+        """Play totals, optionally ?since= an ISO timestamp"""
+        since = request.query.get('since')
+
+        def load():
+            stats = self.catalog.play_stats(since)
+            stats['top_artist'] = self.catalog.top_played_artist(since)
+            stats['saved_tracks'] = self.catalog.saved_count()
+            stats['history'] = self.catalog.history_bounds()
+            return stats
+
+        return await self.in_thread(load)
+
+    async def plays(self, request):
+        """Plays per ?level=day|week|month between optional ?start= and ?end= dates"""
+        level = request.query.get('level', "day")
+        if level not in ROLLUP_LEVELS:
+            raise web.HTTPBadRequest(text=f"level must be one of {', '.join(ROLLUP_LEVELS)}")
+
+        def load():
+            self.catalog.update_rollups()
+            return self.catalog.get_rollup(level, request.query.get('start'), request.query.get('end'))
+
+        rows = await self.in_thread(load)
+        return {'level': level, 'buckets': [bucket for bucket, _ in rows], 'plays': [plays for _, plays in rows]}
+
+    async def top_tracks(self, request):
+        """Most played tracks"""
+        offset, limit = page_params(request)
+        rows = await self.in_thread(self.catalog.most_played, limit, offset)
+        return {'items': [dict(track, plays=plays) for track, plays in rows], 'offset': offset, 'limit': limit}
+
+    def library_dataset(self):
+        """Report dataset built from the catalog alone, rebuilt only when the catalog changed"""
+        version = self.catalog.content_version()
+        if self._dataset and self._dataset[0] == version:
+            return self._dataset[1]
+        artists = self.catalog.get_artists(self.catalog.saved_artist_ids()).values()
+        dataset = build_dataset(artists, self.catalog.saved_audio_features(), self.catalog.play_times())
+        self._dataset = (version, dataset)
+        return dataset
+
+    async def report(self, request):
+        """A library-scale report (see report_engine.REPORTS)"""
+        name = request.match_info['report']
+        if name not in REPORTS:
+            raise web.HTTPNotFound(text=f"Unknown report {name}")
+        dataset = await self.in_thread(self.library_dataset)
+        if self.report_engine:
+            result = await asyncio.wrap_future(self.report_engine.submit(name, dataset))
+        else:
+            result = await self.in_thread(REPORTS[name], dataset)
+        return {'report': name, 'version': dataset['version'], 'result': to_json(result)}
+
+    async def _start(self):
+        """Bind the server inside the loop"""
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    def start(self):
+        """Serve in the background on a private event loop thread; returns (success, message)"""
+        if self._thread:
+            return True, f"Local API already running on http://{self.host}:{self.port}/api"
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        except Exception as e:
+            print(f"Error starting local API: {e}")
+            self.stop()
+            return False, f"Local API failed to start: {str(e)}"
+        return True, f"Local API running on http://{self.host}:{self.port}/api"
+
+    def stop(self):
+        """Shut the server and its loop down"""
+        if not self._loop:
+            return
+        if self._runner:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._runner = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def serve_forever(self):
+        """Serve in the foreground until interrupted (for the CLI)"""
+        web.run_app(self.make_app(), host=self.host, port=self.port, access_log=None, print=None)
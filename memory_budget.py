@@ -0,0 +1,192 @@
+"""
+Memory budgets for long sessions: a registry of byte-budgeted caches, an album art cache and closed-window cleanup
+"""
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+# Default budgets per registered cache; the total is enforced on top of them
+DEFAULT_BUDGETS = {
+    'pcm': 256 * 1024 * 1024,
+    'http_etags': 32 * 1024 * 1024,
+    'album_art': 32 * 1024 * 1024,
+    'local_api': 16 * 1024 * 1024
+}
+DEFAULT_TOTAL_BUDGET = 320 * 1024 * 1024
+TRIM_INTERVAL_MS = 60 * 1000  # How often the app enforces the budgets
+
+def rss_bytes():
+    """Current resident set size of this process (peak size where the current one isn't available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS reports bytes, Linux reports KB
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def image_bytes(image):
+    """Approximate memory held by a PIL image"""
+    return image.width * image.height * len(image.getbands())
+
+class ImageCache:
+    """Resized album art as PIL images, keyed by URL and size, least recently used evicted over budget
+
+    Only PIL images are kept. A CTkImage remembers every widget it was shown
+    in (and customtkinter never forgets them), so callers wrap the cached image
+    in a new CTkImage per widget instead of sharing one.
+    """
+    def __init__(self, budget_bytes=DEFAULT_BUDGETS['album_art']):
+        self.budget_bytes = budget_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (url, size) -> PIL image
+        self._lock = threading.Lock()
+
+    def get(self, url, size, loader):
+        """Get a cached image, calling loader(url, size) on a miss; failed loads are not cached"""
+        key = (url, tuple(size))
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        image = loader(url, size)
+        if image is not None:
+            with self._lock:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self.size_bytes -= image_bytes(old)
+                self._entries[key] = image
+                self.size_bytes += image_bytes(image)
+            self.trim(self.budget_bytes)
+        return image
+
+    def memory_usage(self):
+        """Bytes held"""
+        return self.size_bytes
+
+    def trim(self, max_bytes):
+        """Evict least recently used images until at most max_bytes are held; returns bytes freed"""
+        freed = 0
+        with self._lock:
+            while self._entries and self.size_bytes > max_bytes:
+                _, image = self._entries.popitem(last=False)
+                self.size_bytes -= image_bytes(image)
+                freed += image_bytes(image)
+        return freed
+
+    def clear(self):
+        """Drop every image"""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self):
+        """Get cache usage numbers"""
+        with self._lock:
+            return {'entries': len(self._entries), 'size_bytes': self.size_bytes, 'hits': self.hits, 'misses': self.misses}
+
+class MemoryBudget:
+    """Central registry of caches with byte budgets, plus weak counts of live views
+
+    A registered cache provides memory_usage() and trim(max_bytes). enforce()
+    trims each cache to its own budget, then shrinks them all proportionally
+    while the total is still over total_bytes.
+    """
+    def __init__(self, total_bytes=DEFAULT_TOTAL_BUDGET):
+        self.total_bytes = total_bytes
+        self.caches = {}  # Name -> (cache, budget bytes)
+        self.trims = 0
+        self._tracked = {}  # Kind -> WeakSet of live objects (windows, figures...)
+        self._lock = threading.Lock()
+
+    def register(self, name, cache, budget_bytes=None):
+        """Put a cache under a budget (DEFAULT_BUDGETS[name] when not given)"""
+        if budget_bytes is None:
+            budget_bytes = DEFAULT_BUDGETS.get(name, self.total_bytes)
+        with self._lock:
+            self.caches[name] = (cache, budget_bytes)
+        return cache
+
+    def unregister(self, name):
+        """Stop budgeting a cache"""
+        with self._lock:
+            self.caches.pop(name, None)
+
+    def usage(self):
+        """Bytes held by each registered cache"""
+        with self._lock:
+            caches = dict(self.caches)
+        return {name: cache.memory_usage() for name, (cache, _) in caches.items()}
+
+    def enforce(self):
+        """Trim caches over their budgets, then all of them while over the total; returns bytes freed per cache"""
+        with self._lock:
+            caches = dict(self.caches)
+        freed = {}
+        for name, (cache, budget) in caches.items():
+            try:
+                freed[name] = cache.trim(budget) or 0
+            except Exception as e:
+                print(f"Error trimming {name} cache: {e}")
+
+        usage = self.usage()
+        total = sum(usage.values())
+        if total > self.total_bytes:
+            # Every cache gives up the same share of what it holds
+            scale = self.total_bytes / total
+            for name, (cache, _) in caches.items():
+                try:
+                    freed[name] = freed.get(name, 0) + (cache.trim(int(usage[name] * scale)) or 0)
+                except Exception as e:
+                    print(f"Error trimming {name} cache: {e}")
+        self.trims += 1
+        return freed
+
+    def track(self, kind, obj):
+        """Count obj as a live object of a kind until it is garbage collected"""
+        with self._lock:
+            self._tracked.setdefault(kind, weakref.WeakSet()).add(obj)
+        return obj
+
+    def live(self):
+        """Number of tracked objects of each kind still alive"""
+        with self._lock:
+            return {kind: len(objects) for kind, objects in self._tracked.items()}
+
+    def stats(self):
+        """Usage and budget per cache, live object counts and process RSS"""
+        with self._lock:
+            budgets = {name: budget for name, (_, budget) in self.caches.items()}
+        usage = self.usage()
+        return {
+            'caches': {name: {'bytes': usage[name], 'budget': budgets[name]} for name in usage},
+            'total_bytes': sum(usage.values()),
+            'total_budget': self.total_bytes,
+            'live': self.live(),
+            'rss_bytes': rss_bytes()
+        }
+
+def release_window(window):
+    """Destroy a Toplevel and drop what customtkinter keeps of it afterwards"""
+    try:
+        window.destroy()
+    except Exception as e:
+        print(f"Error closing window: {e}")
+    # customtkinter removes the window's widget callbacks but keeps its DPI entry, which pins the window
+    try:
+        from customtkinter.windows.widgets.scaling import ScalingTracker
+        ScalingTracker.window_dpi_scaling_dict.pop(window, None)
+    except ImportError:
+        pass
+
+# Shared registry used across the app
+memory_budget = MemoryBudget()
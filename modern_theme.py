@@ -23,6 +23,25 @@ LIGHT_SECONDARY = "#0091EA"  # Blue
 LIGHT_TEXT = "#212121"  # Near black text
 LIGHT_SUBTEXT = "#757575"  # Medium gray for secondary text
 
+# Shared fonts, so views don't create a new CTkFont for every label
+_font_pool = {}
+
+def get_font(size=None, weight=None, family=None):
+    """Get a pooled CTkFont for a size/weight/family combination"""
+    key = (size, weight, family)
+    font = _font_pool.get(key)
+    if font is None:
+        kwargs = {}
+        if family is not None:
+            kwargs['family'] = family
+        if size is not None:
+            kwargs['size'] = size
+        if weight is not None:
+            kwargs['weight'] = weight
+        font = ctk.CTkFont(**kwargs)
+        _font_pool[key] = font
+    return font
+
 def setup_modern_theme():
     """Apply the modern theme to customtkinter"""
     # Set default appearance mode
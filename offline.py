@@ -0,0 +1,203 @@
+"""
+Offline support: a Spotify client wrapper that persists responses in the catalog and queues writes
+"""
+import json
+import threading
+from spotipy.exceptions import SpotifyException
+
+# Reads whose responses are stored and served when Spotify is unreachable
+CACHED_READS = {
+    "current_user", "current_user_playlists", "current_user_recently_played",
+    "current_user_top_artists", "current_user_top_tracks", "current_user_saved_tracks",
+    "playlist", "playlist_tracks", "playlist_items", "search", "recommendations",
+    "audio_features", "track", "tracks", "artist", "artists", "artist_top_tracks"
+}
+# Writes that are queued while offline and replayed in order later
+QUEUED_WRITES = {
+    "user_playlist_create", "playlist_add_items", "playlist_remove_all_occurrences_of_items",
+    "playlist_replace_items", "current_user_saved_tracks_add", "current_user_saved_tracks_delete"
+}
+# Placeholder ids handed out for playlists created offline
+OFFLINE_ID_PREFIX = "offline:"
+
+def cache_key(method, args, kwargs):
+    """Stable catalog key for an API call"""
+    return f"{method}:{json.dumps([list(args), kwargs], sort_keys=True, default=str)}"
+
+def is_network_error(error):
+    """Whether an exception means Spotify could not be reached (rather than a bad request)"""
+    # requests' ConnectionError and Timeout are OSError subclasses, like the built-in ones
+    if isinstance(error, OSError):
+        return True
+    return isinstance(error, SpotifyException) and (error.http_status or 0) >= 500
+
+def mark_stale(response, fetched_at):
+    """Flag a cached response so views can tell it apart from live data"""
+    if isinstance(response, dict):
+        return dict(response, _stale=True, _fetched_at=fetched_at)
+    return response
+
+def harvest_tracks(response):
+    """Pull track dicts out of a response so offline search can find them"""
+    if not isinstance(response, dict):
+        return []
+    items = []
+    for key in ("tracks", "items"):
+        value = response.get(key)
+        if isinstance(value, dict):
+            value = value.get('items')
+        if isinstance(value, list):
+            items.extend(value)
+    return [
+        item.get('track') if isinstance(item.get('track'), dict) else item
+        for item in items
+        if isinstance(item, dict) and (item.get('type') == "track" or isinstance(item.get('track'), dict))
+    ]
+
+class UnreachableSpotify:
+    """Client stub whose every call fails as if the network were down"""
+    def __getattr__(self, attr):
+        def call(*args, **kwargs):
+            raise ConnectionError(f"Spotify is unreachable ({attr})")
+        return call
+
+class ResilientSpotify:
+    """Wraps a spotipy client: stores read responses, serves them when offline, and queues writes"""
+    def __init__(self, client, catalog):
+        self._client = client
+        self._catalog = catalog
+        self.offline = False
+        self.last_stale_at = None  # fetched_at of the newest cached response served while offline
+        self._replay_lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        value = getattr(self._client, attr)
+        if attr in CACHED_READS:
+            return lambda *args, **kwargs: self._read(attr, value, args, kwargs)
+        if attr in QUEUED_WRITES:
+            return lambda *args, **kwargs: self._write(attr, value, args, kwargs)
+        return value
+
+    def _read(self, method, func, args, kwargs):
+        """Call through, remembering the response; fall back to the catalog when offline"""
+        try:
+            response = func(*args, **kwargs)
+        except Exception as e:
+            return self.read_failed(method, args, kwargs, e)
+        self.read_succeeded(method, args, kwargs, response)
+        return response
+
+    def read_failed(self, method, args, kwargs, error):
+        """Serve a failed read from the catalog if the failure was the network; re-raises otherwise
+
+        Also used by AsyncSpotify, whose reads bypass this wrapper's methods.
+        """
+        if not is_network_error(error):
+            raise error
+        self.offline = True
+        cached = self._catalog.get_cached_response(cache_key(method, args, kwargs))
+        if cached:
+            response, fetched_at = cached
+            self.last_stale_at = max(self.last_stale_at or 0, fetched_at)
+            return mark_stale(response, fetched_at)
+        fallback = getattr(self, f"_offline_{method}", None)
+        if fallback:
+            return fallback(*args, **kwargs)
+        raise error
+
+    def read_succeeded(self, method, args, kwargs, response):
+        """Remember a live read response and the tracks in it"""
+        self.offline = False
+        try:
+            self._catalog.cache_response(cache_key(method, args, kwargs), response)
+            tracks = harvest_tracks(response)
+            if tracks:
+                self._catalog.upsert_tracks(tracks)
+        except Exception as e:
+            print(f"Error caching {method} response: {e}")
+
+    def _write(self, method, func, args, kwargs):
+        """Call through, or queue the write if Spotify is unreachable"""
+        # Earlier offline writes must land first, and may be needed to resolve placeholder ids
+        if self._catalog.pending_ops():
+            self.replay_pending()
+        if not self._catalog.pending_ops():
+            try:
+                result = func(*self._resolve(args), **self._resolve(kwargs))
+                self.offline = False
+                return result
+            except Exception as e:
+                if not is_network_error(e):
+                    raise
+                self.offline = True
+
+        op_id = self._catalog.queue_op(method, args, kwargs)
+        return {'id': f"{OFFLINE_ID_PREFIX}{op_id}", 'snapshot_id': None, '_queued': True}
+
+    def _resolve(self, value):
+        """Swap placeholder ids for the real ids of playlists created on replay"""
+        if isinstance(value, str) and value.startswith(OFFLINE_ID_PREFIX):
+            cached = self._catalog.get_cached_response(f"offline_id:{value}")
+            return cached[0] if cached else value
+        if isinstance(value, (list, tuple)):
+            return [self._resolve(v) for v in value]
+        if isinstance(value, dict):
+            return {k: self._resolve(v) for k, v in value.items()}
+        return value
+
+    def replay_pending(self):
+        """Replay queued writes in order; returns (replayed, remaining)"""
+        with self._replay_lock:
+            replayed = 0
+            ops = self._catalog.pending_ops()
+            for op in ops:
+                try:
+                    result = getattr(self._client, op['method'])(*self._resolve(op['args']), **self._resolve(op['kwargs']))
+                except Exception as e:
+                    if is_network_error(e):
+                        self.offline = True
+                        return replayed, len(ops) - replayed
+                    # A write Spotify rejects would block the queue forever, so drop it
+                    print(f"Error replaying {op['method']}: {e}")
+                    result = None
+
+                if isinstance(result, dict) and result.get('id'):
+                    self._catalog.cache_response(f"offline_id:{OFFLINE_ID_PREFIX}{op['id']}", result['id'])
+                self._catalog.delete_op(op['id'])
+                replayed += 1
+
+            self.offline = False
+            return replayed, 0
+
+    def check_connectivity(self):
+        """Probe Spotify; when it answers, replay queued writes. Returns True if online"""
+        try:
+            self._client.current_user()
+        except Exception as e:
+            if is_network_error(e):
+                self.offline = True
+                return False
+            raise
+        self.offline = False
+        self.replay_pending()
+        return True
+
+    def pending_count(self):
+        """Number of writes waiting for replay"""
+        return len(self._catalog.pending_ops())
+
+    def _offline_search(self, q, limit=10, offset=0, type="track", market=None):
+        """Search tracks the catalog has seen before"""
+        tracks = self._catalog.search_tracks(q, limit=limit)
+        return {
+            'tracks': {'items': tracks, 'total': len(tracks)},
+            'artists': {'items': []},
+            'albums': {'items': []},
+            '_stale': True
+        }
+
+    def _offline_recommendations(self, seed_artists=None, seed_genres=None, seed_tracks=None, limit=20, country=None, **kwargs):
+        """Recommend saved tracks nearest the target features, or other tracks the catalog has seen"""
+        targets = {key[len("target_"):]: value for key, value in kwargs.items() if key.startswith("target_")}
+        tracks = self._catalog.recommend_from_library(targets, limit=limit) or self._catalog.random_tracks(limit=limit)
+        return {'tracks': tracks, '_stale': True}
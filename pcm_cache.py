@@ -0,0 +1,174 @@
+"""
+Decoded PCM cache for low-latency playback of local tracks
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pygame
+
+# Default memory budget for decoded audio (about 25 minutes of 44.1kHz stereo)
+DEFAULT_BUDGET_BYTES = 256 * 1024 * 1024
+
+def decode_file(filename):
+    """Decode an audio file into an int16 PCM array of shape (frames, channels)"""
+    sound = pygame.mixer.Sound(filename)
+    pcm = pygame.sndarray.array(sound)
+    if pcm.ndim == 1:
+        pcm = pcm[:, np.newaxis]
+    return pcm
+
+def file_cache_key(filename):
+    """Build a cache key that changes when the file on disk changes"""
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    return f"{path}:{stat.st_size}:{int(stat.st_mtime)}"
+
+class PCMCache:
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES, spill_dir=None):
+        self.budget_bytes = budget_bytes
+        self.spill_dir = spill_dir  # Optional directory of memory-mapped .npy files
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> PCM array, least recently used first
+        self._lock = threading.Lock()
+
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        """Get a cached PCM array, or None"""
+        with self._lock:
+            pcm = self._entries.get(key)
+            if pcm is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pcm
+            self.misses += 1
+
+        # Fall back to a memory-mapped copy on disk
+        pcm = self._load_spilled(key)
+        if pcm is not None:
+            self._store(key, pcm)
+        return pcm
+
+    def put(self, key, pcm):
+        """Add a decoded PCM array to the cache"""
+        if self.spill_dir and not isinstance(pcm, np.memmap):
+            self._spill(key, pcm)
+        self._store(key, pcm)
+        return pcm
+
+    def load(self, filename):
+        """Get the PCM for a local file, decoding it on first use"""
+        key = file_cache_key(filename)
+        pcm = self.get(key)
+        if pcm is None:
+            pcm = self.put(key, decode_file(filename))
+        return pcm
+
+    def preload(self, filenames):
+        """Decode a set of files in the background"""
+        def worker():
+            for filename in filenames:
+                try:
+                    self.load(filename)
+                except Exception as e:
+                    print(f"Error decoding {filename}: {e}")
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
+
+    def evict(self, key):
+        """Remove one entry from the cache"""
+        with self._lock:
+            pcm = self._entries.pop(key, None)
+            if pcm is not None:
+                self.size_bytes -= pcm.nbytes
+
+    def clear(self):
+        """Remove all entries from the cache"""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def memory_usage(self):
+        """Bytes of decoded PCM held"""
+        return self.size_bytes
+
+    def trim(self, max_bytes):
+        """Evict least recently used entries until at most max_bytes are held; returns bytes freed"""
+        freed = 0
+        with self._lock:
+            while self._entries and self.size_bytes > max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= evicted.nbytes
+                freed += evicted.nbytes
+                self.evictions += 1
+        return freed
+
+    def stats(self):
+        """Get cache usage numbers"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self.size_bytes,
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def _store(self, key, pcm):
+        """Insert an entry and evict least recently used ones over budget"""
+        # Entries bigger than the whole budget are returned but never kept
+        if pcm.nbytes > self.budget_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size_bytes -= old.nbytes
+
+            self._entries[key] = pcm
+            self.size_bytes += pcm.nbytes
+
+            while self.size_bytes > self.budget_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def _spill_path(self, key):
+        """Get the on-disk location for a cache key"""
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.npy")
+
+    def _spill(self, key, pcm):
+        """Write decoded PCM to disk so it can be memory-mapped later"""
+        try:
+            path = self._spill_path(key)
+            if not os.path.exists(path):
+                np.save(path, pcm)
+        except Exception as e:
+            print(f"Error writing PCM file: {e}")
+
+    def _load_spilled(self, key):
+        """Memory-map previously decoded PCM from disk"""
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path, mmap_mode="r")
+        except Exception as e:
+            print(f"Error reading PCM file: {e}")
+            return None
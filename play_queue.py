@@ -0,0 +1,154 @@
+"""
+Play queue for the music player (ordering, shuffle and repeat)
+"""
+import random
+
+REPEAT_OFF = "off"
+REPEAT_ALL = "all"
+REPEAT_ONE = "one"
+REPEAT_MODES = [REPEAT_OFF, REPEAT_ALL, REPEAT_ONE]
+
+class PlayQueue:
+    def __init__(self):
+        self.items = []
+        self.order = []  # Indices into items, shuffled when shuffle is on
+        self.position = -1
+        self.shuffle = False
+        self.repeat = REPEAT_OFF
+
+    def __len__(self):
+        return len(self.items)
+
+    def replace(self, tracks, start_index=0):
+        """Replace the queue with a new set of tracks"""
+        self.items = list(tracks)
+        self.order = list(range(len(self.items)))
+        self.position = start_index if self.items else -1
+
+        if self.shuffle and self.items:
+            # Keep the chosen start track first and shuffle the rest
+            start = self.order.pop(start_index)
+            random.shuffle(self.order)
+            self.order.insert(0, start)
+            self.position = 0
+
+    def enqueue(self, tracks):
+        """Append tracks to the end of the queue"""
+        first_new = len(self.items)
+        self.items.extend(tracks)
+        new_indices = list(range(first_new, len(self.items)))
+
+        if self.shuffle:
+            random.shuffle(new_indices)
+        self.order.extend(new_indices)
+
+    def clear(self):
+        """Remove all tracks from the queue"""
+        self.items = []
+        self.order = []
+        self.position = -1
+
+    def current(self):
+        """Get the track at the current position"""
+        if 0 <= self.position < len(self.order):
+            return self.items[self.order[self.position]]
+        return None
+
+    def _next_position(self, position=None):
+        """Work out where the queue goes after the current (or given) position"""
+        if position is None:
+            position = self.position
+        if not self.order:
+            return None
+        if self.repeat == REPEAT_ONE:
+            return position
+        if position + 1 < len(self.order):
+            return position + 1
+        if self.repeat == REPEAT_ALL:
+            return 0
+        return None
+
+    def remaining_positions(self):
+        """Positions from the current one onwards in skip order, wrapping round unless repeat is off, each entry once"""
+        if not 0 <= self.position < len(self.order):
+            return []
+        positions = list(range(self.position, len(self.order)))
+        if self.repeat != REPEAT_OFF:
+            positions += list(range(self.position))
+        return positions
+
+    def peek_next(self):
+        """Get the track that will play after the current one"""
+        position = self._next_position()
+        if position is None:
+            return None
+        return self.items[self.order[position]]
+
+    def peek_after_next(self):
+        """Get the track that will play two tracks from now"""
+        position = self._next_position()
+        if position is None:
+            return None
+        position = self._next_position(position)
+        if position is None:
+            return None
+        return self.items[self.order[position]]
+
+    def advance(self):
+        """Move to the next track and return it"""
+        position = self._next_position()
+        if position is None:
+            self.position = len(self.order)
+            return None
+
+        # Reshuffle on wrap-around so repeated passes differ
+        if position == 0 and self.position == len(self.order) - 1 and self.shuffle and self.repeat == REPEAT_ALL:
+            random.shuffle(self.order)
+
+        self.position = position
+        return self.current()
+
+    def skip(self):
+        """Move to the next track, ignoring repeat-one"""
+        if self.repeat == REPEAT_ONE:
+            self.repeat = REPEAT_ALL
+            try:
+                return self.advance()
+            finally:
+                self.repeat = REPEAT_ONE
+        return self.advance()
+
+    def previous(self):
+        """Move to the previous track and return it"""
+        if not self.order:
+            return None
+        if self.position > 0:
+            self.position -= 1
+        elif self.repeat == REPEAT_ALL:
+            self.position = len(self.order) - 1
+        else:
+            self.position = 0
+        return self.current()
+
+    def set_shuffle(self, enabled):
+        """Turn shuffle on or off, keeping the current track in place"""
+        if enabled == self.shuffle:
+            return
+        self.shuffle = enabled
+        current_index = self.order[self.position] if 0 <= self.position < len(self.order) else None
+
+        if enabled:
+            # Shuffle only what is still to come
+            upcoming = self.order[self.position + 1:]
+            random.shuffle(upcoming)
+            self.order = self.order[:self.position + 1] + upcoming
+        else:
+            self.order = list(range(len(self.items)))
+            if current_index is not None:
+                self.position = current_index
+
+    def cycle_repeat(self):
+        """Cycle the repeat mode (off -> all -> one) and return the new mode"""
+        index = REPEAT_MODES.index(self.repeat)
+        self.repeat = REPEAT_MODES[(index + 1) % len(REPEAT_MODES)]
+        return self.repeat
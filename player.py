@@ -2,54 +2,113 @@
 Simple music player for Spotify previews
 """
 import os
+import time
 import tempfile
 import threading
 import webbrowser
-import requests
+import numpy as np
 import pygame
+from play_queue import PlayQueue
+from pcm_cache import PCMCache, DEFAULT_BUDGET_BYTES, decode_file, file_cache_key
+from dsp import DEFAULT_CROSSFADE_SECONDS, apply_gain, crossfade
+from tracing import tracer
+from http_pool import http_pool
+from track_model import Track
+
+# Event posted by pygame when a streamed track finishes (or a queued track takes over)
+TRACK_END = pygame.USEREVENT + 1
+# Event posted when a buffer finishes on the low-latency playback channel
+CHANNEL_END = pygame.USEREVENT + 2
+
+# Fade used when the user skips, seeks or starts another track mid-play
+SWITCH_FADE_SECONDS = 0.3
 
 class MusicPlayer:
-    def __init__(self):
+    def __init__(self, low_latency=False, cache_budget_bytes=DEFAULT_BUDGET_BYTES, pcm_dir=None,
+                 crossfade_seconds=DEFAULT_CROSSFADE_SECONDS):
         # Initialize pygame mixer
         pygame.mixer.init()
+
+        # End events go through the pygame event queue, which needs the display module
+        try:
+            if not pygame.display.get_init():
+                pygame.display.init()
+            pygame.mixer.music.set_endevent(TRACK_END)
+        except pygame.error as e:
+            print(f"Track end events unavailable: {e}")
+
         self.currently_playing = None
         self.temp_files = []
-    
+
+        # Queue state
+        self.queue = PlayQueue()
+        self.queue_active = False
+        self.current_track = None
+        self.on_track_change = None  # Callback(track) for UI updates
+        self.on_queue_error = None  # Callback(message) when no queued track could be started
+        self._queued_file = None  # File handed to pygame.mixer.music.queue
+        self._queued_track = None
+        self._pending_preload = None  # (generation, track, filename) from the preload thread
+        self._pending_start = None  # (generation, position, track, pcm, filename) from the start thread
+        self._files_in_use = set()  # Downloads not yet playing, queued or decoded
+        self._generation = 0  # Bumped whenever the queue is restarted or skipped
+        self._lock = threading.Lock()
+
+        # Low-latency mode plays decoded PCM through a reserved mixer channel
+        self.low_latency = low_latency
+        self.crossfade_seconds = crossfade_seconds
+        self.gain_lookup = None  # Callable(track) -> linear gain, e.g. from stored loudness
+        self.pcm_cache = PCMCache(cache_budget_bytes, spill_dir=pcm_dir)
+        pygame.mixer.set_reserved(1)
+        self.channel = pygame.mixer.Channel(0)
+        self.channel.set_endevent(CHANNEL_END)
+        self._sound_pcm = None  # Un-gained PCM of the track on the channel
+        self._sound_gain = 1.0
+        self._sound_offset = 0  # Frame of the PCM the playing buffer starts at
+        self._sound_started = 0.0  # time.monotonic() when the playing buffer started
+        self._segment_end = 0  # Frame of the PCM the playing buffer stops at
+        self._queued_segment = None  # Buffer waiting on the channel, see _on_channel_end
+
+    @tracer.traced("player.play", "audio")
     def play(self, url=None, track_id=None):
         """Play a track from URL or open in Spotify"""
-        # Stop any currently playing music
-        self.stop()
-        
+        # A single play replaces whatever the queue was doing
+        self.queue_active = False
+        self.current_track = None
+
+        # Stop any currently playing music (low-latency mode crossfades instead)
+        if not self.low_latency:
+            self.stop()
+
         # If no preview URL but we have track ID, open in Spotify
         if not url and track_id:
             spotify_url = f"https://open.spotify.com/track/{track_id}"
             webbrowser.open(spotify_url)
             return True, "Opening in Spotify"
-        
+
         # If no preview URL and no track ID
         if not url:
             return False, "No playable source available"
-            
+
         try:
+            if self.low_latency:
+                track = Track(id=track_id, preview_url=url)
+                pcm = self._load_track_pcm(track)
+                if pcm is None:
+                    raise RuntimeError("preview could not be downloaded")
+                self._switch_to_pcm(pcm, self._track_gain(track))
+                return True, "Playing preview"
+
             # Download the preview file to a temporary location
-            response = requests.get(url, timeout=5)
+            with tracer.span("preview.download", "network"):
+                response = http_pool.get(url, "previews", persist=True)
             if response.status_code == 200:
-                # Create a temporary file
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-                temp_file.write(response.content)
-                temp_file.close()
-                
-                # Keep track of the file for cleanup
-                self.temp_files.append(temp_file.name)
-                self.currently_playing = temp_file.name
-                
-                # Play the music
-                pygame.mixer.music.load(temp_file.name)
-                pygame.mixer.music.play()
-                
-                # Start a thread to clean up when done
-                threading.Thread(target=self._monitor_playback, args=(temp_file.name,)).start()
-                
+                filename = self._write_temp_file(response.content)
+                try:
+                    self._start_file(filename)
+                finally:
+                    self._release_temp_file(filename)
+
                 return True, "Playing preview"
             else:
                 # Fallback to Spotify if download fails
@@ -65,33 +124,626 @@ class MusicPlayer:
                 webbrowser.open(spotify_url)
                 return True, "Opening in Spotify (error occurred)"
             return False, f"Error playing preview: {str(e)}"
-    
+
+    def play_local(self, filename, start_seconds=0):
+        """Play a local audio file, from decoded PCM when low-latency mode is on"""
+        self.queue_active = False
+        self.current_track = None
+
+        if not os.path.exists(filename):
+            return False, f"File not found: {filename}"
+
+        try:
+            if not self.low_latency:
+                self.stop()
+                self.currently_playing = filename
+                pygame.mixer.music.load(filename)
+                pygame.mixer.music.play(start=start_seconds)
+                return True, "Playing local file"
+
+            track = Track(local_path=filename)
+            pcm = self._load_track_pcm(track)
+            self._switch_to_pcm(pcm, self._track_gain(track), int(start_seconds * self.sample_rate()))
+            return True, "Playing local file"
+        except Exception as e:
+            return False, f"Error playing local file: {str(e)}"
+
+    def set_low_latency(self, enabled):
+        """Turn Sound-based playback with level matching and crossfades on or off"""
+        if enabled == self.low_latency:
+            return
+        # The two paths keep separate state, so switching stops playback
+        self.queue_active = False
+        self.stop()
+        self._set_current(None)
+        self.low_latency = enabled
+        if not enabled:
+            self.pcm_cache.clear()
+
+    def seek(self, seconds):
+        """Jump to a position in the current track"""
+        if self.channel.get_busy() and self._sound_pcm is not None:
+            self._switch_to_pcm(self._sound_pcm, self._sound_gain, int(seconds * self.sample_rate()))
+            if self.queue_active:
+                self._preload_next()
+            return True
+        if pygame.mixer.music.get_busy():
+            pygame.mixer.music.play(start=seconds)
+            return True
+        return False
+
+    def position(self):
+        """Get the playback position of the current track in seconds"""
+        if self.channel.get_busy():
+            return self._current_frame() / self.sample_rate()
+        if pygame.mixer.music.get_busy():
+            return pygame.mixer.music.get_pos() / 1000.0
+        return 0.0
+
+    def sample_rate(self):
+        """Get the mixer output sample rate"""
+        init = pygame.mixer.get_init()
+        return init[0] if init else 44100
+
+    def play_queue(self, tracks, start_index=0):
+        """Replace the queue with a playlist or result set and start playing"""
+        playable = [track for track in tracks if track and track.playable]
+        if not playable:
+            return False, "None of these tracks have a preview"
+
+        # Keep the clicked track as the starting point when it is playable
+        start_track = tracks[start_index] if 0 <= start_index < len(tracks) else None
+        start = playable.index(start_track) if start_track in playable else 0
+
+        self.queue.replace(playable, start)
+        self.queue_active = True
+        return self._play_current()
+
+    def enqueue(self, tracks):
+        """Add tracks to the end of the queue"""
+        playable = [track for track in tracks if track and track.playable]
+        if not playable:
+            return False, "None of these tracks have a preview"
+
+        first_new = len(self.queue.order)
+        self.queue.enqueue(playable)
+
+        # Nothing is playing from the queue, so start with the new tracks
+        if not self.queue_active:
+            self.queue.position = first_new
+            self.queue_active = True
+            return self._play_current()
+
+        # The upcoming track may have changed, so refresh the preload
+        self._preload_next()
+        return True, f"Added {len(playable)} tracks to the queue"
+
+    def next(self):
+        """Skip to the next track in the queue"""
+        if not self.queue_active:
+            return False, "Queue is empty"
+        if self.queue.skip() is None:
+            self.stop()
+            self._set_current(None)
+            return False, "End of queue"
+        return self._play_current()
+
+    def previous(self):
+        """Go back to the previous track in the queue"""
+        if not self.queue_active or self.queue.previous() is None:
+            return False, "Queue is empty"
+        return self._play_current()
+
+    def set_shuffle(self, enabled):
+        """Turn shuffle on or off"""
+        self.queue.set_shuffle(enabled)
+        if self.queue_active:
+            self._preload_next()
+
+    def cycle_repeat(self):
+        """Cycle the repeat mode and return the new mode"""
+        mode = self.queue.cycle_repeat()
+        if self.queue_active:
+            self._preload_next()
+        return mode
+
     def stop(self):
         """Stop any currently playing music"""
+        self._generation += 1
         if pygame.mixer.music.get_busy():
             pygame.mixer.music.stop()
-    
-    def _monitor_playback(self, filename):
-        """Monitor playback and clean up when done"""
-        # Wait until the music is no longer playing
-        while pygame.mixer.music.get_busy():
-            pygame.time.wait(1000)  # Check every second
-        
-        # Clean up the file if it's no longer needed
-        if filename == self.currently_playing:
+        self._halt_channel()
+
+        # Stopping also posts end events; they must not advance the queue
+        self._clear_end_events()
+        self._sound_pcm = None
+        self._queued_segment = None
+
+        # Release the stopped and queued files so they can be deleted
+        finished, queued = self.currently_playing, self._queued_file
+        self.currently_playing = None
+        self._queued_file = None
+        self._queued_track = None
+        with self._lock:
+            pending = self._pending_preload
+            self._pending_preload = None
+            start = self._pending_start
+            self._pending_start = None
+        try:
+            pygame.mixer.music.unload()
+        except (pygame.error, AttributeError):
+            pass
+        for filename in (finished, queued, pending[2] if pending else None, start[4] if start else None):
+            self._remove_temp_file(filename)
+
+    def process_events(self):
+        """Handle pygame end events (call regularly from the UI event loop)"""
+        # Install a preload the background thread finished in the meantime
+        with self._lock:
+            start = self._pending_start
+            self._pending_start = None
+            pending = self._pending_preload
+            self._pending_preload = None
+        if start:
+            self._install_start(*start)
+        if pending:
+            if self.low_latency:
+                self._queue_transition(*pending[:2])
+            else:
+                self._queue_file(*pending)
+
+        try:
+            events = pygame.event.get(eventtype=[TRACK_END, CHANNEL_END])
+        except pygame.error:
+            return
+
+        for event in events:
+            if event.type == CHANNEL_END:
+                self._on_channel_end()
+            else:
+                self._on_track_end()
+
+    def _on_track_end(self):
+        """Advance the queue when pygame reports the end of a streamed track"""
+        finished = self.currently_playing
+
+        if not self.queue_active:
+            self.currently_playing = None
+            self._remove_temp_file(finished)
+            return
+
+        next_track = self.queue.advance()
+
+        if next_track is None:
+            # End of the queue
+            self.queue_active = False
             self.currently_playing = None
-        
-        # Delete the file if it exists
+            self._set_current(None)
+        elif self._queued_file:
+            # pygame already switched to the queued file without a gap
+            self.currently_playing = self._queued_file
+            self._queued_file = None
+            self._queued_track = None
+            self._set_current(next_track)
+            self._preload_next()
+        else:
+            # The preload did not make it in time, start the track directly
+            self._play_current()
+
+        if finished != self.currently_playing:
+            self._remove_temp_file(finished)
+
+    def _on_channel_end(self):
+        """Move to the buffer pygame started from the channel queue"""
+        segment = self._queued_segment
+        self._queued_segment = None
+
+        if segment is None:
+            # Nothing was queued, so the channel ran dry
+            self._sound_pcm = None
+            if not self.queue_active:
+                return
+            if self.queue.advance() is None:
+                self.queue_active = False
+                self._set_current(None)
+            else:
+                self._play_current()
+            return
+
+        if segment[0] == 'body':
+            # Same track continues after its crossfade-in
+            _, start = segment
+            self._sound_offset = start
+            self._sound_started = time.monotonic()
+            self._preload_next()
+            return
+
+        # The next track has started, either crossfading in or directly
+        _, track, pcm, gain, covered, needs_body = segment
+        self.queue.advance()
+        self._sound_pcm = pcm
+        self._sound_gain = gain
+        self._sound_offset = 0
+        self._sound_started = time.monotonic()
+        self._segment_end = covered
+        self._set_current(track)
+
+        if not needs_body:
+            self._preload_next()
+            return
+
+        # Queue the rest of the new track straight away so it follows sample-accurately
+        buffer, end = self._render_body(pcm, gain, covered)
+        self.channel.queue(self._make_sound(buffer))
+        self._queued_segment = ('body', covered)
+        self._segment_end = end
+
+    def _play_current(self):
+        """Start the track at the current queue position, loading it on a worker thread when it isn't at hand"""
+        track = self.queue.current()
+        if track is None:
+            return False, "Queue is empty"
+
+        if self.low_latency:
+            # Invalidate loads and preloads for the track being replaced; it keeps playing until the switch
+            self._generation += 1
+            pcm = self._cached_track_pcm(track)
+            if pcm is not None:
+                return self._start_track(track, pcm, None)
+        else:
+            self.stop()
+            if track.local_path:
+                return self._start_track(track, None, track.local_path)
+
+        # Downloads and decodes can take seconds, so they never run on the UI thread
+        candidates = [(position, self.queue.items[self.queue.order[position]]) for position in self.queue.remaining_positions()]
+        generation = self._generation
+
+        def load():
+            # Each queue entry is tried at most once; unreachable previews are skipped
+            for position, candidate in candidates:
+                if generation != self._generation:
+                    return
+                pcm, filename = self._load_source(candidate)
+                if pcm is not None or filename:
+                    with self._lock:
+                        self._pending_start = (generation, position, candidate, pcm, filename)
+                        self._files_in_use.discard(filename)
+                    return
+            with self._lock:
+                self._pending_start = (generation, None, None, None, None)
+
+        threading.Thread(target=load, daemon=True).start()
+        return True, "Loading queue"
+
+    def _load_source(self, track):
+        """Get (pcm, filename) for a queue track, downloading or decoding as needed (runs on a worker thread)"""
+        try:
+            if self.low_latency:
+                return self._load_track_pcm(track), None
+            return None, track.local_path or self._download_preview(track.preview_url)
+        except Exception as e:
+            print(f"Error loading track: {e}")
+            return None, None
+
+    def _install_start(self, generation, position, track, pcm, filename):
+        """Start the track the start thread loaded, or end the queue if none could be loaded"""
+        # Ignore loads made stale by a skip, stop or queue change
+        if generation != self._generation:
+            self._remove_temp_file(filename)
+            return
+
+        if position is None:
+            self.queue_active = False
+            self.stop()
+            self._set_current(None)
+            if self.on_queue_error:
+                self.on_queue_error("No playable tracks left in the queue")
+            return
+
+        # Shuffle may have reordered the queue while the track loaded
+        if position >= len(self.queue.order) or self.queue.items[self.queue.order[position]] is not track:
+            position = next((i for i, index in enumerate(self.queue.order) if self.queue.items[index] is track), None)
+            if position is None:
+                self._remove_temp_file(filename)
+                return
+        self.queue.position = position
+        success, message = self._start_track(track, pcm, filename)
+        if not success and self.on_queue_error:
+            self.on_queue_error(message)
+
+    def _start_track(self, track, pcm, filename):
+        """Play a loaded queue track and preload the one after it"""
+        try:
+            if pcm is not None:
+                self._switch_to_pcm(pcm, self._track_gain(track))
+            else:
+                try:
+                    self._start_file(filename)
+                finally:
+                    self._release_temp_file(filename)
+            self._set_current(track)
+            self._preload_next()
+            return True, "Playing queue"
+        except Exception as e:
+            return False, f"Error playing queue: {str(e)}"
+
+    def _preload_next(self):
+        """Fetch the upcoming track in the background so it can follow without a gap"""
+        next_track = self.queue.peek_next()
+
+        if self.low_latency:
+            if next_track is None:
+                return
+            # Decoded already, so the crossfade can be queued right now
+            if self._cached_track_pcm(next_track) is not None:
+                self._queue_transition(self._generation, next_track)
+                return
+        else:
+            # The right track is already queued in pygame
+            if next_track is not None and next_track is self._queued_track:
+                return
+
+            # pygame.mixer.music.queue replaces the old entry, so only forget it here
+            stale = self._queued_file
+            self._queued_file = None
+            self._queued_track = None
+            if stale:
+                self._remove_temp_file(stale)
+            if next_track is None:
+                return
+
+        generation = self._generation
+        low_latency = self.low_latency
+
+        def preload():
+            if low_latency:
+                # Decoding into the PCM cache is all the preload has to do
+                if self._load_track_pcm(next_track) is None:
+                    return
+                filename = None
+            else:
+                filename = next_track.local_path or self._download_preview(next_track.preview_url)
+                if not filename:
+                    return
+            with self._lock:
+                self._pending_preload = (generation, next_track, filename)
+                self._files_in_use.discard(filename)
+
+        threading.Thread(target=preload, daemon=True).start()
+
+    def _queue_file(self, generation, track, filename):
+        """Hand a preloaded file to pygame so it starts as soon as the current one ends"""
+        # Ignore preloads made stale by a skip, stop or queue change
+        if generation != self._generation or track is not self.queue.peek_next():
+            self._remove_temp_file(filename)
+            return
+
+        try:
+            pygame.mixer.music.queue(filename)
+            self._queued_file = filename
+            self._queued_track = track
+        except pygame.error as e:
+            print(f"Error queueing next track: {e}")
+            self._remove_temp_file(filename)
+
+    def _queue_transition(self, generation, track):
+        """Queue the crossfade from the current track's tail into the next track's head"""
+        if generation != self._generation or track is not self.queue.peek_next():
+            return
+        if self._sound_pcm is None or not self.channel.get_busy():
+            return
+        # A crossfade is only queued behind a body buffer
+        if self._queued_segment is not None:
+            return
+
+        pcm = self._cached_track_pcm(track)
+        if pcm is None:
+            return
+        gain = self._track_gain(track)
+
+        tail = self._sound_pcm[self._segment_end:]
+        if len(tail):
+            buffer = crossfade(tail, pcm, self._sound_gain, gain)
+            self._queued_segment = ('transition', track, pcm, gain, len(buffer), True)
+        else:
+            # No tail left to mix with, so the next track's body follows directly
+            buffer, end = self._render_body(pcm, gain, 0, upcoming=True)
+            self._queued_segment = ('transition', track, pcm, gain, end, False)
+
+        self.channel.queue(self._make_sound(buffer))
+
+    def _switch_to_pcm(self, pcm, gain, start_frame=0):
+        """Start PCM on the channel, crossfading from whatever is playing now"""
+        start_frame = max(0, min(start_frame, len(pcm) - 1))
+
+        # Stream playback and channel playback would overlap
+        if pygame.mixer.music.get_busy():
+            pygame.mixer.music.stop()
+            self._clear_end_events()
+
+        buffer, end = self._render_body(pcm, gain, start_frame)
+        if self.channel.get_busy() and self._sound_pcm is not None:
+            position = self._current_frame()
+            fade_frames = int(SWITCH_FADE_SECONDS * self.sample_rate())
+            tail = self._sound_pcm[position:position + fade_frames]
+            mixed = crossfade(tail, pcm[start_frame:end], self._sound_gain, gain)
+            buffer = np.concatenate((mixed, buffer[len(mixed):]))
+
+        self._generation += 1
+        self._halt_channel()
+        self._clear_end_events()
+        self._queued_segment = None
+
+        self.channel.play(self._make_sound(buffer))
+        self._sound_pcm = pcm
+        self._sound_gain = gain
+        self._sound_offset = start_frame
+        self._sound_started = time.monotonic()
+        self._segment_end = end
+
+    def _render_body(self, pcm, gain, start_frame, upcoming=False):
+        """Apply gain to a track, leaving its tail for the crossfade when another track follows"""
+        # `upcoming` is set when rendering the next track rather than the current one
+        end = len(pcm)
+        if upcoming:
+            follows = self.queue.peek_after_next() is not None
+        else:
+            follows = self.queue.peek_next() is not None
+        if self.queue_active and follows:
+            fade_frames = min(int(self.crossfade_seconds * self.sample_rate()), len(pcm) // 4)
+            end = max(len(pcm) - fade_frames, start_frame + 1)
+        return apply_gain(pcm[start_frame:end], gain), end
+
+    def _current_frame(self):
+        """Estimate the frame of the current PCM that is playing now"""
+        elapsed = int((time.monotonic() - self._sound_started) * self.sample_rate())
+        return min(self._sound_offset + elapsed, self._segment_end)
+
+    def _track_gain(self, track):
+        """Get the loudness-normalizing gain for a track"""
+        if not self.gain_lookup:
+            return 1.0
+        try:
+            return self.gain_lookup(track)
+        except Exception as e:
+            print(f"Error looking up track gain: {e}")
+            return 1.0
+
+    def _pcm_key(self, track):
+        """Get the PCM cache key for a queue track"""
+        if track.local_path:
+            return file_cache_key(track.local_path)
+        return f"preview:{track.preview_url}"
+
+    def _cached_track_pcm(self, track):
+        """Get a track's PCM only if it is already decoded"""
+        try:
+            return self.pcm_cache.get(self._pcm_key(track))
+        except OSError:
+            return None
+
+    def _load_track_pcm(self, track):
+        """Decode a local file or downloaded preview into the PCM cache"""
+        if track.local_path:
+            return self.pcm_cache.load(track.local_path)
+
+        key = self._pcm_key(track)
+        pcm = self.pcm_cache.get(key)
+        if pcm is not None:
+            return pcm
+
+        filename = self._download_preview(track.preview_url)
+        if not filename:
+            return None
+        try:
+            return self.pcm_cache.put(key, decode_file(filename))
+        finally:
+            self._release_temp_file(filename)
+            self._remove_temp_file(filename)
+
+    def _halt_channel(self):
+        """Stop the playback channel, including any buffer queued behind the current one"""
+        # Stopping a channel starts its queued buffer, so the second stop clears that
+        for _ in range(2):
+            if self.channel.get_busy():
+                self.channel.stop()
+
+    def _make_sound(self, pcm):
+        """Turn a PCM array into a pygame Sound matching the mixer layout"""
+        init = pygame.mixer.get_init()
+        channels = init[2] if init else 2
+        if channels == 1:
+            pcm = pcm[:, 0]
+        return pygame.sndarray.make_sound(np.ascontiguousarray(pcm))
+
+    def _download_preview(self, url):
+        """Download a preview to a temporary file and return its path"""
+        if not url:
+            return None
+        try:
+            with tracer.span("preview.download", "network"):
+                response = http_pool.get(url, "previews", persist=True)
+            if response.status_code == 200:
+                return self._write_temp_file(response.content)
+            return None
+        except Exception as e:
+            print(f"Error downloading preview: {e}")
+            return None
+
+    def _write_temp_file(self, content):
+        """Write downloaded audio to a temporary file, in use until _release_temp_file"""
+        # Create a temporary file
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
+        temp_file.write(content)
+        temp_file.close()
+
+        # Keep track of the file for cleanup; pruning skips it until the caller has handed it on
+        with self._lock:
+            self.temp_files.append(temp_file.name)
+            self._files_in_use.add(temp_file.name)
+        return temp_file.name
+
+    def _release_temp_file(self, filename):
+        """Mark a download as handed on (playing, queued as a preload or decoded)"""
+        with self._lock:
+            self._files_in_use.discard(filename)
+
+    def _start_file(self, filename):
+        """Load a file into pygame and start playing it"""
+        self.currently_playing = filename
+        pygame.mixer.music.load(filename)
+        pygame.mixer.music.play()
+
+    def _set_current(self, track):
+        """Update the current queue track and notify the UI"""
+        self.current_track = track
+        if self.on_track_change:
+            self.on_track_change(track)
+
+    def _clear_end_events(self):
+        """Drop end events that are already in the pygame event queue"""
+        try:
+            pygame.event.clear(eventtype=[TRACK_END, CHANNEL_END])
+        except pygame.error:
+            pass
+
+    def _remove_temp_file(self, filename):
+        """Delete a temporary file that is no longer playing, queued, preloaded or being decoded"""
+        if not filename or filename in (self.currently_playing, self._queued_file):
+            return
+        with self._lock:
+            pending = self._pending_preload
+            if filename in self._files_in_use or (pending and filename == pending[2]):
+                return
+        # Never delete files the player did not download (e.g. local tracks)
+        if filename not in self.temp_files:
+            return
         try:
             if os.path.exists(filename):
                 os.unlink(filename)
+            with self._lock:
                 if filename in self.temp_files:
                     self.temp_files.remove(filename)
         except:
             pass  # Ignore errors in cleanup
-    
+
+    def prune_temp_files(self):
+        """Delete downloaded previews nothing uses any more and forget files already gone"""
+        with self._lock:
+            files = list(self.temp_files)
+        for filename in files:
+            if not os.path.exists(filename):
+                with self._lock:
+                    if filename in self.temp_files:
+                        self.temp_files.remove(filename)
+            else:
+                self._remove_temp_file(filename)
+        return len(self.temp_files)
+
     def cleanup(self):
         """Clean up all temporary files"""
+        self.queue_active = False
         self.stop()
         for file in self.temp_files:
             try:
@@ -99,4 +751,4 @@ class MusicPlayer:
                     os.unlink(file)
             except:
                 pass
-        self.temp_files = []
\ No newline at end of file
+        self.temp_files = []
@@ -0,0 +1,238 @@
+"""
+Streaming playlist export and import (M3U, CSV, JSONL, Parquet)
+"""
+import os
+import re
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from track_model import tracks_from_spotify, track_columns
+
+EXPORT_FORMATS = {".m3u": "m3u", ".m3u8": "m3u", ".csv": "csv", ".jsonl": "jsonl", ".parquet": "parquet"}
+EXPORT_FIELDS = ("id", "name", "artist", "album", "duration_ms", "isrc")
+PAGE_SIZE = 100  # Max items per playlist_items request
+ADD_BATCH = 100  # Max ids per playlist_add_items request
+IMPORT_CHUNK = 500  # Rows read and resolved at a time
+PARQUET_ROW_GROUP = 5000
+SEARCH_WORKERS = 8
+TRACK_ID_PATTERN = re.compile(r"(?:spotify:track:|open\.spotify\.com/track/)([A-Za-z0-9]+)")
+
+def format_for_path(path):
+    """Pick an export/import format from a file extension"""
+    fmt = EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if not fmt:
+        raise ValueError(f"Unsupported playlist file type: {path}")
+    return fmt
+
+def iter_playlist_items(spotify, playlist_id, page_size=PAGE_SIZE):
+    """Yield a playlist's raw items (tracks, episodes, local files) one page at a time"""
+    offset = 0
+    while True:
+        page = spotify.playlist_items(playlist_id, limit=page_size, offset=offset)
+        yield from page['items']
+        offset += len(page['items'])
+        if not page.get('next') or not page['items']:
+            return
+
+def iter_playlist_tracks(spotify, playlist_id, page_size=PAGE_SIZE):
+    """Yield a playlist's Tracks one page at a time"""
+    for page in chunked(iter_playlist_items(spotify, playlist_id, page_size), page_size):
+        yield from tracks_from_spotify(page)
+
+def reorderable(item):
+    """Whether a playlist item is a Spotify track that can be written back by id"""
+    track = (item or {}).get('track')
+    return (
+        isinstance(track, dict) and track.get('type', "track") == "track"
+        and bool(track.get('id')) and not track.get('is_local') and not item.get('is_local')
+    )
+
+def chunked(iterable, size):
+    """Yield lists of at most size items from any iterable"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def write_m3u(tracks, path):
+    """Write extended M3U with spotify: URIs as locations"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("#EXTM3U\n")
+        for track in tracks:
+            seconds = round(track.duration_ms / 1000) if track.duration_ms else -1
+            f.write(f"#EXTINF:{seconds},{track.artist_name} - {track.name}\n")
+            f.write(f"spotify:track:{track.id}\n" if track.id else f"{track.local_path or track.preview_url or ''}\n")
+            count += 1
+    return count
+
+def write_csv(tracks, path):
+    """Write one CSV row per track"""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_FIELDS)
+        for track in tracks:
+            writer.writerow([getattr(track, field) for field in EXPORT_FIELDS])
+            count += 1
+    return count
+
+def write_jsonl(tracks, path):
+    """Write one JSON object per line"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for track in tracks:
+            f.write(json.dumps({field: getattr(track, field) for field in EXPORT_FIELDS}) + "\n")
+            count += 1
+    return count
+
+def write_parquet(tracks, path):
+    """Write Parquet one row group at a time (needs pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.string()), ("name", pa.string()), ("artist", pa.string()),
+        ("album", pa.string()), ("duration_ms", pa.int64()), ("isrc", pa.string())
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in chunked(tracks, PARQUET_ROW_GROUP):
+            writer.write_table(pa.Table.from_pydict(track_columns(batch, EXPORT_FIELDS), schema=schema))
+            count += len(batch)
+    return count
+
+def read_m3u(path):
+    """Yield rows from an (extended) M3U file"""
+    info = {}
+    with open(path, encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#EXTINF:"):
+                # "#EXTINF:seconds,Artist - Title"
+                title = line.split(",", 1)[1] if "," in line else ""
+                artist, _, name = title.partition(" - ")
+                info = {'artist': artist, 'name': name} if name else {'name': title}
+            elif line and not line.startswith("#"):
+                match = TRACK_ID_PATTERN.search(line)
+                row = dict(info, id=match.group(1) if match else None)
+                if not row.get('name'):
+                    row['name'] = os.path.splitext(os.path.basename(line))[0]
+                yield row
+                info = {}
+
+def read_csv(path):
+    """Yield rows from a CSV file with a header row"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        yield from csv.DictReader(f)
+
+def read_jsonl(path):
+    """Yield rows from a JSON Lines file"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def read_parquet(path):
+    """Yield rows from a Parquet file one batch at a time (needs pyarrow)"""
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=IMPORT_CHUNK):
+        yield from batch.to_pylist()
+
+WRITERS = {'m3u': write_m3u, 'csv': write_csv, 'jsonl': write_jsonl, 'parquet': write_parquet}
+READERS = {'m3u': read_m3u, 'csv': read_csv, 'jsonl': read_jsonl, 'parquet': read_parquet}
+
+def search_query(row):
+    """Spotify search query for a row without a track id"""
+    if row.get('isrc'):
+        return f"isrc:{row['isrc']}"
+    query = f'track:"{row.get("name", "")}"'
+    if row.get('artist'):
+        query += f' artist:"{row["artist"]}"'
+    return query
+
+def export_playlist(spotify, playlist_id, path, fmt=None):
+    """Stream a playlist to a file page by page; returns (success, message)"""
+    try:
+        fmt = fmt or format_for_path(path)
+        start = time.perf_counter()
+        # Written beside the target first so a failed export never leaves a truncated file
+        count = WRITERS[fmt](iter_playlist_tracks(spotify, playlist_id), path + ".tmp")
+        os.replace(path + ".tmp", path)
+        elapsed = time.perf_counter() - start
+        return True, f"Exported {count} tracks in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f} tracks/s)"
+    except Exception as e:
+        if os.path.exists(path + ".tmp"):
+            os.remove(path + ".tmp")
+        return False, f"Export failed: {str(e)}"
+
+class PlaylistImporter:
+    """Reads a playlist file in chunks, resolves rows to track ids and adds them to a new playlist"""
+    def __init__(self, spotify, user_id, async_client=None, workers=SEARCH_WORKERS):
+        self.spotify = spotify
+        self.user_id = user_id
+        self.async_client = async_client  # Optional AsyncSpotify; searches then run on its event loop
+        self.workers = workers
+
+    def resolve(self, rows):
+        """Track ids for a chunk of rows, in order; None where nothing matched"""
+        ids = [row.get('id') or None for row in rows]
+        missing = [i for i, track_id in enumerate(ids) if not track_id]
+        if not missing:
+            return ids
+
+        queries = [search_query(rows[i]) for i in missing]
+        if self.async_client:
+            calls = {str(n): ("search", (query,), {'limit': 1}) for n, query in enumerate(queries)}
+            found = self.async_client.gather(**calls)
+            results = [found[str(n)] for n in range(len(queries))]
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(self._search, queries))
+
+        for i, result in zip(missing, results):
+            items = result['tracks']['items'] if isinstance(result, dict) else []
+            ids[i] = items[0]['id'] if items else None
+        return ids
+
+    def _search(self, query):
+        """Search for one track; failures count as no match"""
+        try:
+            return self.spotify.search(q=query, limit=1, type="track")
+        except Exception as e:
+            print(f"Error searching for {query}: {e}")
+            return None
+
+    def import_file(self, path, name=None, fmt=None, progress_callback=None):
+        """Create a playlist from a file; returns (success, message)"""
+        try:
+            fmt = fmt or format_for_path(path)
+            start = time.perf_counter()
+            playlist = self.spotify.user_playlist_create(
+                user=self.user_id,
+                name=name or os.path.splitext(os.path.basename(path))[0],
+                public=True,
+                description="Imported with MoodySongs App"
+            )
+
+            read, added = 0, 0
+            for rows in chunked(READERS[fmt](path), IMPORT_CHUNK):
+                ids = [track_id for track_id in self.resolve(rows) if track_id]
+                for batch in chunked(ids, ADD_BATCH):
+                    self.spotify.playlist_add_items(playlist['id'], batch)
+                read += len(rows)
+                added += len(ids)
+                if progress_callback:
+                    progress_callback(read, added)
+
+            elapsed = time.perf_counter() - start
+            return True, (f"Imported {added} of {read} tracks in {elapsed:.1f}s "
+                          f"({read / max(elapsed, 1e-9):.0f} tracks/s)")
+        except Exception as e:
+            return False, f"Import failed: {str(e)}"
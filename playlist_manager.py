@@ -1,20 +1,39 @@
 import json
 import os
+from track_model import tracks_from_spotify
+from playlist_io import export_playlist, iter_playlist_items, reorderable, PlaylistImporter, chunked, ADD_BATCH
+from playlist_ordering import order_tracks as sequence_tracks
+from async_spotify import AUDIO_FEATURES_BATCH
+from playlist_sets import sync_playlists, PlaylistSets
+from smart_playlists import SmartPlaylists, mood_definition
+
+# Map moods to audio features
+MOOD_PARAMS = {
+    "Happy": {"target_valence": 0.8, "target_energy": 0.7},
+    "Sad": {"target_valence": 0.2, "target_energy": 0.3},
+    "Energetic": {"target_valence": 0.6, "target_energy": 0.9},
+    "Chill": {"target_valence": 0.5, "target_energy": 0.3},
+    "Focused": {"target_valence": 0.5, "target_energy": 0.5, "target_instrumentalness": 0.5}
+}
 
 class PlaylistManager:
-    def __init__(self, spotify_client):
+    def __init__(self, spotify_client, catalog=None, async_client=None):
         self.spotify = spotify_client
+        self.catalog = catalog  # Optional MusicCatalog with the synced saved library
+        self.async_client = async_client  # Optional AsyncSpotify for concurrent import lookups
         self.user_id = None
         if self.spotify:
             user = self.spotify.current_user()
             self.user_id = user['id'] if user else None
     
-    def create_mood_playlist(self, mood, track_ids):
-        """Create a new playlist based on mood"""
+    def create_mood_playlist(self, mood, track_ids, ordering="original"):
+        """Create a new playlist based on mood, optionally sequenced by an ordering from playlist_ordering"""
         if not self.spotify or not self.user_id or not track_ids:
             return False, "Missing required data"
         
         try:
+            track_ids = self.order_tracks(track_ids, ordering)
+            
             # Create a new playlist
             playlist = self.spotify.user_playlist_create(
                 user=self.user_id,
@@ -30,6 +49,52 @@ class PlaylistManager:
         except Exception as e:
             return False, f"Failed to create playlist: {str(e)}"
     
+    def get_audio_features(self, track_ids):
+        """Get {track_id: features}, from the catalog where stored and from Spotify otherwise"""
+        features = self.catalog.get_audio_features(track_ids) if self.catalog else {}
+        # Rows stored before key/mode were kept have a tempo but no key
+        missing = [
+            track_id for track_id in track_ids
+            if track_id not in features or (features[track_id]['key'] is None and features[track_id]['tempo'] is not None)
+        ]
+        if missing and self.spotify:
+            fetched = [
+                item for batch in chunked(missing, AUDIO_FEATURES_BATCH)
+                for item in self.spotify.audio_features(batch) if item
+            ]
+            if self.catalog:
+                self.catalog.save_audio_features(fetched)
+            features.update((item['id'], item) for item in fetched)
+        return features
+    
+    def order_tracks(self, track_ids, ordering="smooth"):
+        """Sequence track ids by audio features ("smooth", "arc", "rising", "falling" or "original")"""
+        if ordering in (None, "original"):
+            return list(track_ids)
+        return sequence_tracks(track_ids, self.get_audio_features(track_ids), ordering)
+    
+    def reorder_playlist(self, playlist_id, ordering="smooth"):
+        """Rewrite a playlist's tracks in a new order"""
+        if not self.spotify:
+            return False, "Missing required data"
+        
+        try:
+            items = list(iter_playlist_items(self.spotify, playlist_id))
+            # Replacing the items would drop local files, episodes and unavailable tracks for good
+            skipped = sum(1 for item in items if not reorderable(item))
+            if skipped:
+                return False, f"Can't reorder: {skipped} items are local files, episodes or unavailable tracks"
+            track_ids = [item['track']['id'] for item in items]
+            ordered = self.order_tracks(track_ids, ordering)
+            batches = list(chunked(ordered, ADD_BATCH)) or [[]]
+            # Replace takes at most one batch; the rest is appended
+            self.spotify.playlist_replace_items(playlist_id, batches[0])
+            for batch in batches[1:]:
+                self.spotify.playlist_add_items(playlist_id, batch)
+            return True, f"Reordered {len(ordered)} tracks"
+        except Exception as e:
+            return False, f"Failed to reorder playlist: {str(e)}"
+    
     def get_user_playlists(self, limit=50):
         """Get user's playlists"""
         if not self.spotify or not self.user_id:
@@ -55,40 +120,102 @@ class PlaylistManager:
             return []
     
     def get_mood_recommendations(self, mood, limit=20):
-        """Get track recommendations based on mood"""
+        """Get Tracks recommended for a mood, falling back to matching tracks from the saved library"""
         if not self.spotify:
-            return []
+            return self.get_library_mood_tracks(mood, limit)
         
         try:
-            # Map moods to audio features
-            mood_params = {
-                "Happy": {"target_valence": 0.8, "target_energy": 0.7},
-                "Sad": {"target_valence": 0.2, "target_energy": 0.3},
-                "Energetic": {"target_valence": 0.6, "target_energy": 0.9},
-                "Chill": {"target_valence": 0.5, "target_energy": 0.3},
-                "Focused": {"target_valence": 0.5, "target_energy": 0.5, "target_instrumentalness": 0.5}
-            }
-            
             # Get user's top tracks for seed
             top_tracks = self.spotify.current_user_top_tracks(limit=5, time_range="medium_term")
             if not top_tracks['items']:
-                return []
+                return self.get_library_mood_tracks(mood, limit)
                 
             seed_tracks = [track['id'] for track in top_tracks['items'][:2]]
             
             # Get recommendations
-            params = mood_params.get(mood, {})
+            params = MOOD_PARAMS.get(mood, {})
             recommendations = self.spotify.recommendations(
                 seed_tracks=seed_tracks, 
                 limit=limit,
                 **params
             )
             
-            return recommendations['tracks']
+            return tracks_from_spotify(recommendations['tracks']) or self.get_library_mood_tracks(mood, limit)
         except Exception as e:
             print(f"Error getting recommendations: {e}")
+            return self.get_library_mood_tracks(mood, limit)
+    
+    def get_library_mood_tracks(self, mood, limit=20):
+        """Get saved tracks whose audio features are closest to a mood"""
+        if not self.catalog:
+            return []
+        
+        params = MOOD_PARAMS.get(mood, {})
+        targets = {key[len("target_"):]: value for key, value in params.items()}
+        try:
+            return tracks_from_spotify(self.catalog.recommend_from_library(targets, limit=limit))
+        except Exception as e:
+            print(f"Error getting library recommendations: {e}")
             return []
     
+    def export_playlist(self, playlist_id, path):
+        """Stream a playlist to an M3U, CSV, JSONL or Parquet file (picked by extension)"""
+        if not self.spotify:
+            return False, "Missing required data"
+        return export_playlist(self.spotify, playlist_id, path)
+    
+    def import_playlist(self, path, name=None, progress_callback=None):
+        """Create a playlist from an M3U, CSV, JSONL or Parquet file"""
+        if not self.spotify or not self.user_id:
+            return False, "Missing required data"
+        importer = PlaylistImporter(self.spotify, self.user_id, self.async_client)
+        return importer.import_file(path, name, progress_callback=progress_callback)
+    
+    def sync_playlists(self):
+        """Store the user's playlists in the catalog for set operations"""
+        if not self.spotify or not self.catalog:
+            return False, "Missing required data"
+        return sync_playlists(self.spotify, self.catalog)
+    
+    def get_playlist_sets(self, fuzzy=False):
+        """Load the stored playlists as a PlaylistSets engine"""
+        return PlaylistSets.from_catalog(self.catalog, fuzzy=fuzzy)
+    
+    def create_playlist_from_tracks(self, name, track_ids, description="Generated with MoodySongs App"):
+        """Create a playlist of any length (e.g. a set operation result)"""
+        if not self.spotify or not self.user_id or not track_ids:
+            return False, "Missing required data"
+        
+        try:
+            playlist = self.spotify.user_playlist_create(user=self.user_id, name=name, public=True, description=description)
+            for batch in chunked(track_ids, ADD_BATCH):
+                self.spotify.playlist_add_items(playlist['id'], batch)
+            return True, playlist['id']
+        except Exception as e:
+            return False, f"Failed to create playlist: {str(e)}"
+    
+    def get_smart_playlists(self):
+        """Smart playlists maintained from the catalog"""
+        return SmartPlaylists(self.catalog, self.spotify, self.user_id)
+    
+    def create_smart_playlist(self, name, definition):
+        """Create a playlist that follows rules over the saved library"""
+        if not self.catalog:
+            return False, "Missing required data"
+        return self.get_smart_playlists().create(name, definition)
+    
+    def create_smart_mood_playlist(self, mood, limit=100):
+        """Create a mood playlist that keeps updating as the library changes"""
+        if mood not in MOOD_PARAMS:
+            return False, f"Unknown mood: {mood}"
+        return self.create_smart_playlist(f"{mood} Mix", mood_definition(MOOD_PARAMS[mood], limit))
+    
+    def refresh_smart_playlists(self, force=False):
+        """Push the changes in every smart playlist since it was last materialized"""
+        if not self.catalog:
+            return False, "Missing required data"
+        return self.get_smart_playlists().refresh_all(force)
+    
     def save_session(self, data, filename="session.json"):
         """Save session data to file"""
         try:
@@ -0,0 +1,176 @@
+"""
+Sequencing track sets by audio features: smooth tempo/key transitions or a target energy curve
+"""
+import time
+import numpy as np
+
+# Orderings offered when creating or reordering playlists
+ORDERINGS = {
+    "original": "As recommended",
+    "smooth": "Smooth transitions",
+    "arc": "Energy arc",
+    "rising": "Rising energy",
+    "falling": "Falling energy"
+}
+# Target energy by relative position, as (position, energy) points that are linearly interpolated
+ENERGY_CURVES = {
+    "arc": ((0.0, 0.35), (0.65, 0.9), (1.0, 0.4)),  # Warm-up, peak, cool-down
+    "rising": ((0.0, 0.3), (1.0, 0.9)),
+    "falling": ((0.0, 0.9), (1.0, 0.3))
+}
+# Weights of each part of the transition distance
+TRANSITION_WEIGHTS = {'tempo': 1.0, 'key': 0.6, 'energy': 0.8}
+TEMPO_SCALE = 20.0  # BPM difference that counts as one unit of transition distance
+ARC_BLOCK = 8  # Tracks per stretch of the curve that are sequenced for smoothness
+TWO_OPT_SECONDS = 1.0  # Time budget for 2-opt improvement
+
+def ordering_for_label(label):
+    """ORDERINGS key for a label shown in the UI"""
+    return next((key for key, text in ORDERINGS.items() if text == label), "original")
+
+def camelot(key, mode):
+    """Position (0-11) of a key on the Camelot wheel; relative major/minor share a position"""
+    # Each step clockwise is a fifth up; a minor key sits with the major three semitones above
+    return (7 * (key + 3 * (1 - mode))) % 12
+
+def feature_arrays(features):
+    """Tempo, wheel position, mode and energy arrays from audio feature dicts (missing values as NaN)"""
+    def column(name):
+        return np.array([np.nan if item.get(name) is None else item[name] for item in features], dtype=np.float64)
+
+    tempo, key, mode, energy = column('tempo'), column('key'), column('mode'), column('energy')
+    # Spotify reports key -1 when it couldn't detect one
+    known = ~np.isnan(key) & ~np.isnan(mode) & (key >= 0)
+    wheel = np.full(len(features), np.nan)
+    wheel[known] = camelot(key[known].astype(int), mode[known].astype(int))
+    return {'tempo': tempo, 'wheel': wheel, 'mode': mode, 'energy': energy}
+
+def transition_matrix(arrays, weights=TRANSITION_WEIGHTS):
+    """Pairwise cost of playing track j right after track i"""
+    tempo = arrays['tempo']
+    # Half and double time mix as well as the same tempo
+    tempo_diff = np.abs(tempo[:, None] - tempo[None, :])
+    tempo_diff = np.minimum(tempo_diff, np.abs(2 * tempo[:, None] - tempo[None, :]))
+    tempo_diff = np.minimum(tempo_diff, np.abs(tempo[:, None] - 2 * tempo[None, :]))
+
+    wheel = arrays['wheel']
+    steps = np.abs(wheel[:, None] - wheel[None, :])
+    steps = np.minimum(steps, 12 - steps) + (arrays['mode'][:, None] != arrays['mode'][None, :])
+
+    energy_diff = np.abs(arrays['energy'][:, None] - arrays['energy'][None, :])
+
+    # Unknown features cost nothing rather than poisoning every distance
+    distance = (
+        weights['tempo'] * np.nan_to_num(tempo_diff / TEMPO_SCALE)
+        + weights['key'] * np.nan_to_num(steps)
+        + weights['energy'] * np.nan_to_num(energy_diff * 10)
+    )
+    np.fill_diagonal(distance, 0)
+    return distance
+
+def greedy_path(distance, start=0):
+    """Nearest-neighbour path through every node"""
+    n = len(distance)
+    visited = np.zeros(n, dtype=bool)
+    path = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, distance[path[-1]])
+        nxt = int(row.argmin())
+        path.append(nxt)
+        visited[nxt] = True
+    return np.array(path)
+
+def path_cost(path, distance):
+    """Total transition cost of a path"""
+    return float(distance[path[:-1], path[1:]].sum())
+
+def two_opt(path, distance, time_limit=TWO_OPT_SECONDS, fixed_start=True):
+    """Improve an open path by reversing segments while that shortens it
+
+    For each edge the gain of every possible reversal is computed at once
+    with numpy, and the best one is applied.
+    """
+    path = np.array(path)
+    n = len(path)
+    if n < 4:
+        return path
+    deadline = time.perf_counter() + time_limit
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        # i is the last node kept before the reversed segment; -1 means the segment starts the path
+        for i in range(0 if fixed_start else -1, n - 2):
+            a = path[i] if i >= 0 else None
+            b = path[i + 1]
+            c = path[i + 2:]  # Candidate last nodes of the reversed segment
+            e = np.append(path[i + 3:], -1)  # Node after each candidate (-1: end of path)
+            before = (distance[a, b] if a is not None else 0) + np.where(e >= 0, distance[c, e], 0)
+            after = (distance[a, c] if a is not None else 0) + np.where(e >= 0, distance[b, e], 0)
+            gains = before - after
+            j = int(gains.argmax())
+            if gains[j] > 1e-9:
+                path[i + 1:i + 3 + j] = path[i + 1:i + 3 + j][::-1]
+                improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return path
+
+def order_smooth(features, time_limit=TWO_OPT_SECONDS):
+    """Indices of tracks in an order with small tempo/key/energy jumps, starting from the calmest"""
+    if len(features) < 3:
+        return list(range(len(features)))
+    arrays = feature_arrays(features)
+    distance = transition_matrix(arrays)
+    start = int(np.nanargmin(arrays['energy'])) if not np.isnan(arrays['energy']).all() else 0
+    path = greedy_path(distance, start)
+    return two_opt(path, distance, time_limit).tolist()
+
+def energy_targets(n, curve):
+    """Target energy for each of n positions along a curve"""
+    points = ENERGY_CURVES[curve]
+    positions = np.linspace(0, 1, n) if n > 1 else np.zeros(1)
+    return np.interp(positions, [p for p, _ in points], [e for _, e in points])
+
+def order_curve(features, curve="arc", block=ARC_BLOCK):
+    """Indices of tracks following a target energy curve, smoothed within short stretches"""
+    n = len(features)
+    if n < 2:
+        return list(range(n))
+    arrays = feature_arrays(features)
+    energy = np.where(np.isnan(arrays['energy']), 0.5, arrays['energy'])
+    targets = energy_targets(n, curve)
+
+    # Matching sorted energies to sorted targets minimizes the total distance to the curve
+    assigned = np.empty(n, dtype=np.int64)
+    assigned[np.argsort(targets, kind="stable")] = np.argsort(energy, kind="stable")
+
+    # Within each stretch the targets are nearly equal, so the tracks can be re-sequenced for smooth transitions
+    distance = transition_matrix(arrays)
+    order = []
+    for start in range(0, n, block):
+        members = list(assigned[start:start + block])
+        while members:
+            if order:
+                nxt = min(members, key=lambda m: distance[order[-1], m])
+            else:
+                nxt = members[0]
+            order.append(nxt)
+            members.remove(nxt)
+    return [int(i) for i in order]
+
+def order_tracks(track_ids, features_by_id, ordering="smooth"):
+    """Track ids in the requested ordering; tracks without features keep their order at the end"""
+    if ordering in (None, "original"):
+        return list(track_ids)
+    if ordering not in ORDERINGS:
+        raise ValueError(f"Unknown ordering: {ordering}")
+
+    known = [track_id for track_id in track_ids if features_by_id.get(track_id)]
+    unknown = [track_id for track_id in track_ids if not features_by_id.get(track_id)]
+    features = [features_by_id[track_id] for track_id in known]
+    if ordering == "smooth":
+        indices = order_smooth(features)
+    else:
+        indices = order_curve(features, ordering)
+    return [known[i] for i in indices] + unknown
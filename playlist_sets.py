@@ -0,0 +1,193 @@
+"""
+Set algebra and duplicate detection across playlists stored in the catalog
+"""
+import re
+import unicodedata
+import numpy as np
+from playlist_io import iter_playlist_tracks
+
+# Version/edition suffixes that don't make a different song for duplicate matching
+TITLE_NOISE = re.compile(r"\s*[\(\[][^\)\]]*(feat\.?|ft\.|with|remaster|version|edit|mono|stereo)[^\)\]]*[\)\]]|\s+-\s+.*$", re.IGNORECASE)
+NON_WORD = re.compile(r"[^\w\s]")
+
+def normalize_text(text):
+    """Lowercase, strip accents, punctuation and repeated spaces"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(NON_WORD.sub(" ", text.lower()).split())
+
+def match_key(name, artist, isrc=None):
+    """Key under which versions of the same recording are treated as duplicates"""
+    if isrc:
+        return f"isrc:{isrc.upper()}"
+    return f"title:{normalize_text(TITLE_NOISE.sub('', name or ''))}|{normalize_text(artist)}"
+
+def sync_playlists(spotify, catalog, playlist_ids=None):
+    """Store the user's playlists in the catalog, re-reading only those whose snapshot changed
+
+    Returns (success, message).
+    """
+    try:
+        summaries = []
+        offset = 0
+        while True:
+            page = spotify.current_user_playlists(limit=50, offset=offset)
+            summaries.extend(page['items'])
+            offset += len(page['items'])
+            if not page.get('next') or not page['items']:
+                break
+
+        stored = catalog.playlist_snapshots()
+        if playlist_ids is None:
+            catalog.delete_playlists(set(stored) - {summary['id'] for summary in summaries})
+
+        updated = 0
+        for summary in summaries:
+            if playlist_ids is not None and summary['id'] not in playlist_ids:
+                continue
+            snapshot = summary.get('snapshot_id')
+            if snapshot and stored.get(summary['id']) == snapshot:
+                continue
+            tracks = list(iter_playlist_tracks(spotify, summary['id']))
+            catalog.upsert_tracks([track.to_spotify() for track in tracks])
+            catalog.save_playlist(summary['id'], summary['name'], snapshot, [track.id for track in tracks if track.id])
+            updated += 1
+
+        return True, f"Synced {updated} of {len(summaries)} playlists"
+    except Exception as e:
+        print(f"Error syncing playlists: {e}")
+        return False, f"Playlist sync failed: {str(e)}"
+
+class PlaylistSets:
+    """Playlists as bitsets over a shared dictionary of tracks (or of match keys when fuzzy)
+
+    Set operations work on Python ints, whose bitwise operators run over the
+    whole bitmap in C; reports that count across playlists use a numpy
+    membership matrix.
+    """
+    def __init__(self, playlists, names=None, track_keys=None):
+        self.names = names or {}  # Playlist id -> name
+        self.lists = playlists  # Playlist id -> [track ids in order]
+        self.track_keys = track_keys  # Optional track id -> match key for fuzzy matching
+
+        # Dictionary: every distinct key gets a bit; the first track id seen represents it
+        self.index = {}
+        self.representatives = []
+        self.bits = {}
+        for playlist_id, track_ids in playlists.items():
+            positions = np.fromiter((self._bit(track_id) for track_id in track_ids), dtype=np.int64, count=len(track_ids))
+            self.bits[playlist_id] = positions
+        self.masks = {playlist_id: self._pack(positions) for playlist_id, positions in self.bits.items()}
+
+    @classmethod
+    def from_catalog(cls, catalog, fuzzy=False):
+        """Load every stored playlist; fuzzy matches tracks by ISRC or normalized title and artist"""
+        track_keys = None
+        if fuzzy:
+            track_keys = {
+                track_id: match_key(name, artist, isrc)
+                for track_id, (name, artist, isrc) in catalog.playlist_track_info().items()
+            }
+        return cls(catalog.playlist_track_lists(), catalog.playlist_names(), track_keys)
+
+    def _key(self, track_id):
+        """Dictionary key for a track"""
+        if self.track_keys is None:
+            return track_id
+        return self.track_keys.get(track_id, track_id)
+
+    def _bit(self, track_id):
+        """Bit position of a track, adding it to the dictionary if new"""
+        key = self._key(track_id)
+        bit = self.index.get(key)
+        if bit is None:
+            bit = self.index[key] = len(self.representatives)
+            self.representatives.append(track_id)
+        return bit
+
+    def _pack(self, positions):
+        """Bitset int with the given bit positions set"""
+        flags = np.zeros(len(self.representatives), dtype=bool)
+        flags[positions] = True
+        return int.from_bytes(np.packbits(flags, bitorder="little").tobytes(), "little")
+
+    def _unpack(self, mask):
+        """Bit positions set in a bitset int"""
+        n_bytes = (len(self.representatives) + 7) // 8
+        flags = np.unpackbits(np.frombuffer(mask.to_bytes(n_bytes, "little"), dtype=np.uint8), bitorder="little")
+        return np.flatnonzero(flags)
+
+    def tracks(self, mask):
+        """Track ids (one per key) in a bitset"""
+        return [self.representatives[bit] for bit in self._unpack(mask)]
+
+    def union(self, *playlist_ids):
+        """Tracks in any of the playlists"""
+        mask = 0
+        for playlist_id in playlist_ids:
+            mask |= self.masks[playlist_id]
+        return self.tracks(mask)
+
+    def intersection(self, *playlist_ids):
+        """Tracks in every one of the playlists"""
+        if not playlist_ids:
+            return []
+        mask = self.masks[playlist_ids[0]]
+        for playlist_id in playlist_ids[1:]:
+            mask &= self.masks[playlist_id]
+        return self.tracks(mask)
+
+    def difference(self, playlist_id, *others):
+        """Tracks in the first playlist but in none of the others"""
+        mask = self.masks[playlist_id]
+        for other in others:
+            mask &= ~self.masks[other]
+        return self.tracks(mask)
+
+    def membership(self):
+        """(playlist ids, playlists x tracks membership matrix)"""
+        playlist_ids = list(self.masks)
+        matrix = np.zeros((len(playlist_ids), len(self.representatives)), dtype=np.float32)
+        for row, playlist_id in enumerate(playlist_ids):
+            matrix[row, self.bits[playlist_id]] = 1
+        return playlist_ids, matrix
+
+    def overlap_matrix(self):
+        """(playlist ids, matrix of tracks shared by each pair of playlists)"""
+        playlist_ids, matrix = self.membership()
+        return playlist_ids, (matrix @ matrix.T).astype(np.int32)
+
+    def duplicates(self, min_playlists=2):
+        """Duplicate report
+
+        'within': playlist id -> track ids that occur more than once in it
+        'across': track id -> playlist ids, for tracks in at least min_playlists playlists
+        'variants': lists of different track ids that match as the same recording (fuzzy only)
+        """
+        within = {}
+        for playlist_id, positions in self.bits.items():
+            counts = np.bincount(positions, minlength=len(self.representatives)) if len(positions) else np.zeros(0)
+            repeated = np.flatnonzero(counts > 1)
+            if len(repeated):
+                within[playlist_id] = [self.representatives[bit] for bit in repeated]
+
+        playlist_ids, matrix = self.membership()
+        shared = np.flatnonzero(matrix.sum(axis=0) >= min_playlists)
+        # Non-zero entries of the shared columns, grouped by column
+        columns, rows = np.nonzero(matrix[:, shared].T)
+        splits = np.flatnonzero(np.diff(columns)) + 1
+        across = {
+            self.representatives[shared[group_columns[0]]]: [playlist_ids[row] for row in group_rows]
+            for group_columns, group_rows in zip(np.split(columns, splits), np.split(rows, splits))
+            if len(group_columns)
+        }
+
+        variants = []
+        if self.track_keys is not None:
+            ids_by_key = {}
+            for track_ids in self.lists.values():
+                for track_id in track_ids:
+                    ids_by_key.setdefault(self._key(track_id), set()).add(track_id)
+            variants = [sorted(ids) for ids in ids_by_key.values() if len(ids) > 1]
+
+        return {'within': within, 'across': across, 'variants': variants}
@@ -0,0 +1,332 @@
+"""
+Library-scale analytics reports computed in worker processes and cached by dataset version
+"""
+import os
+import csv
+import time
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
+import numpy as np
+from playlist_manager import MOOD_PARAMS
+
+# Audio features used for distributions and clustering, with their histogram ranges
+FEATURE_RANGES = {
+    'danceability': (0.0, 1.0),
+    'energy': (0.0, 1.0),
+    'valence': (0.0, 1.0),
+    'acousticness': (0.0, 1.0),
+    'instrumentalness': (0.0, 1.0),
+    'speechiness': (0.0, 1.0),
+    'liveness': (0.0, 1.0),
+    'tempo': (40.0, 220.0),
+    'loudness': (-60.0, 0.0)
+}
+FEATURE_NAMES = list(FEATURE_RANGES)
+HISTOGRAM_BINS = 20
+QUANTILES = (5, 25, 50, 75, 95)
+TOP_GENRES = 50  # Genres kept in the co-occurrence matrix
+KMEANS_ITERATIONS = 50
+DEFAULT_REPORT_CACHE_DIR = "report_cache"
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+def build_dataset(artists=(), features=(), played_at=(), utc_offset=None):
+    """Pack spotipy artists, audio features and ISO play timestamps into compact arrays"""
+    # Artist genres as a sparse row list: artist i has genres[indices[indptr[i]:indptr[i + 1]]]
+    genres = {}
+    indices, indptr = [], [0]
+    for artist in artists:
+        if not artist:
+            continue
+        for genre in artist.get('genres') or []:
+            indices.append(genres.setdefault(genre, len(genres)))
+        indptr.append(len(indices))
+
+    rows = [
+        [np.nan if item.get(name) is None else item[name] for name in FEATURE_NAMES]
+        for item in features if item
+    ]
+    stamps = np.array([value[:19] for value in played_at if value], dtype="datetime64[s]")
+
+    dataset = {
+        'genres': np.array(list(genres), dtype=str),
+        'genre_indices': np.array(indices, dtype=np.int32),
+        'genre_indptr': np.array(indptr, dtype=np.int32),
+        'features': np.array(rows, dtype=np.float32).reshape(-1, len(FEATURE_NAMES)),
+        'played_at': stamps.astype(np.int64),
+        'utc_offset': time.localtime().tm_gmtoff if utc_offset is None else int(utc_offset)
+    }
+    dataset['version'] = dataset_version(dataset)
+    return dataset
+
+def dataset_version(dataset):
+    """Content hash of a dataset; reports are cached under it"""
+    digest = hashlib.sha1()
+    for name in sorted(dataset):
+        value = dataset[name]
+        if name == 'version':
+            continue
+        if isinstance(value, np.ndarray):
+            digest.update(f"{name}:{value.dtype}:{value.shape}".encode("utf-8"))
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(f"{name}:{value!r}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def genre_cooccurrence(dataset, top=TOP_GENRES):
+    """Number of artists sharing each pair of the most common genres (diagonal: artists per genre)"""
+    genres = dataset['genres']
+    indices = dataset['genre_indices']
+    indptr = dataset['genre_indptr']
+    n_artists = len(indptr) - 1
+    if not len(indices):
+        return {'genres': genres[:0], 'counts': np.zeros((0, 0), dtype=np.int32)}
+
+    totals = np.bincount(indices, minlength=len(genres))
+    keep = np.argsort(-totals, kind="stable")[:top]
+    column = np.full(len(genres), -1)
+    column[keep] = np.arange(len(keep))
+
+    # Artist x genre membership; float32 matmul is BLAS-backed and exact for counts below 2**24
+    rows = np.repeat(np.arange(n_artists), np.diff(indptr))
+    kept = column[indices] >= 0
+    membership = np.zeros((n_artists, len(keep)), dtype=np.float32)
+    membership[rows[kept], column[indices[kept]]] = 1
+    counts = (membership.T @ membership).astype(np.int32)
+    return {'genres': genres[keep], 'counts': counts}
+
+def feature_distributions(dataset, bins=HISTOGRAM_BINS):
+    """Histogram and quantiles of every audio feature"""
+    features = dataset['features']
+    counts = np.zeros((len(FEATURE_NAMES), bins), dtype=np.int32)
+    quantiles = np.full((len(FEATURE_NAMES), len(QUANTILES)), np.nan, dtype=np.float32)
+    for i, name in enumerate(FEATURE_NAMES):
+        values = features[:, i]
+        values = values[~np.isnan(values)]
+        counts[i] = np.histogram(values, bins=bins, range=FEATURE_RANGES[name])[0]
+        if len(values):
+            quantiles[i] = np.percentile(values, QUANTILES)
+    return {
+        'features': np.array(FEATURE_NAMES),
+        'ranges': np.array(list(FEATURE_RANGES.values()), dtype=np.float32),
+        'counts': counts,
+        'quantiles': quantiles
+    }
+
+def nearest_mood(centroid):
+    """Name of the MOOD_PARAMS entry closest to a cluster centre"""
+    def distance(params):
+        return sum((centroid[FEATURE_NAMES.index(key[len("target_"):])] - value) ** 2 for key, value in params.items())
+    return min(MOOD_PARAMS, key=lambda mood: distance(MOOD_PARAMS[mood]))
+
+def mood_clusters(dataset, k=len(MOOD_PARAMS), seed=0, iterations=KMEANS_ITERATIONS):
+    """K-means clusters of the standardised feature space, each named after its nearest mood"""
+    features = dataset['features']
+    complete = ~np.isnan(features).any(axis=1)
+    points = features[complete].astype(np.float64)
+    labels = np.full(len(features), -1, dtype=np.int16)  # -1 for tracks with missing features
+    k = min(k, len(points))
+    if k == 0:
+        return {
+            'labels': labels,
+            'centroids': np.zeros((0, len(FEATURE_NAMES)), dtype=np.float32),
+            'sizes': np.zeros(0, dtype=np.int32),
+            'moods': np.array([], dtype=str)
+        }
+
+    mean = points.mean(axis=0)
+    std = points.std(axis=0)
+    std[std == 0] = 1
+    points = (points - mean) / std
+
+    # k-means++ seeding
+    rng = np.random.default_rng(seed)
+    centers = [points[rng.integers(len(points))]]
+    for _ in range(1, k):
+        nearest = np.min([((points - center) ** 2).sum(axis=1) for center in centers], axis=0)
+        total = nearest.sum()
+        centers.append(points[rng.choice(len(points), p=nearest / total)] if total else points[rng.integers(len(points))])
+    centers = np.array(centers)
+
+    squared = (points ** 2).sum(axis=1)[:, None]
+    assigned = None
+    for _ in range(iterations):
+        distances = squared - 2 * points @ centers.T + (centers ** 2).sum(axis=1)
+        new_assigned = distances.argmin(axis=1)
+        if assigned is not None and np.array_equal(new_assigned, assigned):
+            break
+        assigned = new_assigned
+        for c in range(k):
+            members = points[assigned == c]
+            if len(members):
+                centers[c] = members.mean(axis=0)
+
+    labels[complete] = assigned
+    centroids = (centers * std + mean).astype(np.float32)
+    return {
+        'labels': labels,
+        'centroids': centroids,
+        'sizes': np.bincount(assigned, minlength=k).astype(np.int32),
+        'moods': np.array([nearest_mood(centroid) for centroid in centroids])
+    }
+
+def listening_heatmap(dataset):
+    """Plays per (weekday, hour) in local time; Monday is row 0"""
+    local = dataset['played_at'] + dataset['utc_offset']
+    hours = (local % 86400) // 3600
+    weekdays = (local // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+    counts = np.bincount(weekdays * 24 + hours, minlength=7 * 24)
+    return {'counts': counts.reshape(7, 24).astype(np.int32)}
+
+REPORTS = {
+    'genre_cooccurrence': genre_cooccurrence,
+    'feature_distributions': feature_distributions,
+    'mood_clusters': mood_clusters,
+    'listening_heatmap': listening_heatmap
+}
+
+def report_rows(report, result):
+    """Header and rows of a report result as a flat table"""
+    if report == 'genre_cooccurrence':
+        genres = [str(genre) for genre in result['genres']]
+        return ["genre"] + genres, [[genre] + row.tolist() for genre, row in zip(genres, result['counts'])]
+    if report == 'feature_distributions':
+        low, high = result['ranges'][:, 0], result['ranges'][:, 1]
+        header = ["feature"] + [f"p{q}" for q in QUANTILES] + [f"bin{i}" for i in range(result['counts'].shape[1])] + ["min", "max"]
+        rows = [
+            [str(name)] + [round(float(value), 4) for value in quantiles] + counts.tolist() + [float(lo), float(hi)]
+            for name, quantiles, counts, lo, hi in zip(result['features'], result['quantiles'], result['counts'], low, high)
+        ]
+        return header, rows
+    if report == 'mood_clusters':
+        header = ["cluster", "mood", "tracks"] + FEATURE_NAMES
+        rows = [
+            [i, str(mood), int(size)] + [round(float(value), 4) for value in centroid]
+            for i, (mood, size, centroid) in enumerate(zip(result['moods'], result['sizes'], result['centroids']))
+        ]
+        return header, rows
+    if report == 'listening_heatmap':
+        return ["weekday"] + [f"{hour:02d}:00" for hour in range(24)], [
+            [day] + row.tolist() for day, row in zip(WEEKDAYS, result['counts'])
+        ]
+    raise ValueError(f"Unknown report: {report}")
+
+def export_report_csv(report, result, path):
+    """Write a report result to a CSV file"""
+    header, rows = report_rows(report, result)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return len(rows)
+
+def compute_report(report, dataset, params):
+    """Run one report (in a pool process); returns (result, seconds)"""
+    start = time.perf_counter()
+    result = REPORTS[report](dataset, **params)
+    return result, time.perf_counter() - start
+
+class ReportEngine:
+    """Computes reports off the UI process; results are cached in memory and on disk per dataset version
+
+    Callbacks run on a pool bookkeeping thread, so Tk code should hand results
+    to the main thread (e.g. with after) before touching widgets.
+    """
+    def __init__(self, max_workers=None, cache_dir=DEFAULT_REPORT_CACHE_DIR):
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.cache = {}  # (report, version, params) -> result dict of arrays
+        self.timings = {}  # Report name -> seconds its last computation took in the worker
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        """Start the worker processes on first use"""
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+            return self._pool
+
+    def _cache_path(self, key):
+        """npz file a result is persisted to"""
+        report, version, params = key
+        suffix = hashlib.sha1(repr(params).encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.cache_dir, f"{report}-{version}-{suffix}.npz")
+
+    def _load(self, key):
+        """Cached result from memory or disk, or None"""
+        with self._lock:
+            result = self.cache.get(key)
+        if result is not None or not self.cache_dir:
+            return result
+
+        path = self._cache_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                result = {name: data[name] for name in data.files}
+        except Exception as e:
+            print(f"Error loading cached report: {e}")
+            return None
+        with self._lock:
+            self.cache[key] = result
+        return result
+
+    def _store(self, key, result):
+        """Keep a result in memory and persist it"""
+        with self._lock:
+            self.cache[key] = result
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._cache_path(key)
+            with open(path + ".tmp", "wb") as f:
+                np.savez(f, **result)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            print(f"Error saving report cache file: {e}")
+
+    def submit(self, report, dataset, callback=None, **params):
+        """Compute a report in the pool, or answer from the cache; returns a Future of its result dict"""
+        key = (report, dataset['version'], tuple(sorted(params.items())))
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+
+        cached = self._load(key)
+        if cached is not None:
+            future.set_result(cached)
+            return future
+
+        def done(pool_future):
+            try:
+                result, seconds = pool_future.result()
+            except Exception as e:
+                future.set_exception(e)
+                return
+            self.timings[report] = seconds
+            self._store(key, result)
+            future.set_result(result)
+
+        self._get_pool().submit(compute_report, report, dataset, params).add_done_callback(done)
+        return future
+
+    def submit_all(self, dataset, callback=None):
+        """Start every report; returns report name -> Future"""
+        return {report: self.submit(report, dataset, callback) for report in REPORTS}
+
+    def run_all(self, dataset):
+        """Compute every report in parallel and wait for the results"""
+        futures = self.submit_all(dataset)
+        return {report: future.result() for report, future in futures.items()}
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
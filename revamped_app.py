@@ -3,19 +3,65 @@ Revamped Music Playlist Interface with modern UI
 """
 import os
 import json
+import time
+import queue
+import threading
+import weakref
 import webbrowser
 import customtkinter as ctk
-from PIL import Image, ImageTk
-import requests
-from io import BytesIO
+from tkinter import filedialog
+from PIL import ImageTk
 import spotipy
 from spotify_auth import SpotifyAuthManager
 from playlist_manager import PlaylistManager
-from analytics import MusicAnalytics
+from track_model import Track, tracks_from_spotify
+from analytics import MusicAnalytics, REPORT_CHARTS
+from report_engine import ReportEngine
 from player import MusicPlayer
+from catalog import MusicCatalog, DEFAULT_CATALOG_PATH, local_track_key, spotify_track_key
+from audio_analysis import analyze_tracks, new_analysis_pool
+from dsp import gain_for_loudness
+from dashboard import DashboardAggregator, stat_cards, load_image
+from ui_components import WaveformCanvas
+from modern_theme import get_font
+from view_manager import ViewManager
+from tracing import tracer, TracedSpotify
+from stall_detector import StallDetector
+from http_pool import http_pool
+from async_spotify import AsyncSpotify
+from library_sync import LibrarySync
+from artist_info import ArtistInfo
+from playlist_ordering import ORDERINGS, ordering_for_label
+from local_api import LocalAPI, configured_port
+from memory_budget import memory_budget, ImageCache, release_window, TRIM_INTERVAL_MS
+from offline import ResilientSpotify, UnreachableSpotify, OFFLINE_ID_PREFIX, cache_key
+
+VIEW_TITLES = {
+    "dashboard": "Dashboard",
+    "search": "Search Music",
+    "recommendations": "Mood-Based Recommendations",
+    "playlists": "My Playlists",
+    "analytics": "Listening Analytics"
+}
+
+# Folder scanned for local audio files
+LOCAL_TRACKS_DIR = "sample_tracks"
+LOCAL_TRACK_EXTENSIONS = (".mp3", ".ogg", ".wav", ".flac")
+
+# While offline, how often (ms) the banner is refreshed and how often (s) Spotify is probed
+CONNECTIVITY_POLL_MS = 5000
+RECONNECT_INTERVAL = 30
+
+# Page sizes for search results and the playlist window
+SEARCH_LIMIT = 15
+ARTIST_IMAGE_SIZE = (120, 120)
+PLAYLIST_TRACK_LIMIT = 50
+PLAYLIST_FILE_TYPES = [
+    ("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("M3U playlist", "*.m3u *.m3u8"), ("Parquet", "*.parquet")
+]
 
 class RevampedMusicApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, spotify_client=None, catalog_path=DEFAULT_CATALOG_PATH):
         super().__init__()
         
         # Configure window
@@ -27,17 +73,76 @@ class RevampedMusicApp(ctk.CTk):
         self.spotify = None
         self.current_user = None
         self.current_theme = "dark"
+        self.current_view = None
+        self.dashboard = None
+        self.async_spotify = None
+        self.library = None
+        self.artist_info = None
+        self.offline_session = False  # Started offline; switches to a fresh client once Spotify answers
+        self.reconnecting = False
+        self.last_reconnect_attempt = 0
+        self.main_thread_calls = queue.Queue()
         self.auth_manager = SpotifyAuthManager()
         self.music_player = MusicPlayer()
+        self.catalog = MusicCatalog(catalog_path)
+        self.analysis_running = False
+        self.pending_analysis = []
+        self.analysis_lock = threading.Lock()  # Guards analysis_running and pending_analysis
+        self.analysis_pool = None  # Process pool kept for every analysis batch, started on first use
+        self.report_engine = ReportEngine()  # Library-scale analytics reports, computed in worker processes
+        self.library_dataset = None  # ReportEngine dataset for the analytics view, built on a worker
+        self.dataset_lock = threading.Lock()
+        self.analytics_generation = 0  # Bumped when the analytics view is rebuilt; older chart loads are dropped
+        self.search_limit = SEARCH_LIMIT
+        self.playlist_track_limit = PLAYLIST_TRACK_LIMIT
+        
+        # Caches that grow with use are kept under byte budgets and trimmed periodically
+        self.album_art = ImageCache()
+        memory_budget.register("pcm", self.music_player.pcm_cache, self.music_player.pcm_cache.budget_bytes)
+        memory_budget.register("http_etags", http_pool, http_pool.etag_cache_bytes)
+        memory_budget.register("album_art", self.album_art)
+        self.playlist_windows = weakref.WeakValueDictionary()  # Playlist id -> its open window
+        self.artist_windows = weakref.WeakValueDictionary()  # Artist id -> its open window
+        self.after(TRIM_INTERVAL_MS, self.trim_memory)
+        
+        # Background work hands results back to the Tk thread through this queue
+        self.poll_main_thread_calls()
+        
+        # Record where the Tk loop gets blocked
+        self.stall_detector = StallDetector(self)
+        self.stall_detector.start()
+        
+        # Optional read-only JSON API over the catalog, enabled by local_api_port in config.json
+        self.local_api = None
+        api_port = configured_port()
+        if api_port:
+            self.local_api = LocalAPI(self.catalog, port=int(api_port), report_engine=self.report_engine)
+            success, message = self.local_api.start()
+            print(message)
+            if success:
+                memory_budget.register("local_api", self.local_api)
+            else:
+                self.local_api = None
         
         # Create main layout
         self.create_layout()
         
-        # Initialize Spotify connection
-        self.initialize_spotify()
+        # Initialize Spotify connection; a ready client (e.g. a fake for benchmarks) skips OAuth
+        if spotify_client is not None:
+            self.connect_spotify(spotify_client, spotify_client.current_user())
+        else:
+            self.initialize_spotify()
         
         # Cleanup on window close
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+        # Show the offline banner and reconnect when Spotify comes back
+        self.poll_connectivity()
+        
+        # Precompute waveforms and loudness for local files in the background
+        self.after(2000, lambda: self.start_track_analysis(
+            [(local_track_key(track.local_path), track.local_path) for track in self.get_local_tracks()]
+        ))
     
     def create_layout(self):
         # Configure grid layout
@@ -63,6 +168,14 @@ class RevampedMusicApp(ctk.CTk):
         self.main_container.grid_columnconfigure(0, weight=1)
         self.main_container.grid_rowconfigure(0, weight=1)
         
+        # Each view is built once and then hidden/shown
+        self.views = ViewManager(self.main_container)
+        self.views.register("dashboard", self.build_dashboard_view, self.on_show_dashboard)
+        self.views.register("search", self.build_search_view)
+        self.views.register("recommendations", self.build_recommendations_view)
+        self.views.register("playlists", self.build_playlists_view, self.on_show_playlists)
+        self.views.register("analytics", self.build_analytics_view)
+        
         # Default to dashboard view
         self.show_dashboard()
     
@@ -76,7 +189,7 @@ class RevampedMusicApp(ctk.CTk):
         self.logo_label = ctk.CTkLabel(
             self.sidebar_frame, 
             text="MoodySongs",
-            font=ctk.CTkFont(size=24, weight="bold")
+            font=get_font(size=24, weight="bold")
         )
         self.logo_label.grid(row=0, column=0, padx=20, pady=(30, 10))
         
@@ -102,6 +215,12 @@ class RevampedMusicApp(ctk.CTk):
             button.grid(row=i+1, column=0, padx=20, pady=10, sticky="ew")
             self.nav_buttons.append(button)
         
+        # Queue controls
+        self.create_player_controls()
+        
+        # Performance overlay
+        self.create_perf_overlay()
+        
         # Theme switch at bottom
         self.appearance_label = ctk.CTkLabel(self.sidebar_frame, text="Appearance:")
         self.appearance_label.grid(row=8, column=0, padx=20, pady=(10, 0), sticky="w")
@@ -121,21 +240,427 @@ class RevampedMusicApp(ctk.CTk):
         self.user_label = ctk.CTkLabel(self.user_frame, text="Not logged in")
         self.user_label.pack(anchor="w")
     
+    def create_player_controls(self):
+        """Create the now-playing label and queue transport buttons"""
+        self.player_frame = ctk.CTkFrame(self.sidebar_frame, fg_color="transparent")
+        self.player_frame.grid(row=6, column=0, padx=20, pady=10, sticky="ew")
+        
+        self.now_playing_label = ctk.CTkLabel(
+            self.player_frame,
+            text="Nothing queued",
+            wraplength=200,
+            justify="left"
+        )
+        self.now_playing_label.pack(anchor="w", pady=(0, 5))
+        
+        self.waveform = WaveformCanvas(self.player_frame, width=200, height=32)
+        self.waveform.pack(anchor="w", pady=(0, 5))
+        
+        transport_frame = ctk.CTkFrame(self.player_frame, fg_color="transparent")
+        transport_frame.pack(fill="x")
+        
+        ctk.CTkButton(transport_frame, text="Prev", width=60, command=self.previous_track).pack(side="left")
+        ctk.CTkButton(transport_frame, text="Stop", width=60, command=self.stop_playback).pack(side="left", padx=5)
+        ctk.CTkButton(transport_frame, text="Next", width=60, command=self.next_track).pack(side="left")
+        
+        options_frame = ctk.CTkFrame(self.player_frame, fg_color="transparent")
+        options_frame.pack(fill="x", pady=(5, 0))
+        
+        self.shuffle_switch = ctk.CTkSwitch(options_frame, text="Shuffle", command=self.toggle_shuffle)
+        self.shuffle_switch.pack(side="left")
+        
+        self.repeat_button = ctk.CTkButton(options_frame, text="Repeat: off", width=90, command=self.cycle_repeat)
+        self.repeat_button.pack(side="right")
+        
+        self.low_latency_switch = ctk.CTkSwitch(
+            self.player_frame,
+            text="Crossfade + level matching",
+            command=self.toggle_low_latency
+        )
+        self.low_latency_switch.pack(anchor="w", pady=(5, 0))
+        
+        # Queue auto-advance is driven by pygame end events
+        self.music_player.on_track_change = self.update_now_playing
+        self.music_player.on_queue_error = lambda message: self.show_message(message, "Information")
+        self.music_player.gain_lookup = self.lookup_track_gain
+        self.poll_player_events()
+    
+    def create_perf_overlay(self):
+        """Create the switch and summary label for the tracing overlay"""
+        self.perf_frame = ctk.CTkFrame(self.sidebar_frame, fg_color="transparent")
+        self.perf_frame.grid(row=7, column=0, padx=20, pady=10, sticky="new")
+        
+        self.perf_switch = ctk.CTkSwitch(self.perf_frame, text="Performance overlay", command=self.toggle_perf_overlay)
+        self.perf_switch.pack(anchor="w")
+        
+        # Shown only while the overlay is on
+        self.perf_label = ctk.CTkLabel(
+            self.perf_frame,
+            text="",
+            font=get_font(size=10, family="Courier"),
+            justify="left",
+            anchor="w"
+        )
+        self.perf_export_button = ctk.CTkButton(self.perf_frame, text="Export trace", width=100, command=self.export_trace)
+    
+    def toggle_perf_overlay(self):
+        """Turn tracing and the overlay on or off"""
+        tracer.enabled = bool(self.perf_switch.get())
+        if tracer.enabled:
+            self.perf_label.pack(anchor="w", fill="x", pady=(5, 0))
+            self.perf_export_button.pack(anchor="w", pady=(5, 0))
+            self.refresh_perf_overlay()
+        else:
+            self.perf_label.pack_forget()
+            self.perf_export_button.pack_forget()
+    
+    def refresh_perf_overlay(self):
+        """Show p50/p95 of the slowest spans while the overlay is on"""
+        if not tracer.enabled:
+            return
+        lines = [f"{'span':<22}{'p50':>7}{'p95':>7}"]
+        for name, stats in list(tracer.summary().items())[:8]:
+            lines.append(f"{name[:22]:<22}{stats['p50_ms']:>7.0f}{stats['p95_ms']:>7.0f}")
+        stalls = self.stall_detector.report(top=1)
+        lines.append(f"Stalls: {stalls['stalls']} (max {stalls['max_ms']:.0f}ms)")
+        if stalls['top_offenders']:
+            lines.append(f"Worst: {stalls['top_offenders'][0]['offender'][:30]}")
+        for host_class, stats in http_pool.stats().items():
+            if 'reuse_rate' in stats and stats['requests']:
+                lines.append(f"HTTP {host_class}: {stats['requests']} req, {stats['reuse_rate']:.0%} reused")
+        memory = memory_budget.stats()
+        lines.append(f"Memory: {memory['rss_bytes'] / 2 ** 20:.0f} MB RSS, caches {memory['total_bytes'] / 2 ** 20:.0f} MB")
+        self.perf_label.configure(text="\n".join(lines))
+        self.after(1000, self.refresh_perf_overlay)
+    
+    def trim_memory(self):
+        """Hold every registered cache to its budget, delete previews that finished playing and prune the API response and media caches"""
+        with tracer.span("memory.trim", "memory"):
+            memory_budget.enforce()
+            self.music_player.prune_temp_files()
+            self.catalog.prune_api_cache()
+            http_pool.prune_media_cache()
+        self.after(TRIM_INTERVAL_MS, self.trim_memory)
+    
+    def export_trace(self):
+        """Save the recorded spans as a Chrome trace file and the stall report next to it"""
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        success, message = tracer.export_chrome_trace(f"trace_{stamp}.json")
+        if success:
+            success, stall_message = self.stall_detector.write_report(f"stalls_{stamp}.json")
+            message = f"{message}\n{stall_message}"
+        if success:
+            self.show_message(message)
+        else:
+            self.show_error(message)
+    
+    def call_on_main_thread(self, func, *args):
+        """Schedule a callable from a worker thread to run on the Tk thread"""
+        self.main_thread_calls.put((func, args))
+    
+    def poll_main_thread_calls(self):
+        """Run callables queued by worker threads"""
+        while True:
+            try:
+                func, args = self.main_thread_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Error in background callback: {e}")
+        self.after(50, self.poll_main_thread_calls)
+    
+    def poll_player_events(self):
+        """Hand pygame end events to the player from the Tk event loop"""
+        self.music_player.process_events()
+        self.after(100, self.poll_player_events)
+    
+    def update_now_playing(self, track):
+        """Show the current queue track in the sidebar"""
+        if track:
+            self.now_playing_label.configure(text=f"Now playing: {track.name} - {track.artist_name}")
+            self.show_waveform(track)
+        else:
+            self.now_playing_label.configure(text="Nothing queued")
+            self.waveform.clear()
+    
+    def get_track_analysis(self, track):
+        """Get the stored analysis for a queue or local track"""
+        if track.local_path:
+            return self.catalog.get_analysis(local_track_key(track.local_path))
+        if track.id:
+            return self.catalog.get_analysis(spotify_track_key(track.id))
+        return None
+    
+    def lookup_track_gain(self, track):
+        """Loudness-normalizing gain from the precomputed analysis"""
+        analysis = self.get_track_analysis(track)
+        if not analysis:
+            return 1.0
+        return gain_for_loudness(analysis['loudness_db'], analysis['peak_db'])
+    
+    def show_waveform(self, track):
+        """Draw the precomputed waveform of a track if it has been analysed"""
+        analysis = self.get_track_analysis(track)
+        if analysis:
+            self.waveform.draw(analysis['peaks'])
+        else:
+            self.waveform.clear()
+    
+    def start_track_analysis(self, sources):
+        """Analyse (track_key, source) pairs in a background process pool"""
+        # Sources arriving while a batch runs are picked up by the next batch
+        with self.analysis_lock:
+            self.pending_analysis.extend(sources)
+            if self.analysis_running or not self.pending_analysis:
+                return
+            self.analysis_running = True
+        
+        def worker():
+            while True:
+                # The flag is cleared under the same lock that finds the queue empty, so no source is left behind
+                with self.analysis_lock:
+                    if not self.pending_analysis:
+                        self.analysis_running = False
+                        return
+                    batch, self.pending_analysis = self.pending_analysis, []
+                try:
+                    if self.analysis_pool is None:
+                        self.analysis_pool = new_analysis_pool()
+                    analyze_tracks(batch, self.catalog, pool=self.analysis_pool)
+                except Exception as e:
+                    print(f"Error analysing tracks: {e}")
+                    # A broken pool is replaced for the next batch
+                    pool, self.analysis_pool = self.analysis_pool, None
+                    if pool:
+                        pool.shutdown(wait=False, cancel_futures=True)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def analyze_previews(self, tracks):
+        """Queue preview analysis for tracks so later plays can be level matched"""
+        self.start_track_analysis([
+            (spotify_track_key(track.id), track.preview_url)
+            for track in tracks if track and track.id and track.preview_url
+        ])
+    
+    def play_all(self, tracks, start_index=0):
+        """Replace the play queue with a set of tracks"""
+        success, message = self.music_player.play_queue(tracks, start_index)
+        if not success:
+            self.show_message(message, "Information")
+        else:
+            self.analyze_previews(tracks)
+    
+    def add_to_queue(self, tracks):
+        """Append a set of tracks to the play queue"""
+        success, message = self.music_player.enqueue(tracks)
+        if not success:
+            self.show_message(message, "Information")
+    
+    def next_track(self):
+        """Skip to the next queued track"""
+        self.music_player.next()
+    
+    def previous_track(self):
+        """Go back to the previous queued track"""
+        self.music_player.previous()
+    
+    def stop_playback(self):
+        """Stop playback and deactivate the queue"""
+        self.music_player.queue_active = False
+        self.music_player.stop()
+        self.update_now_playing(None)
+    
+    def toggle_shuffle(self):
+        """Toggle queue shuffle"""
+        self.music_player.set_shuffle(bool(self.shuffle_switch.get()))
+    
+    def toggle_low_latency(self):
+        """Switch between streamed playback and pre-decoded, level-matched playback"""
+        enabled = bool(self.low_latency_switch.get())
+        self.music_player.set_low_latency(enabled)
+        if enabled:
+            # Decode local files up front so the first play starts instantly
+            self.music_player.pcm_cache.preload([track.local_path for track in self.get_local_tracks()])
+    
+    def get_local_tracks(self, query=None):
+        """List local audio files, optionally filtered by a search query"""
+        if not os.path.isdir(LOCAL_TRACKS_DIR):
+            return []
+        
+        tracks = []
+        for filename in sorted(os.listdir(LOCAL_TRACKS_DIR)):
+            if not filename.lower().endswith(LOCAL_TRACK_EXTENSIONS):
+                continue
+            name = os.path.splitext(filename)[0]
+            if query and query.lower() not in name.lower():
+                continue
+            tracks.append(Track(name=name, artist="Local file", local_path=os.path.join(LOCAL_TRACKS_DIR, filename)))
+        return tracks
+    
+    def play_local_track(self, track):
+        """Play a local audio file"""
+        success, message = self.music_player.play_local(track.local_path)
+        if success:
+            self.update_now_playing(track)
+        else:
+            self.show_error(message)
+    
+    def cycle_repeat(self):
+        """Cycle the queue repeat mode"""
+        mode = self.music_player.cycle_repeat()
+        self.repeat_button.configure(text=f"Repeat: {mode}")
+    
     def initialize_spotify(self):
         """Initialize Spotify connection"""
         try:
             success, message = self.auth_manager.authenticate()
             
             if success:
-                self.spotify = self.auth_manager.get_spotify_client()
-                self.current_user = self.auth_manager.get_current_user()
-                self.playlist_manager = PlaylistManager(self.spotify)
-                self.analytics = MusicAnalytics(self.spotify)
-                self.update_user_info()
-            else:
+                self.connect_spotify(
+                    self.auth_manager.get_spotify_client(),
+                    self.auth_manager.get_current_user(),
+                    self.auth_manager.get_access_token
+                )
+            elif not self.start_offline_mode():
                 self.show_error(message)
         except Exception as e:
-            self.show_error(f"Failed to connect to Spotify: {str(e)}")
+            if not self.start_offline_mode():
+                self.show_error(f"Failed to connect to Spotify: {str(e)}")
+    
+    def start_offline_mode(self):
+        """Serve cached data if Spotify cannot be reached but we have logged in before"""
+        cached_user = self.catalog.get_cached_response(cache_key("current_user", (), {}))
+        if not cached_user:
+            return False
+        # A saved token lets the session probe Spotify without logging in again
+        self.connect_spotify(self.auth_manager.get_cached_client() or UnreachableSpotify(), cached_user[0])
+        self.offline_session = True
+        self.update_offline_banner()
+        return True
+    
+    def connect_spotify(self, spotify_client, user, token_getter=None):
+        """Set up everything that needs a Spotify client; token_getter enables the async facade"""
+        # Responses are kept in the catalog so views still work offline
+        resilient = ResilientSpotify(spotify_client, self.catalog)
+        self.spotify = TracedSpotify(resilient, tracer)
+        self.current_user = user
+        self.offline_session = False
+        if self.async_spotify:
+            self.async_spotify.close()
+        # The facade shares the offline cache and the tracer, since its calls skip the proxies above
+        self.async_spotify = AsyncSpotify(token_getter, resilient=resilient, tracer=tracer) if token_getter else None
+        self.library = LibrarySync(self.spotify, self.catalog, self.async_spotify)
+        self.playlist_manager = PlaylistManager(self.spotify, self.catalog, self.async_spotify)
+        self.analytics = MusicAnalytics(self.spotify, self.async_spotify, self.catalog, self.library)
+        self.dashboard = DashboardAggregator(self.spotify, self.catalog, self.async_spotify)
+        self.artist_info = ArtistInfo(self.spotify, self.catalog, self.async_spotify)
+        self.update_user_info()
+        # Runs after start_offline_mode has flagged an offline session
+        self.after_idle(self.sync_library)
+        
+        # Views built before login show login prompts, so rebuild them
+        self.views.invalidate_all()
+        self.show_view(self.current_view or "dashboard")
+    
+    def sync_library(self):
+        """Fetch saves made since the last sync in the background"""
+        if not self.library or self.offline_session:
+            return
+        threading.Thread(target=self.run_library_sync, daemon=True).start()
+    
+    def run_library_sync(self):
+        """Sync the library, then push whatever changed in the smart playlists (worker thread)"""
+        success, _ = self.library.sync()
+        if success:
+            self.playlist_manager.refresh_smart_playlists()
+    
+    def is_offline(self):
+        """Whether the Spotify client is currently serving cached data"""
+        return bool(self.spotify) and (self.offline_session or self.spotify.offline)
+    
+    def update_offline_banner(self):
+        """Show or hide the stale-data notice under the view title"""
+        if not self.is_offline():
+            self.offline_label.pack_forget()
+            self.login_button.pack_forget()
+            return
+        
+        text = "Offline - showing cached data"
+        if self.spotify.last_stale_at:
+            text += f" from {time.strftime('%b %d %H:%M', time.localtime(self.spotify.last_stale_at))}"
+        pending = self.spotify.pending_count()
+        if pending:
+            text += f" ({pending} change{'s' if pending != 1 else ''} waiting to sync)"
+        self.offline_label.configure(text=text)
+        self.offline_label.pack(anchor="w")
+        if self.offline_session:
+            self.login_button.pack(anchor="w", pady=(5, 0))
+        else:
+            self.login_button.pack_forget()
+    
+    def poll_connectivity(self):
+        """Refresh the offline banner and periodically probe Spotify with the saved token"""
+        if self.spotify:
+            self.update_offline_banner()
+            # Without a saved token only the log in button can bring the session back
+            can_probe = not self.offline_session or self.auth_manager.get_spotify_client() is not None
+            if (self.is_offline() and can_probe and not self.reconnecting
+                    and time.time() - self.last_reconnect_attempt > RECONNECT_INTERVAL):
+                self.reconnecting = True
+                self.last_reconnect_attempt = time.time()
+                threading.Thread(target=self.reconnect, daemon=True).start()
+        self.after(CONNECTIVITY_POLL_MS, self.poll_connectivity)
+    
+    def reconnect(self):
+        """Probe Spotify with the current token and replay offline changes (runs in a worker thread)"""
+        try:
+            pending = self.spotify.pending_count()
+            if self.spotify.check_connectivity():
+                self.call_on_main_thread(self.on_reconnected, pending - self.spotify.pending_count())
+        except Exception as e:
+            print(f"Error reconnecting to Spotify: {e}")
+        finally:
+            self.reconnecting = False
+    
+    def log_in_again(self):
+        """Log in from the offline banner, in the background"""
+        if self.reconnecting:
+            return
+        self.reconnecting = True
+        self.login_button.configure(state="disabled", text="Logging in...")
+        threading.Thread(target=self.run_log_in_again, daemon=True).start()
+    
+    def run_log_in_again(self):
+        """Authenticate and replay offline changes (worker thread)"""
+        try:
+            success, message = self.auth_manager.authenticate()
+            if success:
+                # Replay before the new client is handed to the UI so queued playlists exist
+                client = ResilientSpotify(self.auth_manager.get_spotify_client(), self.catalog)
+                replayed, _ = client.replay_pending()
+                self.call_on_main_thread(self.on_reconnected, replayed)
+            else:
+                self.call_on_main_thread(self.show_error, message)
+        except Exception as e:
+            self.call_on_main_thread(self.show_error, f"Failed to connect to Spotify: {str(e)}")
+        finally:
+            self.reconnecting = False
+            self.call_on_main_thread(lambda: self.login_button.configure(state="normal", text="Log in again"))
+    
+    def on_reconnected(self, replayed):
+        """Switch back to live data once Spotify is reachable"""
+        if self.offline_session:
+            self.connect_spotify(
+                self.auth_manager.get_spotify_client(),
+                self.auth_manager.get_current_user() or self.current_user,
+                self.auth_manager.get_access_token
+            )
+        self.update_offline_banner()
+        if replayed:
+            self.show_message(f"Back online: synced {replayed} offline change{'s' if replayed != 1 else ''}", "Information")
     
     def update_user_info(self):
         """Update user info in sidebar"""
@@ -155,54 +680,70 @@ class RevampedMusicApp(ctk.CTk):
             self.current_theme = "dark"
             self.theme_switch.select()
     
-    def clear_main_container(self):
-        """Clear the main container for new content"""
-        for widget in self.main_container.winfo_children():
+    def clear_frame(self, frame):
+        """Destroy all children of a frame"""
+        for widget in frame.winfo_children():
             widget.destroy()
     
     def update_header(self, title):
         """Update the header with a new title"""
-        for widget in self.header_frame.winfo_children():
-            widget.destroy()
+        if not hasattr(self, 'header_label'):
+            self.header_label = ctk.CTkLabel(
+                self.header_frame,
+                text=title,
+                font=get_font(size=24, weight="bold")
+            )
+            self.header_label.pack(anchor="w")
             
-        header_label = ctk.CTkLabel(
-            self.header_frame,
-            text=title,
-            font=ctk.CTkFont(size=24, weight="bold")
-        )
-        header_label.pack(anchor="w")
+            # Stale-data notice, shown by update_offline_banner
+            self.offline_label = ctk.CTkLabel(
+                self.header_frame,
+                text="",
+                text_color="#FFB74D",
+                font=get_font(size=12)
+            )
+            self.login_button = ctk.CTkButton(
+                self.header_frame,
+                text="Log in again",
+                width=120,
+                command=self.log_in_again
+            )
+        else:
+            self.header_label.configure(text=title)
+    
+    def show_view(self, name):
+        """Switch the main container to a cached view"""
+        with tracer.span(f"view.{name}", "ui"):
+            self.update_header(VIEW_TITLES[name])
+            self.current_view = name
+            self.views.show(name)
         
     def show_dashboard(self):
         """Show dashboard view"""
-        self.clear_main_container()
-        self.update_header("Dashboard")
-        
-        # Create dashboard layout
-        dashboard = ctk.CTkFrame(self.main_container, fg_color="transparent")
-        dashboard.pack(fill="both", expand=True)
+        self.show_view("dashboard")
+    
+    def build_dashboard_view(self, dashboard):
+        """Build the dashboard widgets once"""
+        self.dashboard_rendered = None
         
         # Welcome message
-        if self.current_user:
-            welcome_text = f"Welcome back, {self.current_user['display_name']}!"
-        else:
-            welcome_text = "Welcome to MoodySongs!"
-            
-        welcome = ctk.CTkLabel(
+        self.dashboard_welcome = ctk.CTkLabel(
             dashboard, 
-            text=welcome_text,
-            font=ctk.CTkFont(size=20)
+            text="Welcome to MoodySongs!",
+            font=get_font(size=20)
         )
-        welcome.pack(pady=(0, 20), anchor="w")
+        self.dashboard_welcome.pack(pady=(0, 20), anchor="w")
         
         # Quick stats in cards
         stats_frame = ctk.CTkFrame(dashboard)
         stats_frame.pack(fill="x", pady=10)
-        stats_frame.grid_columnconfigure((0, 1, 2), weight=1, uniform="stats")
+        stats_frame.grid_columnconfigure(tuple(range(len(stat_cards(None)))), weight=1, uniform="stats")
         
-        # Stats cards
-        self.create_stat_card(stats_frame, "Recently Played", "5 tracks", 0, 0)
-        self.create_stat_card(stats_frame, "Top Genre", "Pop", 0, 1)
-        self.create_stat_card(stats_frame, "Mood Today", "Energetic", 0, 2)
+        # Stats cards keep their value labels so refreshes only change text
+        self.dashboard_stat_labels = [
+            self.create_stat_card(stats_frame, title, value, 0, column)
+            for column, (title, value) in enumerate(stat_cards(None))
+        ]
         
         # Recently played section
         recent_frame = ctk.CTkFrame(dashboard)
@@ -211,70 +752,16 @@ class RevampedMusicApp(ctk.CTk):
         recent_label = ctk.CTkLabel(
             recent_frame, 
             text="Recently Played",
-            font=ctk.CTkFont(size=18, weight="bold")
+            font=get_font(size=18, weight="bold")
         )
         recent_label.pack(padx=15, pady=(15, 10), anchor="w")
         
-        # If logged in, show recent tracks
-        if self.spotify and self.current_user:
-            try:
-                recent = self.spotify.current_user_recently_played(limit=5)
-                
-                if recent['items']:
-                    for i, item in enumerate(recent['items']):
-                        track = item['track']
-                        track_frame = ctk.CTkFrame(recent_frame)
-                        track_frame.pack(fill="x", padx=15, pady=5)
-                        
-                        track_name = track['name']
-                        artist_name = track['artists'][0]['name']
-                        
-                        # Track number
-                        num_label = ctk.CTkLabel(track_frame, text=f"{i+1}", width=30)
-                        num_label.pack(side="left", padx=(10, 0), pady=10)
-                        
-                        # Track info
-                        info_frame = ctk.CTkFrame(track_frame, fg_color="transparent")
-                        info_frame.pack(side="left", fill="x", expand=True, padx=10, pady=10)
-                        
-                        name_label = ctk.CTkLabel(
-                            info_frame, 
-                            text=track_name,
-                            font=ctk.CTkFont(weight="bold")
-                        )
-                        name_label.pack(anchor="w")
-                        
-                        artist_label = ctk.CTkLabel(info_frame, text=artist_name)
-                        artist_label.pack(anchor="w")
-                        
-                        # Album art
-                        album_art = None
-                        if 'album' in track and 'images' in track['album'] and track['album']['images']:
-                            album_image_url = track['album']['images'][-1]['url']  # Get smallest image
-                            album_art = self.load_album_art(album_image_url, (40, 40))
-                        
-                        # Album art display
-                        if album_art:
-                            art_label = ctk.CTkLabel(track_frame, image=album_art, text="")
-                            art_label.pack(side="left", padx=(10, 0), pady=10)
-                            
-                        # Preview button
-                        preview_button = ctk.CTkButton(
-                            track_frame, 
-                            text="Play", 
-                            width=80,
-                            command=lambda url=track['preview_url'], tid=track['id']: self.preview_track(url, tid)
-                        )
-                        preview_button.pack(side="right", padx=10, pady=10)
-                else:
-                    no_tracks = ctk.CTkLabel(recent_frame, text="No recently played tracks")
-                    no_tracks.pack(padx=15, pady=15)
-            except Exception as e:
-                error_label = ctk.CTkLabel(recent_frame, text=f"Could not load recent tracks: {str(e)}")
-                error_label.pack(padx=15, pady=15)
-        else:
+        self.dashboard_recent_list = ctk.CTkFrame(recent_frame, fg_color="transparent")
+        self.dashboard_recent_list.pack(fill="both", expand=True)
+        
+        if not (self.spotify and self.current_user and self.dashboard):
             # Login prompt
-            login_frame = ctk.CTkFrame(recent_frame, fg_color="transparent")
+            login_frame = ctk.CTkFrame(self.dashboard_recent_list, fg_color="transparent")
             login_frame.pack(padx=15, pady=15, fill="both", expand=True)
             
             login_label = ctk.CTkLabel(
@@ -290,6 +777,94 @@ class RevampedMusicApp(ctk.CTk):
             )
             login_button.pack()
     
+    def on_show_dashboard(self):
+        """Render the cached dashboard model and refresh it in the background"""
+        if self.current_user:
+            self.dashboard_welcome.configure(text=f"Welcome back, {self.current_user['display_name']}!")
+        
+        if self.spotify and self.current_user and self.dashboard:
+            self.render_dashboard(self.dashboard.get_cached())
+            self.dashboard.refresh_async(
+                lambda model, error: self.call_on_main_thread(self.on_dashboard_refreshed, model, error)
+            )
+    
+    def on_dashboard_refreshed(self, model, error):
+        """Update the dashboard with fresh data if it is built"""
+        if not self.views.is_built("dashboard"):
+            return
+        if model:
+            self.render_dashboard(model)
+        elif error and not self.dashboard.get_cached():
+            self.clear_frame(self.dashboard_recent_list)
+            self.dashboard_rendered = None
+            error_label = ctk.CTkLabel(self.dashboard_recent_list, text=f"Could not load recent tracks: {str(error)}")
+            error_label.pack(padx=15, pady=15)
+    
+    def render_dashboard(self, model):
+        """Update the dashboard stat cards and recent tracks from a dashboard model"""
+        for label, (_, value) in zip(self.dashboard_stat_labels, stat_cards(model)):
+            label.configure(text=value)
+        
+        # Only rebuild the track rows when the tracks themselves changed
+        rendered = tuple(track.id for track in model['recent_tracks']) if model else None
+        if rendered == self.dashboard_rendered and self.dashboard_recent_list.winfo_children():
+            return
+        self.dashboard_rendered = rendered
+        self.clear_frame(self.dashboard_recent_list)
+        
+        if model is None:
+            loading_label = ctk.CTkLabel(self.dashboard_recent_list, text="Loading your recent tracks...")
+            loading_label.pack(padx=15, pady=15)
+            return
+        
+        if not model['recent_tracks']:
+            no_tracks = ctk.CTkLabel(self.dashboard_recent_list, text="No recently played tracks")
+            no_tracks.pack(padx=15, pady=15)
+            return
+        
+        for i, track in enumerate(model['recent_tracks']):
+            track_frame = ctk.CTkFrame(self.dashboard_recent_list)
+            track_frame.pack(fill="x", padx=15, pady=5)
+            
+            # Track number
+            num_label = ctk.CTkLabel(track_frame, text=f"{i+1}", width=30)
+            num_label.pack(side="left", padx=(10, 0), pady=10)
+            
+            # Track info
+            info_frame = ctk.CTkFrame(track_frame, fg_color="transparent")
+            info_frame.pack(side="left", fill="x", expand=True, padx=10, pady=10)
+            
+            name_label = ctk.CTkLabel(
+                info_frame, 
+                text=track.name,
+                font=get_font(weight="bold")
+            )
+            name_label.pack(anchor="w")
+            
+            artist_label = ctk.CTkLabel(info_frame, text=track.artist_name)
+            artist_label.pack(anchor="w")
+            
+            # Album art was downloaded with the rest of the dashboard data
+            album_art = None
+            if track.image_url:
+                image = model['album_art'].get(track.image_url)
+                if image:
+                    album_art = ctk.CTkImage(light_image=image, dark_image=image, size=image.size)
+            
+            # Album art display
+            if album_art:
+                art_label = ctk.CTkLabel(track_frame, image=album_art, text="")
+                art_label.pack(side="left", padx=(10, 0), pady=10)
+                
+            # Preview button
+            preview_button = ctk.CTkButton(
+                track_frame, 
+                text="Play", 
+                width=80,
+                command=lambda url=track.preview_url, tid=track.id: self.preview_track(url, tid)
+            )
+            preview_button.pack(side="right", padx=10, pady=10)
+    
     def create_stat_card(self, parent, title, value, row, column):
         """Create a statistics card"""
         card = ctk.CTkFrame(parent, corner_radius=10)
@@ -298,26 +873,24 @@ class RevampedMusicApp(ctk.CTk):
         title_label = ctk.CTkLabel(
             card, 
             text=title,
-            font=ctk.CTkFont(size=14)
+            font=get_font(size=14)
         )
         title_label.pack(padx=15, pady=(15, 5), anchor="w")
         
         value_label = ctk.CTkLabel(
             card, 
             text=value,
-            font=ctk.CTkFont(size=20, weight="bold")
+            font=get_font(size=20, weight="bold")
         )
         value_label.pack(padx=15, pady=(0, 15), anchor="w")
+        return value_label
         
     def show_search(self):
         """Show search view"""
-        self.clear_main_container()
-        self.update_header("Search Music")
-        
-        # Create search layout
-        search_container = ctk.CTkFrame(self.main_container, fg_color="transparent")
-        search_container.pack(fill="both", expand=True)
-        
+        self.show_view("search")
+    
+    def build_search_view(self, search_container):
+        """Build the search widgets once; results stay between visits"""
         # Search bar
         search_frame = ctk.CTkFrame(search_container, height=50, corner_radius=25)
         search_frame.pack(fill="x", pady=(0, 20))
@@ -328,7 +901,7 @@ class RevampedMusicApp(ctk.CTk):
             placeholder_text="Search for songs, artists, or albums...",
             border_width=0,
             height=40,
-            font=ctk.CTkFont(size=14)
+            font=get_font(size=14)
         )
         search_entry.pack(side="left", fill="both", expand=True, padx=(20, 10), pady=5)
         
@@ -347,19 +920,49 @@ class RevampedMusicApp(ctk.CTk):
     
     def perform_search(self, query):
         """Perform search and display results"""
-        if not query or not self.spotify:
+        if not query:
             return
         
         # Clear previous results
         for widget in self.results_frame.winfo_children():
             widget.destroy()
         
+        # Local files are searchable without a Spotify connection
+        local_tracks = self.get_local_tracks(query)
+        if local_tracks:
+            local_label = ctk.CTkLabel(
+                self.results_frame,
+                text="Local Files",
+                font=get_font(size=18, weight="bold")
+            )
+            local_label.pack(anchor="w", pady=(5, 10))
+            
+            for track in local_tracks:
+                self.create_local_track_item(track)
+        
+        # The synced saved library is searchable offline too
+        library_tracks = tracks_from_spotify(self.catalog.search_library(query, limit=self.search_limit))
+        if library_tracks:
+            library_label = ctk.CTkLabel(
+                self.results_frame,
+                text="Your Library",
+                font=get_font(size=18, weight="bold")
+            )
+            library_label.pack(anchor="w", pady=(5, 10))
+            
+            for track in library_tracks:
+                self.create_track_item(track)
+        
+        if not self.spotify:
+            return
+        
         try:
             # Search Spotify
-            results = self.spotify.search(q=query, limit=15, type="track,artist,album")
+            results = self.spotify.search(q=query, limit=self.search_limit, type="track,artist,album")
             
             # Display track results
-            if results['tracks']['items']:
+            result_tracks = tracks_from_spotify(results['tracks']['items'])
+            if result_tracks:
                 # Section header
                 tracks_header = ctk.CTkFrame(self.results_frame, fg_color="transparent", height=40)
                 tracks_header.pack(fill="x", pady=(5, 10))
@@ -367,12 +970,20 @@ class RevampedMusicApp(ctk.CTk):
                 tracks_label = ctk.CTkLabel(
                     tracks_header, 
                     text="Tracks",
-                    font=ctk.CTkFont(size=18, weight="bold")
+                    font=get_font(size=18, weight="bold")
                 )
                 tracks_label.pack(side="left")
                 
+                play_all_button = ctk.CTkButton(
+                    tracks_header,
+                    text="Play All",
+                    width=90,
+                    command=lambda: self.play_all(result_tracks)
+                )
+                play_all_button.pack(side="right")
+                
                 # Track results
-                for track in results['tracks']['items']:
+                for track in result_tracks:
                     self.create_track_item(track)
             else:
                 no_tracks = ctk.CTkLabel(self.results_frame, text="No tracks found")
@@ -386,7 +997,7 @@ class RevampedMusicApp(ctk.CTk):
                 artists_label = ctk.CTkLabel(
                     artists_header, 
                     text="Artists",
-                    font=ctk.CTkFont(size=18, weight="bold")
+                    font=get_font(size=18, weight="bold")
                 )
                 artists_label.pack(side="left")
                 
@@ -396,10 +1007,17 @@ class RevampedMusicApp(ctk.CTk):
                 artists_frame.grid_columnconfigure((0, 1, 2), weight=1)
                 
                 # Display artists in grid
-                for i, artist in enumerate(results['artists']['items'][:6]):
+                shown_artists = results['artists']['items'][:6]
+                self.artist_info.store(shown_artists)
+                for i, artist in enumerate(shown_artists):
                     row = i // 3
                     col = i % 3
                     self.create_artist_card(artists_frame, artist, row, col)
+            
+            # Artists on screen (cards first, then the artists of the listed tracks) open instantly once prefetched
+            visible = [artist['id'] for artist in results.get('artists', {}).get('items', [])[:6]]
+            visible += [track.artist_id for track in library_tracks + result_tracks]
+            self.prefetch_artists(visible)
                     
         except Exception as e:
             error_label = ctk.CTkLabel(
@@ -414,15 +1032,10 @@ class RevampedMusicApp(ctk.CTk):
         track_frame.pack(fill="x", pady=5)
         track_frame.pack_propagate(False)
         
-        # Track info
-        track_name = track['name']
-        artist_name = track['artists'][0]['name'] if track['artists'] else "Unknown Artist"
-        
         # Album art
         album_art = None
-        if 'album' in track and 'images' in track['album'] and track['album']['images']:
-            album_image_url = track['album']['images'][-1]['url']  # Get smallest image
-            album_art = self.load_album_art(album_image_url, (50, 50))
+        if track.image_url:
+            album_art = self.load_album_art(track.image_url, (50, 50))
         
         # Album art display
         if album_art:
@@ -435,17 +1048,20 @@ class RevampedMusicApp(ctk.CTk):
         
         name_label = ctk.CTkLabel(
             info_frame, 
-            text=track_name,
-            font=ctk.CTkFont(size=14, weight="bold")
+            text=track.name,
+            font=get_font(size=14, weight="bold")
         )
         name_label.pack(anchor="w")
         
         artist_label = ctk.CTkLabel(
             info_frame, 
-            text=artist_name,
-            font=ctk.CTkFont(size=12)
+            text=track.artist_name,
+            font=get_font(size=12)
         )
         artist_label.pack(anchor="w")
+        if track.artist_id:
+            artist_label.configure(cursor="hand2")
+            artist_label.bind("<Button-1>", lambda event, artist_id=track.artist_id: self.view_artist(artist_id))
         
         # Action buttons
         buttons_frame = ctk.CTkFrame(track_frame, fg_color="transparent")
@@ -456,10 +1072,32 @@ class RevampedMusicApp(ctk.CTk):
             text="Play", 
             width=80,
             height=30,
-            command=lambda url=track.get('preview_url'), tid=track.get('id'): self.preview_track(url, tid)
+            command=lambda url=track.preview_url, tid=track.id: self.preview_track(url, tid)
         )
         preview_button.pack(side="right", padx=5)
     
+    def create_local_track_item(self, track):
+        """Create a local file item in search results"""
+        track_frame = ctk.CTkFrame(self.results_frame, height=50)
+        track_frame.pack(fill="x", pady=5)
+        track_frame.pack_propagate(False)
+        
+        name_label = ctk.CTkLabel(
+            track_frame,
+            text=track.name,
+            font=get_font(size=14, weight="bold")
+        )
+        name_label.pack(side="left", padx=15)
+        
+        play_button = ctk.CTkButton(
+            track_frame,
+            text="Play",
+            width=80,
+            height=30,
+            command=lambda t=track: self.play_local_track(t)
+        )
+        play_button.pack(side="right", padx=15)
+    
     def create_artist_card(self, parent, artist, row, col):
         """Create an artist card in grid layout"""
         card = ctk.CTkFrame(parent, width=150, height=100, corner_radius=10)
@@ -469,11 +1107,170 @@ class RevampedMusicApp(ctk.CTk):
         name_label = ctk.CTkLabel(
             card, 
             text=artist['name'],
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=get_font(size=14, weight="bold"),
             wraplength=130
         )
         name_label.pack(expand=True)
         
+        view_button = ctk.CTkButton(
+            card,
+            text="View Artist",
+            width=100,
+            height=26,
+            command=lambda artist_id=artist['id']: self.view_artist(artist_id)
+        )
+        view_button.pack(pady=(0, 10))
+    
+    def prefetch_artists(self, artist_ids):
+        """Fetch metadata, top tracks, albums and images of on-screen artists in the background"""
+        if not self.artist_info or self.is_offline():
+            return
+        artist_ids = [artist_id for artist_id in dict.fromkeys(artist_ids) if artist_id]
+        if not artist_ids:
+            return
+        
+        def run():
+            for detail in self.artist_info.prefetch(artist_ids).values():
+                if detail is None:
+                    continue
+                images = detail['artist'].get('images') or []
+                if images:
+                    self.album_art.get(images[-1]['url'], ARTIST_IMAGE_SIZE, load_image)
+                for track in detail['top_tracks']:
+                    if track.image_url:
+                        self.album_art.get(track.image_url, (40, 40), load_image)
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def view_artist(self, artist_id):
+        """Open a window with an artist's stats, genres, top tracks and albums"""
+        if not self.artist_info:
+            self.show_error("Please log in to Spotify first")
+            return
+        
+        with tracer.span("artist.detail", "spotify"):
+            detail = self.artist_info.get_detail(artist_id)
+        if detail is None:
+            self.show_error("Could not load this artist")
+            return
+        artist = detail['artist']
+        
+        # Opening an artist again replaces its window
+        previous = self.artist_windows.get(artist_id)
+        if previous is not None and previous.winfo_exists():
+            release_window(previous)
+        
+        artist_window = ctk.CTkToplevel(self)
+        artist_window.protocol("WM_DELETE_WINDOW", lambda: release_window(artist_window))
+        self.artist_windows[artist_id] = memory_budget.track("windows", artist_window)
+        artist_window.title(f"Artist: {artist['name']}")
+        artist_window.geometry("800x600")
+        artist_window.minsize(600, 400)
+        artist_window.grid_columnconfigure(0, weight=1)
+        artist_window.grid_rowconfigure(1, weight=1)
+        
+        # Header: image, name, stats and actions
+        header_frame = ctk.CTkFrame(artist_window)
+        header_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=(20, 0))
+        
+        images = artist.get('images') or []
+        if images:
+            image = self.load_album_art(images[-1]['url'], ARTIST_IMAGE_SIZE)
+            if image:
+                ctk.CTkLabel(header_frame, image=image, text="").pack(side="left", padx=(15, 0), pady=15)
+        
+        info_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
+        info_frame.pack(side="left", fill="x", expand=True, padx=15, pady=15)
+        
+        ctk.CTkLabel(info_frame, text=artist['name'], font=get_font(size=24, weight="bold"), anchor="w").pack(fill="x")
+        
+        library = detail['library']
+        followers = (artist.get('followers') or {}).get('total')
+        stats = [
+            f"{followers:,} followers" if followers is not None else None,
+            f"Popularity {artist['popularity']}" if artist.get('popularity') is not None else None,
+            f"{library['saved_tracks']} saved tracks, {library['plays']} plays"
+        ]
+        ctk.CTkLabel(info_frame, text="  ·  ".join(item for item in stats if item), anchor="w").pack(fill="x")
+        
+        if artist.get('genres'):
+            ctk.CTkLabel(
+                info_frame,
+                text=", ".join(genre.title() for genre in artist['genres']),
+                font=get_font(size=12),
+                anchor="w",
+                wraplength=450,
+                justify="left"
+            ).pack(fill="x")
+        
+        top_tracks = detail['top_tracks']
+        if top_tracks:
+            ctk.CTkButton(
+                header_frame,
+                text="Add to Queue",
+                width=110,
+                command=lambda: self.add_to_queue(top_tracks)
+            ).pack(side="right", padx=15, pady=15)
+            
+            ctk.CTkButton(
+                header_frame,
+                text="Play Top Tracks",
+                width=120,
+                command=lambda: self.play_all(top_tracks)
+            ).pack(side="right", pady=15)
+        
+        content_frame = ctk.CTkScrollableFrame(artist_window)
+        content_frame.grid(row=1, column=0, sticky="nsew", padx=20, pady=20)
+        
+        # Top tracks
+        ctk.CTkLabel(content_frame, text="Top Tracks", font=get_font(size=18, weight="bold")).pack(anchor="w", pady=(0, 10))
+        if not top_tracks:
+            ctk.CTkLabel(content_frame, text="No top tracks available").pack(anchor="w", padx=10)
+        for i, track in enumerate(top_tracks):
+            track_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
+            track_frame.pack(fill="x", padx=10, pady=2)
+            
+            ctk.CTkLabel(track_frame, text=f"{i+1}", width=40).pack(side="left")
+            
+            if track.image_url:
+                album_art = self.load_album_art(track.image_url, (40, 40))
+                if album_art:
+                    ctk.CTkLabel(track_frame, image=album_art, text="").pack(side="left", padx=(5, 0))
+            
+            track_info = ctk.CTkFrame(track_frame, fg_color="transparent")
+            track_info.pack(side="left", fill="x", expand=True, padx=(10, 0))
+            ctk.CTkLabel(track_info, text=track.name, font=get_font(weight="bold"), anchor="w").pack(fill="x")
+            ctk.CTkLabel(track_info, text=track.album or "", anchor="w").pack(fill="x")
+            
+            ctk.CTkButton(
+                track_frame,
+                text="Play",
+                width=80,
+                command=lambda url=track.preview_url, tid=track.id: self.preview_track(url, tid)
+            ).pack(side="right", padx=10)
+        
+        # Albums
+        albums = detail['albums']
+        ctk.CTkLabel(content_frame, text="Albums", font=get_font(size=18, weight="bold")).pack(anchor="w", pady=(20, 10))
+        if not albums:
+            ctk.CTkLabel(content_frame, text="No albums available").pack(anchor="w", padx=10)
+        for album in albums:
+            album_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
+            album_frame.pack(fill="x", padx=10, pady=2)
+            
+            if album.get('image_url'):
+                cover = self.load_album_art(album['image_url'], (40, 40))
+                if cover:
+                    ctk.CTkLabel(album_frame, image=cover, text="").pack(side="left")
+            
+            details = [(album.get('album_type') or "album").title(), (album.get('release_date') or "")[:4]]
+            if album.get('total_tracks'):
+                details.append(f"{album['total_tracks']} tracks")
+            ctk.CTkLabel(album_frame, text=album.get('name') or "", font=get_font(weight="bold"), anchor="w").pack(side="left", padx=(10, 0))
+            ctk.CTkLabel(album_frame, text="  ·  ".join(item for item in details if item), anchor="e").pack(side="right", padx=10)
+        
+        return artist_window
+        
     def preview_track(self, url=None, track_id=None):
         """Play track preview using the music player or open in Spotify"""
         from player import MusicPlayer
@@ -505,13 +1302,10 @@ class RevampedMusicApp(ctk.CTk):
             
     def show_recommendations(self):
         """Show recommendations view"""
-        self.clear_main_container()
-        self.update_header("Mood-Based Recommendations")
-        
-        # Create recommendations layout
-        recommendations_container = ctk.CTkFrame(self.main_container, fg_color="transparent")
-        recommendations_container.pack(fill="both", expand=True)
-        
+        self.show_view("recommendations")
+    
+    def build_recommendations_view(self, recommendations_container):
+        """Build the mood picker and results area once"""
         # Mood selection section
         mood_section = ctk.CTkFrame(recommendations_container)
         mood_section.pack(fill="x", pady=(0, 20))
@@ -519,7 +1313,7 @@ class RevampedMusicApp(ctk.CTk):
         mood_label = ctk.CTkLabel(
             mood_section, 
             text="How are you feeling today?",
-            font=ctk.CTkFont(size=16)
+            font=get_font(size=16)
         )
         mood_label.pack(padx=20, pady=(20, 15))
         
@@ -552,7 +1346,7 @@ class RevampedMusicApp(ctk.CTk):
         prompt_label = ctk.CTkLabel(
             self.recommendations_frame, 
             text="Select a mood to get personalized recommendations",
-            font=ctk.CTkFont(size=14)
+            font=get_font(size=14)
         )
         prompt_label.pack(pady=50)
     
@@ -570,7 +1364,7 @@ class RevampedMusicApp(ctk.CTk):
         loading_label = ctk.CTkLabel(
             self.recommendations_frame, 
             text=f"Finding {mood} tracks for you...",
-            font=ctk.CTkFont(size=14)
+            font=get_font(size=14)
         )
         loading_label.pack(pady=20)
         self.update_idletasks()
@@ -597,17 +1391,48 @@ class RevampedMusicApp(ctk.CTk):
             mood_label = ctk.CTkLabel(
                 mood_header, 
                 text=f"{mood} Recommendations",
-                font=ctk.CTkFont(size=18, weight="bold")
+                font=get_font(size=18, weight="bold")
             )
             mood_label.pack(side="left")
             
-            # Create playlist button
+            # Create playlist button, sequenced by the chosen ordering
+            ordering_menu = ctk.CTkOptionMenu(mood_header, values=list(ORDERINGS.values()), width=160)
+            ordering_menu.set(ORDERINGS["original"])
             create_playlist_button = ctk.CTkButton(
                 mood_header,
                 text=f"Create {mood} Playlist",
-                command=lambda: self.create_playlist(mood, [track['id'] for track in recommendations])
+                command=lambda: self.create_playlist(
+                    mood, [track.id for track in recommendations], ordering_for_label(ordering_menu.get())
+                )
             )
             create_playlist_button.pack(side="right")
+            ordering_menu.pack(side="right", padx=(0, 10))
+            
+            # Smart version that follows the library as it changes
+            if self.catalog.saved_count():
+                smart_playlist_button = ctk.CTkButton(
+                    mood_header,
+                    text="Keep Updated",
+                    width=110,
+                    command=lambda: self.create_smart_playlist(mood)
+                )
+                smart_playlist_button.pack(side="right", padx=(10, 0))
+            
+            queue_button = ctk.CTkButton(
+                mood_header,
+                text="Add to Queue",
+                width=110,
+                command=lambda: self.add_to_queue(recommendations)
+            )
+            queue_button.pack(side="right", padx=10)
+            
+            play_all_button = ctk.CTkButton(
+                mood_header,
+                text="Play All",
+                width=90,
+                command=lambda: self.play_all(recommendations)
+            )
+            play_all_button.pack(side="right")
             
             # Display recommendations
             for i, track in enumerate(recommendations):
@@ -619,15 +1444,10 @@ class RevampedMusicApp(ctk.CTk):
                 num_label = ctk.CTkLabel(track_frame, text=f"{i+1}", width=30)
                 num_label.pack(side="left", padx=(15, 0))
                 
-                # Track info
-                track_name = track['name']
-                artist_name = track['artists'][0]['name'] if track['artists'] else "Unknown Artist"
-                
                 # Album art
                 album_art = None
-                if 'album' in track and 'images' in track['album'] and track['album']['images']:
-                    album_image_url = track['album']['images'][-1]['url']  # Get smallest image
-                    album_art = self.load_album_art(album_image_url, (50, 50))
+                if track.image_url:
+                    album_art = self.load_album_art(track.image_url, (50, 50))
                 
                 # Album art display
                 if album_art:
@@ -639,15 +1459,15 @@ class RevampedMusicApp(ctk.CTk):
                 
                 name_label = ctk.CTkLabel(
                     info_frame, 
-                    text=track_name,
-                    font=ctk.CTkFont(size=14, weight="bold")
+                    text=track.name,
+                    font=get_font(size=14, weight="bold")
                 )
                 name_label.pack(anchor="w")
                 
                 artist_label = ctk.CTkLabel(
                     info_frame, 
-                    text=artist_name,
-                    font=ctk.CTkFont(size=12)
+                    text=track.artist_name,
+                    font=get_font(size=12)
                 )
                 artist_label.pack(anchor="w")
                 
@@ -657,7 +1477,7 @@ class RevampedMusicApp(ctk.CTk):
                     text="Play", 
                     width=80,
                     height=30,
-                    command=lambda url=track.get('preview_url'), tid=track.get('id'): self.preview_track(url, tid)
+                    command=lambda url=track.preview_url, tid=track.id: self.preview_track(url, tid)
                 )
                 preview_button.pack(side="right", padx=15, pady=15)
                 
@@ -671,7 +1491,7 @@ class RevampedMusicApp(ctk.CTk):
             )
             error_label.pack(pady=20)
     
-    def create_playlist(self, name, track_ids):
+    def create_playlist(self, name, track_ids, ordering="original"):
         """Create a new playlist with selected tracks"""
         if not self.spotify or not self.current_user:
             self.show_error("Please log in to Spotify first")
@@ -679,23 +1499,36 @@ class RevampedMusicApp(ctk.CTk):
         
         try:
             # Use playlist manager to create playlist
-            success, result = self.playlist_manager.create_mood_playlist(name, track_ids)
+            success, result = self.playlist_manager.create_mood_playlist(name, track_ids, ordering)
             
-            if success:
+            if success and str(result).startswith(OFFLINE_ID_PREFIX):
+                self.show_message(f"You're offline; {name} playlist will be created when Spotify is reachable", "Information")
+            elif success:
                 self.show_message(f"Created {name} playlist successfully!")
             else:
                 self.show_error(result)
         except Exception as e:
             self.show_error(f"Failed to create playlist: {str(e)}")
             
+    def create_smart_playlist(self, mood):
+        """Create a mood playlist that is refreshed after every library sync"""
+        if not self.spotify or not self.current_user:
+            self.show_error("Please log in to Spotify first")
+            return
+        
+        success, result = self.playlist_manager.create_smart_mood_playlist(mood)
+        if success:
+            self.show_message(f"Created {mood} Mix; it will update as your library changes")
+        else:
+            self.show_error(result)
+            
     def show_playlists(self):
         """Show user's playlists"""
-        self.clear_main_container()
-        self.update_header("My Playlists")
-        
-        # Create playlists layout
-        playlists_container = ctk.CTkFrame(self.main_container, fg_color="transparent")
-        playlists_container.pack(fill="both", expand=True)
+        self.show_view("playlists")
+    
+    def build_playlists_view(self, playlists_container):
+        """Build the playlists view once; the list is loaded on first show"""
+        self.playlists_loaded = False
         
         if not self.spotify or not self.current_user:
             # Login prompt
@@ -705,7 +1538,7 @@ class RevampedMusicApp(ctk.CTk):
             login_label = ctk.CTkLabel(
                 login_frame, 
                 text="Please log in to Spotify to see your playlists",
-                font=ctk.CTkFont(size=14)
+                font=get_font(size=14)
             )
             login_label.pack(pady=(0, 15))
             
@@ -717,30 +1550,50 @@ class RevampedMusicApp(ctk.CTk):
             login_button.pack()
             return
         
+        # Toolbar
+        toolbar = ctk.CTkFrame(playlists_container, fg_color="transparent")
+        toolbar.pack(fill="x", pady=(0, 10))
+        
+        refresh_button = ctk.CTkButton(toolbar, text="Refresh", width=100, command=self.load_playlists)
+        refresh_button.pack(side="right")
+        
+        import_button = ctk.CTkButton(toolbar, text="Import...", width=100, command=self.import_playlist)
+        import_button.pack(side="right", padx=10)
+        
+        # Create grid layout for playlists
+        self.playlists_frame = ctk.CTkScrollableFrame(playlists_container)
+        self.playlists_frame.pack(fill="both", expand=True)
+    
+    def on_show_playlists(self):
+        """Load the playlists the first time the view is shown"""
+        if self.spotify and self.current_user and not self.playlists_loaded:
+            self.load_playlists()
+    
+    def load_playlists(self):
+        """Fetch the user's playlists and rebuild the list"""
+        self.clear_frame(self.playlists_frame)
+        
         try:
             # Get user's playlists
             playlists = self.playlist_manager.get_user_playlists(limit=20)
+            self.playlists_loaded = True
             
             if not playlists:
                 no_playlists = ctk.CTkLabel(
-                    playlists_container, 
+                    self.playlists_frame, 
                     text="You don't have any playlists yet",
-                    font=ctk.CTkFont(size=14)
+                    font=get_font(size=14)
                 )
                 no_playlists.pack(pady=50)
                 return
             
-            # Create grid layout for playlists
-            playlists_frame = ctk.CTkScrollableFrame(playlists_container)
-            playlists_frame.pack(fill="both", expand=True)
-            
             # Display playlists in a grid
             for i, playlist in enumerate(playlists):
-                self.create_playlist_card(playlists_frame, playlist, i)
+                self.create_playlist_card(self.playlists_frame, playlist, i)
                 
         except Exception as e:
             error_label = ctk.CTkLabel(
-                playlists_container, 
+                self.playlists_frame, 
                 text=f"Error loading playlists: {str(e)}"
             )
             error_label.pack(pady=50)
@@ -761,7 +1614,7 @@ class RevampedMusicApp(ctk.CTk):
         icon_label = ctk.CTkLabel(
             card, 
             text=f"{index+1}",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=get_font(size=16, weight="bold"),
             width=40,
             height=40
         )
@@ -771,7 +1624,7 @@ class RevampedMusicApp(ctk.CTk):
         name_label = ctk.CTkLabel(
             card, 
             text=name,
-            font=ctk.CTkFont(size=16, weight="bold")
+            font=get_font(size=16, weight="bold")
         )
         name_label.grid(row=0, column=1, padx=5, pady=(15, 0), sticky="w")
         
@@ -792,7 +1645,7 @@ class RevampedMusicApp(ctk.CTk):
         view_button.grid(row=0, column=2, rowspan=2, padx=15, pady=15)
     
     def view_playlist(self, playlist_id):
-        """Show playlist details in a new window"""
+        """Show playlist details in a new window and return the window"""
         if not self.spotify:
             self.show_error("Please log in to Spotify first")
             return
@@ -800,10 +1653,17 @@ class RevampedMusicApp(ctk.CTk):
         try:
             # Get playlist details
             playlist = self.spotify.playlist(playlist_id)
-            tracks = self.spotify.playlist_tracks(playlist_id, limit=50)
+            tracks = self.spotify.playlist_tracks(playlist_id, limit=self.playlist_track_limit)
+            
+            # Opening a playlist again replaces its window instead of stacking another one
+            previous = self.playlist_windows.get(playlist_id)
+            if previous is not None and previous.winfo_exists():
+                release_window(previous)
             
             # Create a new window for playlist details
             playlist_window = ctk.CTkToplevel(self)
+            playlist_window.protocol("WM_DELETE_WINDOW", lambda: release_window(playlist_window))
+            self.playlist_windows[playlist_id] = memory_budget.track("windows", playlist_window)
             playlist_window.title(f"Playlist: {playlist['name']}")
             playlist_window.geometry("800x600")
             playlist_window.minsize(600, 400)
@@ -819,9 +1679,44 @@ class RevampedMusicApp(ctk.CTk):
             name_label = ctk.CTkLabel(
                 header_frame, 
                 text=playlist['name'], 
-                font=ctk.CTkFont(size=24, weight="bold")
+                font=get_font(size=24, weight="bold")
+            )
+            name_label.pack(side="left", padx=15, pady=15)
+            
+            playlist_tracks = tracks_from_spotify(tracks['items'])
+            
+            queue_button = ctk.CTkButton(
+                header_frame,
+                text="Add to Queue",
+                width=110,
+                command=lambda: self.add_to_queue(playlist_tracks)
+            )
+            queue_button.pack(side="right", padx=15, pady=15)
+            
+            play_all_button = ctk.CTkButton(
+                header_frame,
+                text="Play All",
+                width=90,
+                command=lambda: self.play_all(playlist_tracks)
+            )
+            play_all_button.pack(side="right", pady=15)
+            
+            export_button = ctk.CTkButton(
+                header_frame,
+                text="Export...",
+                width=90,
+                command=lambda: self.export_playlist(playlist_id, playlist['name'])
             )
-            name_label.pack(padx=15, pady=15, anchor="w")
+            export_button.pack(side="right", padx=15, pady=15)
+            
+            reorder_menu = ctk.CTkOptionMenu(
+                header_frame,
+                values=[label for key, label in ORDERINGS.items() if key != "original"],
+                width=160,
+                command=lambda label: self.reorder_playlist(playlist_id, ordering_for_label(label))
+            )
+            reorder_menu.set("Reorder...")
+            reorder_menu.pack(side="right", pady=15)
             
             # Description if available
             if 'description' in playlist and playlist['description']:
@@ -845,7 +1740,7 @@ class RevampedMusicApp(ctk.CTk):
             
             # Header labels
             ctk.CTkLabel(headers_frame, text="#", width=40).pack(side="left")
-            ctk.CTkLabel(headers_frame, text="Title", font=ctk.CTkFont(weight="bold")).pack(side="left", padx=(10, 0), expand=True, fill="x")
+            ctk.CTkLabel(headers_frame, text="Title", font=get_font(weight="bold")).pack(side="left", padx=(10, 0), expand=True, fill="x")
             ctk.CTkLabel(headers_frame, text="Actions", width=80).pack(side="right", padx=10)
             
             # Separator
@@ -853,11 +1748,7 @@ class RevampedMusicApp(ctk.CTk):
             separator.pack(fill="x", padx=10, pady=(0, 10))
             
             # Display tracks
-            for i, item in enumerate(tracks['items']):
-                track = item['track']
-                if not track:  # Skip if track is None
-                    continue
-                    
+            for i, track in enumerate(playlist_tracks):
                 track_frame = ctk.CTkFrame(tracks_frame, fg_color="transparent")
                 track_frame.pack(fill="x", padx=10, pady=2)
                 
@@ -866,32 +1757,28 @@ class RevampedMusicApp(ctk.CTk):
                 num_label.pack(side="left")
                 
                 # Track info
-                track_name = track['name']
-                artist_name = track['artists'][0]['name'] if track['artists'] else "Unknown Artist"
-                
                 info_frame = ctk.CTkFrame(track_frame, fg_color="transparent")
                 info_frame.pack(side="left", fill="x", expand=True, padx=(10, 0))
                 
                 name_label = ctk.CTkLabel(
                     info_frame, 
-                    text=track_name,
-                    font=ctk.CTkFont(weight="bold"),
+                    text=track.name,
+                    font=get_font(weight="bold"),
                     anchor="w"
                 )
                 name_label.pack(fill="x")
                 
                 artist_label = ctk.CTkLabel(
                     info_frame, 
-                    text=artist_name,
+                    text=track.artist_name,
                     anchor="w"
                 )
                 artist_label.pack(fill="x")
                 
                 # Album art
                 album_art = None
-                if 'album' in track and 'images' in track['album'] and track['album']['images']:
-                    album_image_url = track['album']['images'][-1]['url']  # Get smallest image
-                    album_art = self.load_album_art(album_image_url, (40, 40))
+                if track.image_url:
+                    album_art = self.load_album_art(track.image_url, (40, 40))
                 
                 # Album art display
                 if album_art:
@@ -903,20 +1790,58 @@ class RevampedMusicApp(ctk.CTk):
                     track_frame, 
                     text="Play", 
                     width=80,
-                    command=lambda url=track.get('preview_url'), tid=track.get('id'): self.preview_track(url, tid)
+                    command=lambda url=track.preview_url, tid=track.id: self.preview_track(url, tid)
                 )
                 preview_button.pack(side="right", padx=10)
+            
+            return playlist_window
         except Exception as e:
             self.show_error(f"Error loading playlist: {str(e)}")
             
+    def export_playlist(self, playlist_id, name):
+        """Ask for a file and export a playlist to it in the background"""
+        path = filedialog.asksaveasfilename(
+            title="Export playlist",
+            initialfile=f"{name}.csv",
+            defaultextension=".csv",
+            filetypes=PLAYLIST_FILE_TYPES
+        )
+        if path:
+            self.run_playlist_file_task(lambda: self.playlist_manager.export_playlist(playlist_id, path))
+    
+    def reorder_playlist(self, playlist_id, ordering):
+        """Resequence a playlist in the background"""
+        self.run_playlist_file_task(lambda: self.playlist_manager.reorder_playlist(playlist_id, ordering))
+    
+    def import_playlist(self):
+        """Ask for a playlist file and import it in the background"""
+        path = filedialog.askopenfilename(title="Import playlist", filetypes=PLAYLIST_FILE_TYPES)
+        if path:
+            self.run_playlist_file_task(lambda: self.playlist_manager.import_playlist(path), self.load_playlists)
+    
+    def run_playlist_file_task(self, task, on_success=None):
+        """Run an export or import off the Tk thread and report its (success, message) result"""
+        def worker():
+            success, message = task()
+            self.call_on_main_thread(self.show_message if success else self.show_error, message)
+            if success and on_success:
+                self.call_on_main_thread(on_success)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
     def show_analytics(self):
         """Show analytics view"""
-        self.clear_main_container()
-        self.update_header("Listening Analytics")
-        
-        # Create analytics layout
-        analytics_container = ctk.CTkFrame(self.main_container, fg_color="transparent")
-        analytics_container.pack(fill="both", expand=True)
+        self.show_view("analytics")
+    
+    def build_analytics_view(self, analytics_container):
+        """Build the analytics tabs once; each chart is built on first use"""
+        self.chart_widgets = {}  # Chart name -> widget shown in chart_frame
+        self.current_chart = None
+        self.chart_status_label = None
+        self.chart_loading = set()  # Charts whose data is being fetched
+        self.analytics_generation += 1
+        with self.dataset_lock:
+            self.library_dataset = None
         
         if not self.spotify or not self.current_user:
             # Login prompt
@@ -926,7 +1851,7 @@ class RevampedMusicApp(ctk.CTk):
             login_label = ctk.CTkLabel(
                 login_frame, 
                 text="Please log in to Spotify to see your analytics",
-                font=ctk.CTkFont(size=14)
+                font=get_font(size=14)
             )
             login_label.pack(pady=(0, 15))
             
@@ -948,7 +1873,9 @@ class RevampedMusicApp(ctk.CTk):
             tabs = [
                 ("Top Genres", lambda: self.show_genre_chart()),
                 ("Listening Time", lambda: self.show_listening_time()),
-                ("Audio Features", lambda: self.show_audio_features())
+                ("Audio Features", lambda: self.show_audio_features()),
+                ("Listening Hours", lambda: self.show_listening_hours()),
+                ("Moods", lambda: self.show_mood_clusters())
             ]
             
             for i, (text, command) in enumerate(tabs):
@@ -967,8 +1894,10 @@ class RevampedMusicApp(ctk.CTk):
             self.chart_frame = ctk.CTkFrame(analytics_container)
             self.chart_frame.pack(fill="both", expand=True)
             
-            # Default to genre chart
-            self.show_genre_chart()
+            # Fetch the data for all three charts at once, then default to the genre chart
+            self.chart_status_label = ctk.CTkLabel(self.chart_frame, text="Loading...", font=get_font(size=14))
+            self.chart_status_label.pack(pady=50)
+            self.prefetch_analytics()
             
         except Exception as e:
             error_label = ctk.CTkLabel(
@@ -977,87 +1906,136 @@ class RevampedMusicApp(ctk.CTk):
             )
             error_label.pack(pady=50)
     
-    def show_genre_chart(self):
-        """Show genre chart in analytics"""
-        # Clear previous chart
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
+    def prefetch_analytics(self):
+        """Prefetch the chart data on a worker; the default chart is shown once it arrives"""
+        generation = self.analytics_generation
         
+        def worker():
+            with tracer.span("analytics.prefetch", "spotify"):
+                self.analytics.prefetch()
+            self.call_on_main_thread(self.on_analytics_prefetched, generation)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def on_analytics_prefetched(self, generation):
+        """Show the genre chart unless the view was rebuilt or another tab was picked meanwhile"""
+        if generation == self.analytics_generation and self.current_chart is None:
+            self.show_genre_chart()
+    
+    def show_chart(self, name, empty_text, error_text):
+        """Show a cached analytics chart; the first time, its data is loaded on a worker and the chart built when it arrives"""
+        if self.current_chart in self.chart_widgets:
+            self.chart_widgets[self.current_chart].pack_forget()
+        if self.chart_status_label is not None:
+            self.chart_status_label.destroy()
+            self.chart_status_label = None
+        self.current_chart = name
+        
+        widget = self.chart_widgets.get(name)
+        if widget is None:
+            self.chart_status_label = ctk.CTkLabel(self.chart_frame, text="Loading...", font=get_font(size=14))
+            self.chart_status_label.pack(pady=50)
+            if name not in self.chart_loading:
+                self.chart_loading.add(name)
+                self.load_chart(name, empty_text, error_text)
+            return
+        
+        if isinstance(widget, ctk.CTkLabel):
+            widget.pack(pady=50)
+        else:
+            widget.pack(fill="both", expand=True)
+    
+    def load_chart(self, name, empty_text, error_text):
+        """Fetch a chart's data, or have ReportEngine compute its report, away from the Tk thread"""
+        generation = self.analytics_generation
+        
+        def deliver(data, error=None):
+            self.call_on_main_thread(self.on_chart_data, generation, name, data, error, empty_text, error_text)
+        
+        def report_done(future):
+            # Runs on a ReportEngine bookkeeping thread
+            error = future.exception()
+            deliver(None if error else future.result(), error)
+        
+        def worker():
+            try:
+                with tracer.span(f"chart.{name}.load", "spotify"):
+                    if name not in REPORT_CHARTS:
+                        deliver(self.analytics.load_chart_data(name))
+                        return
+                    dataset = self.get_library_dataset()
+                if dataset is None:
+                    deliver(None)
+                else:
+                    self.report_engine.submit(REPORT_CHARTS[name], dataset, callback=report_done)
+            except Exception as e:
+                deliver(None, e)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def get_library_dataset(self):
+        """ReportEngine dataset of the synced library, built once per analytics view (worker thread)"""
+        with self.dataset_lock:
+            if self.library_dataset is None:
+                self.library_dataset = self.analytics.get_library_dataset()
+            return self.library_dataset
+    
+    def on_chart_data(self, generation, name, data, error, empty_text, error_text):
+        """Build a chart from data a worker loaded and show it if its tab is still selected"""
+        if generation != self.analytics_generation:
+            return
+        self.chart_loading.discard(name)
         try:
-            # Use analytics module to create chart
-            chart_widget = self.analytics.create_genre_chart(self.chart_frame)
-            
-            if chart_widget:
-                chart_widget.pack(fill="both", expand=True)
-            else:
-                no_data = ctk.CTkLabel(
+            if error:
+                raise error
+            with tracer.span(f"chart.{name}", "matplotlib"):
+                widget = self.analytics.create_chart(name, self.chart_frame, data)
+            if not widget:
+                widget = ctk.CTkLabel(
                     self.chart_frame, 
-                    text="No genre data available",
-                    font=ctk.CTkFont(size=14)
+                    text=empty_text,
+                    font=get_font(size=14)
                 )
-                no_data.pack(pady=50)
         except Exception as e:
-            error_label = ctk.CTkLabel(
-                self.chart_frame, 
-                text=f"Error creating genre chart: {str(e)}"
-            )
-            error_label.pack(pady=50)
+            # Errors are not cached, so the next visit tries again
+            if self.current_chart == name:
+                if self.chart_status_label is not None:
+                    self.chart_status_label.destroy()
+                self.chart_status_label = ctk.CTkLabel(
+                    self.chart_frame, 
+                    text=f"{error_text}: {str(e)}"
+                )
+                self.chart_status_label.pack(pady=50)
+            return
+        self.chart_widgets[name] = widget
+        if self.current_chart == name:
+            self.show_chart(name, empty_text, error_text)
+    
+    def show_genre_chart(self):
+        """Show genre chart in analytics"""
+        self.show_chart("genres", "No genre data available", "Error creating genre chart")
     
     def show_listening_time(self):
         """Show listening time chart in analytics"""
-        # Clear previous chart
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-        
-        try:
-            # Use analytics module to create chart
-            chart_widget = self.analytics.create_listening_history_chart(self.chart_frame)
-            
-            if chart_widget:
-                chart_widget.pack(fill="both", expand=True)
-            else:
-                no_data = ctk.CTkLabel(
-                    self.chart_frame, 
-                    text="No listening history available",
-                    font=ctk.CTkFont(size=14)
-                )
-                no_data.pack(pady=50)
-        except Exception as e:
-            error_label = ctk.CTkLabel(
-                self.chart_frame, 
-                text=f"Error creating listening chart: {str(e)}"
-            )
-            error_label.pack(pady=50)
+        self.show_chart("listening", "No listening history available", "Error creating listening chart")
     
     def show_audio_features(self):
         """Show audio features chart in analytics"""
-        # Clear previous chart
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-        
-        try:
-            # Use analytics module to create chart
-            chart_widget = self.analytics.create_audio_features_chart(self.chart_frame)
-            
-            if chart_widget:
-                chart_widget.pack(fill="both", expand=True)
-            else:
-                no_data = ctk.CTkLabel(
-                    self.chart_frame, 
-                    text="No audio features data available",
-                    font=ctk.CTkFont(size=14)
-                )
-                no_data.pack(pady=50)
-        except Exception as e:
-            error_label = ctk.CTkLabel(
-                self.chart_frame, 
-                text=f"Error creating audio features chart: {str(e)}"
-            )
-            error_label.pack(pady=50)
+        self.show_chart("features", "No audio features data available", "Error creating audio features chart")
+    
+    def show_listening_hours(self):
+        """Show the weekday/hour listening heatmap of the whole play history"""
+        self.show_chart("hours", "No listening history available", "Error creating listening heatmap")
+    
+    def show_mood_clusters(self):
+        """Show the saved library clustered by mood"""
+        self.show_chart("moods", "No audio features in your library yet", "Error creating mood chart")
     
     def show_error(self, message):
         """Show error message in a popup"""
         error_window = ctk.CTkToplevel(self)
+        error_window.protocol("WM_DELETE_WINDOW", lambda: release_window(error_window))
+        memory_budget.track("windows", error_window)
         error_window.title("Error")
         error_window.geometry("400x200")
         error_window.resizable(False, False)
@@ -1078,7 +2056,7 @@ class RevampedMusicApp(ctk.CTk):
         error_symbol = ctk.CTkLabel(
             error_frame, 
             text="!",
-            font=ctk.CTkFont(size=24, weight="bold"),
+            font=get_font(size=24, weight="bold"),
             text_color="#FFFFFF"
         )
         error_symbol.place(relx=0.5, rely=0.5, anchor="center")
@@ -1088,7 +2066,7 @@ class RevampedMusicApp(ctk.CTk):
             error_window, 
             text=message,
             wraplength=350,
-            font=ctk.CTkFont(size=14)
+            font=get_font(size=14)
         )
         error_label.pack(padx=20, pady=10)
         
@@ -1096,35 +2074,42 @@ class RevampedMusicApp(ctk.CTk):
         ok_button = ctk.CTkButton(
             error_window, 
             text="OK", 
-            command=error_window.destroy,
+            command=lambda: release_window(error_window),
             width=100
         )
         ok_button.pack(pady=20)
     
     def load_album_art(self, url, size=(100, 100)):
         """Load album art from URL and return as CTkImage"""
-        try:
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                img_data = BytesIO(response.content)
-                img = Image.open(img_data)
-                img = img.resize(size, Image.LANCZOS)
-                return ctk.CTkImage(light_image=img, dark_image=img, size=size)
-            return None
-        except Exception as e:
-            print(f"Error loading album art: {e}")
+        # The resized image is shared through the cache, but each widget gets its own CTkImage
+        img = self.album_art.get(url, size, load_image)
+        if img is None:
             return None
+        return ctk.CTkImage(light_image=img, dark_image=img, size=size)
     
     def on_closing(self):
         """Handle window closing event"""
         # Clean up music player resources
         if hasattr(self, 'music_player'):
             self.music_player.cleanup()
+        self.stall_detector.stop()
+        if self.analysis_pool:
+            self.analysis_pool.shutdown(wait=False, cancel_futures=True)
+        self.report_engine.shutdown()
+        if self.async_spotify:
+            self.async_spotify.close()
+        if self.local_api:
+            self.local_api.stop()
+            memory_budget.unregister("local_api")
+        http_pool.close()
+        self.catalog.close()
         self.destroy()
     
     def show_message(self, message, title="Success"):
         """Show message in a popup with custom title"""
         message_window = ctk.CTkToplevel(self)
+        message_window.protocol("WM_DELETE_WINDOW", lambda: release_window(message_window))
+        memory_budget.track("windows", message_window)
         message_window.title(title)
         message_window.geometry("400x200")
         message_window.resizable(False, False)
@@ -1156,7 +2141,7 @@ class RevampedMusicApp(ctk.CTk):
         icon_symbol = ctk.CTkLabel(
             icon_frame, 
             text=icon_text,
-            font=ctk.CTkFont(size=24, weight="bold"),
+            font=get_font(size=24, weight="bold"),
             text_color="#FFFFFF"
         )
         icon_symbol.place(relx=0.5, rely=0.5, anchor="center")
@@ -1166,7 +2151,7 @@ class RevampedMusicApp(ctk.CTk):
             message_window, 
             text=message,
             wraplength=350,
-            font=ctk.CTkFont(size=14)
+            font=get_font(size=14)
         )
         message_label.pack(padx=20, pady=10)
         
@@ -1174,7 +2159,7 @@ class RevampedMusicApp(ctk.CTk):
         ok_button = ctk.CTkButton(
             message_window, 
             text="OK", 
-            command=message_window.destroy,
+            command=lambda: release_window(message_window),
             width=100
         )
         ok_button.pack(pady=20)
\ No newline at end of file
@@ -0,0 +1,239 @@
+"""
+Rule-based smart playlists evaluated against the catalog and kept in sync with Spotify by diffs
+"""
+import time
+from catalog import FEATURE_COLUMNS
+from playlist_io import chunked, ADD_BATCH
+
+# A definition is plain JSON:
+# {
+#     'match': 'all' or 'any',
+#     'rules': [
+#         {'field': 'energy', 'op': 'between', 'value': [0.6, 1.0]},
+#         {'field': 'genre', 'op': 'in', 'value': ['indie rock', 'shoegaze']},
+#         {'field': 'added_at', 'op': 'within_days', 'value': 90},
+#         {'field': 'plays', 'op': '>=', 'value': 3},
+#         {'field': 'artist', 'op': 'not_in', 'value': ['Some Artist']}
+#     ],
+#     'order': 'added_at', 'descending': True, 'limit': 200
+# }
+
+NUMBER_OPS = {'>': ">", '>=': ">=", '<': "<", '<=': "<=", '=': "=", '!=': "!="}
+DATE_OPS = ("after", "before", "within_days")
+
+# Rule field -> SQL expression over saved_tracks s, audio_features f, tracks t and play_counts p
+FIELDS = dict(
+    {column: f"f.{column}" for column in FEATURE_COLUMNS},
+    plays="IFNULL(p.plays, 0)",
+    last_played="p.last_played",
+    added_at="s.added_at",
+    artist="t.artist",
+    genre=None  # Matched through artist_genres
+)
+DATE_FIELDS = ("added_at", "last_played")
+ORDERS = dict(FIELDS, name="t.name", random="RANDOM()")
+PLAY_FIELDS = ("plays", "last_played")
+MOOD_RANGE = 0.15  # Half-width of the feature ranges a mood definition allows around its targets
+
+def mood_definition(params, limit=100, width=MOOD_RANGE):
+    """Definition matching the saved tracks near a MOOD_PARAMS entry's target features"""
+    rules = []
+    for key, value in params.items():
+        rules.append({'field': key[len("target_"):], 'op': "between", 'value': [value - width, value + width]})
+    return {'match': "all", 'rules': rules, 'order': "added_at", 'descending': True, 'limit': limit}
+
+def uses_relative_dates(definition):
+    """Whether a definition's matches move with the clock (within_days rules)"""
+    return any(rule.get('op') == "within_days" for rule in definition.get('rules') or [])
+
+def compile_rule(rule):
+    """(SQL condition, params) for one rule; raises ValueError for rules it doesn't understand"""
+    field, op, value = rule.get('field'), rule.get('op'), rule.get('value')
+    if field not in FIELDS:
+        raise ValueError(f"Unknown smart playlist field: {field}")
+
+    if field == "genre":
+        values = [value] if isinstance(value, str) else list(value)
+        if op == "contains":
+            condition = " OR ".join(["g.genre LIKE ?"] * len(values))
+            params = [f"%{item.lower()}%" for item in values]
+        elif op in ("in", "not_in"):
+            condition = f"g.genre IN ({','.join('?' * len(values))})"
+            params = [item.lower() for item in values]
+        else:
+            raise ValueError(f"Unsupported operator for genre: {op}")
+        # An uncorrelated subquery is evaluated once (using the genre index), not per track
+        matching = f"s.artist_id IN (SELECT g.artist_id FROM artist_genres g WHERE {condition})"
+        return (f"NOT IFNULL({matching}, 0)" if op == "not_in" else matching), params
+
+    column = FIELDS[field]
+    if field == "artist":
+        values = [value] if isinstance(value, str) else list(value)
+        if op == "contains":
+            return "(" + " OR ".join(["LOWER(t.artist) LIKE ?"] * len(values)) + ")", [f"%{item.lower()}%" for item in values]
+        if op in ("in", "not_in"):
+            # Artists match by name or by Spotify id
+            placeholders = ",".join("?" * len(values))
+            condition = f"(LOWER(t.artist) IN ({placeholders}) OR s.artist_id IN ({placeholders}))"
+            params = [item.lower() for item in values] + values
+            # Tracks without an artist name are never excluded by a not_in rule
+            return (f"NOT IFNULL({condition}, 0)" if op == "not_in" else condition), params
+        raise ValueError(f"Unsupported operator for artist: {op}")
+
+    if field in DATE_FIELDS and op in DATE_OPS:
+        if op == "within_days":
+            return f"{column} >= strftime('%Y-%m-%dT%H:%M:%SZ', 'now', ?)", [f"-{float(value)} days"]
+        # ISO timestamps compare correctly as text
+        return f"{column} {'>=' if op == 'after' else '<'} ?", [str(value)]
+
+    if op == "between":
+        low, high = value
+        return f"{column} BETWEEN ? AND ?", [low, high]
+    if op in NUMBER_OPS:
+        return f"{column} {NUMBER_OPS[op]} ?", [value]
+    raise ValueError(f"Unsupported operator for {field}: {op}")
+
+def compile_definition(definition):
+    """(SQL selecting matching saved track ids, params)"""
+    rules = definition.get('rules') or []
+    conditions, params = [], []
+    for rule in rules:
+        condition, rule_params = compile_rule(rule)
+        conditions.append(f"({condition})")
+        params.extend(rule_params)
+
+    joiner = " OR " if definition.get('match') == "any" else " AND "
+    where = joiner.join(conditions) or "1"
+
+    order = definition.get('order') or "added_at"
+    if order not in ORDERS or order == "genre":
+        raise ValueError(f"Unknown smart playlist order: {order}")
+    direction = "DESC" if definition.get('descending', True) else "ASC"
+
+    # Only join the tables the rules and the order actually use
+    used = [rule['field'] for rule in rules] + [order]
+    joins = []
+    if any(field in FEATURE_COLUMNS for field in used):
+        joins.append("JOIN audio_features f ON f.track_id = s.track_id")
+    if any(field in ("artist", "name") for field in used):
+        joins.append("JOIN tracks t ON t.id = s.track_id")
+    if any(field in PLAY_FIELDS for field in used):
+        joins.append("LEFT JOIN play_counts p ON p.track_id = s.track_id")
+
+    # With rules, a unary + keeps SQLite from walking the added_at index in order and
+    # looking up every row; filtering first and sorting the matches is far faster
+    order_by = f"+{ORDERS[order]}" if conditions else ORDERS[order]
+    limit = definition.get('limit')
+    sql = f"""SELECT s.track_id FROM saved_tracks s {' '.join(joins)}
+              WHERE {where} ORDER BY {order_by} {direction}, s.track_id LIMIT ?"""
+    return sql, params + [-1 if limit is None else int(limit)]
+
+class SmartPlaylists:
+    """Stores smart playlist definitions and re-materializes them when the catalog changes
+
+    Each materialization is compared with the stored track set and only the
+    difference is sent to Spotify: removals, then additions appended in
+    rule order.
+    """
+    def __init__(self, catalog, spotify_client=None, user_id=None):
+        self.catalog = catalog
+        self.spotify = spotify_client
+        self.user_id = user_id
+
+    def evaluate(self, definition):
+        """Track ids matching a definition, in its order"""
+        sql, params = compile_definition(definition)
+        if any(rule.get('field') in PLAY_FIELDS for rule in definition.get('rules') or []) or definition.get('order') in PLAY_FIELDS:
+            self.catalog.update_play_counts()
+        return [row['track_id'] for row in self.catalog.query(sql, params)]
+
+    def create(self, name, definition):
+        """Store a definition and materialize it; returns (success, smart playlist id or message)"""
+        try:
+            compile_definition(definition)
+        except (ValueError, TypeError) as e:
+            return False, f"Invalid smart playlist: {str(e)}"
+
+        smart_id = self.catalog.save_smart_playlist(name, definition)
+        success, message = self.refresh(smart_id)
+        return (True, smart_id) if success else (False, message)
+
+    def update(self, smart_id, name, definition):
+        """Change a definition and re-materialize it"""
+        try:
+            compile_definition(definition)
+        except (ValueError, TypeError) as e:
+            return False, f"Invalid smart playlist: {str(e)}"
+        self.catalog.save_smart_playlist(name, definition, smart_id)
+        return self.refresh(smart_id)
+
+    def delete(self, smart_id):
+        """Stop maintaining a smart playlist"""
+        self.catalog.delete_smart_playlist(smart_id)
+
+    def get_all(self):
+        """Every stored smart playlist"""
+        return self.catalog.smart_playlists()
+
+    def refresh(self, smart_id, force=False):
+        """Re-materialize one smart playlist if the catalog changed; returns (success, message)"""
+        smart = next((item for item in self.catalog.smart_playlists() if item['id'] == smart_id), None)
+        if smart is None:
+            return False, f"No smart playlist {smart_id}"
+        return self._materialize(smart, self.catalog.fingerprint(), force)
+
+    def refresh_all(self, force=False):
+        """Re-materialize every smart playlist whose inputs changed; returns (success, message)"""
+        fingerprint = self.catalog.fingerprint()
+        results = [self._materialize(smart, fingerprint, force) for smart in self.catalog.smart_playlists()]
+        failed = [message for success, message in results if not success]
+        if failed:
+            return False, "; ".join(failed)
+        return True, f"Refreshed {len(results)} smart playlists"
+
+    def _materialize(self, smart, fingerprint, force):
+        """Evaluate, diff against the stored tracks and push the diff"""
+        if uses_relative_dates(smart['definition']):
+            # within_days windows slide even when the catalog doesn't change, so re-evaluate daily
+            fingerprint = f"{fingerprint}:{time.strftime('%Y-%m-%d', time.gmtime())}"
+        # Without a Spotify playlist yet there's still something to push
+        if not force and smart['fingerprint'] == fingerprint and (smart['spotify_id'] or not self.spotify):
+            return True, f"{smart['name']} is up to date"
+
+        try:
+            start = time.perf_counter()
+            track_ids = self.evaluate(smart['definition'])
+            current = self.catalog.smart_playlist_tracks(smart['id'])
+            spotify_id = smart['spotify_id']
+            if self.spotify and not spotify_id:
+                playlist = self.spotify.user_playlist_create(
+                    user=self.user_id,
+                    name=smart['name'],
+                    public=True,
+                    description="Smart playlist from MoodySongs App"
+                )
+                spotify_id = playlist['id']
+                # A new playlist gets everything, whatever was materialized locally before
+                self.catalog.update_smart_playlist_tracks(smart['id'], [], current, None, spotify_id)
+                current = set()
+
+            wanted = set(track_ids)
+            added = [track_id for track_id in track_ids if track_id not in current]
+            removed = [track_id for track_id in current if track_id not in wanted]
+
+            # Each batch is recorded once Spotify accepted it, so a failed refresh resumes without duplicates
+            for batch in chunked(removed, ADD_BATCH):
+                if self.spotify:
+                    self.spotify.playlist_remove_all_occurrences_of_items(spotify_id, batch)
+                self.catalog.update_smart_playlist_tracks(smart['id'], [], batch, None, spotify_id)
+            for batch in chunked(added, ADD_BATCH):
+                if self.spotify:
+                    self.spotify.playlist_add_items(spotify_id, batch)
+                self.catalog.update_smart_playlist_tracks(smart['id'], batch, [], None, spotify_id)
+            self.catalog.update_smart_playlist_tracks(smart['id'], [], [], fingerprint, spotify_id)
+
+            elapsed = time.perf_counter() - start
+            return True, f"{smart['name']}: +{len(added)} -{len(removed)} tracks ({elapsed * 1000:.0f} ms)"
+        except Exception as e:
+            print(f"Error refreshing smart playlist {smart['name']}: {e}")
+            return False, f"Failed to refresh {smart['name']}: {str(e)}"
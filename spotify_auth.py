@@ -2,6 +2,7 @@ import os
 import json
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
+from http_pool import http_pool, HOST_CLASSES
 
 class SpotifyAuthManager:
     def __init__(self):
@@ -11,6 +12,8 @@ class SpotifyAuthManager:
         self.scope = "user-library-read user-top-read playlist-modify-public user-read-recently-played"
         self.spotify = None
         self.user = None
+        self.access_token = None  # Saved token, when not using SpotifyOAuth
+        self.oauth = None  # SpotifyOAuth manager, which refreshes its own token
         
         # Try to load credentials from config file
         self.load_credentials()
@@ -54,7 +57,12 @@ class SpotifyAuthManager:
                     tokens = json.load(f)
                     access_token = tokens.get("access_token")
                     if access_token:
-                        self.spotify = spotipy.Spotify(auth=access_token)
+                        self.access_token = access_token
+                        self.spotify = spotipy.Spotify(
+                            auth=access_token,
+                            requests_session=http_pool.session("api"),
+                            requests_timeout=HOST_CLASSES['api']['timeout']
+                        )
                         self.user = self.spotify.current_user()
                         return True, "Authentication successful using saved token"
             
@@ -64,10 +72,16 @@ class SpotifyAuthManager:
                 client_secret=self.client_secret,
                 redirect_uri="http://127.0.0.1:8888/callback",  # Use exact URI from Spotify Dashboard
                 scope=self.scope,
-                open_browser=False  # Don't open browser automatically
+                open_browser=False,  # Don't open browser automatically
+                requests_session=http_pool.session("api")
             )
             
-            self.spotify = spotipy.Spotify(auth_manager=auth_manager)
+            self.oauth = auth_manager
+            self.spotify = spotipy.Spotify(
+                auth_manager=auth_manager,
+                requests_session=http_pool.session("api"),
+                requests_timeout=HOST_CLASSES['api']['timeout']
+            )
             self.user = self.spotify.current_user()
             return True, "Authentication successful"
         except Exception as e:
@@ -75,10 +89,54 @@ class SpotifyAuthManager:
             print("Please run spotify_simple_auth.py first to authenticate")
             return False, f"Authentication failed: {str(e)}"
     
+    def get_cached_client(self):
+        """Build a client from a saved token without logging in or calling Spotify; None if there is no token"""
+        try:
+            if os.path.exists(".spotify_tokens"):
+                with open(".spotify_tokens", "r") as f:
+                    access_token = json.load(f).get("access_token")
+                if access_token:
+                    self.access_token = access_token
+                    self.spotify = spotipy.Spotify(
+                        auth=access_token,
+                        requests_session=http_pool.session("api"),
+                        requests_timeout=HOST_CLASSES['api']['timeout']
+                    )
+                    return self.spotify
+            
+            if self.client_id and self.client_secret:
+                auth_manager = SpotifyOAuth(
+                    client_id=self.client_id,
+                    client_secret=self.client_secret,
+                    redirect_uri=self.redirect_uri,
+                    scope=self.scope,
+                    open_browser=False,
+                    requests_session=http_pool.session("api")
+                )
+                # Without a cached token spotipy would prompt for a new login
+                if auth_manager.cache_handler.get_cached_token():
+                    self.oauth = auth_manager
+                    self.spotify = spotipy.Spotify(
+                        auth_manager=auth_manager,
+                        requests_session=http_pool.session("api"),
+                        requests_timeout=HOST_CLASSES['api']['timeout']
+                    )
+                    return self.spotify
+        except Exception as e:
+            print(f"Error loading saved token: {e}")
+        self.spotify = None  # Drop any client left by a failed login, which could prompt when used
+        return None
+    
     def get_spotify_client(self):
         """Get authenticated Spotify client"""
         return self.spotify
     
+    def get_access_token(self):
+        """Get a current access token for clients other than spotipy"""
+        if self.oauth:
+            return self.oauth.get_access_token(as_dict=False)
+        return self.access_token
+    
     def get_current_user(self):
         """Get current user information"""
         return self.user
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""
+Event-loop stall detection for the Tk main thread
+"""
+import os
+import sys
+import json
+import time
+import threading
+import traceback
+from collections import deque, Counter
+
+# Upper bounds (ms) of the stall histogram buckets; the last bucket is open-ended
+STALL_BUCKETS_MS = [100, 250, 500, 1000, 2500, 5000]
+STACK_DEPTH = 8  # Innermost frames kept per stack sample
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def summarize_stack(frame, depth=STACK_DEPTH):
+    """Summarise a frame's stack as ('file:line function', ...) plus the innermost entry from the app's own code"""
+    entries = traceback.extract_stack(frame)[-depth:]
+    stack = tuple(f"{os.path.basename(e.filename)}:{e.lineno} {e.name}" for e in entries)
+
+    offender = stack[-1] if stack else "unknown"
+    for entry, label in zip(reversed(entries), reversed(stack)):
+        filename = os.path.abspath(entry.filename)
+        if filename.startswith(APP_DIR) and "site-packages" not in filename:
+            offender = label
+            break
+    return stack, offender
+
+class StallDetector:
+    """Heartbeat on the Tk loop plus a watchdog thread that samples the main thread's stack while it is blocked"""
+    def __init__(self, root, interval_ms=50, threshold_ms=200, sample_interval=0.05, max_records=200):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.threshold_ms = threshold_ms
+        self.sample_interval = sample_interval
+        self.main_thread_id = threading.get_ident()  # Must be created on the Tk thread
+        self.records = deque(maxlen=max_records)  # Most recent stalls
+        self.histogram = {bucket: 0 for bucket in STALL_BUCKETS_MS + [None]}
+        self.offenders = {}  # Innermost app frame -> {count, total_ms, max_ms, stack}
+        self.running = False
+        self._last_beat = time.monotonic()
+        self._samples = []  # (stack, app frame) sampled during the current stall
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._after_id = None
+
+    def start(self):
+        """Start the heartbeat and the watchdog thread"""
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self._last_beat = time.monotonic()
+        self._after_id = self.root.after(self.interval_ms, self._heartbeat)
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the heartbeat and the watchdog thread"""
+        self.running = False
+        self._stop.set()
+        if self._after_id:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _heartbeat(self):
+        """Runs on the Tk thread; a late beat means the loop was blocked"""
+        now = time.monotonic()
+        lateness_ms = (now - self._last_beat) * 1000 - self.interval_ms
+        with self._lock:
+            self._last_beat = now
+            samples, self._samples = self._samples, []
+        if lateness_ms >= self.threshold_ms:
+            self._record(lateness_ms, samples)
+        if self.running:
+            self._after_id = self.root.after(self.interval_ms, self._heartbeat)
+
+    def _watch(self):
+        """Runs on a helper thread; samples the main thread's stack while beats are overdue"""
+        while not self._stop.wait(self.sample_interval):
+            with self._lock:
+                overdue_ms = (time.monotonic() - self._last_beat) * 1000 - self.interval_ms
+            if overdue_ms < self.threshold_ms:
+                continue
+            frame = sys._current_frames().get(self.main_thread_id)
+            if frame is None:
+                continue
+            sample = summarize_stack(frame)
+            with self._lock:
+                self._samples.append(sample)
+            del frame
+
+    def _record(self, duration_ms, samples):
+        """Store one stall with its most frequently sampled stack"""
+        for bucket in STALL_BUCKETS_MS:
+            if duration_ms <= bucket:
+                self.histogram[bucket] += 1
+                break
+        else:
+            self.histogram[None] += 1
+
+        stack, offender = (), "unknown (not sampled)"
+        if samples:
+            (stack, offender), _ = Counter(samples).most_common(1)[0]
+
+        self.records.append({
+            'at': time.time(),
+            'duration_ms': duration_ms,
+            'offender': offender,
+            'stack': list(stack),
+            'samples': len(samples)
+        })
+
+        stats = self.offenders.setdefault(offender, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'stack': list(stack)})
+        stats['count'] += 1
+        stats['total_ms'] += duration_ms
+        if duration_ms > stats['max_ms']:
+            stats['max_ms'] = duration_ms
+            stats['stack'] = list(stack)
+
+    def report(self, top=10):
+        """Summarise stalls: count, histogram, top offenders by total blocked time and recent records"""
+        histogram = {}
+        lower = 0
+        for bucket in STALL_BUCKETS_MS:
+            histogram[f"{lower}-{bucket}ms"] = self.histogram[bucket]
+            lower = bucket
+        histogram[f">{lower}ms"] = self.histogram[None]
+
+        offenders = sorted(self.offenders.items(), key=lambda item: item[1]['total_ms'], reverse=True)[:top]
+        return {
+            'threshold_ms': self.threshold_ms,
+            'stalls': sum(self.histogram.values()),
+            'max_ms': max((r['duration_ms'] for r in self.records), default=0.0),
+            'histogram': histogram,
+            'top_offenders': [dict(stats, offender=name) for name, stats in offenders],
+            'recent': list(self.records)
+        }
+
+    def write_report(self, path):
+        """Save the stall report as JSON"""
+        try:
+            with open(path, "w") as f:
+                json.dump(self.report(), f, indent=2)
+            return True, f"Stall report saved to {path}"
+        except Exception as e:
+            print(f"Error writing stall report: {e}")
+            return False, f"Failed to write stall report: {str(e)}"
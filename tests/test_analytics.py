@@ -0,0 +1,63 @@
+"""
+Library dataset and audio feature tables of MusicAnalytics
+"""
+from matplotlib.figure import Figure
+from analytics import MusicAnalytics, plot_listening_heatmap, plot_mood_clusters
+from catalog import MusicCatalog
+from fake_spotify import FakeSpotify
+from library_sync import LibrarySync
+from report_engine import listening_heatmap, mood_clusters
+
+def test_library_dataset_fetches_only_missing_artists(tmp_path):
+    spotify = FakeSpotify(n_tracks=200)
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    analytics = MusicAnalytics(spotify, catalog=catalog)
+
+    first = analytics.get_library_dataset()
+    fetched = spotify.calls.get("artists", 0)
+    assert fetched > 0
+    second = analytics.get_library_dataset()
+    assert spotify.calls.get("artists", 0) == fetched
+    # Stored artists come back in the same order, so the dataset (and its report cache key) is unchanged
+    assert second['version'] == first['version']
+
+def test_audio_features_matched_by_id():
+    spotify = FakeSpotify(n_tracks=20)
+    top_tracks = spotify.current_user_top_tracks(limit=3)
+    ids = [track['id'] for track in top_tracks['items']]
+    # The first track has no features and the rest come back out of order
+    features = [None, spotify.features_by_id[ids[2]], spotify.features_by_id[ids[1]]]
+    analytics = MusicAnalytics(spotify)
+    analytics.prefetched['top_tracks'] = (top_tracks, features)
+
+    df = analytics.get_audio_features_data()
+    assert list(df['name']) == [top_tracks['items'][1]['name'], top_tracks['items'][2]['name']]
+    assert df['energy'].iloc[0] == spotify.features_by_id[ids[1]]['energy']
+
+def test_library_dataset_does_not_sync(tmp_path):
+    spotify = FakeSpotify(n_tracks=200)
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    library = LibrarySync(spotify, catalog)
+    analytics = MusicAnalytics(spotify, catalog=catalog, library=library)
+
+    # Nothing synced yet, so the dataset is empty and Spotify's saved tracks are never read
+    assert analytics.get_library_dataset()['features'].shape[0] == 0
+    assert spotify.calls.get("current_user_saved_tracks", 0) == 0
+
+    library.sync()
+    assert analytics.get_library_dataset()['features'].shape[0] > 0
+
+def test_chart_data_and_report_plots(tmp_path):
+    spotify = FakeSpotify(n_tracks=200)
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    analytics = MusicAnalytics(spotify, catalog=catalog)
+
+    assert analytics.load_chart_data("genres")
+    df, level, rolled_up = analytics.load_chart_data("listening")
+    assert level == "day" and rolled_up and df['count'].sum() > 0
+
+    dataset = analytics.get_library_dataset()
+    for plot, report in ((plot_listening_heatmap, listening_heatmap), (plot_mood_clusters, mood_clusters)):
+        fig = Figure()
+        plot(fig.add_subplot(), report(dataset))
+        fig.canvas.draw()
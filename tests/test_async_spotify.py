@@ -0,0 +1,71 @@
+"""
+Token handling, tracing and offline caching of the AsyncSpotify facade
+"""
+import asyncio
+import threading
+import time
+from async_spotify import AsyncSpotify
+from catalog import MusicCatalog
+from offline import ResilientSpotify, UnreachableSpotify
+from tracing import Tracer
+
+def test_token_refresh_runs_off_the_event_loop():
+    calls = []
+
+    def slow_token():
+        calls.append(threading.current_thread())
+        time.sleep(0.2)
+        return "token"
+
+    client = AsyncSpotify(slow_token)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        tokens = await asyncio.gather(*[client._token() for _ in range(5)])
+        task.cancel()
+        return tokens, threading.current_thread(), ticks
+
+    tokens, loop_thread, ticks = client.run(main())
+    assert tokens == ["token"] * 5
+    # Concurrent requests share one refresh, and the loop kept running while it was in flight
+    assert len(calls) == 1 and calls[0] is not loop_thread
+    assert ticks >= 5
+
+def test_reads_are_traced_cached_and_served_offline(tmp_path):
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    resilient = ResilientSpotify(UnreachableSpotify(), catalog)
+    tracer = Tracer(enabled=True)
+    client = AsyncSpotify(lambda: "token", resilient=resilient, tracer=tracer)
+    page = {'items': [{'id': "artist000001", 'name': "Artist", 'genres': ["pop"]}]}
+    reachable = True
+
+    async def fake_get(path, params=None):
+        if not reachable:
+            raise ConnectionError("offline")
+        return page
+
+    client._get = fake_get
+    try:
+        assert client.run(client.current_user_top_artists(limit=5)) == page
+        assert not resilient.offline
+
+        # The response stored on the way through is served once Spotify is unreachable
+        reachable = False
+        cached = client.run(client.current_user_top_artists(limit=5))
+        assert cached['items'] == page['items'] and cached['_stale']
+        assert resilient.offline
+        # So is the same call made through the spotipy wrapper
+        assert resilient.current_user_top_artists(limit=5)['items'] == page['items']
+    finally:
+        client.close()
+        catalog.close()
+
+    assert [span[0] for span in tracer.spans] == ["spotify.current_user_top_artists"] * 2
@@ -0,0 +1,19 @@
+"""
+Pruning of the catalog's API response cache
+"""
+import time
+from catalog import MusicCatalog
+
+def test_prune_api_cache_by_age_and_rows(tmp_path):
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    now = time.time()
+    rows = [(f"search:{i}", "{}", now - i) for i in range(10)]
+    rows += [("artist_albums:old", "[]", now - 3600), ("offline_id:offline:1", '"real"', now - 3600)]
+    catalog.executemany("INSERT INTO api_cache (cache_key, response, fetched_at) VALUES (?, ?, ?)", rows)
+
+    assert catalog.prune_api_cache(max_age=60, max_rows=4) == 7
+    keys = {row['cache_key'] for row in catalog.query("SELECT cache_key FROM api_cache")}
+    # The four newest responses and the placeholder id mapping are left
+    assert keys == {"search:0", "search:1", "search:2", "search:3", "offline_id:offline:1"}
+    assert catalog.get_cached_response("offline_id:offline:1") == ("real", now - 3600)
+    catalog.close()
@@ -0,0 +1,24 @@
+"""
+Dashboard stats
+"""
+import time
+from datetime import date
+from dashboard import local_day_start, stat_cards
+
+def test_day_starts_at_local_midnight(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        assert local_day_start(date(2024, 1, 15)) == "2024-01-15T05:00:00Z"
+        assert local_day_start(date(2024, 7, 15)) == "2024-07-15T04:00:00Z"
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+
+def test_stat_cards_show_top_artist():
+    model = {'plays_today': 1, 'top_genre': "indie rock", 'top_artist': "Some Artist", 'mood': "Happy"}
+    assert stat_cards(model) == [
+        ("Recently Played", "1 track today"), ("Top Genre", "Indie Rock"),
+        ("Top Artist", "Some Artist"), ("Mood Today", "Happy")
+    ]
+    assert [title for title, _ in stat_cards(None)] == [title for title, _ in stat_cards(model)]
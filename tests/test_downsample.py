@@ -0,0 +1,36 @@
+"""
+Downsampling of long series for charts
+"""
+import numpy as np
+from downsample import bucket_max, lttb
+
+def test_lttb_keeps_endpoints_and_one_point_per_bucket():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50)
+    sx, sy = lttb(x, y, 100)
+    assert len(sx) == len(sy) == 100
+    assert (sx[0], sx[-1]) == (0, 999)
+    assert (np.diff(sx) > 0).all()
+    # Selected points are real samples of the series
+    assert np.array_equal(sy, y[sx.astype(int)])
+
+def test_lttb_keeps_spikes():
+    x = np.arange(500, dtype=float)
+    y = np.zeros(500)
+    y[123], y[321] = 10, -7
+    sx, sy = lttb(x, y, 20)
+    assert 123 in sx and 321 in sx
+    assert sy.max() == 10 and sy.min() == -7
+
+def test_lttb_returns_short_series_unchanged():
+    x, y = [0, 1, 2, 3], [5, 6, 7, 8]
+    for threshold in (2, 4, 10):
+        sx, sy = lttb(x, y, threshold)
+        assert sx.tolist() == x and sy.tolist() == y
+
+def test_bucket_max_keeps_each_buckets_peak():
+    x = np.arange(10)
+    y = np.array([1, 5, 2, 0, 9, 3, 4, 4, 8, 7])
+    bx, by = bucket_max(x, y, 5)
+    assert bx.tolist() == [0, 2, 4, 6, 8]
+    assert by.tolist() == [5, 2, 9, 4, 8]
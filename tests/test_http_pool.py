@@ -0,0 +1,25 @@
+"""
+Pruning of the persisted media cache
+"""
+import os
+import time
+from http_pool import HttpPool
+
+def test_prune_media_cache_by_age_and_bytes(tmp_path):
+    pool = HttpPool(media_dir=str(tmp_path))
+    now = time.time()
+    for i in range(6):
+        pool._save_media(f"https://i.scdn.co/image/{i}", b"x" * 100)
+        os.utime(pool._media_path(f"https://i.scdn.co/image/{i}"), (now - i * 60, now - i * 60))
+    os.utime(pool._media_path("https://i.scdn.co/image/5"), (now - 7200, now - 7200))
+
+    # Serving a file offline marks it as recently used
+    assert pool._load_media("https://i.scdn.co/image/4").content == b"x" * 100
+
+    assert pool.prune_media_cache(max_bytes=300, max_age=3600) == 3
+    left = {url for url in (f"https://i.scdn.co/image/{i}" for i in range(6)) if os.path.exists(pool._media_path(url))}
+    assert left == {"https://i.scdn.co/image/0", "https://i.scdn.co/image/1", "https://i.scdn.co/image/4"}
+    assert pool.prune_media_cache(max_bytes=300, max_age=3600) == 0
+
+def test_prune_missing_media_dir(tmp_path):
+    assert HttpPool(media_dir=str(tmp_path / "missing")).prune_media_cache() == 0
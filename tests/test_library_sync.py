@@ -0,0 +1,61 @@
+"""
+Incremental vs full sync of the saved-tracks library
+"""
+import pytest
+from catalog import MusicCatalog
+from fake_spotify import FakeSpotify
+from library_sync import LibrarySync
+
+@pytest.fixture
+def synced(tmp_path):
+    """A 200 track fake library, already synced once, and its LibrarySync"""
+    fake = FakeSpotify(n_tracks=250)
+    hidden = fake.saved[200:]  # Tracks the user saves later
+    del fake.saved[200:]
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    library = LibrarySync(fake, catalog)
+    success, _ = library.sync()
+    assert success and catalog.saved_count() == 200
+    fake.calls.clear()
+    yield fake, catalog, library, hidden
+    catalog.close()
+
+def test_unchanged_library_reads_one_page(synced):
+    fake, catalog, library, _ = synced
+    assert library.sync()[0]
+    assert fake.calls == {'current_user_saved_tracks': 1}
+    assert library.requests == 1
+
+def test_new_saves_are_fetched_incrementally(synced):
+    fake, catalog, library, hidden = synced
+    fake.saved[:0] = [dict(item, added_at="2100-01-01T00:00:00Z") for item in hidden[:3]]
+    success, message = library.sync()
+    assert success and "3 added, 0 removed" in message
+    assert catalog.saved_count() == 203
+    # One page of saves plus the features and artists of the new tracks; no full pass
+    assert fake.calls['current_user_saved_tracks'] == 1
+
+def test_unsave_triggers_a_full_resync(synced):
+    fake, catalog, library, hidden = synced
+    removed = fake.saved.pop(50)['track']['id']
+    fake.saved.insert(0, dict(hidden[0], added_at="2100-01-01T00:00:00Z"))
+    success, message = library.sync()
+    assert success and "1 added, 1 removed" in message
+    assert catalog.saved_count() == 200
+    assert removed not in catalog.known_saved([removed])
+    # The incremental page found the counts disagreeing, then every page was read
+    assert fake.calls['current_user_saved_tracks'] == 1 + 4
+
+def test_resave_with_new_date_updates_added_at(synced):
+    fake, catalog, library, _ = synced
+    item = fake.saved.pop(120)
+    fake.saved.insert(0, dict(item, added_at="2100-01-01T00:00:00Z"))
+    success, message = library.sync()
+    assert success and "0 added, 0 removed" in message
+    assert catalog.known_saved([item['track']['id']]) == {item['track']['id']: "2100-01-01T00:00:00Z"}
+    assert fake.calls['current_user_saved_tracks'] == 1
+
+def test_full_sync_reads_every_page(synced):
+    fake, catalog, library, _ = synced
+    assert library.sync(full=True)[0]
+    assert fake.calls['current_user_saved_tracks'] == 4
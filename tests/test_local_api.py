@@ -0,0 +1,32 @@
+"""
+Response cache of the local API
+"""
+import asyncio
+from aiohttp.test_utils import TestClient, TestServer
+from catalog import MusicCatalog
+from fake_spotify import FakeSpotify
+from local_api import LocalAPI
+
+def test_cache_ignores_api_cache_and_pending_writes(tmp_path):
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    tracks = [item['track'] for item in FakeSpotify(n_tracks=5).current_user_saved_tracks(limit=5)['items']]
+    catalog.upsert_tracks(tracks)
+    api = LocalAPI(catalog)
+
+    async def run():
+        async with TestClient(TestServer(api.make_app())) as client:
+            first = await client.get("/api/playlists")
+            # Offline cache and queued writes don't touch anything the API serves
+            catalog.cache_response("search:abc", {'tracks': []})
+            catalog.queue_op("playlist_add_items", ["p1", ["t1"]], {})
+            await client.get("/api/playlists")
+            assert (api.hits, api.misses) == (1, 1)
+
+            catalog.save_playlist("p1", "Mix", "snap1", [track['id'] for track in tracks])
+            second = await client.get("/api/playlists")
+            assert api.misses == 2
+            assert (await second.json())['items'][0]['tracks'] == 5
+            assert first.headers['ETag'] != second.headers['ETag']
+
+    asyncio.run(run())
+    catalog.close()
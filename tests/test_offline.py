@@ -0,0 +1,61 @@
+"""
+Queued offline writes and their replay
+"""
+from catalog import MusicCatalog
+from fake_spotify import FakeSpotify
+from offline import ResilientSpotify
+
+class FlakySpotify(FakeSpotify):
+    """Fake client whose calls fail like a dropped network while down is set"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.down = False
+
+    def _call(self, name):
+        if self.down:
+            raise ConnectionError(f"Spotify is unreachable ({name})")
+        super()._call(name)
+
+def test_replay_resolves_placeholder_playlist_ids(tmp_path):
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    fake = FlakySpotify(n_tracks=10)
+    spotify = ResilientSpotify(fake, catalog)
+    track_ids = [track['id'] for track in fake.tracks[:3]]
+
+    fake.down = True
+    playlist = spotify.user_playlist_create("fake_user", "Made offline")
+    assert playlist['_queued'] and playlist['id'] == "offline:1"
+    spotify.playlist_add_items(playlist['id'], track_ids)
+    spotify.playlist_add_items(playlist['id'], [fake.tracks[5]['id']])
+    assert spotify.offline and spotify.pending_count() == 3
+
+    # Still down: nothing is lost
+    assert spotify.replay_pending() == (0, 3)
+
+    fake.down = False
+    assert spotify.replay_pending() == (3, 0)
+    assert not spotify.offline and spotify.pending_count() == 0
+    real_id = catalog.get_cached_response("offline_id:offline:1")[0]
+    assert real_id in fake.playlists and real_id != "offline:1"
+    assert [item['track']['id'] for item in fake.playlists[real_id]['items']] == track_ids + [fake.tracks[5]['id']]
+
+    # Later writes naming the placeholder still reach the real playlist
+    spotify.playlist_remove_all_occurrences_of_items("offline:1", [track_ids[0]])
+    assert len(fake.playlists[real_id]['items']) == 3
+    catalog.close()
+
+def test_replay_drops_writes_spotify_rejects(tmp_path):
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    fake = FlakySpotify(n_tracks=10)
+    spotify = ResilientSpotify(fake, catalog)
+
+    fake.down = True
+    spotify.playlist_add_items("no_such_playlist", [fake.tracks[0]['id']])
+    spotify.user_playlist_create("fake_user", "Kept")
+    fake.down = False
+
+    # The unknown playlist fails without a network error, so it must not block the playlist queued after it
+    assert spotify.replay_pending() == (2, 0)
+    assert catalog.get_cached_response("offline_id:offline:1") is None
+    assert catalog.get_cached_response("offline_id:offline:2")[0] in fake.playlists
+    catalog.close()
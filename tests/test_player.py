@@ -0,0 +1,122 @@
+"""
+Low-latency (crossfade + level matching) entry points, queue start-up and temp file pruning of MusicPlayer
+"""
+import os
+import glob
+import time
+import threading
+import requests
+import pytest
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import player
+from player import MusicPlayer
+from play_queue import REPEAT_ALL
+from track_model import Track
+
+SAMPLE_TRACKS = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "sample_tracks", "*.mp3")))
+
+@pytest.fixture
+def low_latency_player(monkeypatch):
+    """Low-latency player that fails the test if it falls back to the browser"""
+    def no_browser(url):
+        raise AssertionError(f"fell back to opening {url}")
+    monkeypatch.setattr(player.webbrowser, "open", no_browser)
+    music_player = MusicPlayer(low_latency=True)
+    yield music_player
+    music_player.cleanup()
+
+@pytest.mark.skipif(not SAMPLE_TRACKS, reason="no sample tracks")
+def test_play_local_low_latency(low_latency_player):
+    success, message = low_latency_player.play_local(SAMPLE_TRACKS[0])
+    assert success, message
+    assert low_latency_player._sound_pcm is not None
+
+@pytest.mark.skipif(not SAMPLE_TRACKS, reason="no sample tracks")
+def test_play_preview_low_latency(low_latency_player, monkeypatch):
+    with open(SAMPLE_TRACKS[0], "rb") as f:
+        content = f.read()
+
+    def fake_get(url, host_class="images", use_etag=False, persist=False, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = content
+        return response
+
+    monkeypatch.setattr(player.http_pool, "get", fake_get)
+    success, message = low_latency_player.play("https://p.scdn.co/mp3-preview/test", "track000001")
+    assert success, message
+    assert message == "Playing preview"
+    assert low_latency_player._sound_pcm is not None
+
+def test_prune_keeps_preloaded_and_in_use_files(low_latency_player):
+    music_player = low_latency_player
+    downloading = music_player._write_temp_file(b"partial")
+    preloaded = music_player._write_temp_file(b"next")
+    music_player._release_temp_file(preloaded)
+    music_player._pending_preload = (music_player._generation, None, preloaded)
+    finished = music_player._write_temp_file(b"done")
+    music_player._release_temp_file(finished)
+
+    assert music_player.prune_temp_files() == 2
+    assert os.path.exists(downloading) and os.path.exists(preloaded)
+    assert not os.path.exists(finished)
+
+    music_player._release_temp_file(downloading)
+    music_player._pending_preload = None
+    assert music_player.prune_temp_files() == 0
+
+def wait_for(music_player, condition, timeout=10):
+    """Pump the player's events until condition() holds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        music_player.process_events()
+        time.sleep(0.01)
+
+@pytest.fixture
+def queue_player(monkeypatch):
+    """Streaming player that fails the test if it falls back to the browser"""
+    monkeypatch.setattr(player.webbrowser, "open", lambda url: pytest.fail(f"fell back to opening {url}"))
+    music_player = MusicPlayer()
+    yield music_player
+    music_player.cleanup()
+
+def queue_tracks(n):
+    return [Track(id=f"track{i:06d}", name=f"Track {i}", preview_url=f"https://p.scdn.co/mp3-preview/{i}") for i in range(n)]
+
+def test_queue_with_no_reachable_previews_stops_after_one_pass(queue_player, monkeypatch):
+    tried = []
+    monkeypatch.setattr(queue_player, "_download_preview", lambda url: tried.append(url))
+    errors = []
+    queue_player.on_queue_error = errors.append
+    queue_player.queue.repeat = REPEAT_ALL
+    main_thread = threading.current_thread()
+
+    success, message = queue_player.play_queue(queue_tracks(50), start_index=10)
+    # Nothing is downloaded on the calling thread
+    assert success and message == "Loading queue"
+    wait_for(queue_player, lambda: errors)
+    assert errors == ["No playable tracks left in the queue"]
+    assert len(tried) == 50 and len(set(tried)) == 50
+    assert not queue_player.queue_active and threading.current_thread() is main_thread
+
+@pytest.mark.skipif(not SAMPLE_TRACKS, reason="no sample tracks")
+def test_queue_skips_to_first_reachable_preview(queue_player, monkeypatch):
+    with open(SAMPLE_TRACKS[0], "rb") as f:
+        content = f.read()
+    tracks = queue_tracks(5)
+
+    def download(url):
+        # Only the fourth track's preview can be fetched
+        return queue_player._write_temp_file(content) if url == tracks[3].preview_url else None
+
+    monkeypatch.setattr(queue_player, "_download_preview", download)
+    started = []
+    queue_player.on_track_change = started.append
+
+    queue_player.play_queue(tracks, start_index=1)
+    wait_for(queue_player, lambda: started)
+    assert started == [tracks[3]]
+    assert queue_player.queue.current() is tracks[3]
@@ -0,0 +1,61 @@
+"""
+Playlist export and import round trips
+"""
+import os
+import pytest
+from fake_spotify import FakeSpotify
+from playlist_io import PlaylistImporter, READERS, export_playlist, format_for_path
+
+@pytest.mark.parametrize("extension", [".m3u", ".csv", ".jsonl", ".parquet"])
+def test_export_import_round_trip(tmp_path, extension):
+    fake = FakeSpotify(n_tracks=300, n_playlists=1, playlist_size=250)
+    expected = [item['track']['id'] for item in fake.playlists["playlist0000"]['items']]
+    path = str(tmp_path / f"mix{extension}")
+
+    success, message = export_playlist(fake, "playlist0000", path)
+    assert success, message
+    assert not os.path.exists(path + ".tmp")
+    rows = list(READERS[format_for_path(path)](path))
+    assert [row['id'] for row in rows] == expected
+    first = fake.tracks_by_id[expected[0]]
+    assert rows[0]['name'] == first['name'] and rows[0]['artist'] == first['artists'][0]['name']
+
+    success, message = PlaylistImporter(fake, "fake_user").import_file(path)
+    assert success and message.startswith("Imported 250 of 250 tracks")
+    imported = next(playlist for playlist in fake.playlists.values() if playlist['name'] == "mix")
+    assert [item['track']['id'] for item in imported['items']] == expected
+
+def test_failed_export_leaves_no_file(tmp_path):
+    path = str(tmp_path / "missing.csv")
+    success, message = export_playlist(FakeSpotify(n_tracks=10, n_playlists=1), "no_such_playlist", path)
+    assert not success and message.startswith("Export failed")
+    assert os.listdir(tmp_path) == []
+
+def test_rows_without_ids_are_resolved_by_search():
+    queries = []
+
+    class SearchOnly:
+        def search(self, q, limit=1, type="track"):
+            queries.append(q)
+            return {'tracks': {'items': [{'id': "found"}] if "Known" in q or "isrc:" in q else []}}
+
+    rows = [
+        {'id': "t1"},
+        {'name': "Known Song", 'artist': "Someone"},
+        {'name': "Unknown", 'isrc': "USABC1234567"},
+        {'name': "Nothing Like It"}
+    ]
+    assert PlaylistImporter(SearchOnly(), "user", workers=2).resolve(rows) == ["t1", "found", "found", None]
+    assert sorted(queries) == ["isrc:USABC1234567", 'track:"Known Song" artist:"Someone"', 'track:"Nothing Like It"']
+
+def test_m3u_without_spotify_uris(tmp_path):
+    path = tmp_path / "local.m3u"
+    path.write_text("#EXTM3U\n#EXTINF:200,Artist - Title\n/music/a.mp3\n/music/Other Song.flac\n", encoding="utf-8")
+    assert list(READERS['m3u'](str(path))) == [
+        {'artist': "Artist", 'name': "Title", 'id': None},
+        {'name': "Other Song", 'id': None}
+    ]
+
+def test_unknown_extension_is_rejected():
+    with pytest.raises(ValueError):
+        format_for_path("playlist.xspf")
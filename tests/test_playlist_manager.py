@@ -0,0 +1,28 @@
+"""
+PlaylistManager playlist rewrites against the fake Spotify client
+"""
+from fake_spotify import FakeSpotify
+from playlist_manager import PlaylistManager
+
+def playlist_ids(spotify, playlist_id):
+    return [item['track']['id'] for item in spotify.playlists[playlist_id]['items']]
+
+def test_reorder_keeps_every_track():
+    spotify = FakeSpotify(n_tracks=200, playlist_size=50)
+    before = playlist_ids(spotify, "playlist0000")
+    success, message = PlaylistManager(spotify).reorder_playlist("playlist0000", "smooth")
+    assert success, message
+    assert sorted(playlist_ids(spotify, "playlist0000")) == sorted(before)
+
+def test_reorder_refuses_playlists_with_local_files_and_episodes():
+    spotify = FakeSpotify(n_tracks=200, playlist_size=50)
+    items = spotify.playlists["playlist0000"]['items']
+    items.append({'added_at': None, 'is_local': True, 'track': {'id': None, 'name': "Local", 'type': "track", 'is_local': True}})
+    items.append({'added_at': None, 'track': {'id': "episode1", 'name': "Episode", 'type': "episode"}})
+    before = list(items)
+
+    success, message = PlaylistManager(spotify).reorder_playlist("playlist0000", "smooth")
+    assert not success
+    assert "2 items" in message
+    assert spotify.playlists["playlist0000"]['items'] == before
+    assert "playlist_replace_items" not in spotify.calls
@@ -0,0 +1,70 @@
+"""
+Playlist orderings: 2-opt path improvement and energy curves
+"""
+import numpy as np
+import pytest
+from playlist_ordering import camelot, energy_targets, greedy_path, order_curve, order_tracks, path_cost, two_opt
+
+def line_distance(positions):
+    positions = np.array(positions, dtype=np.float64)
+    return np.abs(positions[:, None] - positions[None, :])
+
+def reversal_costs(path, distance, fixed_start=True):
+    """Cost of every path one segment reversal away"""
+    for i in range(1 if fixed_start else 0, len(path) - 1):
+        for j in range(i + 2, len(path) + 1):
+            yield path_cost(np.concatenate([path[:i], path[i:j][::-1], path[j:]]), distance)
+
+def test_two_opt_untangles_a_line():
+    distance = line_distance(range(6))
+    assert two_opt([0, 3, 2, 1, 4, 5], distance).tolist() == [0, 1, 2, 3, 4, 5]
+    # The start only moves when it isn't fixed
+    assert two_opt([2, 1, 0, 3, 4, 5], distance).tolist() == [2, 1, 0, 3, 4, 5]
+    assert two_opt([2, 1, 0, 3, 4, 5], distance, fixed_start=False).tolist() == [0, 1, 2, 3, 4, 5]
+
+@pytest.mark.parametrize("fixed_start", [True, False])
+def test_two_opt_reaches_a_local_optimum(fixed_start):
+    rng = np.random.default_rng(7)
+    points = rng.random((30, 2))
+    distance = np.sqrt(((points[:, None] - points[None, :]) ** 2).sum(axis=2))
+    start = greedy_path(distance, 5)
+    path = two_opt(start, distance, time_limit=10, fixed_start=fixed_start)
+
+    assert sorted(path.tolist()) == list(range(30))
+    assert path_cost(path, distance) <= path_cost(start, distance)
+    if fixed_start:
+        assert path[0] == 5
+    assert min(reversal_costs(path, distance, fixed_start)) >= path_cost(path, distance) - 1e-9
+
+def test_camelot_pairs_relative_keys():
+    assert camelot(0, 1) == camelot(9, 0)  # C major and A minor
+    assert camelot(7, 1) == (camelot(0, 1) + 1) % 12  # G major is a fifth up
+
+def features_with_energy(energies):
+    return [{'energy': energy, 'tempo': 120, 'key': 0, 'mode': 1} for energy in energies]
+
+def test_order_curve_follows_the_target_energy():
+    energies = np.random.default_rng(3).random(40)
+    features = features_with_energy(energies)
+    for curve in ("rising", "falling", "arc"):
+        order = order_curve(features, curve, block=4)
+        assert sorted(order) == list(range(40))
+        # Every stretch of the curve holds the tracks closest to its targets
+        targets = energy_targets(40, curve)
+        for start in range(0, 40, 4):
+            stretch = sorted(energies[order[start:start + 4]])
+            wanted_rank = np.argsort(np.argsort(targets, kind="stable"), kind="stable")[start:start + 4]
+            assert stretch == sorted(np.sort(energies)[wanted_rank])
+
+    rising = energies[order_curve(features, "rising", block=1)]
+    assert (np.diff(rising) >= 0).all()
+    arc = energies[order_curve(features, "arc", block=1)]
+    assert int(arc.argmax()) == int(energy_targets(40, "arc").argmax())
+
+def test_order_tracks_keeps_tracks_without_features_at_the_end():
+    features = {'a': features_with_energy([0.9])[0], 'b': features_with_energy([0.1])[0], 'c': features_with_energy([0.5])[0]}
+    assert order_tracks(["x", "a", "b", "c", "y"], features, "rising") == ["b", "c", "a", "x", "y"]
+    assert order_tracks(["x", "a", "b"], features, "original") == ["x", "a", "b"]
+    assert sorted(order_tracks(["a", "b", "c"], features, "smooth")) == ["a", "b", "c"]
+    with pytest.raises(ValueError):
+        order_tracks(["a"], features, "shuffle")
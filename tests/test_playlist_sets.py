@@ -0,0 +1,64 @@
+"""
+Playlist set algebra and duplicate detection
+"""
+import pytest
+from catalog import MusicCatalog
+from playlist_sets import PlaylistSets, match_key
+
+@pytest.fixture
+def sets():
+    return PlaylistSets({
+        'p1': ["a", "b", "c", "a"],
+        'p2': ["b", "c", "d"],
+        'p3': ["c", "e"],
+        'empty': []
+    })
+
+def test_set_operations(sets):
+    assert sorted(sets.union("p1", "p3")) == ["a", "b", "c", "e"]
+    assert sorted(sets.intersection("p1", "p2")) == ["b", "c"]
+    assert sets.intersection("p1", "p2", "p3") == ["c"]
+    assert sorted(sets.difference("p1", "p2")) == ["a"]
+    assert sorted(sets.difference("p2", "p1", "p3")) == ["d"]
+    assert sets.union() == [] and sets.intersection() == []
+    assert sets.intersection("p1", "empty") == []
+
+def test_overlap_matrix(sets):
+    playlist_ids, overlap = sets.overlap_matrix()
+    shared = {(a, b): int(overlap[i, j]) for i, a in enumerate(playlist_ids) for j, b in enumerate(playlist_ids)}
+    # Repeats inside a playlist count once
+    assert shared[("p1", "p1")] == 3
+    assert shared[("p1", "p2")] == shared[("p2", "p1")] == 2
+    assert shared[("p2", "p3")] == 1
+    assert shared[("p3", "empty")] == 0
+
+def test_duplicates(sets):
+    report = sets.duplicates()
+    assert report['within'] == {'p1': ["a"]}
+    assert report['across'] == {'b': ["p1", "p2"], 'c': ["p1", "p2", "p3"]}
+    assert report['variants'] == []
+    assert sets.duplicates(min_playlists=3)['across'] == {'c': ["p1", "p2", "p3"]}
+
+def test_match_key_ignores_versions_and_accents():
+    assert match_key("Song (2011 Remaster)", "Beyoncé") == match_key("song", "Beyonce")
+    assert match_key("Song - Radio Edit", "Artist") == match_key("Song", "artist")
+    assert match_key("Song", "Artist", "usabc1234567") == "isrc:USABC1234567"
+    assert match_key("Song (Live)", "Artist") != match_key("Song", "Artist")
+
+def test_fuzzy_sets_from_catalog(tmp_path):
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    catalog.upsert_tracks([
+        {'id': "t1", 'name': "Song", 'artists': [{'name': "Artist"}], 'album': {}},
+        {'id': "t2", 'name': "Song - 2011 Remaster", 'artists': [{'name': "Artist"}], 'album': {}},
+        {'id': "t3", 'name': "Other", 'artists': [{'name': "Artist"}], 'album': {}}
+    ])
+    catalog.save_playlist("p1", "One", "s1", ["t1", "t3"])
+    catalog.save_playlist("p2", "Two", "s1", ["t2"])
+
+    exact = PlaylistSets.from_catalog(catalog)
+    assert exact.intersection("p1", "p2") == []
+    fuzzy = PlaylistSets.from_catalog(catalog, fuzzy=True)
+    assert fuzzy.names == {'p1': "One", 'p2': "Two"}
+    assert fuzzy.intersection("p1", "p2") == ["t1"]
+    assert fuzzy.duplicates()['variants'] == [["t1", "t2"]]
+    catalog.close()
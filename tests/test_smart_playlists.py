@@ -0,0 +1,104 @@
+"""
+Smart playlist materialization
+"""
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+import smart_playlists
+from catalog import MusicCatalog
+from fake_spotify import FakeSpotify
+from smart_playlists import SmartPlaylists, compile_definition
+
+def iso_days_ago(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def test_within_days_rules_are_reevaluated_daily(tmp_path, monkeypatch):
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    tracks = FakeSpotify(n_tracks=3).tracks
+    catalog.add_saved_tracks([{'added_at': iso_days_ago(days), 'track': track} for days, track in zip((0, 3, 10), tracks)])
+    smart = SmartPlaylists(catalog)
+    success, smart_id = smart.create("Recent", {'rules': [{'field': "added_at", 'op': "within_days", 'value': 5}]})
+    assert success
+    assert catalog.smart_playlist_tracks(smart_id) == {tracks[0]['id'], tracks[1]['id']}
+
+    # Age a track out of the window without changing the catalog fingerprint
+    catalog.execute("UPDATE saved_tracks SET added_at = ? WHERE track_id = ?", (iso_days_ago(8), tracks[1]['id']))
+    assert smart.refresh(smart_id) == (True, "Recent is up to date")
+
+    tomorrow = time.gmtime(time.time() + 24 * 3600)
+    monkeypatch.setattr(smart_playlists.time, "gmtime", lambda *args: tomorrow)
+    success, message = smart.refresh(smart_id)
+    assert success and "-1 tracks" in message
+    assert catalog.smart_playlist_tracks(smart_id) == {tracks[0]['id']}
+    catalog.close()
+
+def test_definitions_without_relative_dates_keep_the_catalog_fingerprint(tmp_path, monkeypatch):
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    catalog.add_saved_tracks([{'added_at': iso_days_ago(1), 'track': track} for track in FakeSpotify(n_tracks=3).tracks])
+    smart = SmartPlaylists(catalog)
+    _, smart_id = smart.create("Everything", {'rules': [], 'order': "name"})
+
+    tomorrow = time.gmtime(time.time() + 24 * 3600)
+    monkeypatch.setattr(smart_playlists.time, "gmtime", lambda *args: tomorrow)
+    assert smart.refresh(smart_id) == (True, "Everything is up to date")
+    catalog.close()
+
+def rule_catalog(tmp_path):
+    """Three saved tracks: t1 (indie rock, energetic, new, 3 plays), t2 (shoegaze), t3 (no genres, old, 1 play)"""
+    catalog = MusicCatalog(str(tmp_path / "catalog.db"))
+    artists = [("a1", "Artist A", ["indie rock"]), ("b1", "Artist B", ["shoegaze"]), ("c1", "Artist C", [])]
+    catalog.upsert_artists([{'id': artist_id, 'name': name, 'genres': genres} for artist_id, name, genres in artists])
+    items = []
+    for number, ((artist_id, name, _), days) in enumerate(zip(artists, (1, 10, 30)), 1):
+        track = {'id': f"t{number}", 'name': f"Track {number}", 'artists': [{'id': artist_id, 'name': name}], 'album': {}}
+        items.append({'added_at': iso_days_ago(days), 'track': track})
+    catalog.add_saved_tracks(items)
+    catalog.save_audio_features([
+        {'id': track_id, 'energy': energy, 'valence': 0.5} for track_id, energy in (("t1", 0.9), ("t2", 0.5), ("t3", 0.2))
+    ])
+    plays = ["t1", "t1", "t1", "t3"]
+    catalog.record_plays([
+        {'played_at': iso_days_ago(i / 24), 'track': items[int(track_id[1]) - 1]['track']} for i, track_id in enumerate(plays)
+    ])
+    return catalog
+
+@pytest.mark.parametrize("rule, expected", [
+    ({'field': "energy", 'op': "between", 'value': [0.4, 1.0]}, {"t1", "t2"}),
+    ({'field': "energy", 'op': "<", 'value': 0.5}, {"t3"}),
+    ({'field': "genre", 'op': "in", 'value': ["Indie Rock"]}, {"t1"}),
+    ({'field': "genre", 'op': "contains", 'value': "gaze"}, {"t2"}),
+    ({'field': "genre", 'op': "not_in", 'value': ["indie rock"]}, {"t2", "t3"}),
+    ({'field': "artist", 'op': "in", 'value': ["artist a", "b1"]}, {"t1", "t2"}),
+    ({'field': "artist", 'op': "not_in", 'value': ["Artist A"]}, {"t2", "t3"}),
+    ({'field': "artist", 'op': "contains", 'value': "c"}, {"t3"}),
+    ({'field': "plays", 'op': ">=", 'value': 1}, {"t1", "t3"}),
+    ({'field': "plays", 'op': "=", 'value': 0}, {"t2"}),
+    ({'field': "added_at", 'op': "within_days", 'value': 5}, {"t1"}),
+    ({'field': "added_at", 'op': "before", 'value': iso_days_ago(20)}, {"t3"}),
+    ({'field': "last_played", 'op': "after", 'value': iso_days_ago(1 / 48)}, {"t1"}),
+])
+def test_compiled_rules_select_matching_tracks(tmp_path, rule, expected):
+    catalog = rule_catalog(tmp_path)
+    assert set(SmartPlaylists(catalog).evaluate({'rules': [rule]})) == expected
+    catalog.close()
+
+def test_match_any_order_and_limit(tmp_path):
+    catalog = rule_catalog(tmp_path)
+    smart = SmartPlaylists(catalog)
+    rules = [{'field': "energy", 'op': ">", 'value': 0.8}, {'field': "genre", 'op': "in", 'value': ["shoegaze"]}]
+    assert set(smart.evaluate({'match': "any", 'rules': rules})) == {"t1", "t2"}
+    assert smart.evaluate({'match': "all", 'rules': rules}) == []
+    assert smart.evaluate({'rules': [], 'order': "energy", 'descending': False, 'limit': 2}) == ["t3", "t2"]
+    assert smart.evaluate({'rules': [], 'order': "added_at"}) == ["t1", "t2", "t3"]
+    catalog.close()
+
+@pytest.mark.parametrize("definition", [
+    {'rules': [{'field': "colour", 'op': "=", 'value': 1}]},
+    {'rules': [{'field': "genre", 'op': ">", 'value': ["rock"]}]},
+    {'rules': [{'field': "artist", 'op': "between", 'value': [1, 2]}]},
+    {'rules': [{'field': "energy", 'op': "like", 'value': 1}]},
+    {'rules': [], 'order': "genre"},
+])
+def test_invalid_definitions_are_rejected(definition):
+    with pytest.raises(ValueError):
+        compile_definition(definition)
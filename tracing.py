@@ -0,0 +1,150 @@
+"""
+Lightweight span tracing with a ring buffer of recent spans and Chrome trace export
+"""
+import os
+import json
+import time
+import functools
+import threading
+from collections import deque
+
+DEFAULT_CAPACITY = 5000
+
+def percentile(values, fraction):
+    """Get a percentile from a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+class _NullSpan:
+    """Span used while tracing is disabled; does nothing"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    __slots__ = ("tracer", "name", "category", "start")
+
+    def __init__(self, tracer, name, category):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, self.category, self.start, time.perf_counter())
+        return False
+
+class Tracer:
+    def __init__(self, capacity=DEFAULT_CAPACITY, enabled=False):
+        self.enabled = enabled
+        # Each span is (name, category, start, end, thread id); old spans fall off the end
+        self.spans = deque(maxlen=capacity)
+        self._origin = time.perf_counter()
+
+    def span(self, name, category="app"):
+        """Context manager timing a block; a shared no-op object while disabled"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category)
+
+    def record(self, name, category, start, end):
+        """Store a finished span (deque appends are thread-safe)"""
+        self.spans.append((name, category, start, end, threading.get_ident()))
+
+    def traced(self, name=None, category="app"):
+        """Decorator wrapping a function in a span"""
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(span_name, category, start, time.perf_counter())
+            return wrapper
+        return decorator
+
+    def summary(self):
+        """Get count, p50, p95 and total milliseconds per span name, slowest p95 first"""
+        durations = {}
+        for name, category, start, end, _ in list(self.spans):
+            durations.setdefault(name, []).append((end - start) * 1000)
+
+        stats = {
+            name: {
+                'count': len(values),
+                'p50_ms': percentile(values, 0.5),
+                'p95_ms': percentile(values, 0.95),
+                'total_ms': sum(values)
+            }
+            for name, values in durations.items()
+        }
+        return dict(sorted(stats.items(), key=lambda item: item[1]['p95_ms'], reverse=True))
+
+    def chrome_trace(self):
+        """Convert the buffered spans to Chrome trace event format"""
+        pid = os.getpid()
+        events = [
+            {
+                'name': name,
+                'cat': category,
+                'ph': "X",
+                'ts': (start - self._origin) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': pid,
+                'tid': thread_id
+            }
+            for name, category, start, end, thread_id in list(self.spans)
+        ]
+        return {'traceEvents': events, 'displayTimeUnit': "ms"}
+
+    def export_chrome_trace(self, path):
+        """Write the buffered spans as a Chrome trace file (open in chrome://tracing or Perfetto)"""
+        try:
+            with open(path, "w") as f:
+                json.dump(self.chrome_trace(), f)
+            return True, f"Trace saved to {path}"
+        except Exception as e:
+            print(f"Error exporting trace: {e}")
+            return False, f"Failed to export trace: {str(e)}"
+
+    def clear(self):
+        """Drop all buffered spans"""
+        self.spans.clear()
+
+class TracedSpotify:
+    """Proxy for a spotipy client that wraps every API method call in a span"""
+    def __init__(self, client, tracer):
+        self._client = client
+        self._tracer = tracer
+
+    def __getattr__(self, attr):
+        value = getattr(self._client, attr)
+        if not self._tracer.enabled or not callable(value):
+            return value
+
+        tracer = self._tracer
+        name = f"spotify.{attr}"
+
+        def call(*args, **kwargs):
+            with tracer.span(name, "spotify"):
+                return value(*args, **kwargs)
+        return call
+
+# Shared tracer used across the app
+tracer = Tracer()
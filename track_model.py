@@ -0,0 +1,88 @@
+"""
+Compact track records, built once from spotipy responses and used by views, the queue and analytics
+"""
+import sys
+
+TRACK_FIELDS = (
+    "id", "name", "artist", "artist_id", "album", "image_url",
+    "duration_ms", "preview_url", "isrc", "local_path"
+)
+
+def intern_text(value):
+    """Share one copy of strings that repeat across tracks (artist and album names, ids)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class Track:
+    """The track fields the app uses, in a __slots__ record instead of the nested API JSON"""
+    __slots__ = TRACK_FIELDS
+
+    def __init__(self, id=None, name="", artist=None, artist_id=None, album=None, image_url=None,
+                 duration_ms=None, preview_url=None, isrc=None, local_path=None):
+        self.id = id
+        self.name = name
+        self.artist = intern_text(artist)
+        self.artist_id = intern_text(artist_id)
+        self.album = intern_text(album)
+        self.image_url = image_url
+        self.duration_ms = duration_ms
+        self.preview_url = preview_url
+        self.isrc = isrc
+        self.local_path = local_path
+
+    @classmethod
+    def from_spotify(cls, track):
+        """Build from a spotipy track dict (or a catalog track dict)"""
+        artists = track.get('artists') or []
+        album = track.get('album') or {}
+        images = album.get('images') or []
+        return cls(
+            id=track.get('id'),
+            name=track.get('name') or "",
+            artist=artists[0].get('name') if artists else None,
+            artist_id=artists[0].get('id') if artists else None,
+            album=album.get('name'),
+            image_url=images[-1]['url'] if images else None,  # Smallest image; rows only show thumbnails
+            duration_ms=track.get('duration_ms'),
+            preview_url=track.get('preview_url'),
+            isrc=(track.get('external_ids') or {}).get('isrc'),
+            local_path=track.get('local_path')
+        )
+
+    @property
+    def artist_name(self):
+        """Artist name for display"""
+        return self.artist or "Unknown Artist"
+
+    @property
+    def playable(self):
+        """Whether the player has audio for this track"""
+        return bool(self.preview_url or self.local_path)
+
+    def to_spotify(self):
+        """Minimal spotipy-style dict, for code that stores or sends track dicts"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'artists': [{'id': self.artist_id, 'name': self.artist}] if self.artist else [],
+            'album': {'name': self.album, 'images': [{'url': self.image_url}] if self.image_url else []},
+            'duration_ms': self.duration_ms,
+            'preview_url': self.preview_url,
+            'external_ids': {'isrc': self.isrc} if self.isrc else {}
+        }
+
+    def __repr__(self):
+        return f"Track({self.id!r}, {self.name!r}, {self.artist!r})"
+
+def tracks_from_spotify(items):
+    """Build Tracks from a list of track dicts or saved/playlist items ({'track': {...}}), skipping gaps"""
+    tracks = []
+    for item in items:
+        if item and isinstance(item.get('track'), dict):
+            item = item['track']
+        if item and item.get('type', "track") == "track" and 'name' in item:
+            tracks.append(Track.from_spotify(item))
+    return tracks
+
+def track_columns(tracks, fields=TRACK_FIELDS):
+    """Field name -> list of values, for building a DataFrame in one call"""
+    return {field: [getattr(track, field) for track in tracks] for field in fields}
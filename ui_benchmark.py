@@ -0,0 +1,869 @@
+"""
+UI performance benchmarks for the Music Playlist Interface views
+
+Views are driven headlessly (under Xvfb when there is no display) against a
+deterministic fake Spotify client, so runs are comparable between commits:
+
+    python ui_benchmark.py run --sizes 10 100 1000 10000 --out report.json
+    python ui_benchmark.py compare baseline.json report.json
+    python ui_benchmark.py navigation
+    python ui_benchmark.py charts --points 20000
+    python ui_benchmark.py reports --size 20000
+    python ui_benchmark.py memory --size 10000
+    python ui_benchmark.py sets --playlists 100 --size 1000
+    python ui_benchmark.py soak --rounds 300
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from tracing import percentile
+
+NAVIGATION_VIEWS = ["dashboard", "search", "recommendations", "playlists", "analytics"]
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+XVFB_DISPLAY = ":99"
+
+# Soak runs fail when RSS grows more than this over their second half (after warm-up)
+SOAK_RSS_TOLERANCE = 16 * 1024 * 1024
+SOAK_SAMPLES = 10
+
+# A metric only counts as a regression when it grows by both the relative tolerance and this amount
+REGRESSION_TOLERANCE = 0.25
+MIN_REGRESSION_DELTA = {
+    'build_ms': 5.0,
+    'stall_ms': 10.0,
+    'peak_rss_kb': 10 * 1024,
+    'widgets': 10
+}
+
+def time_call(app, func, *args):
+    """Run a UI call, let Tk finish its layout work, and return the elapsed milliseconds"""
+    start = time.perf_counter()
+    func(*args)
+    app.update_idletasks()
+    return (time.perf_counter() - start) * 1000
+
+def benchmark_navigation(app, rounds=20, views=NAVIGATION_VIEWS):
+    """Switch between views repeatedly and time each switch"""
+    # The first visit builds the view; later visits should only swap frames
+    first_visit = {name: time_call(app, app.show_view, name) for name in views}
+
+    timings = {name: [] for name in views}
+    for _ in range(rounds):
+        for name in views:
+            timings[name].append(time_call(app, app.show_view, name))
+
+    return {
+        name: {
+            'first_ms': first_visit[name],
+            'mean_ms': statistics.mean(timings[name]),
+            'p95_ms': percentile(timings[name], 0.95),
+            'max_ms': max(timings[name])
+        }
+        for name in views
+    }
+
+def print_navigation_report(results):
+    """Print navigation timings as a table"""
+    print(f"{'view':<18}{'first':>10}{'mean':>10}{'p95':>10}{'max':>10}")
+    for name, stats in results.items():
+        print(f"{name:<18}{stats['first_ms']:>9.1f}ms{stats['mean_ms']:>8.2f}ms"
+              f"{stats['p95_ms']:>8.2f}ms{stats['max_ms']:>8.2f}ms")
+
+def ensure_display():
+    """Start Xvfb if there is no display; returns the Xvfb process or None"""
+    if os.environ.get("DISPLAY"):
+        return None
+
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        raise RuntimeError("No DISPLAY set and Xvfb is not installed")
+
+    process = subprocess.Popen(
+        [xvfb, XVFB_DISPLAY, "-screen", "0", "1600x1000x24", "-nolisten", "tcp"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    # Wait for the X socket to appear
+    socket_path = f"/tmp/.X11-unix/X{XVFB_DISPLAY.lstrip(':')}"
+    deadline = time.time() + 10
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.time() > deadline:
+            process.kill()
+            raise RuntimeError("Xvfb failed to start")
+        time.sleep(0.05)
+
+    os.environ["DISPLAY"] = XVFB_DISPLAY
+    return process
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def count_widgets(widget):
+    """Count a widget and all its descendants, including Toplevel windows"""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+class StallProbe:
+    """Measures how late Tk timer callbacks run, i.e. how long the event loop was blocked"""
+    def __init__(self, app, interval_ms=10):
+        self.app = app
+        self.interval_ms = interval_ms
+        self.stalls = []  # Lateness of each tick in ms
+        self._last = None
+        self._after_id = None
+
+    def start(self):
+        """Start ticking"""
+        self.stalls = []
+        self._last = time.perf_counter()
+        self._after_id = self.app.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        """Record how late this tick ran and schedule the next one"""
+        now = time.perf_counter()
+        self.stalls.append(max(0.0, (now - self._last) * 1000 - self.interval_ms))
+        self._last = now
+        self._after_id = self.app.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        """Stop ticking and return the longest stall in ms"""
+        if self._after_id:
+            self.app.after_cancel(self._after_id)
+            self._after_id = None
+        # Count the time since the last tick too, in case the final call blocked
+        self.stalls.append(max(0.0, (time.perf_counter() - self._last) * 1000 - self.interval_ms))
+        return max(self.stalls)
+
+def pump(app, seconds=0.2, until=None):
+    """Run the Tk event loop for a while, or until a condition holds"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        app.update()
+        if until and until():
+            break
+        time.sleep(0.002)
+    app.update()
+
+def measure(app, func, settle=None, settle_seconds=0.2):
+    """Measure one scenario step: build time, event-loop stall, peak RSS and widget count"""
+    probe = StallProbe(app)
+    probe.start()
+    build_ms = time_call(app, func)
+    pump(app, settle_seconds, settle)
+    return {
+        'build_ms': build_ms,
+        'stall_ms': probe.stop(),
+        'peak_rss_kb': peak_rss_kb(),
+        'widgets': count_widgets(app)
+    }
+
+def run_scenarios(size, seed=0):
+    """Boot the app against a fake client with `size` tracks and drive each view"""
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from fake_spotify import FakeSpotify
+    from modern_theme import setup_modern_theme
+    from revamped_app import RevampedMusicApp
+
+    spotify = FakeSpotify(n_tracks=size, seed=seed, playlist_size=size)
+    catalog_dir = tempfile.mkdtemp(prefix="ui_benchmark_")
+    results = {}
+
+    setup_modern_theme()
+    start = time.perf_counter()
+    app = RevampedMusicApp(spotify_client=spotify, catalog_path=os.path.join(catalog_dir, "catalog.db"))
+    app.update()
+    results['boot'] = {
+        'build_ms': (time.perf_counter() - start) * 1000,
+        'stall_ms': 0.0,
+        'peak_rss_kb': peak_rss_kb(),
+        'widgets': count_widgets(app)
+    }
+
+    try:
+        # The dashboard refreshes in the background; wait for its results to be rendered
+        results['show_dashboard'] = measure(
+            app, app.show_dashboard,
+            settle=lambda: not app.dashboard.refreshing and app.main_thread_calls.empty(),
+            settle_seconds=10
+        )
+
+        # Search returns up to `size` tracks
+        app.search_limit = size
+        app.show_search()
+        results['perform_search'] = measure(app, lambda: app.perform_search("a"))
+
+        # The playlist window lists every track of a `size`-track playlist
+        app.playlist_track_limit = size
+        windows = []
+        results['view_playlist'] = measure(app, lambda: windows.append(app.view_playlist("playlist0000")))
+        for window in windows:
+            if window is not None:
+                window.destroy()
+
+        # Chart data loads on a worker; wait until each chart has been built on the Tk thread
+        def chart_built(name):
+            return lambda: name in app.chart_widgets
+        results['show_analytics'] = measure(app, app.show_analytics, settle=chart_built("genres"), settle_seconds=10)
+        results['listening_chart'] = measure(app, app.show_listening_time, settle=chart_built("listening"), settle_seconds=10)
+        results['features_chart'] = measure(app, app.show_audio_features, settle=chart_built("features"), settle_seconds=10)
+    finally:
+        app.on_closing()
+        shutil.rmtree(catalog_dir, ignore_errors=True)
+
+    return results
+
+def benchmark_chart_interaction(n_points=20000, n_events=300, seed=0):
+    """Feed synthetic pointer events to the interactive charts (Agg canvas) and report events per second"""
+    import numpy as np
+    import pandas as pd
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.backend_bases import MouseEvent
+    from analytics import plot_listening_series
+    from interactive_charts import HistoryChart, PieHoverChart
+
+    rng = np.random.default_rng(seed)
+
+    def rate(canvas, name, positions, **kwargs):
+        start = time.perf_counter()
+        for x, y in positions:
+            canvas.callbacks.process(name, MouseEvent(name, canvas, x, y, **kwargs))
+        return len(positions) / (time.perf_counter() - start)
+
+    # History: hovering across the axes changes the nearest bucket on every event
+    fig = Figure(figsize=(8, 6))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    df = pd.DataFrame({
+        'date': pd.date_range("2000-01-01", periods=n_points, freq="D"),
+        'count': rng.poisson(20, n_points)
+    })
+    max_points = int(ax.get_window_extent().width)
+    chart = HistoryChart(canvas, ax, df, "day", max_points, plot_listening_series)
+    canvas.draw()
+    y = ax.bbox.y0 + ax.bbox.height / 2
+    sweep = [(x, y) for x in np.linspace(ax.bbox.x0 + 1, ax.bbox.x1 - 1, n_events)]
+    results = {'history_hover_fps': rate(canvas, "motion_notify_event", sweep)}
+    # Without the frame limit every zoom/pan event draws a blitted preview frame, so these are frame rates
+    chart.frame_interval = 0
+    results['history_zoom_fps'] = rate(canvas, "scroll_event", sweep[::10], button="up", step=1)
+    start = time.perf_counter()
+    chart.settle()
+    results['history_settle_ms'] = (time.perf_counter() - start) * 1000
+    chart.set_xlim(*chart.bounds)
+    canvas.draw()
+    middle = sweep[len(sweep) // 2]
+    canvas.callbacks.process("button_press_event", MouseEvent("button_press_event", canvas, *middle, button=1))
+    results['history_pan_fps'] = rate(canvas, "motion_notify_event", sweep, button=1)
+    canvas.callbacks.process("button_release_event", MouseEvent("button_release_event", canvas, *middle, button=1))
+    chart.settle()
+
+    # Genre pie
+    fig = Figure(figsize=(8, 6))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    values = list(rng.integers(1, 30, 8))
+    labels = [f"genre {i}" for i in range(8)]
+    wedges, _, _ = ax.pie(values, labels=labels, autopct='%1.1f%%')
+    PieHoverChart(canvas, ax, wedges, labels, values)
+    canvas.draw()
+    center, radius = ax.transData.transform((0, 0)), ax.bbox.height * 0.4
+    circle = [(center[0] + radius * np.cos(t), center[1] + radius * np.sin(t)) for t in np.linspace(0, 2 * np.pi, n_events)]
+    results['pie_hover_fps'] = rate(canvas, "motion_notify_event", circle)
+    return results
+
+def benchmark_reports(size=20000, seed=0):
+    """Time the library report engine cold (worker processes) and warm (dataset-version cache)"""
+    from fake_spotify import FakeSpotify
+    from analytics import MusicAnalytics
+    from report_engine import ReportEngine
+
+    start = time.perf_counter()
+    dataset = MusicAnalytics(FakeSpotify(n_tracks=size, seed=seed)).get_library_dataset()
+    results = {'dataset_s': time.perf_counter() - start}
+
+    engine = ReportEngine(cache_dir=None)
+    try:
+        start = time.perf_counter()
+        reports = engine.run_all(dataset)
+        results['cold_s'] = time.perf_counter() - start
+        start = time.perf_counter()
+        engine.run_all(dataset)
+        results['warm_s'] = time.perf_counter() - start
+    finally:
+        engine.shutdown()
+
+    results.update({f"{name}_s": seconds for name, seconds in engine.timings.items()})
+    results['result_kb'] = sum(array.nbytes for report in reports.values() for array in report.values()) / 1024
+    return results
+
+def benchmark_track_memory(size=10000, seed=0):
+    """Memory held by `size` tracks as parsed API JSON versus Track records"""
+    import tracemalloc
+    from fake_spotify import FakeSpotify
+    from track_model import tracks_from_spotify
+
+    # Round-trip through JSON so every dict and string is freshly allocated, as from the network
+    payload = json.dumps(FakeSpotify(n_tracks=size, seed=seed).tracks)
+
+    tracemalloc.start()
+    raw = json.loads(payload)
+    raw_bytes = tracemalloc.get_traced_memory()[0]
+    tracks = tracks_from_spotify(raw)
+    del raw
+    track_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        'tracks': len(tracks),
+        'raw_json_kb': raw_bytes / 1024,
+        'track_records_kb': track_bytes / 1024,
+        'reduction': 1 - track_bytes / raw_bytes
+    }
+
+def benchmark_playlist_sets(n_playlists=100, size=1000, seed=0):
+    """Time building playlist bitsets and running each set operation and report"""
+    import random
+    from playlist_sets import PlaylistSets
+
+    rng = random.Random(seed)
+    universe = n_playlists * size // 5  # Enough overlap for every report to have results
+    playlists = {f"playlist{i:04d}": [f"track{rng.randrange(universe):06d}" for _ in range(size)] for i in range(n_playlists)}
+    ids = list(playlists)
+
+    results = {}
+    start = time.perf_counter()
+    sets = PlaylistSets(playlists)
+    results['build_s'] = time.perf_counter() - start
+    operations = {
+        'union_all_s': lambda: sets.union(*ids),
+        'intersection_s': lambda: sets.intersection(ids[0], ids[1]),
+        'difference_all_s': lambda: sets.difference(ids[0], *ids[1:]),
+        'overlap_matrix_s': sets.overlap_matrix,
+        'duplicates_s': sets.duplicates
+    }
+    for name, operation in operations.items():
+        start = time.perf_counter()
+        operation()
+        results[name] = time.perf_counter() - start
+    return results
+
+def benchmark_smart_playlists(size=100000, seed=0):
+    """Time evaluating smart playlist rules over a synthetic saved library in a scratch catalog"""
+    import random
+    import tempfile
+    from catalog import MusicCatalog, FEATURE_COLUMNS
+    from smart_playlists import SmartPlaylists
+
+    rng = random.Random(seed)
+    genres = ["pop", "rock", "indie rock", "shoegaze", "jazz", "house", "techno", "ambient", "hip hop", "folk"]
+    n_artists = max(size // 20, 1)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = MusicCatalog(os.path.join(directory, "catalog.db"))
+        start = time.perf_counter()
+        catalog.add_saved_tracks([
+            {
+                'added_at': f"20{rng.randint(15, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00Z",
+                'track': {
+                    'id': f"track{i:07d}",
+                    'name': f"Track {i}",
+                    'artists': [{'id': f"artist{i % n_artists:05d}", 'name': f"Artist {i % n_artists}"}]
+                }
+            }
+            for i in range(size)
+        ])
+        catalog.save_audio_features([
+            dict({column: rng.random() for column in FEATURE_COLUMNS}, id=f"track{i:07d}", tempo=rng.uniform(60, 180))
+            for i in range(size)
+        ])
+        catalog.upsert_artists([
+            {'id': f"artist{i:05d}", 'name': f"Artist {i}", 'genres': rng.sample(genres, 2)} for i in range(n_artists)
+        ])
+        catalog.executemany(
+            "INSERT INTO play_history (played_at, track_id) VALUES (?, ?)",
+            [(f"2024-01-01T00:00:00.{i:07d}Z", f"track{rng.randrange(size):07d}") for i in range(size)]
+        )
+        catalog.update_play_counts()
+        results['load_s'] = time.perf_counter() - start
+
+        smart = SmartPlaylists(catalog)
+        definitions = {
+            'features': {'rules': [
+                {'field': 'energy', 'op': 'between', 'value': [0.6, 0.8]},
+                {'field': 'valence', 'op': '>=', 'value': 0.7}
+            ]},
+            'genre_recent': {'rules': [
+                {'field': 'genre', 'op': 'in', 'value': ["shoegaze", "indie rock"]},
+                {'field': 'added_at', 'op': 'after', 'value': "2023-01-01"}
+            ], 'limit': 500},
+            'plays': {'rules': [
+                {'field': 'plays', 'op': '>=', 'value': 2},
+                {'field': 'artist', 'op': 'not_in', 'value': ["Artist 1"]}
+            ], 'order': 'plays'},
+            'any': {'match': 'any', 'rules': [
+                {'field': 'tempo', 'op': '>', 'value': 170},
+                {'field': 'genre', 'op': 'contains', 'value': "jazz"}
+            ]}
+        }
+        for name, definition in definitions.items():
+            start = time.perf_counter()
+            matches = smart.evaluate(definition)
+            results[f"{name}_s"] = time.perf_counter() - start
+            results[f"{name}_matches"] = len(matches)
+
+        # Materialize, change a slice of the catalog, then refresh with only the diff
+        smart_id = catalog.save_smart_playlist("Benchmark", definitions['features'])
+        start = time.perf_counter()
+        smart.refresh(smart_id)
+        results['materialize_s'] = time.perf_counter() - start
+        catalog.save_audio_features([{'id': f"track{i:07d}", 'energy': 0.7, 'valence': 0.9} for i in range(0, size, 100)])
+        start = time.perf_counter()
+        results['refresh_message'] = smart.refresh(smart_id)[1]
+        results['refresh_s'] = time.perf_counter() - start
+        catalog.close()
+    return results
+
+def benchmark_ordering(size=1000, seed=0):
+    """Time and score each playlist ordering on a synthetic track set"""
+    import numpy as np
+    from fake_spotify import FakeSpotify
+    from playlist_ordering import feature_arrays, transition_matrix, greedy_path, two_opt, path_cost, order_tracks, ORDERINGS
+
+    spotify = FakeSpotify(n_tracks=size, seed=seed)
+    track_ids = [track['id'] for track in spotify.tracks]
+    features = {item['id']: item for item in spotify.audio_features(track_ids)}
+
+    results = {}
+    start = time.perf_counter()
+    distance = transition_matrix(feature_arrays([features[track_id] for track_id in track_ids]))
+    results['distance_matrix_s'] = time.perf_counter() - start
+    start = time.perf_counter()
+    path = greedy_path(distance)
+    results['greedy_s'] = time.perf_counter() - start
+    start = time.perf_counter()
+    improved = two_opt(path, distance)
+    results['two_opt_s'] = time.perf_counter() - start
+    results['original_cost'] = path_cost(np.arange(size), distance)
+    results['greedy_cost'] = path_cost(path, distance)
+    results['two_opt_cost'] = path_cost(improved, distance)
+
+    for ordering in ORDERINGS:
+        start = time.perf_counter()
+        order_tracks(track_ids, features, ordering)
+        results[f"{ordering}_total_s"] = time.perf_counter() - start
+    return results
+
+def benchmark_artist_view(visible=60, latency=0.05, seed=0):
+    """Spotify calls and time to open an artist page cold versus after prefetching the visible artists"""
+    from fake_spotify import FakeSpotify
+    from catalog import MusicCatalog
+    from artist_info import ArtistInfo, PREFETCH_DETAILS
+
+    spotify = FakeSpotify(n_tracks=visible * 20, seed=seed, latency=latency)
+    catalog_dir = tempfile.mkdtemp(prefix="artist_benchmark_")
+    catalog = MusicCatalog(os.path.join(catalog_dir, "catalog.db"))
+    try:
+        artist_info = ArtistInfo(spotify, catalog)
+        artist_ids = list(spotify.artists_by_id)[:visible]
+        results = {}
+
+        start = time.perf_counter()
+        artist_info.get_detail(artist_ids[-1])
+        results['open_cold_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        artist_info.prefetch(artist_ids)
+        results['prefetch_s'] = time.perf_counter() - start
+        results['artists_calls'] = spotify.calls.get("artists", 0)
+        results['detail_calls'] = spotify.calls.get("artist_top_tracks", 0) + spotify.calls.get("artist_albums", 0)
+
+        calls_before = sum(spotify.calls.values())
+        opens = []
+        for artist_id in artist_ids[:PREFETCH_DETAILS]:
+            start = time.perf_counter()
+            artist_info.get_detail(artist_id)
+            opens.append(time.perf_counter() - start)
+        results['open_prefetched_s'] = statistics.mean(opens)
+        results['calls_while_opening'] = sum(spotify.calls.values()) - calls_before
+        return results
+    finally:
+        catalog.close()
+        shutil.rmtree(catalog_dir, ignore_errors=True)
+
+def benchmark_local_api(size=10000, requests=5000, concurrency=50, seed=0):
+    """Requests per second the local API sustains for cached, revalidated and uncached responses"""
+    import random
+    import socket
+    import asyncio
+    import tempfile
+    import aiohttp
+    from catalog import MusicCatalog, FEATURE_COLUMNS
+
+    rng = random.Random(seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = MusicCatalog(os.path.join(directory, "catalog.db"))
+        catalog.add_saved_tracks([
+            {
+                'added_at': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00Z",
+                'track': {'id': f"track{i:07d}", 'name': f"Track {i}", 'artists': [{'id': f"artist{i % 500}", 'name': f"Artist {i % 500}"}]}
+            }
+            for i in range(size)
+        ])
+        catalog.save_audio_features([dict({column: rng.random() for column in FEATURE_COLUMNS}, id=f"track{i:07d}") for i in range(size)])
+        catalog.executemany(
+            "INSERT INTO play_history (played_at, track_id) VALUES (?, ?)",
+            [(f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00.{i:07d}Z", f"track{rng.randrange(size):07d}") for i in range(size)]
+        )
+
+        catalog.close()
+
+        # The server runs in its own process, as it would for other tools, so the client doesn't compete for its GIL
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py"),
+             "--catalog", os.path.join(directory, "catalog.db"), "serve", "--port", str(port)],
+            stdout=subprocess.DEVNULL
+        )
+        base = f"http://127.0.0.1:{port}"
+        deadline = time.time() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.time() > deadline:
+                    server.terminate()
+                    raise
+                time.sleep(0.1)
+        paths = [
+            "/api/library?limit=50", "/api/stats/summary", "/api/stats/plays?level=week",
+            "/api/stats/top-tracks?limit=20", "/api/search?q=track+12", f"/api/tracks/track{size // 2:07d}"
+        ]
+
+        async def hammer(urls, etags=None):
+            """Fetch every url with bounded concurrency; returns (seconds, status counts)"""
+            statuses = {}
+            semaphore = asyncio.Semaphore(concurrency)
+            async with aiohttp.ClientSession() as session:
+                async def fetch(url):
+                    headers = {'If-None-Match': etags[url]} if etags and url in etags else {}
+                    async with semaphore:
+                        async with session.get(url, headers=headers) as response:
+                            await response.read()
+                            statuses[response.status] = statuses.get(response.status, 0) + 1
+                            return url, response.headers.get('ETag')
+                start = time.perf_counter()
+                fetched = await asyncio.gather(*[fetch(url) for url in urls])
+                return time.perf_counter() - start, statuses, dict(fetched)
+
+        # Uncached: every library page is a different query
+        pages = [f"{base}/api/library?offset={offset}&limit=20" for offset in range(0, min(size, 20 * 500), 20)]
+        seconds, statuses, _ = asyncio.run(hammer(pages))
+        results['uncached_rps'] = len(pages) / seconds
+
+        urls = [base + paths[i % len(paths)] for i in range(requests)]
+        seconds, statuses, etags = asyncio.run(hammer(urls))
+        results['cached_rps'] = requests / seconds
+        seconds, statuses, _ = asyncio.run(hammer(urls, etags))
+        results['revalidated_rps'] = requests / seconds
+        results['not_modified_share'] = statuses.get(304, 0) / requests
+
+        server.terminate()
+        server.wait()
+    return results
+
+def benchmark_soak(rounds=300, size=200, seed=0):
+    """Drive hundreds of navigations, playlist windows and chart switches, sampling RSS and traced memory
+
+    The first half of the run warms caches up; memory should stay flat over
+    the second half, when every cache is full and windows are being replaced.
+    """
+    import gc
+    import tracemalloc
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from fake_spotify import FakeSpotify
+    from modern_theme import setup_modern_theme
+    from http_pool import http_pool
+    from revamped_app import RevampedMusicApp
+    from memory_budget import memory_budget, release_window, rss_bytes
+
+    xvfb = ensure_display()
+    catalog_dir = tempfile.mkdtemp(prefix="ui_soak_")
+    tracemalloc.start(10)
+    setup_modern_theme()
+    app = RevampedMusicApp(spotify_client=FakeSpotify(n_tracks=size, seed=seed, playlist_size=size),
+                           catalog_path=os.path.join(catalog_dir, "catalog.db"))
+    charts = [app.show_genre_chart, app.show_listening_time, app.show_audio_features]
+    samples = []  # (round, RSS bytes, traced bytes)
+    try:
+        pump(app, 10, lambda: not app.dashboard.refreshing and app.main_thread_calls.empty())
+        snapshot = None
+        for i in range(rounds):
+            for name in NAVIGATION_VIEWS:
+                app.show_view(name)
+            charts[i % len(charts)]()
+            window = app.view_playlist(f"playlist{i % 20:04d}")
+            app.update()
+            if window is not None and i % 2:
+                release_window(window)  # Odd rounds close the window, even ones leave it to be replaced
+            pump(app, 0.01)
+
+            if i % max(rounds // SOAK_SAMPLES, 1) == 0 or i == rounds - 1:
+                memory_budget.enforce()
+                app.music_player.prune_temp_files()
+                app.catalog.prune_api_cache()
+                http_pool.prune_media_cache()
+                gc.collect()
+                samples.append((i, rss_bytes(), tracemalloc.get_traced_memory()[0]))
+                if snapshot is None and i >= rounds // 2:
+                    snapshot = tracemalloc.take_snapshot()
+
+        growth = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")[:5] if snapshot else []
+    finally:
+        app.on_closing()
+        tracemalloc.stop()
+        shutil.rmtree(catalog_dir, ignore_errors=True)
+        if xvfb:
+            xvfb.terminate()
+
+    second_half = [sample for sample in samples if sample[0] >= rounds // 2]
+    return {
+        'rounds': rounds,
+        'samples': samples,
+        'rss_growth': second_half[-1][1] - second_half[0][1],
+        'traced_growth': second_half[-1][2] - second_half[0][2],
+        'live': memory_budget.live(),
+        'top_growth': [str(stat) for stat in growth]
+    }
+
+def run_suite(sizes=DEFAULT_SIZES, seed=0):
+    """Run every size in its own process so peak RSS is per size, and build a report"""
+    xvfb = ensure_display()
+    report = {
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'sizes': list(sizes),
+        'results': {}
+    }
+
+    try:
+        for size in sizes:
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "size", str(size), "--seed", str(seed)],
+                capture_output=True,
+                text=True
+            )
+            if completed.returncode != 0:
+                print(f"Error running benchmark for {size} tracks:\n{completed.stderr}")
+                continue
+            # The scenario JSON is the last line; the app may print before it
+            scenarios = json.loads(completed.stdout.strip().splitlines()[-1])
+            for name, metrics in scenarios.items():
+                report['results'][f"{name}@{size}"] = dict(metrics, scenario=name, size=size)
+    finally:
+        if xvfb:
+            xvfb.terminate()
+
+    return report
+
+def compare_reports(baseline, current, tolerance=REGRESSION_TOLERANCE):
+    """Find metrics that got worse between two reports"""
+    regressions = []
+    for key, new in current['results'].items():
+        old = baseline['results'].get(key)
+        if not old:
+            continue
+        for metric, min_delta in MIN_REGRESSION_DELTA.items():
+            if metric not in old or metric not in new:
+                continue
+            delta = new[metric] - old[metric]
+            if delta > min_delta and new[metric] > old[metric] * (1 + tolerance):
+                regressions.append({
+                    'key': key,
+                    'metric': metric,
+                    'baseline': old[metric],
+                    'current': new[metric],
+                    'change': delta / old[metric] if old[metric] else float("inf")
+                })
+    return regressions
+
+def print_suite_report(report):
+    """Print a suite report as a table"""
+    print(f"{'scenario':<20}{'size':>7}{'build':>11}{'stall':>11}{'peak rss':>12}{'widgets':>9}")
+    for metrics in report['results'].values():
+        print(f"{metrics['scenario']:<20}{metrics['size']:>7}{metrics['build_ms']:>9.1f}ms"
+              f"{metrics['stall_ms']:>9.1f}ms{metrics['peak_rss_kb'] / 1024:>9.1f} MB{metrics['widgets']:>9}")
+
+def print_regressions(regressions):
+    """Print regressions found by compare_reports"""
+    if not regressions:
+        print("No regressions")
+        return
+    for r in regressions:
+        print(f"REGRESSION {r['key']} {r['metric']}: {r['baseline']:.1f} -> {r['current']:.1f} ({r['change']:+.0%})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI performance benchmarks")
+    commands = parser.add_subparsers(dest="command")
+
+    run_parser = commands.add_parser("run", help="Run the scenario suite and write a JSON report")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--out", default="ui_benchmark_report.json")
+    run_parser.add_argument("--baseline", help="Report to compare the new run against")
+
+    size_parser = commands.add_parser("size", help="Run the scenarios for one dataset size (used by run)")
+    size_parser.add_argument("size", type=int)
+    size_parser.add_argument("--seed", type=int, default=0)
+
+    compare_parser = commands.add_parser("compare", help="Compare two JSON reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+
+    charts_parser = commands.add_parser("charts", help="Measure hover/zoom event rates on the interactive charts")
+    charts_parser.add_argument("--points", type=int, default=20000)
+    charts_parser.add_argument("--events", type=int, default=300)
+
+    reports_parser = commands.add_parser("reports", help="Time the library report engine")
+    reports_parser.add_argument("--size", type=int, default=20000)
+
+    memory_parser = commands.add_parser("memory", help="Compare memory of raw track JSON and Track records")
+    memory_parser.add_argument("--size", type=int, default=10000)
+
+    sets_parser = commands.add_parser("sets", help="Time playlist set operations")
+    sets_parser.add_argument("--playlists", type=int, default=100)
+    sets_parser.add_argument("--size", type=int, default=1000)
+
+    smart_parser = commands.add_parser("smart", help="Time smart playlist rule evaluation")
+    smart_parser.add_argument("--size", type=int, default=100000)
+
+    ordering_parser = commands.add_parser("ordering", help="Time playlist ordering heuristics")
+    ordering_parser.add_argument("--size", type=int, default=1000)
+
+    api_parser = commands.add_parser("api", help="Measure local API throughput")
+    api_parser.add_argument("--size", type=int, default=10000)
+    api_parser.add_argument("--requests", type=int, default=5000)
+    api_parser.add_argument("--concurrency", type=int, default=50)
+
+    artists_parser = commands.add_parser("artists", help="Time opening artist pages cold and after prefetching")
+    artists_parser.add_argument("--visible", type=int, default=60)
+    artists_parser.add_argument("--latency", type=float, default=0.05)
+
+    soak_parser = commands.add_parser("soak", help="Check memory stays flat over a long session")
+    soak_parser.add_argument("--rounds", type=int, default=300)
+    soak_parser.add_argument("--size", type=int, default=200)
+
+    navigation_parser = commands.add_parser("navigation", help="Time switching between cached views")
+    navigation_parser.add_argument("--rounds", type=int, default=20)
+    navigation_parser.add_argument("--size", type=int, default=100)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_suite(args.sizes, args.seed)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print_suite_report(report)
+        if args.baseline:
+            with open(args.baseline) as f:
+                regressions = compare_reports(json.load(f), report)
+            print_regressions(regressions)
+            sys.exit(1 if regressions else 0)
+
+    elif args.command == "size":
+        print(json.dumps(run_scenarios(args.size, args.seed)))
+
+    elif args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare_reports(baseline, current, args.tolerance)
+        print_regressions(regressions)
+        sys.exit(1 if regressions else 0)
+
+    elif args.command == "charts":
+        for name, value in benchmark_chart_interaction(args.points, args.events).items():
+            print(f"{name:<20}{value:>8.1f} ms" if name.endswith("_ms") else f"{name:<20}{value:>8.0f} events/s")
+
+    elif args.command == "memory":
+        for name, value in benchmark_track_memory(args.size).items():
+            print(f"{name:<20}{value:>12.2f}")
+
+    elif args.command == "sets":
+        for name, seconds in benchmark_playlist_sets(args.playlists, args.size).items():
+            print(f"{name:<20}{seconds * 1000:>10.1f} ms")
+
+    elif args.command == "smart":
+        for name, value in benchmark_smart_playlists(args.size).items():
+            if name.endswith("_s"):
+                print(f"{name:<24}{value * 1000:>10.1f} ms")
+            else:
+                print(f"{name:<24}{value:>10}")
+
+    elif args.command == "ordering":
+        for name, value in benchmark_ordering(args.size).items():
+            if name.endswith("_s"):
+                print(f"{name:<24}{value * 1000:>10.1f} ms")
+            else:
+                print(f"{name:<24}{value:>10.1f}")
+
+    elif args.command == "api":
+        for name, value in benchmark_local_api(args.size, args.requests, args.concurrency).items():
+            print(f"{name:<24}{value:>10.2f}")
+
+    elif args.command == "artists":
+        for name, value in benchmark_artist_view(args.visible, args.latency).items():
+            if name.endswith("_s"):
+                print(f"{name:<24}{value * 1000:>10.1f} ms")
+            else:
+                print(f"{name:<24}{value:>10}")
+
+    elif args.command == "soak":
+        result = benchmark_soak(args.rounds, args.size)
+        print(f"{'round':>8}{'rss MB':>12}{'traced MB':>12}")
+        for i, rss, traced in result['samples']:
+            print(f"{i:>8}{rss / 2 ** 20:>12.1f}{traced / 2 ** 20:>12.1f}")
+        print(f"Second half: RSS {result['rss_growth'] / 2 ** 20:+.1f} MB, traced {result['traced_growth'] / 2 ** 20:+.1f} MB")
+        print(f"Live objects: {result['live']}")
+        for line in result['top_growth']:
+            print(f"  {line}")
+        flat = result['rss_growth'] <= SOAK_RSS_TOLERANCE
+        print("RSS stayed flat" if flat else "RSS kept growing")
+        sys.exit(0 if flat else 1)
+
+    elif args.command == "reports":
+        for name, value in benchmark_reports(args.size).items():
+            print(f"{name:<30}{value:>10.3f}")
+
+    else:
+        from fake_spotify import FakeSpotify
+        from modern_theme import setup_modern_theme
+        from revamped_app import RevampedMusicApp
+
+        xvfb = ensure_display()
+        setup_modern_theme()
+        size = getattr(args, "size", 100)
+        app = RevampedMusicApp(spotify_client=FakeSpotify(n_tracks=size))
+        app.update()
+        print_navigation_report(benchmark_navigation(app, getattr(args, "rounds", 20)))
+        app.on_closing()
+        if xvfb:
+            xvfb.terminate()
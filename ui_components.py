@@ -3,7 +3,9 @@ Reusable UI components for the Music Playlist Interface
 """
 import customtkinter as ctk
 from PIL import Image, ImageTk
+import numpy as np
 import os
+from modern_theme import get_font
 
 class GradientFrame(ctk.CTkFrame):
     """A frame with a gradient background"""
@@ -63,12 +65,12 @@ class MusicCard(ctk.CTkFrame):
         
         # Title
         self.title_label = ctk.CTkLabel(self, text=title, 
-                                       font=ctk.CTkFont(size=14, weight="bold"))
+                                       font=get_font(size=14, weight="bold"))
         self.title_label.grid(row=0, column=1, padx=5, pady=(10, 0), sticky="w")
         
         # Subtitle
         self.subtitle_label = ctk.CTkLabel(self, text=subtitle, 
-                                          font=ctk.CTkFont(size=12))
+                                          font=get_font(size=12))
         self.subtitle_label.grid(row=1, column=1, padx=5, pady=(0, 10), sticky="w")
 
 class AnimatedButton(ctk.CTkButton):
@@ -120,4 +122,33 @@ class ScrollableCardFrame(ctk.CTkScrollableFrame):
         if command:
             card.bind("<Button-1>", lambda e: command())
             
-        return card
\ No newline at end of file
+        return card
+
+class WaveformCanvas(ctk.CTkCanvas):
+    """Canvas that draws a precomputed waveform peak envelope"""
+    def __init__(self, master, width=200, height=40, color="#00C9FF", **kwargs):
+        super().__init__(master, width=width, height=height, highlightthickness=0, bg="#1E1E1E", **kwargs)
+        self.width = width
+        self.height = height
+        self.color = color
+        
+    def draw(self, peaks):
+        """Draw a peak envelope (values 0..1) as one mirrored polygon"""
+        self.delete("all")
+        if peaks is None or not len(peaks):
+            return
+        
+        # Resample the stored envelope to one value per pixel column
+        peaks = np.asarray(peaks, dtype=np.float32)
+        columns = np.linspace(0, len(peaks) - 1, self.width).astype(int)
+        values = np.clip(peaks[columns], 0, 1)
+        
+        middle = self.height / 2
+        xs = np.arange(self.width)
+        top = np.column_stack((xs, middle - values * middle))
+        bottom = np.column_stack((xs[::-1], middle + values[::-1] * middle))
+        self.create_polygon(*np.concatenate((top, bottom)).ravel().tolist(), fill=self.color, outline="")
+        
+    def clear(self):
+        """Remove the waveform"""
+        self.delete("all")
@@ -0,0 +1,59 @@
+"""
+Build-once view caching for the main content area
+"""
+import time
+import customtkinter as ctk
+
+class ViewManager:
+    """Keeps one frame per top-level view and swaps them with pack/pack_forget"""
+    def __init__(self, container):
+        self.container = container
+        self.builders = {}  # name -> build(frame)
+        self.show_hooks = {}  # name -> on_show(), run every time the view is shown
+        self.frames = {}  # name -> built frame
+        self.current = None
+        self.build_times = {}  # name -> seconds spent building the view
+
+    def register(self, name, build, on_show=None):
+        """Register a view builder and an optional hook run on every show"""
+        self.builders[name] = build
+        if on_show:
+            self.show_hooks[name] = on_show
+
+    def show(self, name):
+        """Show a view, building it the first time it is needed"""
+        frame = self.frames.get(name)
+        if frame is None or not frame.winfo_exists():
+            start = time.perf_counter()
+            frame = ctk.CTkFrame(self.container, fg_color="transparent")
+            self.builders[name](frame)
+            self.frames[name] = frame
+            self.build_times[name] = time.perf_counter() - start
+
+        if self.current != name:
+            if self.current in self.frames and self.frames[self.current].winfo_exists():
+                self.frames[self.current].pack_forget()
+            frame.pack(fill="both", expand=True)
+            self.current = name
+
+        if name in self.show_hooks:
+            self.show_hooks[name]()
+        return frame
+
+    def is_built(self, name):
+        """Check whether a view has been built"""
+        frame = self.frames.get(name)
+        return frame is not None and frame.winfo_exists()
+
+    def invalidate(self, name):
+        """Destroy a cached view so the next show rebuilds it"""
+        frame = self.frames.pop(name, None)
+        if frame is not None and frame.winfo_exists():
+            frame.destroy()
+        if self.current == name:
+            self.current = None
+
+    def invalidate_all(self):
+        """Destroy every cached view, e.g. after logging in"""
+        for name in list(self.frames):
+            self.invalidate(name)